@@ -0,0 +1,146 @@
+"""
+Answer cache in front of RAGPipeline.answer().
+
+Entries are keyed on text_norm.norm_question() (acronyms expanded, case and
+spacing folded) and tagged with the guidance corpus version. A lookup is a hit
+when the normalized question matches exactly, or when its embedding is at
+least ANSWER_CACHE_MIN_SIM cosine-similar to a cached question's that mentions
+the same numbers and identifiers (so "regulation 28" never answers
+"regulation 29"). Entries expire after ANSWER_CACHE_TTL_SECONDS.
+
+The corpus version is a stamp file beside the Chroma store, bumped whenever
+documents or SME resolutions are added or deleted; every uvicorn worker reads
+it on lookup, so one worker's upload invalidates all workers' caches.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from lexical_index import tokenize
+from settings import ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MIN_SIM, ANSWER_CACHE_MAX_ENTRIES
+from text_norm import norm_question
+
+
+def _id_tokens(key: str) -> frozenset:
+    """Numeric and identifier tokens of a normalized question ("28", "2017/692", "fg17/6", "5.2.1")."""
+    return frozenset(t for t in tokenize(key) if any(c.isdigit() for c in t))
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        version_path: Path,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+        min_sim: float = ANSWER_CACHE_MIN_SIM,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+    ):
+        self.version_path = Path(version_path)
+        self.embed_fn = embed_fn
+        self.ttl = ttl_seconds
+        self.min_sim = min_sim
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()   # norm key -> {result, vec, ids, at}
+        self._version: Optional[str] = None
+        self._version_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits_exact": 0, "hits_semantic": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+    # ---------------- corpus version ----------------
+    def corpus_version(self) -> str:
+        try:
+            mtime = self.version_path.stat().st_mtime
+        except FileNotFoundError:
+            return ""
+        if mtime != self._version_mtime:
+            self._version = self.version_path.read_text(encoding="utf-8").strip()
+            self._version_mtime = mtime
+        return self._version or ""
+
+    def bump_version(self) -> str:
+        """Call after any change to the guidance corpus or SME resolutions."""
+        version = uuid.uuid4().hex
+        self.version_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.version_path.with_suffix(".tmp")
+        tmp.write_text(version, encoding="utf-8")
+        tmp.replace(self.version_path)
+        with self._lock:
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+        return version
+
+    def _sync_version(self) -> str:
+        """Drop everything cached under an older corpus version (e.g. bumped by another worker)."""
+        version = self.corpus_version()
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e["version"] != version]
+            for k in stale:
+                del self._entries[k]
+            if stale:
+                self.stats["invalidations"] += 1
+        return version
+
+    # ---------------- lookup / store ----------------
+    def _embed(self, key: str) -> Optional[np.ndarray]:
+        if not self.embed_fn or self.min_sim >= 1.0:
+            return None
+        return np.asarray(self.embed_fn(key), dtype=np.float32)
+
+    def get(self, question: str) -> Optional[Dict]:
+        key = norm_question(question)
+        version = self._sync_version()
+        now = time.time()
+        with self._lock:
+            for k in [k for k, e in self._entries.items() if now - e["at"] > self.ttl]:
+                del self._entries[k]
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits_exact"] += 1
+                return dict(entry["result"])
+            ids = _id_tokens(key)
+            candidates = [(k, e) for k, e in self._entries.items() if e["vec"] is not None and e["ids"] == ids]
+
+        vec = self._embed(key) if candidates else None
+        if vec is not None:
+            mat = np.stack([e["vec"] for _, e in candidates])
+            sims = mat @ vec        # embeddings are unit-normalized: dot product == cosine
+            best = int(np.argmax(sims))
+            if float(sims[best]) >= self.min_sim and candidates[best][1]["version"] == version:
+                with self._lock:
+                    self.stats["hits_semantic"] += 1
+                return dict(candidates[best][1]["result"])
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, question: str, result: Dict) -> None:
+        if result.get("error"):
+            return
+        key = norm_question(question)
+        version = self.corpus_version()
+        vec = self._embed(key)
+        with self._lock:
+            self._entries[key] = {"result": dict(result), "vec": vec, "ids": _id_tokens(key), "at": time.time(),
+                                  "version": version}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stats["stores"] += 1
+
+    def info(self) -> Dict:
+        with self._lock:
+            out = dict(self.stats)
+            out["size"] = len(self._entries)
+        lookups = out["hits_exact"] + out["hits_semantic"] + out["misses"]
+        out["hit_rate"] = round((out["hits_exact"] + out["hits_semantic"]) / lookups, 3) if lookups else 0.0
+        out["corpus_version"] = self.corpus_version()
+        out["ttl_seconds"] = self.ttl
+        out["min_sim"] = self.min_sim
+        return out
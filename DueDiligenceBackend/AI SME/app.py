@@ -8,7 +8,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import (
-    JSONResponse, PlainTextResponse, RedirectResponse, HTMLResponse
+    JSONResponse, PlainTextResponse, RedirectResponse, HTMLResponse, StreamingResponse
 )
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.status import HTTP_302_FOUND, HTTP_303_SEE_OTHER
@@ -27,6 +27,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from rag import RAGPipeline
+from referral_store import ReferralStore
+from feedback_store import FeedbackStore
+from text_norm import norm_question
 from settings import DATA_DIR, LLM_BACKEND 
 
 # -----------------------------------------------------------------------------
@@ -64,8 +67,10 @@ pipeline = RAGPipeline()
 # -----------------------------------------------------------------------------
 # Storage files
 # -----------------------------------------------------------------------------
-REFERRALS_PATH: Path = DATA_DIR / "referrals.jsonl"
-FEEDBACK_PATH: Path = DATA_DIR / "feedback.jsonl"
+REFERRALS_PATH: Path = DATA_DIR / "referrals.jsonl"      # legacy; imported into REFERRALS_DB_PATH
+REFERRALS_DB_PATH: Path = DATA_DIR / "referrals.db"
+FEEDBACK_PATH: Path = DATA_DIR / "feedback.jsonl"        # legacy; split into FEEDBACK_DIR partitions
+FEEDBACK_DIR: Path = DATA_DIR / "feedback"
 CONFIG_PATH: Path = DATA_DIR / "config.json"
 for p in [REFERRALS_PATH.parent, FEEDBACK_PATH.parent, CONFIG_PATH.parent]:
     p.mkdir(parents=True, exist_ok=True)
@@ -175,48 +180,18 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
 
 # -----------------------------------------------------------------------------
-# Acronym normalizer for referral dedupe
+# Acronym normalizer for referral dedupe (shared with the answer cache)
 # -----------------------------------------------------------------------------
-ACRONYM_MAP = {
-    r"\bsow\b": "source of wealth",
-    r"\bsof\b": "source of funds",
-    r"\bcdd\b": "customer due diligence",
-    r"\bedd\b": "enhanced due diligence",
-    r"\bpep\b": "politically exposed person",
-    r"\bkyc\b": "know your customer",
-    r"\bkyb\b": "know your business",
-    r"\baml\b": "anti money laundering",
-    r"\bmlro\b": "money laundering reporting officer",
-}
+_norm_question = norm_question
+
+# Referrals live in SQLite keyed by the normalized question; a leftover
+# referrals.jsonl is imported once on startup (and renamed *.migrated).
+referrals = ReferralStore(REFERRALS_DB_PATH)
+referrals.migrate_jsonl(REFERRALS_PATH, _norm_question)
 
-def _norm_question(q: str) -> str:
-    s = (q or "").strip().casefold()
-    for pat, full in ACRONYM_MAP.items():
-        s = re.sub(pat, full, s)
-    s = re.sub(r"\s+", " ", s)
-    s = re.sub(r"[^a-z0-9\s,.;:!?'/()-]", "", s)
-    return s.strip()
-
-def _read_jsonl(path: Path) -> List[Dict]:
-    items: List[Dict] = []
-    if path.exists():
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    items.append(json.loads(line))
-                except Exception:
-                    pass
-    return items
-
-def _write_jsonl(path: Path, items: List[Dict]) -> None:
-    tmp = path.with_suffix(".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        for it in items:
-            f.write(json.dumps(it, ensure_ascii=False) + "\n")
-    tmp.replace(path)
+# Feedback is appended to one file per UTC day with per-day yes/no counters.
+feedback_log = FeedbackStore(FEEDBACK_DIR)
+feedback_log.migrate_jsonl(FEEDBACK_PATH)
 
 # -----------------------------------------------------------------------------
 # Login / Logout
@@ -277,9 +252,12 @@ def health(request: Request):
     cfg = load_config()
     return {
         "status": "ok",
-        "llm_backend": LLM_BACKEND,
+        "llm_backend": pipeline.llm.backend,
         "bot_name": cfg.get("bot_name", DEFAULT_CONFIG["bot_name"]),
         "auto_yes_ms": int(cfg.get("auto_yes_ms", DEFAULT_CONFIG["auto_yes_ms"])),
+        "embeddings": pipeline.store.embedder.cache_info(),
+        "answer_cache": pipeline.answer_cache.info(),
+        "context": pipeline.context.info(),
         # Optional: who am I
         "user": {
             "id": request.session.get("user_id"),
@@ -343,12 +321,21 @@ async def upload_doc(
     dst.write_bytes(content)
     return pipeline.ingest_path(dst, title=title)
 
+# Plain def: FastAPI runs it in the threadpool, so concurrent queries can share
+# an embedding micro-batch instead of queueing on the event loop.
 @app.post("/query")
-async def query_bot(
+def query_bot(
     request: Request,
     q: str = Form(...),
+    stream: bool = Form(False),
     user: sqlite3.Row = Depends(require_login),
 ):
+    if stream or "text/event-stream" in (request.headers.get("accept") or ""):
+        return StreamingResponse(
+            _sse_answer(q),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
     try:
         result = pipeline.answer(q)
         return result
@@ -367,6 +354,18 @@ async def query_bot(
             }
         )
 
+def _sse_answer(q: str):
+    """Server-sent events for a streamed answer: meta, delta..., then done (or error)."""
+    try:
+        for event, payload in pipeline.answer_stream(q):
+            yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    except Exception as e:
+        import traceback
+        print(f"[API ERROR] Streaming query failed: {str(e)}")
+        print(traceback.format_exc())
+        payload = {"answer": f"Error processing query: {str(e)}", "hits": 0, "sources": [], "context_used": [], "error": True}
+        yield f"event: error\ndata: {json.dumps(payload)}\n\n"
+
 @app.post("/delete")
 async def delete_doc(
     request: Request,
@@ -387,7 +386,7 @@ def admin_list_docs(user: sqlite3.Row = Depends(require_role("admin"))):
 def admin_export_docs(fmt: str = "json", user: sqlite3.Row = Depends(require_role("admin"))):
     data = pipeline.list_docs()
     if fmt.lower() == "csv":
-        headers = ["doc_id", "title", "source", "sha256", "uploaded_at", "chunks"]
+        headers = ["doc_id", "title", "source", "sha256", "uploaded_at", "chunks", "bytes"]
         lines = [",".join(headers)]
 
         def esc(v: str) -> str:
@@ -416,70 +415,22 @@ async def raise_referral(
     user: sqlite3.Row = Depends(require_login),
 ):
     now_iso = datetime.now(timezone.utc).isoformat()
-    norm = _norm_question(question)
-    items = _read_jsonl(REFERRALS_PATH)
-
-    match = None
-    for r in items:
-        if _norm_question(r.get("question", "")) == norm:
-            match = r
-            break
-
-    if match:
-        match["count"] = int(match.get("count") or 1) + 1
-        match["last_ts"] = now_iso
-        # backfill task_id if provided and missing
-        if task_id and not match.get("task_id"):
-            match["task_id"] = task_id
-        inst = match.get("instances") or []
-        inst.append({
-            "ts": now_iso,
-            "reason": reason,
-            "answer": answer,
-            "by": (user["email"] or ""),
-        })
-        match["instances"] = inst
-        _write_jsonl(REFERRALS_PATH, items)
-        return {"status": "ok", "message": "Referral updated (duplicate grouped)", "id": match.get("id")}
-    else:
-        item = {
-            "id": str(uuid.uuid4()),
-            "ts": now_iso,
-            "last_ts": now_iso,
-            "reason": reason,
-            "question": question,
-            "answer": answer,
-            "status": "open",
-            "closed_ts": None,
-            "count": 1,
-            "opened_by": (user["email"] or ""),
-            "task_id": task_id or "",
-            "instances": [
-                {"ts": now_iso, "reason": reason, "answer": answer, "by": (user["email"] or "")}
-            ],
-        }
-        with REFERRALS_PATH.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(item, ensure_ascii=False) + "\n")
-        return {"status": "ok", "message": "Referral logged", "id": item["id"]}
+    res = referrals.raise_referral(
+        _norm_question(question), question, answer, reason,
+        by=(user["email"] or ""), task_id=task_id, ts=now_iso,
+    )
+    if res["grouped"]:
+        return {"status": "ok", "message": "Referral updated (duplicate grouped)", "id": res["id"]}
+    return {"status": "ok", "message": "Referral logged", "id": res["id"]}
 
 @app.get("/admin/referrals/data")
 def referrals_data(status: Optional[str] = None, user: sqlite3.Row = Depends(require_role("admin"))):
-    items = _read_jsonl(REFERRALS_PATH)
-    if status in {"open", "closed"}:
-        items = [r for r in items if (r.get("status") or "open") == status]
-    def sort_key(r: Dict):
-        return ((r.get("status") != "open"), -int(r.get("count") or 1), r.get("last_ts") or r.get("ts") or "")
-    items.sort(key=sort_key)
+    items = referrals.list_referrals(status if status in {"open", "closed"} else None)
     return {"status": "ok", "data": items}
 
 @app.get("/admin/referrals/export")
 def referrals_export(fmt: str = "json", status: Optional[str] = None, user: sqlite3.Row = Depends(require_role("admin"))):
-    items = _read_jsonl(REFERRALS_PATH)
-    if status in {"open", "closed"}:
-        items = [r for r in items if (r.get("status") or "open") == status]
-    def sort_key(r: Dict):
-        return ((r.get("status") != "open"), -int(r.get("count") or 1), r.get("last_ts") or r.get("ts") or "")
-    items.sort(key=sort_key)
+    items = referrals.list_referrals(status if status in {"open", "closed"} else None)
 
     if fmt.lower() == "csv":
         headers = ["id", "ts", "last_ts", "status", "closed_ts", "count", "reason", "question", "answer", "opened_by"]
@@ -508,22 +459,8 @@ def my_referrals_page(request: Request, user: sqlite3.Row = Depends(require_logi
 
 @app.get("/my_referrals/data")
 def my_referrals_data(user: sqlite3.Row = Depends(require_login)):
-    email = (user["email"] or "").strip().lower()
-    items = _read_jsonl(REFERRALS_PATH)
-
-    # mine = referrals I opened, or where I added an instance
-    mine = []
-    for r in items:
-        opened_by = (r.get("opened_by") or "").strip().lower()
-        instances = r.get("instances") or []
-        touched = opened_by == email or any((inst.get("by") or "").strip().lower() == email for inst in instances)
-        if touched:
-            mine.append(r)
-
-    # sort newest activity first
-    def _key(rec):
-        return rec.get("last_ts") or rec.get("ts") or ""
-    mine.sort(key=_key, reverse=True)
+    # mine = referrals I opened, or where I added an instance (newest activity first)
+    mine = referrals.for_user(user["email"] or "")
 
     # light payload for the UI
     out = []
@@ -557,7 +494,6 @@ async def referrals_update(
     answer: Optional[str] = Form(None),    # inline editable answer (now saved as sme_response)
     user: sqlite3.Row = Depends(require_role("admin")),
 ):
-    items = _read_jsonl(REFERRALS_PATH)
     now_iso = datetime.now(timezone.utc).isoformat()
 
     if status is not None:
@@ -566,29 +502,10 @@ async def referrals_update(
             return JSONResponse({"status": "error", "message": "Invalid status"}, status_code=400)
         status = s
 
-    found = False
-    for r in items:
-        if r.get("id") == id:
-            if answer is not None:
-                # Save SME response to sme_response field, keep original answer intact
-                r["sme_response"] = answer
-                r["last_ts"] = now_iso
-                inst = r.get("instances") or []
-                inst.append({"ts": now_iso, "reason": "(sme_edit)", "answer": answer, "by": user["email"]})
-                r["instances"] = inst
-            if status is not None:
-                r["status"] = status
-                if status == "closed":
-                    r["closed_ts"] = r.get("closed_ts") or now_iso
-                else:
-                    r["closed_ts"] = None
-            found = True
-            break
-
-    if not found:
+    # SME answer is saved as sme_response; the original chatbot answer is kept intact
+    if not referrals.update(id, ts=now_iso, by=user["email"], status=status, sme_response=answer):
         return JSONResponse({"status": "error", "message": "Referral not found"}, status_code=404)
 
-    _write_jsonl(REFERRALS_PATH, items)
     return {"status": "ok", "message": "Referral updated"}
 
 # -----------------------------------------------------------------------------
@@ -615,97 +532,51 @@ async def feedback(
             "session": session_id or "",
             "user": request.session.get("email") or "",
         }
-        with FEEDBACK_PATH.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        feedback_log.append(item)
         return {"status": "ok"}
     except Exception as e:
         return JSONResponse({"status": "error", "error": str(e)}, status_code=500)
 
-def _apply_range(items: List[Dict], range_code: Optional[str]) -> List[Dict]:
-    if not range_code:
-        return items
-    now = datetime.now(timezone.utc)
-    if range_code == "7d":
-        since = now - timedelta(days=7)
-    elif range_code == "30d":
-        since = now - timedelta(days=30)
-    elif range_code == "90d":
-        since = now - timedelta(days=90)
-    else:
-        return items
-    out = []
-    for r in items:
-        ts = r.get("ts")
-        try:
-            dt = datetime.fromisoformat(ts)
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            if dt >= since:
-                out.append(r)
-        except Exception:
-            pass
-    return out
-
 @app.get("/admin/feedback/data")
 def feedback_data(range: Optional[str] = None, user: sqlite3.Row = Depends(require_role("admin"))):
     """
     Returns totals, daily trend, and recent last-50.
     """
-    rows = _apply_range(_read_jsonl(FEEDBACK_PATH), range)
-    yes = sum(1 for r in rows if r.get("helpful") is True)
-    no  = sum(1 for r in rows if r.get("helpful") is False)
-    rate = (yes / (yes + no)) if (yes + no) else 0.0
-
-    by_day: Dict[str, Dict[str, int]] = {}
-    for r in rows:
-        ts = r.get("ts", "")
-        key = ts[:10] if len(ts) >= 10 else "unknown"
-        b = by_day.setdefault(key, {"yes": 0, "no": 0})
-        if r.get("helpful") is True:
-            b["yes"] += 1
-        elif r.get("helpful") is False:
-            b["no"] += 1
-
-    trend = [
-        {"date": d, "yes": v["yes"], "no": v["no"]}
-        for d, v in sorted(by_day.items(), key=lambda kv: kv[0])
-        if d != "unknown"
-    ]
-
-    return {
-        "status": "ok",
-        "totals": {"yes": yes, "no": no, "rate": round(rate, 3)},
-        "by_day": trend,
-        "recent": rows[-50:],
-    }
+    return {"status": "ok", **feedback_log.summary(range)}
 
 @app.get("/admin/feedback/export")
 def feedback_export(fmt: str = "json", range: Optional[str] = None, user: sqlite3.Row = Depends(require_role("admin"))):
-    rows = _apply_range(_read_jsonl(FEEDBACK_PATH), range)
+    rows = feedback_log.iter_rows(range)
+
+    def esc(v: str) -> str:
+        s = "" if v is None else str(v)
+        return '"' + s.replace('"', '""') + '"'
 
+    # Streamed straight from the day partitions in range; nothing is buffered
     if fmt.lower() == "csv":
         headers = ["ts", "helpful", "question", "answer", "session", "user"]
-        lines = [",".join(headers)]
 
-        def esc(v: str) -> str:
-            s = "" if v is None else str(v)
-            return '"' + s.replace('"', '""') + '"'
+        def gen_csv():
+            yield ",".join(headers)
+            for r in rows:
+                yield "\n" + ",".join([
+                    esc(r.get("ts", "")),
+                    esc("yes" if r.get("helpful") else "no"),
+                    esc(r.get("question", "")),
+                    esc(r.get("answer", "")),
+                    esc(r.get("session", "")),
+                    esc(r.get("user", "")),
+                ])
 
-        for r in rows:
-            line = ",".join([
-                esc(r.get("ts", "")),
-                esc("yes" if r.get("helpful") else "no"),
-                esc(r.get("question", "")),
-                esc(r.get("answer", "")),
-                esc(r.get("session", "")),
-                esc(r.get("user", "")),
-            ])
-            lines.append(line)
+        return StreamingResponse(gen_csv(), media_type="text/csv")
 
-        csv = "\n".join(lines)
-        return PlainTextResponse(csv, media_type="text/csv")
+    def gen_json():
+        yield '{"status": "ok", "data": ['
+        for i, r in enumerate(rows):
+            yield ("," if i else "") + json.dumps(r, ensure_ascii=False)
+        yield "]}"
 
-    return JSONResponse({"status": "ok", "data": rows})
+    return StreamingResponse(gen_json(), media_type="application/json")
 
 # -----------------------------------------------------------------------------
 # SME Resolutions (Admin)
@@ -781,18 +652,7 @@ def referrals_mine_data(user: sqlite3.Row = Depends(require_login)):
     Returns the open referrals created by the current user (or where they appear in instances).
     Sorted by last_ts desc.
     """
-    me = (user["email"] or "").strip().lower()
-    items = _read_jsonl(REFERRALS_PATH)
-
-    def _by_me(rec: Dict) -> bool:
-        opened = (rec.get("opened_by") or "").strip().lower() == me
-        insts = rec.get("instances") or []
-        touched = any((i.get("by") or "").strip().lower() == me for i in insts)
-        return opened or touched
-
-    open_mine = [r for r in items if (r.get("status") or "open") == "open" and _by_me(r)]
-
-    open_mine.sort(key=lambda r: r.get("last_ts") or r.get("ts") or "", reverse=True)
+    open_mine = referrals.for_user(user["email"] or "", status="open")
 
     # Light payload
     out = [
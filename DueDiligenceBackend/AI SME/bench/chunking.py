@@ -0,0 +1,141 @@
+"""
+Chunker benchmark: fixed-window chunk_text() vs the structure-aware chunker.
+
+    python -m bench.chunking                       # from the AI SME folder
+    python -m bench.chunking --retriever bm25 --json chunking.json
+
+Both chunkers index the fixture corpus (bench/fixtures.py); every fixture
+question is retrieved and scored on whether a top-k chunk contains its answer
+phrase intact. Prompt size is the embedding-model token count of the chunks a
+query would put in the prompt. The dense retriever needs sentence-transformers;
+bm25 runs anywhere.
+"""
+import argparse
+import json
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from bench.fixtures import CORPUS, QUESTIONS
+from chunker import chunk_structured_text, chunk_text, get_token_counter
+from settings import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_TOKENS, TOP_K
+
+KS = (1, 3, 5, 10)
+
+
+def _norm(s: str) -> str:
+    return re.sub(r"\s+", " ", s).strip().lower()
+
+
+def _chunk_chars(text: str) -> List[str]:
+    return chunk_text(text, CHUNK_SIZE, CHUNK_OVERLAP)
+
+
+def _chunk_structured(text: str) -> List[str]:
+    return [c["text"] for c in chunk_structured_text(text, CHUNK_TOKENS)]
+
+
+CHUNKERS: Dict[str, Callable[[str], List[str]]] = {
+    f"chars_{CHUNK_SIZE}_{CHUNK_OVERLAP}": _chunk_chars,
+    f"structured_{CHUNK_TOKENS}tok": _chunk_structured,
+}
+
+
+def _dense_ranker(chunks: List[str]) -> Callable[[str, int], List[int]]:
+    from embeddings import EmbeddingService
+    svc = EmbeddingService(cache_path=None, microbatch_ms=0)
+    mat = np.asarray(svc.embed(chunks), dtype=np.float32)
+
+    def rank(q: str, k: int) -> List[int]:
+        sims = mat @ np.asarray(svc.embed_query(q), dtype=np.float32)
+        return [int(i) for i in np.argsort(-sims)[:k]]
+    return rank
+
+
+def _bm25_ranker(chunks: List[str], tmp: Path) -> Callable[[str, int], List[int]]:
+    from lexical_index import BM25Index
+    ix = BM25Index(tmp / f"bm25_{time.perf_counter_ns()}.db")
+    ix.add("fixture", [str(i) for i in range(len(chunks))], chunks)
+    return lambda q, k: [int(cid) for cid, _ in ix.search(q, k)]
+
+
+def evaluate(name: str, chunk_fn: Callable[[str], List[str]], retriever: str, tmp: Path,
+             count: Callable[[str], int], top_k: int) -> Dict:
+    chunks: List[str] = []
+    doc_of: List[str] = []
+    started = time.perf_counter()
+    for doc, text in CORPUS.items():
+        for c in chunk_fn(text):
+            chunks.append(c)
+            doc_of.append(doc)
+    chunk_seconds = time.perf_counter() - started
+    tokens = [count(c) for c in chunks]
+    rank = _dense_ranker(chunks) if retriever == "dense" else _bm25_ranker(chunks, tmp)
+
+    hits = {k: 0 for k in KS}
+    prompt_tokens: List[int] = []
+    tokens_to_hit: List[int] = []
+    ranks: List[int] = []
+    for item in QUESTIONS:
+        order = rank(item["q"], max(KS))
+        answer = _norm(item["answer"])
+        first = next((pos for pos, i in enumerate(order) if doc_of[i] == item["doc"] and answer in _norm(chunks[i])), None)
+        for k in KS:
+            hits[k] += first is not None and first < k
+        prompt_tokens.append(sum(tokens[i] for i in order[:top_k]))
+        if first is not None:
+            ranks.append(first + 1)
+            tokens_to_hit.append(sum(tokens[i] for i in order[:first + 1]))
+
+    n = len(QUESTIONS)
+    return {
+        "chunker": name,
+        "chunks": len(chunks),
+        "tokens_per_chunk": {"mean": round(statistics.mean(tokens), 1), "max": max(tokens)},
+        "over_model_limit": sum(t > 256 for t in tokens),
+        "chunk_ms": round(chunk_seconds * 1000, 2),
+        "hit_rate": {f"@{k}": round(hits[k] / n, 3) for k in KS},
+        "mrr": round(sum(1 / r for r in ranks) / n, 3),
+        f"prompt_tokens@{top_k}": {"mean": round(statistics.mean(prompt_tokens), 1), "max": max(prompt_tokens)},
+        "prompt_tokens_to_first_hit": round(statistics.mean(tokens_to_hit), 1) if tokens_to_hit else None,
+    }
+
+
+def main(argv=None) -> Dict:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--retriever", choices=["auto", "dense", "bm25"], default="auto")
+    ap.add_argument("--top-k", type=int, default=TOP_K)
+    ap.add_argument("--json", type=Path)
+    args = ap.parse_args(argv)
+
+    retriever = args.retriever
+    if retriever == "auto":
+        try:
+            import sentence_transformers  # noqa: F401
+            retriever = "dense"
+        except ImportError:
+            retriever = "bm25"
+
+    count = get_token_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [evaluate(name, fn, retriever, Path(tmp), count, args.top_k) for name, fn in CHUNKERS.items()]
+    report = {"retriever": retriever, "questions": len(QUESTIONS), "top_k": args.top_k, "results": results}
+
+    print(f"retriever={retriever} questions={len(QUESTIONS)} top_k={args.top_k}")
+    for r in results:
+        print(f"  {r['chunker']:<22} chunks={r['chunks']:<4} tok/chunk={r['tokens_per_chunk']['mean']:<6} "
+              f"hit@1={r['hit_rate']['@1']:<5} hit@{args.top_k}={r['hit_rate'].get(f'@{args.top_k}', '-'):<5} "
+              f"mrr={r['mrr']:<5} prompt_tok@{args.top_k}={r[f'prompt_tokens@{args.top_k}']['mean']:<7} "
+              f"tok_to_hit={r['prompt_tokens_to_first_hit']}")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    main()
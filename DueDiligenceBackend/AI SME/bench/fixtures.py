@@ -0,0 +1,216 @@
+"""
+Fixture guidance corpus and question set for the offline benchmarks.
+
+Five short reviewer guides in the shapes real uploads take: markdown headings,
+numbered PDF-style headings, all-caps headings, bullet lists and tables. Each
+question names the document and an exact answer phrase that a retrieved chunk
+must contain to count as a hit. QA_PAIRS are SME resolutions for the Q&A
+fast path.
+"""
+from pathlib import Path
+from typing import Dict, List
+
+_FILLER = (
+    "Reviewers should record the rationale for every conclusion in the case notes so that a "
+    "second reviewer can follow the reasoning without re-reading the underlying documents. "
+    "Where evidence is incomplete the reviewer should request it from the relationship manager "
+    "and pause the review until it is received, noting the date of the request. "
+)
+
+CORPUS: Dict[str, str] = {
+    "sow_guide.md": f"""# Source of Wealth and Source of Funds Reviewer Guide
+
+## 1. Purpose
+This guide explains how reviewers assess source of wealth (SoW) and source of funds (SoF) for
+high risk customers. {_FILLER * 2}
+
+## 2. Definitions
+Source of wealth describes how the customer accumulated their total net worth over their lifetime.
+Source of funds describes the origin of the particular funds used for a specific transaction or
+to open the relationship. {_FILLER}
+
+## 3. Acceptable evidence
+### 3.1 Employment income
+- Payslips covering the most recent three months
+- An employment contract or letter from the employer on headed paper
+- Tax returns for the last two financial years
+{_FILLER}
+
+### 3.2 Sale of a business
+Evidence of a business sale must include the signed sale and purchase agreement and a bank
+statement showing receipt of the sale proceeds. {_FILLER}
+
+### 3.3 Inheritance
+For inheritance, obtain a grant of probate or the will together with a solicitor's letter confirming
+the amount received by the customer. {_FILLER}
+
+## 4. Thresholds
+| Risk rating | Evidence required | Approval |
+| --- | --- | --- |
+| Low | Self-declaration | Reviewer |
+| Medium | One documentary source | Reviewer |
+| High | Two independent documentary sources | Team Leader |
+| Very high | Two independent sources plus adverse media search | Head of Compliance |
+
+{_FILLER * 2}
+""",
+    "pep_policy.txt": f"""POLITICALLY EXPOSED PERSONS POLICY
+
+1 Scope
+This policy applies to all customers who are politically exposed persons, their family members
+and known close associates. {_FILLER * 2}
+
+2 Identification
+2.1 Screening
+All customers are screened against the PEP list at onboarding and daily thereafter. A potential match
+must be dispositioned within two business days of the alert being raised. {_FILLER}
+
+2.2 Domestic PEPs
+Domestic PEPs are treated as high risk only where other risk factors are present, in line with
+the FCA guidance FG17/6 on the treatment of politically exposed persons. {_FILLER}
+
+3 Enhanced due diligence
+3.1 Senior management approval
+Establishing or continuing a relationship with a PEP requires senior management approval, recorded
+in the case file before the account is opened. {_FILLER * 2}
+
+3.2 Ongoing monitoring
+PEP relationships are reviewed at least annually. A PEP remains subject to enhanced due diligence
+for at least twelve months after leaving the prominent public function. {_FILLER}
+""",
+    "edd_checklist.md": f"""# Enhanced Due Diligence Checklist
+
+## Triggers
+Enhanced due diligence is required when any of the following apply:
+- The customer is established in a high-risk third country listed under Regulation (EU) 2016/1675
+- The customer is a politically exposed person
+- The transaction is complex or unusually large with no apparent economic purpose
+- Adverse media relating to financial crime has been identified
+
+{_FILLER * 2}
+
+## Required steps
+1. Obtain additional information on the customer and the beneficial owner
+2. Obtain information on the intended nature of the business relationship
+3. Establish the source of funds and source of wealth
+4. Obtain senior management approval
+5. Conduct enhanced ongoing monitoring with increased frequency of review
+
+{_FILLER * 3}
+
+## Record keeping
+Records of enhanced due diligence must be retained for five years after the end of the business
+relationship. {_FILLER}
+""",
+    "adverse_media.txt": f"""ADVERSE MEDIA SCREENING
+
+1 Search terms
+Searches combine the customer's full name with the negative keyword string maintained by Financial
+Crime Compliance. Searches must cover at least the first three pages of results. {_FILLER * 2}
+
+2 Assessing relevance
+2.1 Credibility of the source
+Reports from established news outlets and official sources carry more weight than blogs or forums.
+Unverified allegations on social media are recorded but do not on their own support an exit decision.
+{_FILLER * 2}
+
+2.2 Materiality
+An article is material if it alleges involvement in money laundering, fraud, bribery, sanctions evasion
+or terrorist financing within the last six years. {_FILLER}
+
+3 Escalation
+Material adverse media is escalated to the Team Leader through a referral, and to the MLRO where a
+suspicious activity report may be required. {_FILLER}
+""",
+    "ownership.md": f"""# Beneficial Ownership and Control
+
+## Identifying beneficial owners
+A beneficial owner is any individual who ultimately owns or controls more than 25 percent of the
+shares or voting rights in the customer. {_FILLER * 2}
+
+## Complex structures
+Where ownership passes through trusts, nominee shareholders or more than three layers of entities,
+obtain a structure chart signed by a director. {_FILLER * 2}
+
+## Verification
+| Entity type | Verification document |
+| --- | --- |
+| UK limited company | Companies House extract dated within three months |
+| Overseas company | Certificate of incumbency |
+| Trust | Trust deed and letter of wishes |
+| Partnership | Partnership agreement |
+
+{_FILLER}
+
+## Discrepancies
+Material discrepancies between the register of people with significant control and the information
+obtained during due diligence must be reported to Companies House. {_FILLER}
+""",
+}
+
+QUESTIONS: List[Dict] = [
+    {"q": "What is the difference between source of wealth and source of funds?", "doc": "sow_guide.md",
+     "answer": "accumulated their total net worth"},
+    {"q": "What evidence is needed for employment income?", "doc": "sow_guide.md",
+     "answer": "Payslips covering the most recent three months"},
+    {"q": "How do we evidence the sale of a business?", "doc": "sow_guide.md",
+     "answer": "signed sale and purchase agreement"},
+    {"q": "What documents prove an inheritance?", "doc": "sow_guide.md",
+     "answer": "grant of probate"},
+    {"q": "Who approves a high risk source of wealth review?", "doc": "sow_guide.md",
+     "answer": "Two independent documentary sources | Team Leader"},
+    {"q": "How quickly must a potential PEP match be dispositioned?", "doc": "pep_policy.txt",
+     "answer": "within two business days"},
+    {"q": "Are domestic PEPs always high risk?", "doc": "pep_policy.txt",
+     "answer": "FG17/6"},
+    {"q": "Who must approve a relationship with a PEP?", "doc": "pep_policy.txt",
+     "answer": "requires senior management approval"},
+    {"q": "How long does EDD continue after a PEP leaves office?", "doc": "pep_policy.txt",
+     "answer": "at least twelve months after leaving"},
+    {"q": "Which regulation lists high-risk third countries?", "doc": "edd_checklist.md",
+     "answer": "2016/1675"},
+    {"q": "What are the required EDD steps?", "doc": "edd_checklist.md",
+     "answer": "Obtain information on the intended nature of the business relationship"},
+    {"q": "How long must EDD records be kept?", "doc": "edd_checklist.md",
+     "answer": "retained for five years"},
+    {"q": "How many pages of adverse media search results must be reviewed?", "doc": "adverse_media.txt",
+     "answer": "first three pages of results"},
+    {"q": "Can a social media allegation alone justify exiting a customer?", "doc": "adverse_media.txt",
+     "answer": "do not on their own support an exit decision"},
+    {"q": "When is adverse media material?", "doc": "adverse_media.txt",
+     "answer": "within the last six years"},
+    {"q": "Where is material adverse media escalated?", "doc": "adverse_media.txt",
+     "answer": "escalated to the Team Leader through a referral"},
+    {"q": "What ownership percentage makes someone a beneficial owner?", "doc": "ownership.md",
+     "answer": "more than 25 percent"},
+    {"q": "What is needed for complex ownership structures?", "doc": "ownership.md",
+     "answer": "structure chart signed by a director"},
+    {"q": "How do we verify an overseas company?", "doc": "ownership.md",
+     "answer": "Certificate of incumbency"},
+    {"q": "What happens with PSC register discrepancies?", "doc": "ownership.md",
+     "answer": "must be reported to Companies House"},
+]
+
+# SME resolutions stored before the run, and how reviewers later ask the same thing.
+# Asking "asked" should take the Q&A fast path; the fixture QUESTIONS should not.
+QA_PAIRS: List[Dict] = [
+    {"stored": "Can we accept a crypto exchange statement as source of funds evidence?",
+     "asked": "Is a cryptocurrency exchange statement acceptable evidence for source of funds?",
+     "answer": "Yes, if it shows the customer's name, the exchange is regulated, and the withdrawal to the bank is visible."},
+    {"stored": "Do we need to re-screen a customer after a change of name?",
+     "asked": "After a customer changes their name, do we have to screen them again?",
+     "answer": "Yes. Re-screen under the new name on the day the change is recorded."},
+    {"stored": "Who signs off an exit decision for adverse media?",
+     "asked": "Who approves exiting a customer because of adverse media?",
+     "answer": "The Team Leader, after MLRO review where a SAR may be required."},
+]
+
+
+def write_corpus(dest: Path) -> List[Path]:
+    dest.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name, text in CORPUS.items():
+        p = dest / name
+        p.write_text(text, encoding="utf-8")
+        paths.append(p)
+    return paths
@@ -0,0 +1,217 @@
+"""
+Offline benchmark of the full RAGPipeline against the fixture corpus.
+
+    python -m bench.pipeline --json bench_report.json
+    python -m bench.pipeline --repeat 5 --compare bench_report.json
+
+Builds a throwaway store (Chroma, BM25 index, catalog) in a temp folder, ingests
+bench/fixtures.py, stores the fixture SME resolutions, then asks every question
+with the deterministic stub LLM and the answer cache bypassed. Reports:
+
+  retrieval    recall@k and MRR of hybrid retrieval; context recall (answer
+               phrase present in the packed prompt context)
+  qa           fast-path hit rate on paraphrased resolved questions, and false
+               hits on the ordinary questions
+  latency_ms   p50/p95/mean per stage (embed, qa_lookup, dense_query, context,
+               prompt_build, generate) and end to end
+  memory_mb    peak RSS, and RSS growth over ingest and queries
+
+Everything under "config" comes from settings.py, so two reports taken before
+and after a settings change are directly comparable (--compare prints deltas).
+Needs the same packages as the app (chromadb, sentence-transformers); the LLM
+is always the stub, so no network or API key is involved.
+"""
+import os
+
+os.environ["LLM_BACKEND"] = "stub"   # before rag/llm are imported
+
+import argparse
+import json
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import settings
+from bench.fixtures import QA_PAIRS, QUESTIONS, write_corpus
+from embeddings import EmbeddingService
+from rag import RAGPipeline, RAGStore
+
+KS = (1, 3, 5, 10)
+STAGES = ("embed", "qa_lookup", "dense_query", "context", "prompt_build", "generate")
+CONFIG_KEYS = (
+    "EMBEDDING_MODEL", "CHUNKER", "CHUNK_TOKENS", "CHUNK_SIZE", "CHUNK_OVERLAP", "TOP_K", "HYBRID_CANDIDATES",
+    "RRF_K", "RERANK_CANDIDATES", "RERANKER_MODEL", "CONTEXT_TOKEN_BUDGET", "QA_MIN_SIM", "QA_MAX_RESULTS",
+)
+
+
+def _norm(s: str) -> str:
+    return re.sub(r"\s+", " ", s or "").strip().lower()
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except Exception:
+        return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KB on Linux
+    except Exception:
+        return None
+
+
+def _pct(values: List[float], q: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+def _summary(values: List[float]) -> Dict:
+    if not values:
+        return {"p50": None, "p95": None, "mean": None, "n": 0}
+    return {"p50": round(_pct(values, 0.5), 2), "p95": round(_pct(values, 0.95), 2),
+            "mean": round(statistics.mean(values), 2), "n": len(values)}
+
+
+def run(repeat: int = 3) -> Dict:
+    rss0 = _rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        store = RAGStore(
+            persist_dir=tmp / "chroma",
+            lexical_path=tmp / "bm25.db",
+            catalog_path=tmp / "catalog.db",
+            embedder=EmbeddingService(cache_path=None),
+        )
+        pipeline = RAGPipeline(store=store)
+
+        # --- corpus
+        started = time.perf_counter()
+        for path in write_corpus(tmp / "corpus"):
+            pipeline.ingest_path(path)
+        for pair in QA_PAIRS:
+            pipeline.add_resolution(pair["stored"], pair["answer"], approved_by="bench")
+        ingest_s = time.perf_counter() - started
+        rss_ingest = _rss_mb()
+
+        # --- retrieval quality (untimed)
+        hits = {k: 0 for k in KS}
+        rr: List[float] = []
+        context_hits = 0
+        qa_false = 0
+        for item in QUESTIONS:
+            answer = _norm(item["answer"])
+            res = store.hybrid_query(item["q"], top_k=max(KS))
+            docs = (res.get("documents") or [[]])[0]
+            metas = (res.get("metadatas") or [[]])[0]
+            first = next((i for i, (d, m) in enumerate(zip(docs, metas))
+                          if (m or {}).get("title") == item["doc"] and answer in _norm(d)), None)
+            for k in KS:
+                hits[k] += first is not None and first < k
+            rr.append(1 / (first + 1) if first is not None else 0.0)
+            prep = pipeline._prepare(item["q"])
+            if "result" in prep:
+                qa_false += 1
+            elif answer in _norm(prep["prompt"]):
+                context_hits += 1
+
+        qa_hits = 0
+        for pair in QA_PAIRS:
+            prep = pipeline._prepare(pair["asked"])
+            qa_hits += "result" in prep and _norm(prep["result"]["answer"]).startswith(_norm(pair["answer"])[:40])
+
+        # --- latency (answer cache bypassed; first pass also warms model caches)
+        stage_ms: Dict[str, List[float]] = {s: [] for s in STAGES}
+        total_ms: List[float] = []
+        questions = [q["q"] for q in QUESTIONS] + [p["asked"] for p in QA_PAIRS]
+        for _ in range(max(1, repeat)):
+            for q in questions:
+                started = time.perf_counter()
+                pipeline._answer_uncached(q)
+                total_ms.append((time.perf_counter() - started) * 1000)
+                for stage, ms in pipeline.last_timings().items():
+                    stage_ms.setdefault(stage, []).append(ms)
+        rss_end = _rss_mb()
+
+        n = len(QUESTIONS)
+        return {
+            "config": {k: getattr(settings, k, None) for k in CONFIG_KEYS},
+            "corpus": {
+                "documents": len(store.list_docs()),
+                "chunks": store.collection.count(),
+                "qa_resolutions": len(QA_PAIRS),
+                "ingest_seconds": round(ingest_s, 2),
+            },
+            "retrieval": {
+                "questions": n,
+                **{f"recall@{k}": round(hits[k] / n, 3) for k in KS},
+                "mrr": round(sum(rr) / n, 3),
+                "context_recall": round(context_hits / n, 3),
+            },
+            "qa": {
+                "fast_path_hit_rate": round(qa_hits / len(QA_PAIRS), 3) if QA_PAIRS else None,
+                "false_hit_rate": round(qa_false / n, 3),
+            },
+            "latency_ms": {**{s: _summary(v) for s, v in stage_ms.items()}, "total": _summary(total_ms)},
+            "context": pipeline.context.info(),
+            "memory_mb": {
+                "peak_rss": round(_peak_rss_mb(), 1) if _peak_rss_mb() else None,
+                "ingest_growth": round(rss_ingest - rss0, 1) if rss0 and rss_ingest else None,
+                "query_growth": round(rss_end - rss_ingest, 1) if rss_ingest and rss_end else None,
+            },
+        }
+
+
+def _flatten(d: Dict, prefix: str = "") -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = v
+    return out
+
+
+def compare(old: Dict, new: Dict) -> None:
+    for section in ("config",):
+        changed = {k: (old[section].get(k), v) for k, v in new[section].items() if old[section].get(k) != v}
+        for k, (a, b) in changed.items():
+            print(f"  config {k}: {a} -> {b}")
+    a, b = _flatten({k: old[k] for k in ("retrieval", "qa", "latency_ms", "memory_mb") if k in old}), \
+        _flatten({k: new[k] for k in ("retrieval", "qa", "latency_ms", "memory_mb") if k in new})
+    for key in sorted(b):
+        if key in a and a[key] != b[key] and not key.endswith(".n"):
+            print(f"  {key:<40} {a[key]:>10} -> {b[key]:<10} ({b[key] - a[key]:+.3f})")
+
+
+def main(argv=None) -> Dict:
+    ap = argparse.ArgumentParser(description="Offline retrieval/latency benchmark for the AI SME pipeline.")
+    ap.add_argument("--repeat", type=int, default=3, help="passes over the question set for latency samples")
+    ap.add_argument("--json", type=Path, help="write the report here")
+    ap.add_argument("--compare", type=Path, help="print differences against an earlier report")
+    args = ap.parse_args(argv)
+
+    report = run(repeat=args.repeat)
+    r, lat = report["retrieval"], report["latency_ms"]
+    print(f"retrieval: " + " ".join(f"{k}={v}" for k, v in r.items()))
+    print(f"qa: fast_path_hit_rate={report['qa']['fast_path_hit_rate']} false_hit_rate={report['qa']['false_hit_rate']}")
+    for stage, s in lat.items():
+        print(f"  {stage:<13} p50={s['p50']}ms p95={s['p95']}ms mean={s['mean']}ms")
+    print(f"memory: {report['memory_mb']}")
+    if args.compare:
+        print(f"vs {args.compare}:")
+        compare(json.loads(args.compare.read_text(encoding="utf-8")), report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Structure-aware chunking for guidance documents.
+
+Documents are first read into blocks (heading / para / list / table), keeping
+DOCX heading styles and tables, and recognising markdown, numbered ("3.2 Source
+of Wealth") and all-caps headings in PDF/text. Blocks are then packed into
+chunks of at most CHUNK_TOKENS embedding-model tokens without crossing a
+heading, so a chunk never mixes two sections. A block too big for one chunk is
+split at sentence boundaries (tables by row, repeating the header row). Each
+chunk records its section path, e.g. "4 Customer Due Diligence > 4.2 PEPs",
+and is prefixed with it.
+
+Token counts use the embedding model's own tokenizer when `transformers` is
+available, otherwise a close word/punctuation estimate.
+"""
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from settings import EMBEDDING_MODEL, CHUNK_TOKENS
+
+_MD_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_NUM_HEADING_RE = re.compile(r"^(\d{1,2}(?:\.\d{1,2}){0,4})\.?\s+([A-Z][^\n]{1,100})$")
+_LIST_RE = re.compile(r"^\s*(?:[-*\u2022\u25aa\u2023\u25cf]|\(?(?:\d{1,3}|[a-z]|[ivx]{1,4})[.)])\s+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;:])\s+(?=[A-Z0-9(\"'\u201c])")
+_APPROX_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\w\s]")
+
+
+# =========================
+# Token counting
+# =========================
+def _approx_tokens(text: str) -> int:
+    # WordPiece splits rarer words into a few pieces; ~15% over the word count holds for guidance prose
+    return int(math.ceil(len(_APPROX_TOKEN_RE.findall(text)) * 1.15))
+
+
+@lru_cache(maxsize=4)
+def get_token_counter(model_name: str = EMBEDDING_MODEL) -> Callable[[str], int]:
+    try:
+        from transformers import AutoTokenizer
+        tok = AutoTokenizer.from_pretrained(model_name)
+    except Exception:
+        return _approx_tokens
+    return lambda text: len(tok.encode(text, add_special_tokens=False))
+
+
+# =========================
+# Reading blocks
+# =========================
+def _is_caps_heading(line: str) -> bool:
+    letters = [c for c in line if c.isalpha()]
+    return (
+        3 <= len(line) <= 80
+        and len(letters) >= 3
+        and all(c.isupper() for c in letters)
+        and line[-1] not in ".,;:"
+    )
+
+
+def blocks_from_lines(lines: List[str]) -> List[Dict]:
+    """Group plain-text lines (PDF page text, .txt/.md) into heading/para/list/table blocks."""
+    blocks: List[Dict] = []
+    cur: Optional[Dict] = None
+
+    def close():
+        nonlocal cur
+        if cur and cur["text"].strip():
+            cur["text"] = cur["text"].strip()
+            blocks.append(cur)
+        cur = None
+
+    for raw in lines:
+        line = raw.rstrip()
+        s = line.strip()
+        if not s:
+            close()
+            continue
+        m = _MD_HEADING_RE.match(s)
+        if m:
+            close()
+            blocks.append({"kind": "heading", "level": len(m.group(1)), "text": m.group(2)})
+            continue
+        m = _NUM_HEADING_RE.match(s)
+        # "2.1 Screening" / "3 Scope" are headings; a single-level "1. Obtain ..." is a list item
+        if m and s[-1] not in ".,;:" and len(s.split()) <= 12 and (
+            "." in m.group(1) or not s.startswith(m.group(1) + ".")
+        ):
+            close()
+            # one deeper than an all-caps document title
+            blocks.append({"kind": "heading", "level": m.group(1).count(".") + 2, "text": s})
+            continue
+        if _is_caps_heading(s):
+            close()
+            blocks.append({"kind": "heading", "level": 1, "text": s})
+            continue
+        if s.count("|") >= 2:
+            if cur is None or cur["kind"] != "table":
+                close()
+                cur = {"kind": "table", "level": 0, "text": ""}
+            if not re.fullmatch(r"[|\s:\-]+", s):   # skip markdown separator rows
+                cur["text"] += s + "\n"
+            continue
+        if _LIST_RE.match(line):
+            close()
+            cur = {"kind": "list", "level": 0, "text": s}
+            continue
+        if cur is None or cur["kind"] == "table":
+            close()
+            cur = {"kind": "para", "level": 0, "text": s}
+        elif cur["text"].endswith("-") and not cur["text"].endswith(" -"):
+            cur["text"] = cur["text"][:-1] + s      # word hyphenated across a PDF line break
+        else:
+            cur["text"] += " " + s
+    close()
+    return blocks
+
+
+def _docx_blocks(path: Path) -> List[Dict]:
+    from docx import Document
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    doc = Document(str(path))
+    blocks: List[Dict] = []
+    for child in doc.element.body.iterchildren():
+        tag = child.tag.rsplit("}", 1)[-1]
+        if tag == "p":
+            p = Paragraph(child, doc)
+            text = p.text.strip()
+            if not text:
+                continue
+            style = (p.style.name if p.style is not None else "") or ""
+            m = re.match(r"Heading\s*(\d)", style)
+            if m or style == "Title":
+                blocks.append({"kind": "heading", "level": int(m.group(1)) if m else 1, "text": text})
+            elif "List" in style:
+                blocks.append({"kind": "list", "level": 0, "text": text})
+            else:
+                blocks.extend(blocks_from_lines([text]))
+        elif tag == "tbl":
+            rows = []
+            for row in Table(child, doc).rows:
+                cells = [c.text.strip() for c in row.cells]
+                if any(cells):
+                    rows.append(" | ".join(cells))
+            if rows:
+                blocks.append({"kind": "table", "level": 0, "text": "\n".join(rows)})
+    return blocks
+
+
+def read_blocks(path: Path) -> List[Dict]:
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        from pypdf import PdfReader
+        reader = PdfReader(str(path))
+        lines: List[str] = []
+        for page in reader.pages:
+            lines.extend((page.extract_text() or "").splitlines())
+            lines.append("")
+        return blocks_from_lines(lines)
+    if suffix in (".docx", ".doc"):
+        return _docx_blocks(path)
+    return blocks_from_lines(path.read_text(errors="ignore").splitlines())
+
+
+# =========================
+# Fixed-window chunking (CHUNKER = "chars")
+# =========================
+def chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """Simple fixed-size chunking with overlap."""
+    text = re.sub(r"\n{3,}", "\n\n", text).strip()
+    chunks: List[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        chunks.append(text[start:end])
+        if end == len(text):
+            break
+        start = max(0, end - overlap)
+    return [c for c in chunks if c.strip()]
+
+
+# =========================
+# Packing blocks into chunks
+# =========================
+def _split_block(block: Dict, max_tokens: int, count: Callable[[str], int]) -> List[str]:
+    """Pieces of one oversized block, each within max_tokens where possible."""
+    if block["kind"] == "table":
+        rows = block["text"].split("\n")
+        header, units, sep = rows[0], rows[1:], "\n"
+    else:
+        header, units, sep = "", _SENTENCE_RE.split(block["text"]), " "
+
+    pieces: List[str] = []
+    cur: List[str] = []
+    cur_tokens = count(header) if header else 0
+    base = cur_tokens
+    for unit in units:
+        t = count(unit)
+        if t > max_tokens - base:
+            # A single sentence longer than a chunk: fall back to word windows
+            words = unit.split()
+            step = max(1, int(len(words) * (max_tokens - base) / max(t, 1)))
+            sub = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            sub = [unit]
+        for u in sub:
+            ut = count(u)
+            if cur and cur_tokens + ut > max_tokens:
+                pieces.append(sep.join(([header] if header else []) + cur))
+                cur, cur_tokens = [], base
+            cur.append(u)
+            cur_tokens += ut
+    if cur:
+        pieces.append(sep.join(([header] if header else []) + cur))
+    return pieces
+
+
+def chunk_blocks(blocks: List[Dict], max_tokens: int = CHUNK_TOKENS,
+                 count: Optional[Callable[[str], int]] = None) -> List[Dict]:
+    """
+    Pack blocks into [{"text", "section", "tokens"}], never crossing a heading.
+    Each chunk's text starts with its section path, so a passage that never
+    repeats its heading's terms ("An article is material if ...") still
+    carries them ("Adverse Media Screening > 2.2 Materiality").
+    """
+    count = count or get_token_counter()
+    chunks: List[Dict] = []
+    path: List[tuple] = []          # [(level, heading text)]
+    section = ""
+    header_tokens = 0
+    buf: List[str] = []
+    buf_tokens = 0
+
+    def flush():
+        nonlocal buf, buf_tokens
+        if buf:
+            body = "\n".join(buf)
+            chunks.append({
+                "text": f"{section}\n{body}" if section else body,
+                "section": section,
+                "tokens": header_tokens + buf_tokens,
+            })
+        buf, buf_tokens = [], 0
+
+    for block in blocks:
+        if block["kind"] == "heading":
+            flush()
+            while path and path[-1][0] >= block["level"]:
+                path.pop()
+            path.append((block["level"], block["text"]))
+            section = " > ".join(t for _, t in path)
+            header_tokens = count(section)
+            continue
+
+        budget = max(max_tokens - header_tokens, max_tokens // 2)
+        t = count(block["text"])
+        units = [block["text"]] if t <= budget else _split_block(block, budget, count)
+        for unit in units:
+            ut = t if len(units) == 1 else count(unit)
+            if buf and buf_tokens + ut > budget:
+                flush()
+            buf.append(unit)
+            buf_tokens += ut
+    flush()
+    return chunks
+
+
+def chunk_structured_text(text: str, max_tokens: int = CHUNK_TOKENS,
+                          count: Optional[Callable[[str], int]] = None) -> List[Dict]:
+    return chunk_blocks(blocks_from_lines(text.splitlines()), max_tokens, count)
+
+
+def chunk_document(path: Path, max_tokens: int = CHUNK_TOKENS,
+                   count: Optional[Callable[[str], int]] = None) -> List[Dict]:
+    return chunk_blocks(read_blocks(Path(path)), max_tokens, count)
@@ -0,0 +1,163 @@
+"""
+Context assembly for the answer prompt.
+
+Retrieved chunks go through three steps before they reach the LLM:
+
+  1. dedupe   adjacent chunks of the same document are merged, dropping the
+              text they share (the 150-char window overlap, or a repeated
+              section-path header); exact and contained duplicates are dropped
+  2. rerank   passages are scored against the question by a small local
+              cross-encoder (RERANKER_MODEL); retrieval order is kept if the
+              model is disabled or cannot be loaded
+  3. pack     best passages first, into CONTEXT_TOKEN_BUDGET tokens
+
+Token counts use the embedding-model tokenizer (chunker.get_token_counter), a
+close proxy for the LLM's own count.
+"""
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+from chunker import get_token_counter
+
+from settings import RERANKER_MODEL, CONTEXT_TOKEN_BUDGET
+
+MIN_OVERLAP_CHARS = 20
+
+
+def _norm(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+def _overlap(a: str, b: str, max_chars: int = 400) -> int:
+    """Length of the longest suffix of a that is a prefix of b (0 if shorter than MIN_OVERLAP_CHARS)."""
+    for k in range(min(len(a), len(b), max_chars), MIN_OVERLAP_CHARS - 1, -1):
+        if a.endswith(b[:k]):
+            return k
+    return 0
+
+
+class ContextAssembler:
+    def __init__(self, reranker_model: str = RERANKER_MODEL, budget_tokens: int = CONTEXT_TOKEN_BUDGET,
+                 count: Optional[Callable[[str], int]] = None, reranker=None):
+        self.reranker_model = reranker_model
+        self.budget = budget_tokens
+        self.count = count or get_token_counter()
+        self._reranker = reranker
+        self._reranker_failed = False
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "candidate_tokens": 0, "prompt_tokens": 0, "merged": 0, "duplicates": 0,
+                      "over_budget": 0}
+
+    # ---------------- reranker ----------------
+    def _get_reranker(self):
+        if self._reranker is not None or self._reranker_failed or not self.reranker_model:
+            return self._reranker
+        with self._lock:
+            if self._reranker is None and not self._reranker_failed:
+                try:
+                    from sentence_transformers import CrossEncoder
+                    self._reranker = CrossEncoder(self.reranker_model)
+                except Exception as e:
+                    print(f"[context] reranker unavailable ({e}); keeping retrieval order")
+                    self._reranker_failed = True
+        return self._reranker
+
+    # ---------------- steps ----------------
+    def dedupe(self, docs: Sequence[str], metas: Sequence[Dict]) -> List[Dict]:
+        """Passages [{"text", "meta", "rank"}] in retrieval order, with overlaps merged away."""
+        passages: List[Dict] = []
+        by_chunk: Dict[tuple, Dict] = {}   # (doc_id, chunk index) -> passage ending with that chunk
+        for rank, (text, meta) in enumerate(zip(docs, metas)):
+            meta = meta or {}
+            text = text or ""
+            key = (meta.get("doc_id"), meta.get("chunk"))
+            prev = by_chunk.get((key[0], key[1] - 1)) if isinstance(key[1], int) else None
+            nxt = by_chunk.get((key[0], key[1] + 1)) if isinstance(key[1], int) else None
+            if prev is not None:
+                prev["text"] = self._join(prev["text"], text, meta.get("section"))
+                by_chunk[key] = prev
+                self.stats["merged"] += 1
+                if nxt is not None:
+                    # This chunk bridges two passages: fold the later one in too
+                    prev["text"] = self._join(prev["text"], nxt["text"], (nxt["meta"] or {}).get("section"))
+                    prev["rank"] = min(prev["rank"], nxt["rank"])
+                    for k, v in list(by_chunk.items()):
+                        if v is nxt:
+                            by_chunk[k] = prev
+                    passages.remove(nxt)
+                continue
+            if nxt is not None:
+                nxt["text"] = self._join(text, nxt["text"], meta.get("section"))
+                nxt["first_chunk"] = key[1]
+                by_chunk[key] = nxt
+                self.stats["merged"] += 1
+                continue
+            p = {"text": text, "meta": meta, "rank": rank, "first_chunk": key[1]}
+            passages.append(p)
+            if key[0] is not None:
+                by_chunk[key] = p
+
+        # Exact or contained duplicates (e.g. the same guide uploaded twice)
+        kept: List[Dict] = []
+        for p in passages:
+            n = _norm(p["text"])
+            if any(n in _norm(k["text"]) for k in kept):
+                self.stats["duplicates"] += 1
+                continue
+            kept = [k for k in kept if _norm(k["text"]) not in n] + [p]
+        kept.sort(key=lambda p: p["rank"])
+        return kept
+
+    @staticmethod
+    def _join(a: str, b: str, section: Optional[str]) -> str:
+        if section and b.startswith(section + "\n"):
+            return a.rstrip() + "\n" + b[len(section) + 1:]
+        k = _overlap(a, b)
+        return a + b[k:] if k else a.rstrip() + "\n" + b
+
+    def rerank(self, question: str, passages: List[Dict]) -> List[Dict]:
+        model = self._get_reranker()
+        if model is None or len(passages) < 2:
+            return passages
+        scores = model.predict([(question, p["text"]) for p in passages])
+        for p, s in zip(passages, scores):
+            p["score"] = float(s)
+        return sorted(passages, key=lambda p: -p["score"])
+
+    def pack(self, passages: List[Dict]) -> List[Dict]:
+        """Greedy by relevance; a passage that does not fit is skipped, smaller later ones may still fit."""
+        out: List[Dict] = []
+        used = 0
+        for p in passages:
+            p["tokens"] = self.count(p["text"])
+            if out and used + p["tokens"] > self.budget:
+                self.stats["over_budget"] += 1
+                continue
+            out.append(p)   # the best passage always goes in, even when it alone is over budget
+            used += p["tokens"]
+        return out
+
+    # ---------------- public API ----------------
+    def assemble(self, question: str, docs: Sequence[str], metas: Sequence[Dict]) -> Dict:
+        candidate_tokens = sum(self.count(d or "") for d in docs)
+        packed = self.pack(self.rerank(question, self.dedupe(docs, metas)))
+        prompt_tokens = sum(p["tokens"] for p in packed)
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["candidate_tokens"] += candidate_tokens
+            self.stats["prompt_tokens"] += prompt_tokens
+        return {
+            "blocks": [p["text"] for p in packed],
+            "metas": [p["meta"] for p in packed],
+            "candidate_tokens": candidate_tokens,
+            "prompt_tokens": prompt_tokens,
+        }
+
+    def info(self) -> Dict:
+        with self._lock:
+            out = dict(self.stats)
+        out["tokens_saved"] = out["candidate_tokens"] - out["prompt_tokens"]
+        out["budget_tokens"] = self.budget
+        out["reranker"] = self.reranker_model if self._reranker is not None else None
+        return out
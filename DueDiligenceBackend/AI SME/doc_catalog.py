@@ -0,0 +1,143 @@
+"""
+Guidance document catalog: one row per ingested document, kept in SQLite
+beside the Chroma store and maintained by RAGStore on ingest/delete.
+
+  documents (doc_id, title, source, sha256, uploaded_at, chunks, bytes)
+
+Serves /admin/docs listing/export and SHA-256 dedupe lookups without reading
+chunk metadata back out of Chroma. Chroma stays the source of truth: run
+`python doc_catalog.py` to reconcile the catalog against the collection
+(adds missing documents, fixes chunk counts, drops documents no longer there).
+"""
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+_COLUMNS = ("doc_id", "title", "source", "sha256", "uploaded_at", "chunks", "bytes")
+
+
+class DocCatalog:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL DEFAULT '',
+                    source TEXT NOT NULL DEFAULT '',
+                    sha256 TEXT NOT NULL DEFAULT '',
+                    uploaded_at TEXT NOT NULL DEFAULT '',
+                    chunks INTEGER NOT NULL DEFAULT 0,
+                    bytes INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_documents_sha ON documents(sha256);
+                CREATE INDEX IF NOT EXISTS idx_documents_uploaded ON documents(uploaded_at, title);
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---------------- writes ----------------
+    def upsert_many(self, docs: Iterable[Dict]) -> None:
+        rows = [
+            (d["doc_id"], d.get("title") or "", d.get("source") or "", d.get("sha256") or "",
+             d.get("uploaded_at") or "", int(d.get("chunks") or 0), d.get("bytes"))
+            for d in docs
+        ]
+        if not rows:
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO documents ({', '.join(_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+        finally:
+            conn.close()
+
+    def delete(self, doc_ids: Iterable[str]) -> int:
+        ids = [(d,) for d in doc_ids]
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.executemany("DELETE FROM documents WHERE doc_id = ?", ids).rowcount
+        finally:
+            conn.close()
+
+    # ---------------- reads ----------------
+    def list(self) -> List[Dict]:
+        """Newest first, same order /admin/docs always used."""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM documents ORDER BY uploaded_at DESC, title DESC"
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(r) for r in rows]
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+    def has_sha(self, sha256: str) -> bool:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM documents WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone() is not None
+        finally:
+            conn.close()
+
+    def shas(self) -> Set[str]:
+        conn = self._connect()
+        try:
+            return {r[0] for r in conn.execute("SELECT DISTINCT sha256 FROM documents WHERE sha256 <> ''")}
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        finally:
+            conn.close()
+
+    # ---------------- maintenance ----------------
+    def reconcile(self, chroma_docs: Dict[str, Dict]) -> Dict:
+        """
+        Make the catalog match `chroma_docs` (doc_id -> catalog row aggregated from
+        the collection's chunk metadata). Byte sizes already catalogued are kept.
+        """
+        current = {d["doc_id"]: d for d in self.list()}
+        added, updated = [], []
+        for doc_id, doc in chroma_docs.items():
+            have = current.get(doc_id)
+            if have is None:
+                added.append(doc)
+                continue
+            merged = {**doc, "bytes": doc.get("bytes") if doc.get("bytes") is not None else have.get("bytes")}
+            if any(merged.get(c) != have.get(c) for c in _COLUMNS):
+                updated.append(merged)
+        removed = [doc_id for doc_id in current if doc_id not in chroma_docs]
+        self.upsert_many(added + updated)
+        self.delete(removed)
+        return {"documents": len(chroma_docs), "added": len(added), "updated": len(updated), "removed": len(removed)}
+
+
+if __name__ == "__main__":
+    from rag import RAGStore
+    report = RAGStore().reconcile_catalog()
+    print(f"[catalog] {report['documents']} document(s) in Chroma: {report['added']} added, "
+          f"{report['updated']} updated, {report['removed']} removed")
@@ -0,0 +1,211 @@
+"""
+Embedding service shared by RAGStore.
+
+- In-memory LRU keyed on a hash of the normalized text, so the question encoded
+  for the SME Q&A lookup is reused by dense retrieval (and repeat questions).
+- Explicit batch size for encode() calls; ingest never sends one unbounded batch.
+- Micro-batching: concurrent embed_query() calls arriving within
+  EMBED_MICROBATCH_MS are encoded together in one model call.
+- Persistent chunk cache (SQLite, float32 blobs) keyed on model + text hash, so
+  re-ingesting unchanged documents does not re-encode anything.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from settings import EMBEDDING_MODEL, EMBED_BATCH_SIZE, EMBED_CACHE_SIZE, EMBED_MICROBATCH_MS, EMBED_CACHE_PATH
+
+
+def _norm_text(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip())
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        batch_size: int = EMBED_BATCH_SIZE,
+        cache_size: int = EMBED_CACHE_SIZE,
+        microbatch_ms: int = EMBED_MICROBATCH_MS,
+        cache_path: Optional[Path] = EMBED_CACHE_PATH,
+        model=None,
+    ):
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+        self.model = model
+        self.model_name = model_name
+        self.batch_size = max(1, int(batch_size))
+        self.cache_size = max(0, int(cache_size))
+        self.microbatch_s = max(0, int(microbatch_ms)) / 1000.0
+
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"lru_hits": 0, "disk_hits": 0, "encoded": 0, "encode_calls": 0}
+
+        # micro-batching state
+        self._pending: List[tuple] = []       # (key, text, Future)
+        self._pending_cv = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+        self.cache_path = Path(cache_path) if cache_path else None
+        if self.cache_path:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            try:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS chunk_embeddings (
+                        key TEXT PRIMARY KEY,
+                        dim INTEGER NOT NULL,
+                        vec BLOB NOT NULL
+                    )
+                """)
+            finally:
+                conn.close()
+
+    # ---------------- keys + caches ----------------
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{_norm_text(text)}".encode("utf-8")).hexdigest()
+
+    def _lru_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self.stats["lru_hits"] += 1
+            return vec
+
+    def _lru_put(self, key: str, vec: List[float]) -> None:
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._lru[key] = vec
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.cache_size:
+                self._lru.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.cache_path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _encode(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        batch_size = max(1, int(batch_size or self.batch_size))
+        out: List[List[float]] = []
+        for i in range(0, len(texts), batch_size):
+            batch = texts[i:i + batch_size]
+            vecs = self.model.encode(batch, batch_size=batch_size, normalize_embeddings=True)
+            out.extend(np.asarray(vecs, dtype=np.float32).tolist())
+            with self._lock:
+                self.stats["encode_calls"] += 1
+                self.stats["encoded"] += len(batch)
+        return out
+
+    # ---------------- public API ----------------
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the LRU; only misses (deduplicated) reach the model."""
+        keys = [self._key(t) for t in texts]
+        result: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for k, t in zip(keys, texts):
+            if k in result or k in missing:
+                continue
+            vec = self._lru_get(k)
+            if vec is not None:
+                result[k] = vec
+            else:
+                missing[k] = t
+        if missing:
+            for k, vec in zip(missing, self._encode(list(missing.values()))):
+                result[k] = vec
+                self._lru_put(k, vec)
+        return [result[k] for k in keys]
+
+    def embed_chunks(self, chunks: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """
+        Embed document chunks, reading and filling the persistent on-disk cache.
+        batch_size overrides EMBED_BATCH_SIZE per encode() call (bulk ingest uses larger batches).
+        """
+        if not self.cache_path:
+            return self.embed(chunks)
+        keys = [self._key(c) for c in chunks]
+        result: Dict[str, List[float]] = {}
+        conn = self._connect()
+        try:
+            uniq = list(dict.fromkeys(keys))
+            for i in range(0, len(uniq), 500):
+                part = uniq[i:i + 500]
+                for key, dim, blob in conn.execute(
+                    f"SELECT key, dim, vec FROM chunk_embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ):
+                    result[key] = np.frombuffer(blob, dtype=np.float32, count=dim).tolist()
+            with self._lock:
+                self.stats["disk_hits"] += len(result)
+
+            missing = {k: c for k, c in zip(keys, chunks) if k not in result}
+            if missing:
+                vecs = self._encode(list(missing.values()), batch_size=batch_size)
+                rows = []
+                for k, vec in zip(missing, vecs):
+                    result[k] = vec
+                    rows.append((k, len(vec), np.asarray(vec, dtype=np.float32).tobytes()))
+                conn.executemany("INSERT OR REPLACE INTO chunk_embeddings (key, dim, vec) VALUES (?, ?, ?)", rows)
+                conn.commit()
+        finally:
+            conn.close()
+        return [result[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed one query; concurrent callers are coalesced into a single encode() call."""
+        key = self._key(text)
+        vec = self._lru_get(key)
+        if vec is not None:
+            return vec
+        if not self.microbatch_s:
+            return self.embed([text])[0]
+
+        fut: Future = Future()
+        with self._pending_cv:
+            self._pending.append((key, text, fut))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._drain, name="embed-microbatch", daemon=True)
+                self._worker.start()
+            self._pending_cv.notify()
+        return fut.result()
+
+    def _drain(self) -> None:
+        while True:
+            with self._pending_cv:
+                if not self._pending:
+                    self._pending_cv.wait(timeout=30)
+                    if not self._pending:
+                        self._worker = None
+                        return
+            # Let other in-flight requests join this batch
+            time.sleep(self.microbatch_s)
+            with self._pending_cv:
+                batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            try:
+                vecs = self.embed([t for _, t, _ in batch])
+            except Exception as e:
+                for _, _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, _, fut), vec in zip(batch, vecs):
+                fut.set_result(vec)
+
+    def cache_info(self) -> Dict:
+        with self._lock:
+            info = dict(self.stats)
+            info["lru_size"] = len(self._lru)
+        info["lru_capacity"] = self.cache_size
+        info["batch_size"] = self.batch_size
+        return info
@@ -0,0 +1,272 @@
+"""
+Day-partitioned feedback log with pre-aggregated daily counters.
+
+  data/feedback/YYYY-MM-DD.jsonl   append-only feedback rows for that (UTC) day
+  data/feedback/counters.db        feedback_daily(day, yes, no), bumped on every write
+
+/admin/feedback/data answers totals and the daily trend from the counter rows
+(only the partial first day of a rolling range is read from its partition), and
+exports stream just the partitions inside the requested range.
+
+Run `python feedback_store.py` to rebuild the counters from the partitions.
+"""
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+RANGE_DAYS = {"7d": 7, "30d": 30, "90d": 90}
+UNKNOWN_DAY = "unknown"   # rows whose ts has no usable date
+JSONL_MIGRATED_KEY = "feedback_jsonl_migrated"
+_DAY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _day_of(ts: Optional[str]) -> str:
+    day = (ts or "")[:10]
+    return day if _DAY_RE.match(day) else UNKNOWN_DAY
+
+
+def _parse_ts(ts: Optional[str]) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(ts)
+    except Exception:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+class FeedbackStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "counters.db"
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feedback_daily (
+                    day TEXT PRIMARY KEY,
+                    yes INTEGER NOT NULL DEFAULT 0,
+                    no INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _partition(self, day: str) -> Path:
+        return self.root / f"{day}.jsonl"
+
+    def _days_on_disk(self) -> List[str]:
+        return sorted(p.stem for p in self.root.glob("*.jsonl"))
+
+    # ---------------- writes ----------------
+    def _bump(self, conn: sqlite3.Connection, counts: Dict[str, List[int]]) -> None:
+        conn.executemany("""
+            INSERT INTO feedback_daily (day, yes, no) VALUES (?, ?, ?)
+            ON CONFLICT(day) DO UPDATE SET yes = yes + excluded.yes, no = no + excluded.no
+        """, [(day, c[0], c[1]) for day, c in counts.items()])
+
+    def append(self, item: Dict) -> None:
+        day = _day_of(item.get("ts"))
+        line = json.dumps(item, ensure_ascii=False) + "\n"
+        # One write() per row in append mode, so concurrent workers never interleave lines
+        with self._partition(day).open("a", encoding="utf-8") as f:
+            f.write(line)
+        helpful = item.get("helpful")
+        conn = self._connect()
+        try:
+            self._bump(conn, {day: [int(helpful is True), int(helpful is False)]})
+        finally:
+            conn.close()
+
+    # ---------------- reads ----------------
+    def _window(self, range_code: Optional[str]) -> Tuple[Optional[datetime], Optional[str]]:
+        """(cutoff instant, cutoff day) for a rolling range, or (None, None) for all time."""
+        days = RANGE_DAYS.get(range_code or "")
+        if not days:
+            return None, None
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        return since, since.date().isoformat()
+
+    def _read_partition(self, day: str, since: Optional[datetime] = None) -> Iterator[Dict]:
+        path = self._partition(day)
+        if not path.exists():
+            return
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    r = json.loads(line)
+                except Exception:
+                    continue
+                if since is not None:
+                    dt = _parse_ts(r.get("ts"))
+                    if dt is None or dt < since:
+                        continue
+                yield r
+
+    def _partitions_in(self, range_code: Optional[str]) -> List[Tuple[str, Optional[datetime]]]:
+        """Partitions overlapping the range, oldest first; only the cutoff day needs row filtering."""
+        since, since_day = self._window(range_code)
+        out = []
+        for day in self._days_on_disk():
+            if since_day is None:
+                out.append((day, None))
+            elif day != UNKNOWN_DAY and day >= since_day:
+                out.append((day, since if day == since_day else None))
+        # undated rows sort last, as they did in the single-file log's totals
+        out.sort(key=lambda p: (p[0] == UNKNOWN_DAY, p[0]))
+        return out
+
+    def iter_rows(self, range_code: Optional[str] = None) -> Iterator[Dict]:
+        for day, since in self._partitions_in(range_code):
+            yield from self._read_partition(day, since)
+
+    def summary(self, range_code: Optional[str] = None, recent: int = 50) -> Dict:
+        since, since_day = self._window(range_code)
+        conn = self._connect()
+        try:
+            if since_day is None:
+                rows = conn.execute("SELECT day, yes, no FROM feedback_daily ORDER BY day").fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT day, yes, no FROM feedback_daily WHERE day > ? AND day <> ? ORDER BY day",
+                    (since_day, UNKNOWN_DAY),
+                ).fetchall()
+        finally:
+            conn.close()
+
+        by_day = {day: [yes, no] for day, yes, no in rows}
+        if since_day is not None:
+            # The cutoff day is only partly inside a rolling window: count it from its rows
+            partial = [0, 0]
+            for r in self._read_partition(since_day, since):
+                partial[0] += r.get("helpful") is True
+                partial[1] += r.get("helpful") is False
+            if partial != [0, 0]:
+                by_day[since_day] = partial
+
+        yes = sum(v[0] for v in by_day.values())
+        no = sum(v[1] for v in by_day.values())
+        trend = [
+            {"date": d, "yes": v[0], "no": v[1]}
+            for d, v in sorted(by_day.items())
+            if d != UNKNOWN_DAY and (v[0] or v[1])
+        ]
+        return {
+            "totals": {"yes": yes, "no": no, "rate": round(yes / (yes + no), 3) if (yes + no) else 0.0},
+            "by_day": trend,
+            "recent": self._recent(range_code, recent),
+        }
+
+    def _recent(self, range_code: Optional[str], limit: int) -> List[Dict]:
+        """Last `limit` rows in the range, reading partitions newest-first until filled."""
+        out: List[Dict] = []
+        for day, since in reversed(self._partitions_in(range_code)):
+            rows = list(self._read_partition(day, since))
+            out = rows[-(limit - len(out)):] + out
+            if len(out) >= limit:
+                break
+        return out
+
+    # ---------------- maintenance ----------------
+    def _recount(self, conn: sqlite3.Connection) -> int:
+        """Replace the counters with a recount of every partition (caller holds the transaction)."""
+        counts: Dict[str, List[int]] = {}
+        total = 0
+        for day in self._days_on_disk():
+            c = counts.setdefault(day, [0, 0])
+            for r in self._read_partition(day):
+                c[0] += r.get("helpful") is True
+                c[1] += r.get("helpful") is False
+                total += 1
+        conn.execute("DELETE FROM feedback_daily")
+        self._bump(conn, counts)
+        return total
+
+    def rebuild_counters(self) -> int:
+        """Recount every partition (e.g. after a crash between append and counter bump)."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            total = self._recount(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return total
+
+    def migrate_jsonl(self, path: Path) -> int:
+        """
+        One-shot split of a legacy single-file feedback.jsonl into day partitions.
+        Every uvicorn worker calls this on startup: the split, the rename to
+        *.migrated and the counter rebuild run while holding a BEGIN IMMEDIATE
+        transaction on counters.db that also writes a "migrated" marker row, so
+        only the first worker splits the file. Returns rows counted.
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (JSONL_MIGRATED_KEY,)).fetchone():
+                conn.execute("ROLLBACK")
+                _retire(path)
+                return 0
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                conn.execute("ROLLBACK")
+                return 0
+            by_day: Dict[str, List[str]] = {}
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    r = json.loads(line)
+                except Exception:
+                    continue
+                by_day.setdefault(_day_of(r.get("ts")), []).append(json.dumps(r, ensure_ascii=False) + "\n")
+            for day, day_lines in by_day.items():
+                with self._partition(day).open("a", encoding="utf-8") as f:
+                    f.writelines(day_lines)
+            # Renamed before the marker commits: a crash in between leaves no file to import again
+            _retire(path)
+            total = self._recount(conn)
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (JSONL_MIGRATED_KEY, path.name))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        print(f"[feedback] migrated {sum(len(v) for v in by_day.values())} row(s) into {len(by_day)} day partition(s)")
+        return total
+
+
+def _retire(path: Path) -> None:
+    """Rename an imported JSONL file to *.migrated; another worker may have done it already."""
+    try:
+        path.replace(path.with_name(path.name + ".migrated"))
+    except FileNotFoundError:
+        pass
+
+if __name__ == "__main__":
+    from settings import DATA_DIR
+    print(f"[feedback] recounted {FeedbackStore(DATA_DIR / 'feedback').rebuild_counters()} row(s)")
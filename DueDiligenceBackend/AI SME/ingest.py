@@ -1,10 +1,198 @@
+"""
+Bulk ingest of guidance documents into the RAG store.
+
+    python ingest.py                      # everything under DATA_DIR
+    python ingest.py /path/to/library -w 8 --json report.json
+
+Pipeline:
+  1. hash     files are SHA-256'd on a thread pool and checked against the set of
+              already-ingested hashes from the document catalog, so unchanged
+              files are skipped without a Chroma lookup per file
+  2. extract  PDF/DOCX text extraction + chunking in a (spawned) process pool
+  3. embed    chunks are buffered across documents and embedded in large batches
+  4. write    each buffer goes to Chroma (and the BM25 index) in bulk add() calls
+
+Only document types in rag.DOC_SUFFIXES are picked up, so the app's own state
+files in DATA_DIR (config.json, *.jsonl, *.db) are ignored.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from pathlib import Path
-from rag import RAGPipeline
-from settings import DATA_DIR
+from typing import Dict, Iterator, List
+
+from rag import RAGPipeline, DOC_SUFFIXES, chunk_file, file_sha256
+from settings import DATA_DIR, INGEST_WORKERS, INGEST_EMBED_BATCH_SIZE, INGEST_FLUSH_CHUNKS
+
+
+def iter_documents(paths: List[Path]) -> Iterator[Path]:
+    for root in paths:
+        if root.is_file():
+            candidates = [root]
+        else:
+            candidates = sorted(p for p in root.rglob("*") if p.is_file())
+        for p in candidates:
+            if p.suffix.lower() in DOC_SUFFIXES and not p.name.startswith("."):
+                yield p
+
+
+def _extract(path: str) -> Dict:
+    """Runs in a worker process: read + chunk one file."""
+    started = time.perf_counter()
+    try:
+        chunks, sections = chunk_file(Path(path))
+    except Exception as e:
+        return {"path": path, "status": "error", "error": str(e), "seconds": time.perf_counter() - started}
+    if not chunks:
+        return {"path": path, "status": "empty", "seconds": time.perf_counter() - started}
+    return {
+        "path": path,
+        "status": "ok",
+        "chunks": chunks,
+        "sections": sections,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+class BulkIngest:
+    def __init__(self, pipeline: RAGPipeline, workers: int = INGEST_WORKERS,
+                 embed_batch_size: int = INGEST_EMBED_BATCH_SIZE, flush_chunks: int = INGEST_FLUSH_CHUNKS):
+        self.pipeline = pipeline
+        self.workers = workers or os.cpu_count() or 1
+        self.embed_batch_size = embed_batch_size
+        self.flush_chunks = flush_chunks
+        self._buffer: List[tuple] = []     # (doc_id, chunks, meta, sections)
+        self._buffered = 0
+        self.stats = {
+            "files_seen": 0, "ingested": 0, "skipped_duplicate": 0, "empty": 0, "errors": 0,
+            "chunks": 0, "bytes": 0,
+            "seconds": {"hash": 0.0, "extract_cpu": 0.0, "embed_write": 0.0, "total": 0.0},
+        }
+        self.results: List[Dict] = []
+
+    # ---------------- stages ----------------
+    def _hash_all(self, files: List[Path]) -> Dict[Path, str]:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(8, self.workers * 2)) as pool:
+            shas = dict(zip(files, pool.map(file_sha256, files)))
+        self.stats["seconds"]["hash"] += time.perf_counter() - started
+        return shas
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        started = time.perf_counter()
+        n = self.pipeline.store.add_docs_bulk(self._buffer, embed_batch_size=self.embed_batch_size)
+        self.stats["seconds"]["embed_write"] += time.perf_counter() - started
+        self.stats["chunks"] += n
+        print(f"[ingest] wrote {len(self._buffer)} document(s), {n} chunk(s) "
+              f"in {time.perf_counter() - started:.1f}s")
+        self._buffer = []
+        self._buffered = 0
+
+    def run(self, paths: List[Path]) -> Dict:
+        t0 = time.perf_counter()
+        files = list(iter_documents(paths))
+        self.stats["files_seen"] = len(files)
+        shas = self._hash_all(files)
+
+        known = self.pipeline.store.known_shas()
+        todo: Dict[str, Path] = {}
+        for path in files:
+            sha = shas[path]
+            if sha in known:
+                self.stats["skipped_duplicate"] += 1
+                self.results.append({"status": "skipped_duplicate", "sha256": sha, "title": path.name})
+                continue
+            known.add(sha)   # identical copies later in the same run are duplicates too
+            todo[str(path)] = path
+        print(f"[ingest] {len(files)} file(s), {len(todo)} new, {self.stats['skipped_duplicate']} unchanged; "
+              f"extracting with {self.workers} worker(s)")
+
+        if todo:
+            # Spawn, not fork: this process already runs torch (embedder) and Chroma
+            # threads, and forked children can hang on their inherited locks
+            spawn = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=spawn) as pool:
+                futures = [pool.submit(_extract, p) for p in todo]
+                for fut in as_completed(futures):
+                    self._collect(fut.result(), shas)
+            self._flush()
+            if self.stats["ingested"]:
+                self.pipeline.answer_cache.bump_version()
+
+        total = time.perf_counter() - t0
+        self.stats["seconds"]["total"] = total
+        self.stats["seconds"] = {k: round(v, 2) for k, v in self.stats["seconds"].items()}
+        self.stats["throughput"] = {
+            "files_per_s": round(self.stats["ingested"] / total, 2) if total else 0.0,
+            "chunks_per_s": round(self.stats["chunks"] / total, 1) if total else 0.0,
+            "mb_per_s": round(self.stats["bytes"] / 1e6 / total, 2) if total else 0.0,
+        }
+        return self.stats
+
+    def _collect(self, res: Dict, shas: Dict[Path, str]) -> None:
+        path = Path(res["path"])
+        self.stats["seconds"]["extract_cpu"] += res.get("seconds", 0.0)
+        if res["status"] == "error":
+            self.stats["errors"] += 1
+            print(f"[ingest] failed {path}: {res['error']}")
+            self.results.append({"status": "error", "path": str(path), "error": res["error"]})
+            return
+        if res["status"] == "empty":
+            self.stats["empty"] += 1
+            self.results.append({"status": "empty", "path": str(path)})
+            return
+
+        doc_id = str(uuid.uuid4())
+        meta = {
+            "doc_id": doc_id,
+            "title": path.name,
+            "source": str(path),
+            "sha256": shas[path],
+            "uploaded_at": datetime.now(timezone.utc).isoformat(),
+            "bytes": path.stat().st_size,
+        }
+        self._buffer.append((doc_id, res["chunks"], meta, res.get("sections")))
+        self._buffered += len(res["chunks"])
+        self.stats["ingested"] += 1
+        self.stats["bytes"] += meta["bytes"]
+        self.results.append({"status": "ok", "doc_id": doc_id, "chunks": len(res["chunks"]),
+                             "title": meta["title"], "sha256": meta["sha256"]})
+        if self._buffered >= self.flush_chunks:
+            self._flush()
+
+
+def main(argv=None) -> Dict:
+    ap = argparse.ArgumentParser(description="Bulk-ingest guidance documents into the AI SME corpus.")
+    ap.add_argument("paths", nargs="*", type=Path, help="files or folders (default: DATA_DIR)")
+    ap.add_argument("-w", "--workers", type=int, default=INGEST_WORKERS, help="extraction processes (0 = CPU count)")
+    ap.add_argument("--embed-batch-size", type=int, default=INGEST_EMBED_BATCH_SIZE)
+    ap.add_argument("--flush-chunks", type=int, default=INGEST_FLUSH_CHUNKS)
+    ap.add_argument("--json", type=Path, help="also write the throughput report here")
+    args = ap.parse_args(argv)
 
-if __name__ == "__main__":
-    p = RAGPipeline()
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    for path in DATA_DIR.iterdir():
-        if path.is_file():
-            print(p.ingest_path(path))
+    job = BulkIngest(RAGPipeline(), workers=args.workers,
+                     embed_batch_size=args.embed_batch_size, flush_chunks=args.flush_chunks)
+    stats = job.run(args.paths or [DATA_DIR])
+
+    s = stats["seconds"]
+    t = stats["throughput"]
+    print(f"[ingest] done: {stats['ingested']} ingested, {stats['skipped_duplicate']} unchanged, "
+          f"{stats['empty']} empty, {stats['errors']} failed; {stats['chunks']} chunks, "
+          f"{stats['bytes'] / 1e6:.1f} MB in {s['total']}s")
+    print(f"[ingest] {t['files_per_s']} files/s, {t['chunks_per_s']} chunks/s, {t['mb_per_s']} MB/s "
+          f"(hash {s['hash']}s, extract {s['extract_cpu']}s CPU, embed+write {s['embed_write']}s)")
+    if args.json:
+        args.json.write_text(json.dumps({"stats": stats, "files": job.results}, indent=2), encoding="utf-8")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+BM25 lexical index over guidance chunks, kept in SQLite beside the Chroma store.
+
+  chunks    (chunk_id, doc_id, length)         one row per indexed chunk
+  postings  (term, chunk_id, tf)               inverted index, looked up by term
+
+Chunks are added/removed together with their Chroma rows (RAGStore.add_docs /
+delete_doc), so a query touches only the posting lists of its own terms
+instead of scanning documents. rrf_fuse() merges the BM25 ranking with the
+dense ranking.
+"""
+import math
+import re
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Keep dotted/slashed identifiers ("2017/692", "5.2.1", "reg.28") as one token,
+# and index their parts too so "regulation 28" still matches "reg.28".
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[./-][a-z0-9]+)*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "if",
+    "in", "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "we", "what", "when",
+    "which", "who", "why", "with", "you",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        if tok in _STOPWORDS:
+            continue
+        tokens.append(tok)
+        parts = re.split(r"[./-]", tok)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p and p not in _STOPWORDS)
+    return tokens
+
+
+def rrf_fuse(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """Reciprocal-rank fusion: score(id) = sum over rankings of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, cid in enumerate(ranking, start=1):
+            scores[cid] = scores.get(cid, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda cid: -scores[cid])
+
+
+class BM25Index:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    chunk_id TEXT PRIMARY KEY,
+                    doc_id TEXT NOT NULL,
+                    length INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks(doc_id);
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (term, chunk_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings(chunk_id);
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---------------- writes ----------------
+    def add(self, doc_id: str, chunk_ids: List[str], texts: List[str]) -> None:
+        self.add_many([(doc_id, chunk_ids, texts)])
+
+    def add_many(self, docs: Sequence[Tuple[str, List[str], List[str]]]) -> None:
+        """Index several documents' chunks in one transaction: [(doc_id, chunk_ids, texts), ...]."""
+        chunk_rows = []
+        posting_rows = []
+        for doc_id, chunk_ids, texts in docs:
+            for cid, text in zip(chunk_ids, texts):
+                counts = Counter(tokenize(text))
+                chunk_rows.append((cid, doc_id, sum(counts.values())))
+                posting_rows.extend((term, cid, tf) for term, tf in counts.items())
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO chunks (chunk_id, doc_id, length) VALUES (?, ?, ?)", chunk_rows)
+                conn.executemany("INSERT OR REPLACE INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", posting_rows)
+        finally:
+            conn.close()
+
+    def delete_doc(self, doc_id: str) -> int:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "DELETE FROM postings WHERE chunk_id IN (SELECT chunk_id FROM chunks WHERE doc_id = ?)", (doc_id,)
+                )
+                return conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,)).rowcount
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        finally:
+            conn.close()
+
+    # ---------------- search ----------------
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k (chunk_id, bm25 score), best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        conn = self._connect()
+        try:
+            n, avgdl = conn.execute("SELECT COUNT(*), AVG(length) FROM chunks").fetchone()
+            if not n:
+                return []
+            avgdl = avgdl or 1.0
+            scores: Dict[str, float] = {}
+            for term in terms:
+                rows = conn.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p JOIN chunks c ON c.chunk_id = p.chunk_id "
+                    "WHERE p.term = ?", (term,)
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+                for cid, tf, length in rows:
+                    denom = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+                    scores[cid] = scores.get(cid, 0.0) + idf * tf * (BM25_K1 + 1) / denom
+        finally:
+            conn.close()
+        return sorted(scores.items(), key=lambda kv: -kv[1])[:k]
@@ -1,15 +1,55 @@
-import os, requests
+import os, re, json, time, requests
+from typing import Iterator
 from dotenv import load_dotenv
 # Ensure .env is loaded before accessing environment variables
 load_dotenv()
 
 from settings import LLM_BACKEND, OLLAMA_MODEL, OLLAMA_URL, OPENAI_MODEL
 
+# LLM_BACKEND may be overridden per environment, e.g. LLM_BACKEND=stub for offline tests
+LLM_BACKEND = os.environ.get("LLM_BACKEND", LLM_BACKEND)
+
+FALLBACK_ANSWER = (
+    "I am not able to confirm based on the current guidance. This has been raised as a referral "
+    "for further review and a response will be provided as soon as possible."
+)
+
+
+class StubLLM:
+    """
+    Offline backend: answers with the first sentences of the retrieved guidance
+    (or the standard fallback when none was retrieved), streamed word by word.
+    Deterministic, so tests and benchmarks can run without a model.
+    """
+    def __init__(self, token_delay_ms: int = int(os.environ.get("STUB_LLM_DELAY_MS", "0"))):
+        self.token_delay = token_delay_ms / 1000.0
+
+    def _answer(self, prompt: str) -> str:
+        m = re.search(r"Guidance:\n(.*?)\n\nQuestion:", prompt, flags=re.S)
+        guidance = (m.group(1) if m else "").strip()
+        if not guidance or guidance == "(no guidance retrieved)":
+            return FALLBACK_ANSWER
+        first_block = guidance.split("\n\n---\n\n")[0]
+        sentences = re.split(r"(?<=[.!?])\s+", " ".join(first_block.split()))
+        return " ".join(sentences[:2]).strip()
+
+    def generate(self, prompt: str) -> str:
+        return self._answer(prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        for i, word in enumerate(self._answer(prompt).split(" ")):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+
 class LLMClient:
     def __init__(self):
         self.backend = LLM_BACKEND
         self.client = None
-        if self.backend == "openai":
+        if self.backend == "stub":
+            self.client = StubLLM()
+        elif self.backend == "openai":
             from openai import OpenAI
             api_key = os.environ.get("OPENAI_API_KEY")
             if not api_key:
@@ -17,6 +57,9 @@ class LLMClient:
             self.client = OpenAI(api_key=api_key)
 
     def generate(self, prompt: str) -> str:
+        if self.backend == "stub":
+            return self.client.generate(prompt)
+
         if self.backend == "ollama":
             r = requests.post(
                 f"{OLLAMA_URL}/api/generate",
@@ -46,3 +89,45 @@ class LLMClient:
             print(f"[LLM ERROR] OpenAI API error: {str(e)}")
             print(traceback.format_exc())
             raise
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Yield answer text deltas as the backend produces them."""
+        if self.backend == "stub":
+            yield from self.client.generate_stream(prompt)
+            return
+
+        if self.backend == "ollama":
+            with requests.post(
+                f"{OLLAMA_URL}/api/generate",
+                json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": True},
+                stream=True,
+                timeout=(10, 120),
+            ) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    part = json.loads(line)
+                    if part.get("response"):
+                        yield part["response"]
+                    if part.get("done"):
+                        break
+            return
+
+        # OpenAI backend
+        print(f"[LLM] Streaming OpenAI model: {OPENAI_MODEL} (prompt {len(prompt)} chars)")
+        stream = self.client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.2,
+            stream=True,
+        )
+        for event in stream:
+            if not event.choices:
+                continue
+            delta = event.choices[0].delta.content
+            if delta:
+                yield delta
@@ -1,12 +1,14 @@
 import re
+import time
 import uuid
 import hashlib
-from typing import List, Dict, Optional
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Iterator, Tuple
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 
 import chromadb
-from sentence_transformers import SentenceTransformer
 
 from settings import (
     CHROMA_DIR,
@@ -15,6 +17,12 @@ from settings import (
     CHUNK_OVERLAP,
     TOP_K,
     SYSTEM_PROMPT,
+    LEXICAL_INDEX_PATH,
+    HYBRID_CANDIDATES,
+    RRF_K,
+    DOC_CATALOG_PATH,
+    CHUNKER,
+    RERANK_CANDIDATES,
     # Optional (may not exist in older settings.py):
     # QA_COLLECTION_NAME, QA_MIN_SIM, QA_MAX_RESULTS, QA_MAX_AGE_DAYS, SHOW_QA_PROVENANCE_DEFAULT
 )
@@ -46,11 +54,20 @@ except Exception:
     SHOW_QA_PROVENANCE_DEFAULT = False
 
 from llm import LLMClient
+from embeddings import EmbeddingService
+from answer_cache import AnswerCache
+from lexical_index import BM25Index, rrf_fuse
+from doc_catalog import DocCatalog
+from chunker import chunk_document, chunk_text
+from context_builder import ContextAssembler
 
 
 # =========================
 # Helpers: I/O + chunking
 # =========================
+DOC_SUFFIXES = {".pdf", ".txt", ".md", ".docx", ".doc", ".csv"}
+
+
 def read_text_from_file(path: Path) -> str:
     """Extract plain text from supported file types."""
     if path.suffix.lower() == ".pdf":
@@ -84,39 +101,93 @@ def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
     return h.hexdigest()
 
 
-def chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
-    """Simple fixed-size chunking with overlap."""
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
-    chunks: List[str] = []
-    start = 0
-    while start < len(text):
-        end = min(start + chunk_size, len(text))
-        chunks.append(text[start:end])
-        if end == len(text):
-            break
-        start = max(0, end - overlap)
-    return [c for c in chunks if c.strip()]
+def chunk_file(path: Path) -> Tuple[List[str], Optional[List[str]]]:
+    """(chunks, section paths) for a file with the configured CHUNKER; sections is None for "chars"."""
+    if CHUNKER == "chars":
+        return chunk_text(read_text_from_file(path), CHUNK_SIZE, CHUNK_OVERLAP), None
+    pieces = chunk_document(path)
+    return [p["text"] for p in pieces], [p["section"] for p in pieces]
 
 
 # =========================
-# Embeddings
+# Answer sanitizing
 # =========================
-class LocalEmbedder:
-    def __init__(self, model_name: str = EMBEDDING_MODEL):
-        self.model = SentenceTransformer(model_name)
+_CITE_NUM_RE = re.compile(r'\s*\[\d+\]\s*$')
+_CITE_TAG_RE = re.compile(r'\s*\[(?:source|reviewer|guidance|doc|ref).*?\]\s*$', flags=re.I)
+# Trailing run of whitespace and (possibly unterminated) bracket groups
+_TRAILING_BRACKETS_RE = re.compile(r'(?:\s*\[[^\[\]]*\]?)*\s*$')
+_CITE_TAG_OPEN_RE = re.compile(r'\[(?:source|reviewer|guidance|doc|ref)', flags=re.I)
+
+
+def sanitize_answer(text: str) -> str:
+    """Strip a trailing [n] or [source ...]-style citation from an answer."""
+    text = _CITE_NUM_RE.sub('', text)
+    return _CITE_TAG_RE.sub('', text)
+
+
+class StreamSanitizer:
+    """
+    Incremental sanitize_answer() for streamed text. Text is released as soon
+    as it can no longer be part of a trailing citation; held back are the
+    trailing run of whitespace/brackets and anything from a [source...-style
+    opener that could still close at the end. finish() sanitizes the rest.
+    Concatenated output equals sanitize_answer(full_text.strip()).
+    """
+    def __init__(self):
+        self._tail = ""
+        self._started = False
+
+    def feed(self, delta: str) -> str:
+        buf = self._tail + delta
+        if not self._started:
+            buf = buf.lstrip()
+            if not buf:
+                self._tail = ""
+                return ""
+            self._started = True
+        cut = self._hold_from(buf)
+        self._tail = buf[cut:]
+        return buf[:cut]
+
+    @staticmethod
+    def _hold_from(buf: str) -> int:
+        cut = _TRAILING_BRACKETS_RE.search(buf).start()
+        for m in _CITE_TAG_OPEN_RE.finditer(buf, 0, cut):
+            p = m.start()
+            eol = buf.find("\n", p)
+            # _CITE_TAG_RE's ".*?" stays on the opener's line; once that line has ended the
+            # opener can only match through a "]" followed by nothing but the trailing run
+            if eol == -1 or any(
+                ch == "]" and _TRAILING_BRACKETS_RE.fullmatch(buf, r + 1)
+                for r, ch in enumerate(buf[p:eol], start=p)
+            ):
+                cut = p
+                break
+        while cut and buf[cut - 1].isspace():
+            cut -= 1
+        return cut
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        return self.model.encode(texts, normalize_embeddings=True).tolist()
+    def finish(self) -> str:
+        tail, self._tail = self._tail, ""
+        return sanitize_answer(tail.rstrip())
 
 
 # =========================
 # Vector store (Chroma)
 # =========================
 class RAGStore:
-    def __init__(self, collection_name: str = "local_rag", persist_dir: Path = CHROMA_DIR):
+    def __init__(
+        self,
+        collection_name: str = "local_rag",
+        persist_dir: Path = CHROMA_DIR,
+        lexical_path: Path = LEXICAL_INDEX_PATH,
+        catalog_path: Path = DOC_CATALOG_PATH,
+        embedder: Optional[EmbeddingService] = None,
+    ):
         persist_dir.mkdir(parents=True, exist_ok=True)
+        self.persist_dir = persist_dir
         self.client = chromadb.PersistentClient(path=str(persist_dir))
-        self.embedder = LocalEmbedder()
+        self.embedder = embedder or EmbeddingService(EMBEDDING_MODEL)
 
         # Main guidance collection
         self.collection = self.client.get_or_create_collection(
@@ -130,15 +201,65 @@ class RAGStore:
             metadata={"hnsw:space": "cosine"},
         )
 
+        # BM25 index over the same chunks; built once from Chroma if missing
+        self.lexical = BM25Index(lexical_path)
+        if self.lexical.count() == 0 and self.collection.count() > 0:
+            self.rebuild_lexical_index()
+
+        # One row per document for listing/dedupe; built once from Chroma if missing
+        self.catalog = DocCatalog(catalog_path)
+        if self.catalog.count() == 0 and self.collection.count() > 0:
+            self.reconcile_catalog()
+
     # ---- guidance documents ----
-    def add_docs(self, doc_id: str, chunks: List[str], meta: Dict) -> int:
-        ids = [f"{doc_id}-{i}" for i in range(len(chunks))]
-        embeddings = self.embedder.embed(chunks)
-        metadatas = [{**meta, "chunk": i} for i in range(len(chunks))]
-        self.collection.add(ids=ids, metadatas=metadatas, documents=chunks, embeddings=embeddings)
-        return len(chunks)
+    def add_docs(self, doc_id: str, chunks: List[str], meta: Dict, sections: Optional[List[str]] = None) -> int:
+        return self.add_docs_bulk([(doc_id, chunks, meta, sections)])
+
+    def add_docs_bulk(self, docs: List[Tuple[str, List[str], Dict, Optional[List[str]]]],
+                      embed_batch_size: Optional[int] = None) -> int:
+        """
+        Add several documents at once: [(doc_id, chunks, meta, sections or None), ...].
+        All chunks are embedded together and written to Chroma in as few add() calls
+        as it allows.
+        """
+        ids: List[str] = []
+        metadatas: List[Dict] = []
+        documents: List[str] = []
+        lexical_rows = []
+        for doc_id, chunks, meta, sections in docs:
+            doc_ids = [f"{doc_id}-{i}" for i in range(len(chunks))]
+            ids.extend(doc_ids)
+            for i in range(len(chunks)):
+                m = {**meta, "chunk": i}
+                if sections:
+                    m["section"] = sections[i]
+                metadatas.append(m)
+            documents.extend(chunks)
+            lexical_rows.append((doc_id, doc_ids, chunks))
+        if not ids:
+            return 0
+        embeddings = self.embedder.embed_chunks(documents, batch_size=embed_batch_size)
+        step = self._max_write_batch()
+        for i in range(0, len(ids), step):
+            self.collection.add(
+                ids=ids[i:i + step],
+                metadatas=metadatas[i:i + step],
+                documents=documents[i:i + step],
+                embeddings=embeddings[i:i + step],
+            )
+        self.lexical.add_many(lexical_rows)
+        self.catalog.upsert_many({**meta, "doc_id": doc_id, "chunks": len(chunks)} for doc_id, chunks, meta, _ in docs)
+        return len(ids)
+
+    def _max_write_batch(self) -> int:
+        try:
+            return int(self.client.max_batch_size) or 5000
+        except Exception:
+            return 5000
 
     def delete_doc(self, doc_id: str) -> int:
+        self.lexical.delete_doc(doc_id)
+        self.catalog.delete([doc_id])
         results = self.collection.get(where={"doc_id": doc_id})
         if results and results.get("ids"):
             self.collection.delete(ids=results["ids"])
@@ -146,62 +267,97 @@ class RAGStore:
         return 0
 
     def exists_sha(self, sha256: str) -> bool:
-        # Chroma 0.5.x returns ids by default. Do not pass include=["ids"].
-        results = self.collection.get(where={"sha256": sha256}, limit=1)
-        return bool(results and results.get("ids"))
+        return self.catalog.has_sha(sha256)
+
+    def known_shas(self) -> set:
+        """SHA-256 of every ingested document."""
+        return self.catalog.shas()
 
     def query(self, text: str, top_k: int = TOP_K):
-        query_embed = self.embedder.embed([text])[0]
+        query_embed = self.embedder.embed_query(text)
         return self.collection.query(query_embeddings=[query_embed], n_results=top_k)
 
+    def hybrid_query(self, text: str, top_k: int = TOP_K, candidates: int = HYBRID_CANDIDATES) -> Dict:
+        """
+        Dense + BM25 candidates fused with reciprocal-rank fusion. Returns the
+        Chroma query shape ({"ids": [[...]], "documents": [[...]], "metadatas": [[...]]}).
+        """
+        n = max(top_k, candidates)
+        dense = self.query(text, top_k=n)
+        dense_ids = (dense.get("ids") or [[]])[0]
+        lexical_ids = [cid for cid, _ in self.lexical.search(text, n)]
+
+        by_id = {
+            cid: (doc, meta)
+            for cid, doc, meta in zip(dense_ids, (dense.get("documents") or [[]])[0], (dense.get("metadatas") or [[]])[0])
+        }
+        fused = rrf_fuse([dense_ids, lexical_ids], k=RRF_K)[:top_k]
+        missing = [cid for cid in fused if cid not in by_id]
+        if missing:
+            batch = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            for cid, doc, meta in zip(batch.get("ids") or [], batch.get("documents") or [], batch.get("metadatas") or []):
+                by_id[cid] = (doc, meta)
+        fused = [cid for cid in fused if cid in by_id]   # drop ids gone from Chroma
+        return {
+            "ids": [fused],
+            "documents": [[by_id[cid][0] for cid in fused]],
+            "metadatas": [[by_id[cid][1] for cid in fused]],
+            "dense_hits": len(dense_ids),
+            "lexical_hits": len(lexical_ids),
+        }
+
+    def rebuild_lexical_index(self, batch_size: int = 1000) -> int:
+        """(Re)index every guidance chunk currently in Chroma. Returns chunks indexed."""
+        total = 0
+        offset = 0
+        while True:
+            batch = self.collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            ids = batch.get("ids") or []
+            if not ids:
+                break
+            by_doc: Dict[str, List[Tuple[str, str]]] = {}
+            for cid, doc, meta in zip(ids, batch.get("documents") or [], batch.get("metadatas") or []):
+                by_doc.setdefault((meta or {}).get("doc_id", ""), []).append((cid, doc or ""))
+            for doc_id, rows in by_doc.items():
+                self.lexical.add(doc_id, [r[0] for r in rows], [r[1] for r in rows])
+            total += len(ids)
+            offset += len(ids)
+        print(f"[lexical] indexed {total} chunk(s) from Chroma")
+        return total
+
     def list_docs(self) -> List[Dict]:
-        by_doc: Dict[str, Dict] = {}
-        # ChromaDB doesn't allow empty where clause in newer versions
-        try:
-            id_batch = self.collection.get(limit=100_000)
-        except Exception:
-            # Fallback for older versions
-            id_batch = self.collection.get(where={}, limit=100_000)
-        ids_ll = id_batch.get("ids", []) or []
-
-        flat_ids: List[str] = []
-        for row in ids_ll:
-            if isinstance(row, list):
-                flat_ids.extend(row)
-            elif isinstance(row, str):
-                flat_ids.append(row)
-
-        if not flat_ids:
-            return []
-
-        meta_batch = self.collection.get(ids=flat_ids, include=["metadatas"])
-        metas_ll = meta_batch.get("metadatas", []) or []
-
-        flat_metas: List[Dict] = []
-        for row in metas_ll:
-            if isinstance(row, list):
-                flat_metas.extend(row)
-            elif isinstance(row, dict):
-                flat_metas.append(row)
-
-        for m in flat_metas:
-            did = m.get("doc_id")
-            if not did:
-                continue
-            entry = by_doc.setdefault(
-                did,
-                {
-                    "doc_id": did,
-                    "title": m.get("title", "unknown"),
-                    "source": m.get("source", ""),
-                    "sha256": m.get("sha256", ""),
-                    "uploaded_at": m.get("uploaded_at", ""),  # ISO string
-                    "chunks": 0,
-                },
-            )
-            entry["chunks"] += 1
+        return self.catalog.list()
 
-        return sorted(by_doc.values(), key=lambda x: (x.get("uploaded_at") or "", x["title"]), reverse=True)
+    def reconcile_catalog(self, page_size: int = 5000) -> Dict:
+        """Rebuild document catalog rows from the chunk metadata in Chroma (the source of truth)."""
+        by_doc: Dict[str, Dict] = {}
+        offset = 0
+        while True:
+            batch = self.collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            metas = batch.get("metadatas") or []
+            if not metas:
+                break
+            for m in metas:
+                did = (m or {}).get("doc_id")
+                if not did:
+                    continue
+                entry = by_doc.setdefault(
+                    did,
+                    {
+                        "doc_id": did,
+                        "title": m.get("title", "unknown"),
+                        "source": m.get("source", ""),
+                        "sha256": m.get("sha256", ""),
+                        "uploaded_at": m.get("uploaded_at", ""),  # ISO string
+                        "chunks": 0,
+                        "bytes": m.get("bytes"),
+                    },
+                )
+                entry["chunks"] += 1
+            offset += len(metas)
+        report = self.catalog.reconcile(by_doc)
+        print(f"[catalog] reconciled: {report}")
+        return report
 
     # ---- SME Q&A (resolutions) ----
     def add_qa(self, qa_id: str, question: str, answer: str, meta: Dict) -> None:
@@ -214,7 +370,7 @@ class RAGStore:
         )
 
     def query_qa(self, question: str, n: int) -> Dict:
-        emb_q = self.embedder.embed([question])[0]
+        emb_q = self.embedder.embed_query(question)
         return self.qa_collection.query(query_embeddings=[emb_q], n_results=n)
 
 
@@ -222,9 +378,27 @@ class RAGStore:
 # High-level pipeline
 # =========================
 class RAGPipeline:
-    def __init__(self):
-        self.store = RAGStore()
+    def __init__(self, store: Optional[RAGStore] = None):
+        self.store = store or RAGStore()
         self.llm = LLMClient()
+        self.context = ContextAssembler()
+        self.answer_cache = AnswerCache(self.store.persist_dir / "corpus_version", embed_fn=self.store.embedder.embed_query)
+        self._timings = threading.local()
+
+    # ---- per-stage timing (benchmarks, logs) ----
+    @contextmanager
+    def _stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            t = getattr(self._timings, "current", None)
+            if t is not None:
+                t[name] = t.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    def last_timings(self) -> Dict[str, float]:
+        """Milliseconds per stage of this thread's last answer, e.g. {"embed": 3.1, "generate": 420.0}."""
+        return dict(getattr(self._timings, "current", None) or {})
 
     # ---- ingest documents ----
     def ingest_path(self, path: Path, title: Optional[str] = None) -> Dict:
@@ -232,11 +406,10 @@ class RAGPipeline:
         if self.store.exists_sha(sha):
             return {"status": "skipped_duplicate", "sha256": sha, "title": title or path.name}
 
-        raw = read_text_from_file(path)
-        if not raw.strip():
+        chunks, sections = chunk_file(path)
+        if not chunks:
             return {"status": "empty", "path": str(path)}
 
-        chunks = chunk_text(raw, CHUNK_SIZE, CHUNK_OVERLAP)
         doc_id = str(uuid.uuid4())
         uploaded_at = datetime.now(timezone.utc).isoformat()
 
@@ -246,8 +419,10 @@ class RAGPipeline:
             "source": str(path),
             "sha256": sha,
             "uploaded_at": uploaded_at,
+            "bytes": path.stat().st_size,
         }
-        n = self.store.add_docs(doc_id, chunks, meta)
+        n = self.store.add_docs(doc_id, chunks, meta, sections)
+        self.answer_cache.bump_version()
         return {
             "status": "ok",
             "doc_id": doc_id,
@@ -259,6 +434,8 @@ class RAGPipeline:
 
     def delete(self, doc_id: str) -> Dict:
         n = self.store.delete_doc(doc_id)
+        if n:
+            self.answer_cache.bump_version()
         return {"status": "ok", "deleted_chunks": n}
 
     def list_docs(self) -> List[Dict]:
@@ -279,12 +456,110 @@ class RAGPipeline:
             "title": (question or "")[:120],
         }
         self.store.add_qa(qa_id, question, answer, meta)
+        self.answer_cache.bump_version()
         return {"status": "ok", "qa_id": qa_id}
 
     # ---- answer flow ----
     def answer(self, question: str) -> Dict:
+        cached = self.answer_cache.get(question)
+        if cached is not None:
+            return cached
+        result = self._answer_uncached(question)
+        self.answer_cache.put(question, result)
+        return result
+
+    def _answer_uncached(self, question: str) -> Dict:
+        prep = self._prepare(question)
+        if "result" in prep:
+            return prep["result"]
+
+        # --- 5) Generate & sanitize
+        try:
+            with self._stage("generate"):
+                answer = sanitize_answer(self.llm.generate(prep["prompt"]))
+        except Exception as e:
+            return self._generation_error(e, prep)
+
+        return {
+            "answer": answer,
+            "hits": prep["hits"],
+            "sources": prep["sources"],
+            "context_used": prep["context_used"],
+        }
+
+    def answer_stream(self, question: str) -> Iterator[Tuple[str, Dict]]:
+        """
+        Streaming variant of answer(). Yields (event, payload):
+          ("meta",  {hits, sources, context_used})
+          ("delta", {text})            sanitized answer text, in order
+          ("done",  full answer() result)
+        or ("error", error result) if generation fails part-way.
+        """
+        result = self.answer_cache.get(question)
+        if result is None:
+            prep = self._prepare(question)
+            result = prep.get("result")
+        if result is not None:
+            # Cache hit or SME resolution: nothing to generate, send it whole
+            yield "meta", {k: result[k] for k in ("hits", "sources", "context_used")}
+            yield "delta", {"text": result["answer"]}
+            self.answer_cache.put(question, result)
+            yield "done", result
+            return
+
+        meta = {"hits": prep["hits"], "sources": prep["sources"], "context_used": prep["context_used"]}
+        yield "meta", meta
+        sanitizer = StreamSanitizer()
+        parts: List[str] = []
+        started = time.perf_counter()
+        try:
+            for delta in self.llm.generate_stream(prep["prompt"]):
+                text = sanitizer.feed(delta)
+                if text:
+                    parts.append(text)
+                    yield "delta", {"text": text}
+            text = sanitizer.finish()
+            if text:
+                parts.append(text)
+                yield "delta", {"text": text}
+        except Exception as e:
+            yield "error", self._generation_error(e, prep)
+            return
+
+        t = getattr(self._timings, "current", None)
+        if t is not None:
+            t["generate"] = (time.perf_counter() - started) * 1000   # includes time the client took to read
+        result = {"answer": "".join(parts), **meta}
+        self.answer_cache.put(question, result)
+        yield "done", result
+
+    def _generation_error(self, e: Exception, prep: Dict) -> Dict:
+        import traceback
+        error_msg = f"Error generating answer: {str(e)}"
+        print(f"[ERROR] {error_msg}")
+        print(traceback.format_exc())
+        # Return error message instead of crashing
+        return {
+            "answer": f"Error: Failed to generate answer. Please check server logs. ({str(e)})",
+            "hits": prep["hits"],
+            "sources": prep["sources"],
+            "context_used": prep["context_used"],
+            "error": True,
+        }
+
+    def _prepare(self, question: str) -> Dict:
+        """
+        Retrieval and prompt building shared by answer() and answer_stream().
+        Returns {"result": ...} when an SME resolution answers the question outright,
+        else {"prompt", "hits", "sources", "context_used"}.
+        """
+        self._timings.current = {}
+        with self._stage("embed"):
+            self.store.embedder.embed_query(question)   # cached for the Q&A and dense lookups below
+
         # --- 0) SME resolution lookup (fast path)
-        qa_hits = self.store.query_qa(question, n=QA_MAX_RESULTS)
+        with self._stage("qa_lookup"):
+            qa_hits = self.store.query_qa(question, n=QA_MAX_RESULTS)
         qa_ids = (qa_hits.get("ids") or [[]])[0]
         qa_metas = (qa_hits.get("metadatas") or [[]])[0]
         qa_docs = (qa_hits.get("documents") or [[]])[0]
@@ -320,15 +595,14 @@ class RAGPipeline:
                     answer_text += suffix
 
                 # cleanup for stray bracketed cites
-                answer_text = re.sub(r'\s*\[\d+\]\s*$', '', answer_text)
-                answer_text = re.sub(r'\s*\[(?:source|reviewer|guidance|doc|ref).*?\]\s*$', '', answer_text, flags=re.I)
+                answer_text = sanitize_answer(answer_text)
 
-                return {
+                return {"result": {
                     "answer": answer_text,
                     "hits": 1,
                     "sources": [meta0.get("title", "")],
                     "context_used": [meta0],
-                }
+                }}
 
         # --- 1) Acronym / term expansion
         expansions = {
@@ -349,84 +623,48 @@ class RAGPipeline:
                 extra_terms.append(v)
         expanded_q = question if not extra_terms else f"{question}\n(also consider: {', '.join(extra_terms)})"
 
-        # --- 2) Dense retrieval
-        results = self.store.query(expanded_q)
+        # --- 2) Hybrid retrieval: dense + BM25 (exact terms, regulation numbers), RRF-fused
+        with self._stage("embed"):
+            self.store.embedder.embed_query(expanded_q)
+        with self._stage("dense_query"):
+            results = self.store.hybrid_query(expanded_q, top_k=max(TOP_K, RERANK_CANDIDATES))
         docs = results.get("documents", [[]])[0]
         metas = results.get("metadatas", [[]])[0]
 
-        # --- 3) Keyword fallback
-        if not docs:
-            tokens = [t for t in re.split(r"[^a-z0-9]+", q_norm) if len(t) > 2]
-            tokens = list(dict.fromkeys(tokens))
-            stop = {"what", "is", "the", "and", "for", "with", "from", "about", "are", "can"}
-            keywords = [t for t in tokens if t not in stop][:3]
-
-            candidates_docs: List[str] = []
-            candidates_metas: List[Dict] = []
-            for kw in keywords:
-                try:
-                    batch = self.store.collection.get(
-                        where_document={"$contains": kw},
-                        include=["documents", "metadatas"],
-                    )
-                    cdocs = batch.get("documents", []) or []
-                    cmetas = batch.get("metadatas", []) or []
-                    for drow, mrow in zip(cdocs, cmetas):
-                        for d, m in zip(drow, mrow):
-                            candidates_docs.append(d)
-                            candidates_metas.append(m)
-                except Exception:
-                    pass
-
-            if candidates_docs:
-                docs = candidates_docs[:TOP_K]
-                metas = candidates_metas[:TOP_K]
+        # --- 3) Merge overlapping chunks, rerank, pack into the token budget
+        with self._stage("context"):
+            assembled = self.context.assemble(question, docs or [], metas or [])
+        metas = assembled["metas"]
 
         # --- 4) Build LLM prompt (clean guidance only)
-        context_blocks: List[str] = list(docs) if docs else []
-        context = "\n\n---\n\n".join(context_blocks) if context_blocks else "(no guidance retrieved)"
-
-        prompt = (
-            f"{SYSTEM_PROMPT}\n\n"
-            f"Guidance:\n{context}\n\n"
-            f"Question: {question}\n\n"
-            f"Answer:"
-        )
+        with self._stage("prompt_build"):
+            context_blocks: List[str] = assembled["blocks"]
+            context = "\n\n---\n\n".join(context_blocks) if context_blocks else "(no guidance retrieved)"
+
+            prompt = (
+                f"{SYSTEM_PROMPT}\n\n"
+                f"Guidance:\n{context}\n\n"
+                f"Question: {question}\n\n"
+                f"Answer:"
+            )
 
-        # For UI (not shown by default)
-        source_titles: List[str] = []
-        for m in metas or []:
-            t = m.get("title") or m.get("source") or "unknown"
-            if t not in source_titles:
-                source_titles.append(t)
+            # For UI (not shown by default)
+            source_titles: List[str] = []
+            for m in metas or []:
+                t = m.get("title") or m.get("source") or "unknown"
+                if t not in source_titles:
+                    source_titles.append(t)
 
         try:
-            dense_hits = len(results.get("ids", [[]])[0]) if results else 0
-            print(f"[answer] dense_hits={dense_hits} context_blocks={len(context_blocks)} sources={len(source_titles)}")
+            dense_hits = results.get("dense_hits", 0)
+            lexical_hits = results.get("lexical_hits", 0)
+            print(f"[answer] dense_hits={dense_hits} lexical_hits={lexical_hits} context_blocks={len(context_blocks)} sources={len(source_titles)} "
+                  f"context_tokens={assembled['prompt_tokens']} tokens_saved={assembled['candidate_tokens'] - assembled['prompt_tokens']}")
         except Exception:
             pass
 
-        # --- 5) Generate & sanitize
-        try:
-            answer = self.llm.generate(prompt)
-            answer = re.sub(r'\s*\[\d+\]\s*$', '', answer)
-            answer = re.sub(r'\s*\[(?:source|reviewer|guidance|doc|ref).*?\]\s*$', '', answer, flags=re.I)
-        except Exception as e:
-            import traceback
-            error_msg = f"Error generating answer: {str(e)}"
-            print(f"[ERROR] {error_msg}")
-            print(traceback.format_exc())
-            # Return error message instead of crashing
-            return {
-                "answer": f"Error: Failed to generate answer. Please check server logs. ({str(e)})",
-                "hits": len(context_blocks),
-                "sources": source_titles,
-                "context_used": metas[:] if metas else [],
-                "error": True,
-            }
-
         return {
-            "answer": answer,
+            "prompt": prompt,
             "hits": len(context_blocks),
             "sources": source_titles,
             "context_used": metas[:] if metas else [],
@@ -0,0 +1,279 @@
+"""
+SQLite store for AI SME referrals (replaces full-file rewrites of referrals.jsonl).
+
+  referrals           one row per distinct question, unique on the normalized key
+  referral_instances  append-only log of every raise / SME edit
+
+Writes run in short BEGIN IMMEDIATE transactions, so concurrent uvicorn workers
+group duplicates atomically. Reads return the same dict shape the JSONL file
+held (including "instances"), so endpoints and templates are unchanged.
+"""
+import json
+import sqlite3
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS referrals (
+    id TEXT PRIMARY KEY,
+    norm_key TEXT NOT NULL UNIQUE,
+    question TEXT NOT NULL DEFAULT '',
+    answer TEXT NOT NULL DEFAULT '',
+    reason TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'open',
+    ts TEXT,
+    last_ts TEXT,
+    closed_ts TEXT,
+    count INTEGER NOT NULL DEFAULT 1,
+    opened_by TEXT NOT NULL DEFAULT '',
+    task_id TEXT NOT NULL DEFAULT '',
+    sme_response TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_referrals_status ON referrals(status, count, last_ts);
+CREATE INDEX IF NOT EXISTS idx_referrals_opened_by ON referrals(lower(opened_by));
+CREATE TABLE IF NOT EXISTS referral_instances (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    referral_id TEXT NOT NULL REFERENCES referrals(id),
+    ts TEXT,
+    reason TEXT NOT NULL DEFAULT '',
+    answer TEXT NOT NULL DEFAULT '',
+    by_email TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_referral_instances_ref ON referral_instances(referral_id, seq);
+CREATE INDEX IF NOT EXISTS idx_referral_instances_by ON referral_instances(lower(by_email));
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+JSONL_MIGRATED_KEY = "referrals_jsonl_migrated"
+
+_COLUMNS = ["id", "ts", "last_ts", "reason", "question", "answer", "status",
+            "closed_ts", "count", "opened_by", "task_id", "sme_response"]
+
+
+class ReferralStore:
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    # ---------------- writes ----------------
+    def raise_referral(self, norm_key: str, question: str, answer: str, reason: str,
+                       by: str, task_id: Optional[str], ts: str) -> Dict:
+        """Group onto the referral with the same normalized question, or open a new one."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id, task_id FROM referrals WHERE norm_key = ?", (norm_key,)).fetchone()
+            if row:
+                ref_id = row["id"]
+                conn.execute("""
+                    UPDATE referrals
+                       SET count = count + 1, last_ts = ?,
+                           task_id = CASE WHEN task_id = '' AND ? <> '' THEN ? ELSE task_id END
+                     WHERE id = ?
+                """, (ts, task_id or "", task_id or "", ref_id))
+            else:
+                ref_id = str(uuid.uuid4())
+                conn.execute("""
+                    INSERT INTO referrals (id, norm_key, question, answer, reason, status, ts, last_ts,
+                                           closed_ts, count, opened_by, task_id)
+                    VALUES (?, ?, ?, ?, ?, 'open', ?, ?, NULL, 1, ?, ?)
+                """, (ref_id, norm_key, question, answer, reason, ts, ts, by, task_id or ""))
+            conn.execute(
+                "INSERT INTO referral_instances (referral_id, ts, reason, answer, by_email) VALUES (?, ?, ?, ?, ?)",
+                (ref_id, ts, reason, answer, by),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return {"id": ref_id, "grouped": bool(row)}
+
+    def update(self, ref_id: str, ts: str, by: str, status: Optional[str] = None,
+               sme_response: Optional[str] = None) -> bool:
+        """Set status and/or record an SME response. Returns False if the id is unknown."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM referrals WHERE id = ?", (ref_id,)).fetchone() is None:
+                conn.execute("ROLLBACK")
+                return False
+            if sme_response is not None:
+                conn.execute("UPDATE referrals SET sme_response = ?, last_ts = ? WHERE id = ?",
+                             (sme_response, ts, ref_id))
+                conn.execute(
+                    "INSERT INTO referral_instances (referral_id, ts, reason, answer, by_email) VALUES (?, ?, '(sme_edit)', ?, ?)",
+                    (ref_id, ts, sme_response, by),
+                )
+            if status is not None:
+                conn.execute("""
+                    UPDATE referrals
+                       SET status = ?,
+                           closed_ts = CASE WHEN ? = 'closed' THEN COALESCE(closed_ts, ?) ELSE NULL END
+                     WHERE id = ?
+                """, (status, status, ts, ref_id))
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # ---------------- reads ----------------
+    def _with_instances(self, conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> List[Dict]:
+        items = []
+        for r in rows:
+            item = {k: r[k] for k in _COLUMNS}
+            if item["sme_response"] is None:
+                del item["sme_response"]  # JSONL records only carried it once an SME answered
+            item["instances"] = []
+            items.append(item)
+        if not items:
+            return items
+        by_id = {it["id"]: it for it in items}
+        ids = list(by_id)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            for inst in conn.execute(
+                f"SELECT referral_id, ts, reason, answer, by_email FROM referral_instances "
+                f"WHERE referral_id IN ({','.join('?' * len(chunk))}) ORDER BY seq",
+                chunk,
+            ):
+                by_id[inst["referral_id"]]["instances"].append(
+                    {"ts": inst["ts"], "reason": inst["reason"], "answer": inst["answer"], "by": inst["by_email"]}
+                )
+        return items
+
+    def list_referrals(self, status: Optional[str] = None) -> List[Dict]:
+        """Open first, then most-grouped, then oldest activity (the admin table order)."""
+        sql = "SELECT * FROM referrals"
+        params: List = []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY status <> 'open', count DESC, COALESCE(last_ts, ts, '')"
+        conn = self._connect()
+        try:
+            return self._with_instances(conn, conn.execute(sql, params).fetchall())
+        finally:
+            conn.close()
+
+    def for_user(self, email: str, status: Optional[str] = None) -> List[Dict]:
+        """Referrals the user opened or added an instance to, newest activity first."""
+        email = (email or "").strip().lower()
+        sql = """
+            SELECT * FROM referrals
+             WHERE (lower(opened_by) = ?
+                    OR id IN (SELECT referral_id FROM referral_instances WHERE lower(by_email) = ?))
+        """
+        params: List = [email, email]
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        sql += " ORDER BY COALESCE(last_ts, ts, '') DESC"
+        conn = self._connect()
+        try:
+            return self._with_instances(conn, conn.execute(sql, params).fetchall())
+        finally:
+            conn.close()
+
+    # ---------------- migration ----------------
+    def migrate_jsonl(self, path: Path, normalize: Callable[[str], str]) -> int:
+        """
+        One-shot import of a legacy referrals.jsonl. Records whose questions normalize
+        to the same key are merged. Every uvicorn worker calls this on startup: the
+        import runs inside one BEGIN IMMEDIATE transaction that also writes a
+        "migrated" marker row, so only the first worker imports and the rest see the
+        marker (or a file another worker already renamed to *.migrated).
+        Returns the number of records read.
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (JSONL_MIGRATED_KEY,)).fetchone():
+                conn.execute("ROLLBACK")
+                _retire(path)
+                return 0
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                conn.execute("ROLLBACK")
+                return 0
+            records: List[Dict] = []
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except Exception:
+                    pass
+
+            for r in records:
+                key = normalize(r.get("question", ""))
+                existing = conn.execute("SELECT id FROM referrals WHERE norm_key = ?", (key,)).fetchone()
+                if existing:
+                    ref_id = existing["id"]
+                    conn.execute("""
+                        UPDATE referrals
+                           SET count = count + ?,
+                               last_ts = MAX(COALESCE(last_ts, ''), ?)
+                         WHERE id = ?
+                    """, (int(r.get("count") or 1), r.get("last_ts") or r.get("ts") or "", ref_id))
+                else:
+                    ref_id = r.get("id") or str(uuid.uuid4())
+                    conn.execute("""
+                        INSERT INTO referrals (id, norm_key, question, answer, reason, status, ts, last_ts,
+                                               closed_ts, count, opened_by, task_id, sme_response)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        ref_id, key, r.get("question", ""), r.get("answer", ""), r.get("reason", ""),
+                        r.get("status") or "open", r.get("ts"), r.get("last_ts") or r.get("ts"),
+                        r.get("closed_ts"), int(r.get("count") or 1), r.get("opened_by", ""),
+                        r.get("task_id") or "", r.get("sme_response"),
+                    ))
+                conn.executemany(
+                    "INSERT INTO referral_instances (referral_id, ts, reason, answer, by_email) VALUES (?, ?, ?, ?, ?)",
+                    [(ref_id, i.get("ts"), i.get("reason", ""), i.get("answer", ""), i.get("by", ""))
+                     for i in (r.get("instances") or [])],
+                )
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (JSONL_MIGRATED_KEY, path.name))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        _retire(path)
+        print(f"[referrals] migrated {len(records)} record(s) from {path.name}")
+        return len(records)
+
+
+def _retire(path: Path) -> None:
+    """Rename an imported JSONL file to *.migrated; another worker may have done it already."""
+    try:
+        path.replace(path.with_name(path.name + ".migrated"))
+    except FileNotFoundError:
+        pass
@@ -6,11 +6,22 @@ DATA_DIR = BASE_DIR / "data"
 CHROMA_DIR = BASE_DIR / "chroma"
 
 # ---------------- Chunking ----------------
-CHUNK_SIZE = 900
-CHUNK_OVERLAP = 150
+CHUNKER = "structured"                 # "structured" (headings/paragraphs, token-sized) or "chars"
+CHUNK_TOKENS = 200                     # structured: max embedding-model tokens per chunk (model limit 256)
+CHUNK_SIZE = 900                       # chars: fixed window size
+CHUNK_OVERLAP = 150                    # chars: window overlap
 
 # ---------------- Embeddings ----------------
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = 64                  # texts per encode() call
+EMBED_CACHE_SIZE = 4096                # in-memory LRU entries (query/question vectors)
+EMBED_MICROBATCH_MS = 5                # wait for concurrent queries to share one encode (0 = off)
+EMBED_CACHE_PATH = BASE_DIR / "embed_cache" / "chunks.db"   # persistent chunk-embedding cache
+
+# ---------------- Bulk ingest (ingest.py) ----------------
+INGEST_WORKERS = 0                     # text-extraction processes (0 = one per CPU)
+INGEST_EMBED_BATCH_SIZE = 256          # texts per encode() call during bulk ingest
+INGEST_FLUSH_CHUNKS = 2048             # chunks buffered before each embed + Chroma write
 
 # ---------------- LLM backend ----------------
 LLM_BACKEND = "openai"  # or "ollama" - Requires OPENAI_API_KEY environment variable to be set
@@ -22,6 +33,15 @@ OPENAI_MODEL = "gpt-4o-mini"  # or "gpt-4o"
 
 # ---------------- Retrieval ----------------
 TOP_K = 5
+LEXICAL_INDEX_PATH = BASE_DIR / "lexical_index" / "bm25.db"   # BM25 index beside CHROMA_DIR
+HYBRID_CANDIDATES = 20                 # dense and BM25 candidates each, before fusion
+RRF_K = 60                             # reciprocal-rank fusion constant
+DOC_CATALOG_PATH = BASE_DIR / "doc_catalog" / "documents.db"   # per-document rows for listing/dedupe
+
+# ---------------- Context assembly ----------------
+RERANK_CANDIDATES = 12                 # chunks retrieved for dedupe + rerank (then packed to the budget)
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"   # "" = keep retrieval order
+CONTEXT_TOKEN_BUDGET = 900             # guidance tokens allowed in the prompt
 
 # ---------------- System Prompt ----------------
 SYSTEM_PROMPT = """
@@ -39,4 +59,9 @@ QA_COLLECTION_NAME = "sme_resolutions"  # separate collection for SME-reviewed a
 QA_MIN_SIM = 0.78                      # similarity threshold (0..1) for reusing past resolutions
 QA_MAX_RESULTS = 3                     # maximum candidates to fetch per query
 QA_MAX_AGE_DAYS = 730                  # ignore SME resolutions older than 2 years (None = no limit)
-SHOW_QA_PROVENANCE_DEFAULT = False      # whether to append provenance note by default
\ No newline at end of file
+SHOW_QA_PROVENANCE_DEFAULT = False      # whether to append provenance note by default
+
+# ---------------- Answer cache ----------------
+ANSWER_CACHE_TTL_SECONDS = 3600        # cached answers expire after an hour
+ANSWER_CACHE_MIN_SIM = 0.95            # cosine similarity for near-duplicate questions (1.0 = exact only)
+ANSWER_CACHE_MAX_ENTRIES = 512         # per-worker LRU size; oldest entries are evicted first
\ No newline at end of file
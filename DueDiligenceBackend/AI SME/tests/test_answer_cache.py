@@ -0,0 +1,22 @@
+import pytest
+
+from answer_cache import AnswerCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    # Every question embeds to the same vector: any non-exact hit is a semantic one
+    return AnswerCache(tmp_path / "corpus_version", embed_fn=lambda text: [1.0, 0.0], min_sim=0.95)
+
+
+def test_semantic_hit_needs_the_same_numbers_and_identifiers(cache):
+    cache.put("What does regulation 28 require?", {"answer": "reg 28"})
+    cache.put("Is FG17/6 guidance mandatory?", {"answer": "fg17/6"})
+
+    assert cache.get("Explain the requirements of regulation 28")["answer"] == "reg 28"
+    assert cache.get("Is the FG17/6 guidance mandatory for us?")["answer"] == "fg17/6"
+    assert cache.get("What does regulation 29 require?") is None
+    assert cache.get("What do regulations 28 and 33 require?") is None
+    assert cache.get("Is FG17/7 guidance mandatory?") is None
+    assert cache.get("What does the regulation require?") is None
+    assert cache.stats["hits_semantic"] == 2
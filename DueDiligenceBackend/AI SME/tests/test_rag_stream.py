@@ -0,0 +1,109 @@
+import hashlib
+import random
+import re
+
+import numpy as np
+import pytest
+
+import llm
+from context_builder import ContextAssembler
+from embeddings import EmbeddingService
+from rag import RAGPipeline, RAGStore, StreamSanitizer, sanitize_answer
+
+# Pieces that stress the sanitizer: plain text, whitespace, numeric and tag
+# citations, unterminated brackets and brackets split over lines
+PIECES = ["Yes", " the", " customer", ".", " ", "  ", "\n", "\n\n", "\t", "[", "]", "[1]", "[12]", " [3]",
+          "[source", "[Source: SoW guide]", "[reviewer note", "[doc 4]", "[ref", ": p.2", "]", "[x]",
+          "[guidance]", "(see [2])", "[[", "]]"]
+
+
+def _sanitize_stream(chunks):
+    s = StreamSanitizer()
+    return "".join(s.feed(c) for c in chunks) + s.finish()
+
+
+def _random_chunking(rng, text):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 8)))) if len(text) > 1 else []
+    bounds = [0] + cuts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize("text", [
+    "", "   ", "Answer.", "Answer. [1]", "Answer [source: PEP policy]  \n", "Answer [source: a\nb]",
+    "Answer [ref 2] more text", "Answer [doc 1] [2]", "Answer [doc 1\n[2]", "  Leading space [guidance]",
+    "See [source: a] and [source: b]", "Unclosed [source",
+])
+def test_stream_matches_sanitize_answer_pinned(text):
+    expected = sanitize_answer(text.strip())
+    assert _sanitize_stream([text]) == expected
+    assert _sanitize_stream(list(text)) == expected
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_stream_matches_sanitize_answer_random_chunkings(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 14)))
+        expected = sanitize_answer(text.strip())
+        for _ in range(5):
+            chunks = _random_chunking(rng, text)
+            assert _sanitize_stream(chunks) == expected, (text, chunks)
+
+
+class _HashingModel:
+    """Bag-of-words hashing encoder with the SentenceTransformer.encode() signature."""
+    dim = 64
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                out[i, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms > 0, norms, 1.0)
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_BACKEND", "stub")
+    store = RAGStore(
+        persist_dir=tmp_path / "chroma",
+        lexical_path=tmp_path / "bm25.db",
+        catalog_path=tmp_path / "catalog.db",
+        embedder=EmbeddingService(model=_HashingModel(), cache_path=None, microbatch_ms=0),
+    )
+    pipeline = RAGPipeline(store=store)
+    pipeline.context = ContextAssembler(reranker_model="")
+    guide = tmp_path / "income.txt"
+    guide.write_text(
+        "Payslips covering the last three months are accepted as evidence of employment income. "
+        "Tax returns must cover two financial years [source: SoW guide]\n",
+        encoding="utf-8",
+    )
+    pipeline.ingest_path(guide)
+    return pipeline
+
+
+def _collect(events):
+    events = list(events)
+    names = [e for e, _ in events]
+    text = "".join(p["text"] for e, p in events if e == "delta")
+    return names, text, dict(events)
+
+
+def test_answer_stream_with_stub_backend(pipeline):
+    question = "What evidence of employment income is accepted?"
+    prompt = pipeline._prepare(question)["prompt"]
+    assert pipeline.llm.client.generate(prompt).endswith("[source: SoW guide]")
+
+    names, text, by_name = _collect(pipeline.answer_stream(question))
+    assert names[0] == "meta" and names[-1] == "done"
+    assert set(names[1:-1]) == {"delta"} and len(names) > 3   # word by word
+    assert text == by_name["done"]["answer"] == pipeline._answer_uncached(question)["answer"]
+    assert text.endswith("two financial years")
+    assert by_name["done"]["sources"] == by_name["meta"]["sources"] == ["income.txt"]
+
+    # Asked again: served whole from the answer cache
+    names, again, _ = _collect(pipeline.answer_stream(question))
+    assert names == ["meta", "delta", "done"]
+    assert again == text
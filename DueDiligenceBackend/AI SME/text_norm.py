@@ -0,0 +1,26 @@
+"""
+Question normalizer shared by referral dedupe and the answer cache:
+casefold, expand compliance acronyms, collapse whitespace, drop stray symbols.
+"""
+import re
+
+ACRONYM_MAP = {
+    r"\bsow\b": "source of wealth",
+    r"\bsof\b": "source of funds",
+    r"\bcdd\b": "customer due diligence",
+    r"\bedd\b": "enhanced due diligence",
+    r"\bpep\b": "politically exposed person",
+    r"\bkyc\b": "know your customer",
+    r"\bkyb\b": "know your business",
+    r"\baml\b": "anti money laundering",
+    r"\bmlro\b": "money laundering reporting officer",
+}
+
+
+def norm_question(q: str) -> str:
+    s = (q or "").strip().casefold()
+    for pat, full in ACRONYM_MAP.items():
+        s = re.sub(pat, full, s)
+    s = re.sub(r"\s+", " ", s)
+    s = re.sub(r"[^a-z0-9\s,.;:!?'/()-]", "", s)
+    return s.strip()
@@ -0,0 +1,71 @@
+"""
+Last-Active Tracker
+Write-behind coalescing of users.last_active.
+
+global_before_request() calls touch() on every authenticated request; that
+only records the timestamp in memory. A daemon thread flushes the pending
+timestamps with one executemany UPDATE every FLUSH_SECONDS, so each user is
+written at most once per interval and read-only requests never take the
+SQLite write lock. Pending updates are also flushed at interpreter exit.
+"""
+import os
+import atexit
+import sqlite3
+import threading
+import time
+
+FLUSH_SECONDS = int(os.environ.get("LAST_ACTIVE_FLUSH_SECONDS", "30"))
+
+
+class LastActiveTracker:
+    def __init__(self, db_path, flush_seconds=FLUSH_SECONDS):
+        self.db_path = db_path
+        self.flush_seconds = flush_seconds
+        self._pending = {}          # user_id -> "YYYY-MM-DD HH:MM:SS"
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    def touch(self, user_id, ts):
+        """Record activity for user_id; ts is the formatted last_active value."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # First use in this (possibly forked) process: start the flusher here
+                self._pending = {}
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="last-active-flush", daemon=True)
+                self._thread.start()
+            self._pending[user_id] = ts
+
+    def flush(self):
+        """Write all pending timestamps in one transaction. Returns rows written."""
+        with self._lock:
+            if not self._pending or self._pid != os.getpid():
+                return 0
+            batch, self._pending = self._pending, {}
+        rows = [(ts, uid, ts) for uid, ts in batch.items()]
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20)
+            try:
+                # Never move last_active backwards (login writes it directly)
+                conn.executemany(
+                    "UPDATE users SET last_active = ? WHERE id = ? AND (last_active IS NULL OR last_active < ?)",
+                    rows,
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"[LastActive] Flush of {len(rows)} user(s) failed: {e}")
+            # Put them back unless a newer touch arrived meanwhile
+            with self._lock:
+                for uid, ts in batch.items():
+                    self._pending.setdefault(uid, ts)
+            return 0
+        return len(rows)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
@@ -5,50 +5,9 @@ from reportlab.lib import colors
 from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_from_directory
 from collections import OrderedDict
 
-# === Global helper utilities for age bucketing (self-contained, no reliance on local closures) ===
+# === Global helper utilities for age bucketing (defined in utils.py) ===
 from datetime import datetime, date, timedelta
-try:
-    from dateutil import parser as _dtparser  # type: ignore
-except Exception:
-    _dtparser = None
-
-def _parse_iso_dt_any(s):
-    if not s:
-        return None
-    try:
-        # Handle common ISO formats and strip Z / microseconds
-        return datetime.fromisoformat(str(s).replace("Z","").split(".")[0])
-    except Exception:
-        try:
-            if _dtparser:
-                return _dtparser.parse(str(s))
-        except Exception:
-            pass
-    return None
-
-def last_touched_date_for_record(r: dict, level: int):
-    fields = [
-        r.get("updated_at"),
-        r.get("date_assigned"),
-        r.get("date_completed"),
-        r.get("qc_check_date"),
-        r.get("sme_selected_date"),
-        r.get("sme_returned_date"),
-    ]
-    dts = [_parse_iso_dt_any(x) for x in fields if x]
-    return max(dts) if dts else None
-
-def age_bucket_from_dt(d, today: date=None):
-    if today is None:
-        today = datetime.utcnow().date()
-    if not d:
-        return "5 days+"
-    days = (today - d.date()).days
-    if days <= 2:
-        return "1–2 days"
-    if days <= 5:
-        return "3–5 days"
-    return "5 days+"
+from utils import _parse_iso_dt_any, last_touched_date_for_record, age_bucket_from_dt
 # === End helpers ===
 
 import sqlite3
@@ -70,7 +29,8 @@ import string
 import csv
 import pandas as pd
 from flask import send_file
-from flask import Response
+from flask import Response, stream_with_context
+from flask import g
 from functools import wraps
 import json
 from types import SimpleNamespace
@@ -81,6 +41,13 @@ from flask_wtf.csrf import CSRFError
 from dateutil import parser
 from flask import render_template, session
 from utils import derive_case_status, ReviewStatus, best_status_with_raw_override
+import jobs
+import db_pool
+from activity_tracker import LastActiveTracker
+import status_materializer
+import dashboard_snapshot
+from chaser_cycle import chaser_grid, week_rows, status_week_rows, chaser_cycle_by_label
+import sme_client
 from datetime import datetime, timedelta, date
 from utils import derive_case_status
 derive_status = derive_case_status
@@ -604,17 +571,40 @@ app.config["DEBUG"] = False
 app.config["SERVER_NAME"] = os.getenv("FLASK_SERVER_NAME", None)
 
 def get_db():
-    import os
     # Get absolute path to database file to ensure we're using the correct database
     db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), DB_PATH)
-    conn = sqlite3.connect(db_path, timeout=20.0)
-    conn.row_factory = sqlite3.Row
-    # Enable WAL mode for better concurrency
+    # One pooled connection per request (PRAGMAs applied on creation); close() is a no-op
+    return db_pool.get_connection(db_path)
+
+# Return the request's connection to the pool once, after the response
+app.teardown_appcontext(db_pool.release)
+
+@app.after_request
+def _refresh_materialized_statuses(response):
+    """Recompute case status columns for reviews written by this request."""
+    # Failed requests and routes that left a transaction open must not have their
+    # writes committed here; release() rolls those back, and the rows stay dirty.
+    if request.method in ("POST", "PUT", "PATCH", "DELETE") and response.status_code < 400:
+        try:
+            db = get_db()
+            if db.in_transaction:
+                print(f"[Status] Skipping refresh after {request.path}: transaction still open")
+                return response
+            status_materializer.refresh_dirty(db)
+        except Exception as e:
+            print(f"[Status] Refresh after {request.path} failed: {e}")
+    return response
+
+def _status_sweep_job(payload, progress):
+    """Background job: nightly status sweep (date-driven transitions, age buckets)."""
+    progress({"stage": "sweep"})
+    conn = sqlite3.connect(os.path.join(os.path.dirname(os.path.abspath(__file__)), DB_PATH), timeout=20)
     try:
-        conn.execute('PRAGMA journal_mode=WAL')
-    except:
-        pass  # Ignore if WAL mode can't be enabled
-    return conn
+        return {"updated": status_materializer.sweep_statuses(conn)}
+    finally:
+        conn.close()
+
+jobs.register_handler("status_sweep", _status_sweep_job)
 
 # --- Outcome options loader -------------------------------------------------
 
@@ -683,6 +673,38 @@ def role_required(*roles):
         return wrapper
     return decorator
 
+# Process-local copy of the permissions table: {(role, feature): (can_view, can_edit)}.
+# settings.permissions_version is bumped on every edit; each worker compares it once
+# per request and reloads the (tiny) matrix only when it has changed.
+_PERMISSION_CACHE = {"version": None, "matrix": None}
+
+def _bump_permissions_version(cur):
+    """Call inside the transaction that edits the permissions table."""
+    cur.execute("""
+        INSERT INTO settings (key, value) VALUES ('permissions_version', '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    """)
+
+def _permission_matrix():
+    if getattr(g, "_permissions_checked", False) and _PERMISSION_CACHE["matrix"] is not None:
+        return _PERMISSION_CACHE["matrix"]
+    conn = get_db()
+    try:
+        row = conn.execute("SELECT value FROM settings WHERE key = 'permissions_version'").fetchone()
+        version = row[0] if row else "0"
+    except sqlite3.Error:
+        version = None  # no settings table: reload every request
+    if version is None or version != _PERMISSION_CACHE["version"] or _PERMISSION_CACHE["matrix"] is None:
+        rows = conn.execute("SELECT role, feature, can_view, can_edit FROM permissions").fetchall()
+        _PERMISSION_CACHE["matrix"] = {(r[0], r[1]): (bool(r[2]), bool(r[3])) for r in rows}
+        _PERMISSION_CACHE["version"] = version
+    g._permissions_checked = True
+    return _PERMISSION_CACHE["matrix"]
+
+def invalidate_permission_cache():
+    _PERMISSION_CACHE["matrix"] = None
+    _PERMISSION_CACHE["version"] = None
+
 def check_permission(feature, action='view'):
     """
     Check if the current user has permission for a feature.
@@ -702,42 +724,16 @@ def check_permission(feature, action='view'):
         return True
     
     try:
-        conn = get_db()
-        cur = conn.cursor()
-        
-        # Check for exact role match first
-        if action == 'view':
-            cur.execute("""
-                SELECT can_view FROM permissions 
-                WHERE role = ? AND feature = ?
-            """, (role, feature))
-        else:
-            cur.execute("""
-                SELECT can_edit FROM permissions 
-                WHERE role = ? AND feature = ?
-            """, (role, feature))
-        
-        result = cur.fetchone()
+        matrix = _permission_matrix()
+        entry = matrix.get((role, feature))
         
         # If not found and feature is "review_tasks", also check "review" (backward compatibility)
-        if not result and feature == 'review_tasks':
-            if action == 'view':
-                cur.execute("""
-                    SELECT can_view FROM permissions 
-                    WHERE role = ? AND feature = ?
-                """, (role, 'review'))
-            else:
-                cur.execute("""
-                    SELECT can_edit FROM permissions 
-                    WHERE role = ? AND feature = ?
-                """, (role, 'review'))
-            result = cur.fetchone()
+        if entry is None and feature == 'review_tasks':
+            entry = matrix.get((role, 'review'))
         
-        conn.close()
-        
-        if result:
+        if entry is not None:
             # Permission entry exists - use it
-            return bool(result[0])
+            return entry[0] if action == 'view' else entry[1]
         else:
             # No permission entry - default to allow (backward compatibility)
             return True
@@ -793,12 +789,8 @@ Scrutinise Admin
         smtp.send_message(msg)
 
 def get_db_connection():
-    import os
-    # Get absolute path to database file to ensure we're using the correct database
-    db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), DB_PATH)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Same pooled per-request connection as get_db()
+    return get_db()
 
 def get_setting(key, default):
     try:
@@ -823,19 +815,49 @@ def score_class(score):
 
 from utils import derive_case_status
 
-def apply_qc_sampling():
+def _ensure_qc_sampling_runs(cur):
+    """qc_sampling_runs records the seed and per-reviewer stats of every sampling pass."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS qc_sampling_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            seed TEXT NOT NULL,
+            run_at TEXT DEFAULT (datetime('now')),
+            run_by INTEGER,
+            sampled INTEGER DEFAULT 0,
+            stats TEXT
+        )
+    """)
+    cur.execute("PRAGMA table_info(qc_sampling_log)")
+    if "sampling_run_id" not in [c[1] for c in cur.fetchall()]:
+        cur.execute("ALTER TABLE qc_sampling_log ADD COLUMN sampling_run_id INTEGER")
+
+def apply_qc_sampling(seed=None, run_by=None):
     """
     Automatically mark a random sample of completed reviews for QC by inserting into qc_sampling_log.
     
     Uses sampling_rates table to determine what % of each reviewer's work should be QC'd.
     Only applies to non-accredited reviewers (accredited reviewers are exempt from QC).
+
+    Eligible reviews are selected in one query. Each reviewer's reviews are drawn in
+    review-id order from random.Random(f"{seed}:{reviewer_id}"), so a run can be
+    replayed from the seed stored in qc_sampling_runs. Log inserts and status updates
+    are applied with executemany in a single transaction.
+
+    Returns: {"run_id", "seed", "sampled", "skipped": {...},
+              "reviewers": {reviewer_id: {"eligible", "sampled", "rate"}}}
     """
     import random
-    import sqlite3
+    import secrets
+    from collections import defaultdict
     
+    if seed is None:
+        seed = secrets.randbits(32)
+    seed = str(seed)
+
     conn = get_db()
     conn.row_factory = sqlite3.Row
     cur  = conn.cursor()
+    _ensure_qc_sampling_runs(cur)
 
     # 1) Get global & per-reviewer sampling rates (single level - no level filtering)
     # Global rate: reviewer_id IS NULL
@@ -847,88 +869,99 @@ def apply_qc_sampling():
     cur.execute("SELECT reviewer_id, rate FROM sampling_rates WHERE reviewer_id IS NOT NULL")
     reviewer_rates = {r["reviewer_id"]: r["rate"] for r in cur.fetchall()}
 
-    # 2) Get accredited reviewers (exempt from QC)
-    cur.execute("SELECT reviewer_id FROM reviewer_accreditation WHERE is_accredited = 1")
-    accredited = {r["reviewer_id"] for r in cur.fetchall()}
-
-    # 3) Fetch completed reviews not yet sampled
+    # 2) Completed reviews not yet sampled, with the reviewer's accreditation (exempt from QC)
     cur.execute("""
-        SELECT r.id, r.assigned_to AS reviewer_id, r.task_id
+        SELECT r.*,
+               r.assigned_to AS _reviewer_id,
+               EXISTS (SELECT 1 FROM reviewer_accreditation a
+                        WHERE a.reviewer_id = r.assigned_to AND a.is_accredited = 1) AS _accredited
         FROM reviews r
-        LEFT JOIN qc_sampling_log q ON q.review_id = r.id
         WHERE r.assigned_to IS NOT NULL
           AND r.date_completed IS NOT NULL
           AND r.date_completed != ''
-          AND q.review_id IS NULL
+          AND NOT EXISTS (SELECT 1 FROM qc_sampling_log q WHERE q.review_id = r.id)
+        ORDER BY r.assigned_to, r.id
     """)
     candidates = cur.fetchall()
 
-    sampled = 0
     skipped_reasons = {
         'accredited': 0,
         'not_completed': 0,
-        'already_sampled': 0,
         'rate_not_met': 0
     }
-    
+    reviewers = defaultdict(lambda: {"eligible": 0, "sampled": 0, "rate": 0})
+    log_rows, status_rows = [], []
+    rng, rng_reviewer = None, object()
+
     for rec in candidates:
-        review_id   = rec["id"]
-        reviewer_id = rec["reviewer_id"]
-        task_id     = rec["task_id"]
+        review = dict(rec)
+        reviewer_id = review.pop("_reviewer_id")
 
         # Skip accredited reviewers (they don't need QC)
-        if reviewer_id in accredited:
+        if review.pop("_accredited"):
             skipped_reasons['accredited'] += 1
             continue
 
         # Check if task is actually completed (not just date_completed set)
-        cur.execute("SELECT * FROM reviews WHERE id = ?", (review_id,))
-        review_row = cur.fetchone()
-        if not review_row:
-            continue
-            
-        review = dict(review_row)
-        # Add _in_qc_sampling flag for status derivation
         review['_in_qc_sampling'] = False
-        status = derive_case_status(review)
-        if status != "Completed":
+        if derive_case_status(review) != "Completed":
             skipped_reasons['not_completed'] += 1
             continue
 
-        # Apply sampling rate
+        # Apply sampling rate with this reviewer's reproducible stream
         rate = reviewer_rates.get(reviewer_id, global_rate)
-        if rate <= 0:
-            skipped_reasons['rate_not_met'] += 1
-            continue
-            
-        if random.random() < rate/100.0:
-            try:
-                cur.execute("""
-                    INSERT INTO qc_sampling_log (review_id, reviewer_id, task_id, sampled_at)
-                    VALUES (?, ?, ?, datetime('now'))
-                """, (review_id, reviewer_id, task_id))
-                
-                # Update status to "QC - Awaiting Allocation"
-                review['_in_qc_sampling'] = True
-                new_status = derive_case_status(review)
-                cur.execute("UPDATE reviews SET status = ? WHERE task_id = ?", (str(new_status), task_id))
-                
-                sampled += 1
-            except Exception as e:
-                # Skip if already sampled (duplicate key)
-                skipped_reasons['already_sampled'] += 1
-                print(f"Skipping {task_id}: {e}")
-                continue
+        stats = reviewers[reviewer_id]
+        stats["eligible"] += 1
+        stats["rate"] = rate
+        if reviewer_id != rng_reviewer:
+            rng, rng_reviewer = random.Random(f"{seed}:{reviewer_id}"), reviewer_id
+        if rate > 0 and rng.random() < rate / 100.0:
+            # Status becomes "QC - Awaiting Allocation"
+            review['_in_qc_sampling'] = True
+            log_rows.append((review["id"], reviewer_id, review["task_id"]))
+            status_rows.append((str(derive_case_status(review)), review["task_id"]))
+            stats["sampled"] += 1
         else:
             skipped_reasons['rate_not_met'] += 1
 
-    conn.commit()
+    # 3) Apply everything in one transaction
+    sampled = len(log_rows)
+    try:
+        cur.execute("INSERT INTO qc_sampling_runs (seed, run_by) VALUES (?, ?)", (seed, run_by))
+        run_id = cur.lastrowid
+        # NOT EXISTS guards against a concurrent run sampling the same review
+        cur.executemany("""
+            INSERT INTO qc_sampling_log (review_id, reviewer_id, task_id, sampled_at, sampling_run_id)
+            SELECT ?, ?, ?, datetime('now'), ?
+            WHERE NOT EXISTS (SELECT 1 FROM qc_sampling_log WHERE review_id = ?)
+        """, [(rid, rev, tid, run_id, rid) for rid, rev, tid in log_rows])
+        cur.executemany("UPDATE reviews SET status = ? WHERE task_id = ?", status_rows)
+        result = {
+            "run_id": run_id,
+            "seed": seed,
+            "sampled": sampled,
+            "skipped": skipped_reasons,
+            "reviewers": {rid: dict(st) for rid, st in reviewers.items()},
+        }
+        cur.execute("UPDATE qc_sampling_runs SET sampled = ?, stats = ? WHERE id = ?",
+                    (sampled, json.dumps(result["reviewers"]), run_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     conn.close()
     
-    print(f"[QC Sampling] Flagged {sampled} reviews for QC")
+    print(f"[QC Sampling] Run {run_id} (seed {seed}): flagged {sampled} reviews for QC")
     print(f"[QC Sampling] Skipped: {skipped_reasons}")
     
-    return sampled
+    return result
+
+def _qc_sampling_job(payload, progress):
+    """Background job wrapper for apply_qc_sampling()."""
+    progress({"stage": "sampling"})
+    return apply_qc_sampling(seed=payload.get("seed"), run_by=payload.get("run_by"))
+
+jobs.register_handler("qc_sampling", _qc_sampling_job)
 
 def _dt_any(s):
     if not s:
@@ -1020,6 +1053,10 @@ import sendgrid
 from sendgrid.helpers.mail import Mail
 
 DB_PATH = os.environ.get("DB_PATH", "scrutinise_workflow.db")
+
+# users.last_active is recorded in memory per request and flushed in batches
+_last_active = LastActiveTracker(os.path.join(os.path.dirname(os.path.abspath(__file__)), DB_PATH))
+
 TOKEN_TTL_MINUTES = int(os.environ.get("PWD_RESET_TOKEN_TTL_MINUTES", 30))
 APP_BASE_URL = os.environ.get("APP_BASE_URL", "http://localhost:5050")
 
@@ -1491,8 +1528,8 @@ def verify_2fa():
 @app.route("/admin/run_qc_sampling", methods=["POST"])
 @role_required("qc_lead_1", "qc_lead_2", "qc_lead_3", "qc_1", "qc_2", "qc_3", "admin")
 def run_sampling():
-    apply_qc_sampling()
-    flash("QC sampling complete.", "success")
+    job_id = jobs.enqueue("qc_sampling", {"run_by": session.get("user_id")}, created_by=session.get("user_id"))
+    flash(f"QC sampling started (job {job_id}).", "success")
     return redirect(url_for("qc_accreditation"))
 
 # API endpoint for manual QC sampling
@@ -1565,12 +1602,15 @@ def api_qc_manual_sampling():
             
             if action == 'auto':
                 # Run automatic sampling
-                conn.close()  # Close before calling apply_qc_sampling which opens its own connection
-                sampled_count = apply_qc_sampling()
+                conn.close()
+                result = apply_qc_sampling(seed=data.get('seed'), run_by=session.get('user_id'))
                 return jsonify({
                     'success': True,
                     'message': 'Automatic sampling completed',
-                    'sent_count': sampled_count
+                    'sent_count': result['sampled'],
+                    'run_id': result['run_id'],
+                    'seed': result['seed'],
+                    'reviewers': result['reviewers']
                 })
             
             elif action == 'manual':
@@ -2790,6 +2830,12 @@ def ensure_module_settings():
 # Initialize module settings on app startup
 ensure_module_settings()
 
+# First Transaction Review aggregate build runs in the job worker, not in a dashboard request
+try:
+    jobs.queue_tx_aggregates_build(os.path.join(os.path.dirname(os.path.abspath(__file__)), DB_PATH))
+except Exception as e:
+    print(f"[Jobs] Could not queue the aggregate build: {e}")
+
 # API endpoint to get module settings (admin only)
 @csrf.exempt
 @app.route('/api/admin/module_settings', methods=['GET'])
@@ -2898,7 +2944,9 @@ def api_admin_permissions():
                     1 if perm.get('can_edit') else 0
                 ))
             
+            _bump_permissions_version(cur)
             conn.commit()
+            invalidate_permission_cache()
             conn.close()
             return jsonify({'success': True, 'message': 'Permissions updated successfully'})
         
@@ -3575,79 +3623,17 @@ def _orig_build_chaser_cycle_for_reviewer(conn, reviewer_id: int, level: int, se
     """
     Returns (chaser_cycle, chaser_headers, chaser_keys, today_key).
 
-    - Considers only rows assigned to this reviewer at the given level.
-    - Excludes cases with outreach_response_received_date present.
+    - Considers only rows assigned to this reviewer.
+    - Counts each case's next chaser to issue (chaser_cycle.next_chaser).
     - Buckets: 'Overdue' + Mon..Sun of THIS week.
     """
-    # make sure we read dict-ish rows
-    try:
-        conn.row_factory = sqlite3.Row
-    except Exception:
-        pass
-
-    today   = date.today()
-    monday  = today - timedelta(days=today.weekday())
-    week    = [monday + timedelta(days=i) for i in range(7)]
-    weekend = monday + timedelta(days=6)
-
-    chaser_headers = ["Overdue"] + [d.strftime("%d/%m/%Y") for d in week]
-    chaser_keys    = ["overdue"]  + [d.strftime("%Y-%m-%d") for d in week]
-    today_key      = today.strftime("%Y-%m-%d")
-
-    # structure
-    chaser_cycle = {
-        "1":   {k: 0 for k in chaser_keys},
-        "2":   {k: 0 for k in chaser_keys},
-        "3":   {k: 0 for k in chaser_keys},
-        "NTC": {k: 0 for k in chaser_keys},
-    }
-
-    assign_col = "assigned_to"
-    sql = f"""
-        SELECT id, task_id,
-               Chaser1DueDate, Chaser1IssuedDate,
-               Chaser2DueDate, Chaser2IssuedDate,
-               Chaser3DueDate, Chaser3IssuedDate,
-               NTCDueDate,   NTCIssuedDate,
-               outreach_response_received_date
-        FROM reviews
-        WHERE {assign_col} = ?
-          AND (outreach_response_received_date IS NULL OR TRIM(outreach_response_received_date) = '')
-    """
-
-    # ensure reviewer_id is an int for INTEGER compare
-    reviewer_id = int(reviewer_id)
-
-    cur = conn.cursor()
-    cur.execute(sql, (reviewer_id,))
-    rows = _fetchall_dicts(cur)
-
-    for r in rows:
-        if _outcome:
-            ro = str((r.get('outcome') or r.get('final_outcome') or '')).strip()
-            if ro.lower() != _outcome.lower():
-                continue
-            if ro.lower() != _outcome.lower():
-                continue
-        # (label, due-column)
-        for label, col in (("1","Chaser1DueDate"),
-                           ("2","Chaser2DueDate"),
-                           ("3","Chaser3DueDate"),
-                           ("NTC","NTCDueDate")):
-            d = _parse_d(r.get(col))
-            if not d:
-                continue
-            if d < monday:
-                chaser_cycle[label]["overdue"] += 1
-            elif monday <= d <= weekend:
-                chaser_cycle[label][d.strftime("%Y-%m-%d")] += 1
-            # future (after weekend) — ignore for “current week”
+    grid = chaser_grid(conn, reviewer_ids=[int(reviewer_id)])
+    res = chaser_cycle_by_label(grid)
 
     # debug totals so you can see numbers in logs
-    totals = {lab: sum(chaser_cycle[lab].values()) for lab in chaser_cycle}
+    totals = {lab: sum(res[0][lab].values()) for lab in res[0]}
     log.debug("ChaserCycle L%s reviewer=%s totals=%s", level, reviewer_id, totals)
-
-    return chaser_cycle, chaser_headers, chaser_keys, today_key
+    return res
 
 # --- route ---
 @app.route('/reviewer_dashboard')
@@ -3713,168 +3699,9 @@ def reviewer_dashboard():
     my_assigned_rows = [r for r in all_rows_mine if (r.get(assign_col) == user_id)]  # <-- int compare
 
     # ─── Chaser Cycle (Weekly Grid by Date) for THIS reviewer ───────────
-    # Rows = Mon..Sun of current week; Columns = Overdue, 7, 14, 21, 28, NTC
-    # Counts include only items NOT YET ISSUED.
-    from collections import defaultdict
-
-    def _coalesce_key(d, names):
-        lower = {k.lower(): k for k in d.keys()}
-        for name in names:
-            if name and name.lower() in lower:
-                return lower[name.lower()]
-        return None
-
-    def _parse_date_any_strict(s):
-        try:
-            from dateutil import parser as _p
-        except Exception:
-            _p = None
-        if not s:
-            return None
-        if isinstance(s, (datetime,)):
-            return s.date()
-        if isinstance(s, str):
-            ss = s.strip()
-            if not ss or ss.lower() in ("none","null","n/a","na"):
-                return None
-            for _fmt in ("%Y-%m-%d","%Y/%m/%d","%d/%m/%Y","%d-%m-%Y","%Y-%m-%d %H:%M:%S"):
-                try:
-                    return datetime.strptime(ss, _fmt).date()
-                except Exception:
-                    pass
-            if _p:
-                try:
-                    return _p.parse(ss).date()
-                except Exception:
-                    return None
-        return None
-
-    def _is_blank_issued(v):
-        if v is None: return True
-        s = str(v).strip().lower()
-        if s in ("", "none", "null", "n/a", "na", "-", "0", "false"): return True
-
-        # treat common zero-dates as blank
-        if s in ("00/00/0000", "0000-00-00"): return True
-        return False
-
-    
-    # 5-day working week (Mon..Fri of the current week)
-    week_days = [monday_this + timedelta(days=i) for i in range(5)]
-    chaser_week_headers = ["Overdue","7","14","21","NTC"]
-    chaser_week_rows = [
-        {"date": d.strftime("%d/%m/%Y"), "iso": d.isoformat(), **{h:0 for h in chaser_week_headers}}
-        for d in week_days
-    ]
-
-    # Column aliases for robustness across DB variants
-    DUE_MAP = {
-        "7":  ["Chaser1DueDate","Chaser_1_DueDate","chaser1_due","chaser_1_due","Outreach1DueDate","Outreach_Cycle_1_Due"],
-        "14": ["Chaser2DueDate","Chaser_2_DueDate","chaser2_due","chaser_2_due","Outreach2DueDate","Outreach_Cycle_2_Due"],
-        "21": ["Chaser3DueDate","Chaser_3_DueDate","chaser3_due","chaser_3_due","Outreach3DueDate","Outreach_Cycle_3_Due"],
-        "NTC": ["NTCDueDate","NTC_DueDate","ntc_due","NTC Due Date","NTC_Due"]
-    }
-    ISSUED_MAP = {
-        "7":  ["Chaser1IssuedDate","Chaser1DateIssued","chaser1_issued","Outreach1Date","Outreach_Cycle_1_Issued","Outreach Cycle 1 Issued"],
-        "14": ["Chaser2IssuedDate","Chaser2DateIssued","chaser2_issued","Outreach2Date","Outreach_Cycle_2_Issued","Outreach Cycle 2 Issued"],
-        "21": ["Chaser3IssuedDate","Chaser3DateIssued","chaser3_issued","Outreach3Date","Outreach_Cycle_3_Issued","Outreach Cycle 3 Issued"],
-        "NTC": ["NTCIssuedDate","NTC_IssuedDate","ntc_issued"]
-    }
-
-    STATUS_TO_COL = {
-        "7 day chaser due": "7",
-        "chaser1_due": "7",
-        "chaser1 due": "7",
-        "14 day chaser due": "14",
-        "chaser2_due": "14",
-        "chaser2 due": "14",
-        "21 day chaser due": "21",
-        "chaser3_due": "21",
-        "chaser3 due": "21",
-        "ntc_due": "NTC",
-        "ntc due": "NTC",
-        "ntc - due": "NTC"
-    }
-
-    def _first_nonblank(rec: dict, keys: list):
-        for k in keys:
-            if k in rec and str(rec.get(k) or "").strip():
-                return rec.get(k)
-        return None
-
-    # draw directly from DB to avoid any prior label munging
-    _conn2 = sqlite3.connect('scrutinise_workflow.db')
-    _conn2.row_factory = sqlite3.Row
-    _cur2 = _conn2.cursor()
-    try:
-        _rows = _cur2.execute("SELECT * FROM reviews").fetchall()
-    except Exception:
-        _rows = []  # fail-safe if DB missing in unit tests
-
-    today = date.today()
-
-    for rec in _rows:
-        # normalize dict with lowercased keys for resilience
-        r = { (k or ""): rec[k] for k in rec.keys() }
-        low_status = (str(r.get("status") or "")).strip().lower()
-
-        # determine which cycle this row is in, strictly from STATUS
-        is_overdue = "overdue" in low_status
-        col = None
-        for key, mapped in STATUS_TO_COL.items():
-            if key in low_status:
-                col = mapped
-                break
-        if not col and not is_overdue:
-            # not in a chaser cycle / NTC, skip entirely
-            continue
-
-        # choose the relevant due date based on the column
-        if is_overdue:
-            # try each typ to find the due date that matches this record
-            try_order = ["7","14","21","NTC"]
-        else:
-            try_order = [col]
-
-        due_date = None
-        for typ in try_order:
-            due_raw = _first_nonblank(r, DUE_MAP.get(typ, [])) or ""
-            # Parse date robustly
-            d = None
-            for fmt in ("%Y-%m-%d","%d/%m/%Y","%d-%m-%Y","%Y/%m/%d"):
-                try:
-                    d = datetime.strptime(str(due_raw).strip(), fmt).date()
-                    break
-                except Exception:
-                    continue
-            if d:
-                due_date = d
-                chosen_typ = typ
-                break
-
-        if not due_date:
-            continue  # can't place it on the working week grid
-
-        # Respect "Counts include only items not yet issued."
-        issued_raw = _first_nonblank(r, ISSUED_MAP.get(chosen_typ, []))
-        if issued_raw and str(issued_raw).strip():
-            continue
-
-        # only current WORKING week rows
-        if not (week_days[0] <= due_date <= week_days[-1]):
-            continue
-
-        # place into Overdue or the specific cycle
-        target_col = "Overdue" if (is_overdue and due_date < today) else chosen_typ
-
-        # increment the matching row
-        for row in chaser_week_rows:
-            if row["iso"] == due_date.isoformat():
-                row[target_col] += 1
-                break
-
-    # Expose unified names used by the template
-    chaser_headers = chaser_week_headers
+    # Rows = Mon..Fri of current week; Columns = Overdue, 7, 14, 21, NTC
+    # Counts follow the review status and include only chasers NOT YET ISSUED (see chaser_cycle.py).
+    chaser_week_rows, chaser_headers = status_week_rows(conn, reviewer_ids=[user_id], today=today)
     
 
     # ---------- KPI: Active WIP (LIVE) ----------
@@ -4244,6 +4071,7 @@ def mi_dashboard():
 
     db  = get_db()
     cur = db.cursor()
+    snap = dashboard_snapshot.get_snapshot(db)
 
     rows = []  # safety: ensure 'rows' is defined
     # ─── Build Teams dropdown ─────────────────────────────────────────────
@@ -4260,180 +4088,14 @@ def mi_dashboard():
     ]
 
     # ─── GLOBAL DATA for Escalation & Forecast (ignore all filters) ──────
-    cur.execute("SELECT * FROM reviews")
-    reviews_all = [dict(r) for r in cur.fetchall()]
+    reviews_all = snap.all_rows()
 
 
     # ─── Chaser Cycle (Weekly Grid by Date) ───────────────────────────────
-    # Rows = dates in current week (Mon..Sun); Columns = Overdue, 7, 14, 21, 28, NTC
-    # Counts are driven by DueDate fields in `reviews` and only include items not yet issued.
-    from collections import defaultdict
-
-    def _coalesce_key(d, names):
-        lower = {k.lower(): k for k in d.keys()}
-        for name in names:
-            n = name.lower()
-            if n in lower:
-                return lower[n]
-        return None
-
-    def _parse_date_any_strict(s):
-        try:
-            from dateutil import parser as _p
-        except Exception:
-            _p = None
-        if not s:
-            return None
-        if isinstance(s, (datetime,)):
-            return s.date()
-        if isinstance(s, str):
-            ss = s.strip()
-            if not ss or ss.lower() in ("none","null","n/a","na"):
-                return None
-            for _fmt in ("%Y-%m-%d","%Y/%m/%d","%d/%m/%Y","%d-%m-%Y","%Y-%m-%d %H:%M:%S"):
-                try:
-                    return datetime.strptime(ss, _fmt).date()
-                except Exception:
-                    pass
-            if _p:
-                try:
-                    return _p.parse(ss).date()
-                except Exception:
-                    return None
-        return None
-
-    def _is_blank_issued(v):
-        if v is None: return True
-        s = str(v).strip().lower()
-        if s in ("", "none", "null", "n/a", "na", "-", "0", "false"): return True
-        # Treat any date-like content as issued
-        return False
-
-    # Build week rows
-    week_days = [monday_this + timedelta(days=i) for i in range(7)]
-    
-    # Working week (Mon..Fri) for current week
-    week_days = [monday_this + timedelta(days=i) for i in range(5)]
-    chaser_week_headers = ["Overdue","7","14","21","NTC"]
-    chaser_week_rows = [
-        {"date": d.strftime("%d/%m/%Y"), "iso": d.isoformat(), **{h:0 for h in chaser_week_headers}}
-        for d in week_days
-    ]
-
-    # Column name aliases across DB variants
-    DUE_MAP = {
-        "7":  ["Chaser1DueDate","Chaser_1_DueDate","chaser1_due","chaser_1_due","Outreach1DueDate","Outreach_Cycle_1_Due"],
-        "14": ["Chaser2DueDate","Chaser_2_DueDate","chaser2_due","chaser_2_due","Outreach2DueDate","Outreach_Cycle_2_Due"],
-        "21": ["Chaser3DueDate","Chaser_3_DueDate","chaser3_due","chaser_3_due","Outreach3DueDate","Outreach_Cycle_3_Due"],
-        "NTC": ["NTCDueDate","NTC_DueDate","ntc_due","NTC Due Date","NTC_Due"]
-    }
-    ISSUED_MAP = {
-        "7":  ["Chaser1IssuedDate","Chaser1DateIssued","chaser1_issued","Outreach1Date","Outreach_Cycle_1_Issued","Outreach Cycle 1 Issued"],
-        "14": ["Chaser2IssuedDate","Chaser2DateIssued","chaser2_issued","Outreach2Date","Outreach_Cycle_2_Issued","Outreach Cycle 2 Issued"],
-        "21": ["Chaser3IssuedDate","Chaser3DateIssued","chaser3_issued","Outreach3Date","Outreach_Cycle_3_Issued","Outreach Cycle 3 Issued"],
-        "NTC": ["NTCIssuedDate","NTC_IssuedDate","ntc_issued"]
-    }
-
-    STATUS_TO_COL = {
-        "chaser1_due": "7",
-        "7 day chaser due": "7",
-        "chaser1 due": "7",
-        "chaser2_due": "14",
-        "14 day chaser due": "14",
-        "chaser2 due": "14",
-        "chaser3_due": "21",
-        "21 day chaser due": "21",
-        "chaser3 due": "21",
-        "ntc_due": "NTC",
-        "ntc due": "NTC",
-        "ntc - due": "NTC"
-    }
-
-    def _coalesce_key(rec, keys):
-        for k in keys:
-            if k in rec and str(rec.get(k) or "").strip():
-                return k
-        return None
-
-    def _parse_date_any(s):
-        if not s:
-            return None
-        s = str(s).strip()
-        for fmt in ("%Y-%m-%d","%d/%m/%Y","%d-%m-%Y","%Y/%m/%d"):
-            try:
-                return datetime.strptime(s, fmt).date()
-            except Exception:
-                continue
-        return None
-
-    # Pull reviews and compute strictly from raw status
-    conn2 = sqlite3.connect('scrutinise_workflow.db')
-    conn2.row_factory = sqlite3.Row
-    cur2 = conn2.cursor()
-    try:
-        reviews = cur2.execute("SELECT * FROM reviews").fetchall()
-    except Exception:
-        reviews = []
-    finally:
-        try: conn2.close()
-        except Exception: pass
-
-    today = date.today()
-
-    for rec in reviews:
-        rec = dict(rec)
-        low_status = (str(rec.get("status") or rec.get("current_status") or "")).strip().lower()
-        is_overdue = "overdue" in low_status
-
-        # decide target column from status
-        col = None
-        for key, mapped in STATUS_TO_COL.items():
-            if key in low_status:
-                col = mapped
-                break
-
-        if not col and not is_overdue:
-            # not in chaser cycle nor NTC
-            continue
-
-        # choose due-date column(s) to look at
-        search_types = ["7","14","21","NTC"] if is_overdue else [col]
-
-        chosen_typ = None
-        due_date = None
-        for typ in search_types:
-            k = _coalesce_key(rec, DUE_MAP.get(typ, []))
-            if not k:
-                continue
-            d = _parse_date_any(rec.get(k))
-            if d:
-                due_date = d
-                chosen_typ = typ
-                break
-
-        if not due_date:
-            continue
-
-        # respect "not yet issued"
-        ik = _coalesce_key(rec, ISSUED_MAP.get(chosen_typ, []))
-        if ik and str(rec.get(ik) or "").strip():
-            continue
-
-        # only within this working week
-        if not (week_days[0] <= due_date <= week_days[-1]):
-            continue
-
-        target = "Overdue" if (is_overdue and due_date < today and chosen_typ in ("7","14","21")) else chosen_typ
-
-        # increment the correct row/column
-        for row in chaser_week_rows:
-            if row["iso"] == due_date.isoformat():
-                row[target] += 1
-                break
-
-    chaser_headers = chaser_week_headers
-    
-    chaser_week_rows = chaser_week_rows
+    # Rows = Mon..Fri of current week; Columns = Overdue, 7, 14, 21, NTC
+    # Counts follow the review status and include only chasers not yet issued (see chaser_cycle.py).
+    chaser_week_rows, chaser_headers = status_week_rows(
+        db, team_lead=selected_team if selected_team != "all" else None, today=today)
 
 
     # Escalation rates (global; renamed labels)
@@ -4460,7 +4122,7 @@ def mi_dashboard():
 
     # ─── 1) Base Population (team filter only) ────────────────────────────
     pop_sql    = """
-      SELECT r.*
+      SELECT r.id
         FROM reviews r
    LEFT JOIN users u ON u.id = r.l1_assigned_to
        WHERE 1=1
@@ -4470,8 +4132,7 @@ def mi_dashboard():
         pop_sql    += " AND u.team_lead = ?"
         pop_params.append(selected_team)
 
-    cur.execute(pop_sql, pop_params)
-    reviews_base = [dict(r) for r in cur.fetchall()]
+    reviews_base = snap.select(db, pop_sql, pop_params)
 
     # Total Population with level filter (only restrict for 2/3 so L1 shows pending/unassigned)
     reviews_pop = reviews_base.copy()
@@ -4492,8 +4153,7 @@ def mi_dashboard():
     elif date_range == "30d":
         data_sql += " AND r.updated_at >= datetime('now','-30 days')"
 
-    cur.execute(data_sql, data_params)
-    reviews = [dict(r) for r in cur.fetchall()]
+    reviews = snap.select(db, data_sql, data_params)
 
     # Level scoping that preserves Unassigned/Pending at L2/L3
     if selected_level == "2":
@@ -4534,7 +4194,7 @@ def mi_dashboard():
     # Total Completed (respect level filter)
     def _is_completed_review(rec: dict) -> bool:
         s = str(rec.get('status', '')).strip().lower()
-        return (s in ('complete', 'completed')) or (str(derive_case_status(rec)) == str(ReviewStatus.COMPLETED))
+        return (s in ('complete', 'completed')) or (snap.live_status(rec["id"]) == str(ReviewStatus.COMPLETED))
 
     total_completed = sum(1 for r in reviews if _is_completed_review(r))
 
@@ -5277,13 +4937,14 @@ def download_mi_report():
                 df = pd.read_sql_query(q, conn)
                 df = apply_name_mapping(df)
 
-                # Live Status column
+                # Live Status column (derived once per data version in the dashboard snapshot)
+                snap = dashboard_snapshot.get_snapshot(conn)
                 records = df.to_dict(orient="records")
                 insert_at = min(5, len(df.columns)) if len(df.columns) else 0
                 df.insert(
                     loc=insert_at,
                     column="Live Status",
-                    value=[excel_safe_value(derive_case_status(r)) for r in records]
+                    value=[excel_safe_value(snap.live_status(int(r["id"])) or derive_case_status(r)) for r in records]
                 )
             else:
                 df = pd.read_sql_query(f"SELECT * FROM {tbl}", conn)
@@ -5528,8 +5189,10 @@ def export_excel():
 
 
     # --- BEGIN FIX: ensure exported Status reflects true status (dashboard logic) ---
+    # Derived once per data version in the dashboard snapshot
+    snap = dashboard_snapshot.get_snapshot(conn)
     _records_for_status = df.to_dict(orient="records")
-    _true_status = [excel_safe_value(derive_case_status(r)) for r in _records_for_status]
+    _true_status = [excel_safe_value(snap.live_status(int(r["id"])) or derive_case_status(r)) for r in _records_for_status]
     try:
         if "Status" in df.columns:
             df.drop(columns=["Status"], inplace=True)
@@ -5539,8 +5202,6 @@ def export_excel():
     df.insert(loc=_status_insert_at, column="Status", value=_true_status)
     # --- END FIX ---
     # --- BEGIN FIX: compute Live Status BEFORE any status columns are dropped ---
-    _records_for_status = df.to_dict(orient="records")
-    _live_status_series = [excel_safe_value(derive_case_status(r)) for r in _records_for_status]
     try:
         if "Live Status" in df.columns:
             df.drop(columns=["Live Status"], inplace=True)
@@ -7214,18 +6875,8 @@ def global_before_request():
         else:
             print(f"[DEBUG] API request {request.path} - Session OK: user_id={session.get('user_id')}, role={session.get('role')}, endpoint={request.endpoint}")
             
-            # Update last_active for logged-in users (API requests)
-            try:
-                conn = get_db()
-                conn.execute(
-                    "UPDATE users SET last_active = ? WHERE id = ?",
-                    (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), session["user_id"]),
-                )
-                conn.commit()
-                conn.close()
-            except Exception as e:
-                print(f"[DEBUG] Failed to update last_active for API request: {e}")
-                pass
+            # Update last_active for logged-in users (API requests) - batched write-behind
+            _last_active.touch(session["user_id"], datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
             
             # For API requests with session, allow through to route handler
             # Return None to let Flask continue to route matching
@@ -7235,19 +6886,9 @@ def global_before_request():
     if "user_id" not in session:
         return redirect(url_for("login"))
 
-    # Update last_active for logged-in users (non-API requests)
+    # Update last_active for logged-in users (non-API requests) - batched write-behind
     if "user_id" in session:
-        try:
-            conn = get_db()
-            conn.execute(
-                "UPDATE users SET last_active = ? WHERE id = ?",
-                (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), session["user_id"]),
-            )
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"[DEBUG] Failed to update last_active: {e}")
-            pass
+        _last_active.touch(session["user_id"], datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
 def get_assignment_counts_by_level(level):
     db = get_db()
@@ -8774,7 +8415,9 @@ def permissions_editor():
                 VALUES (?, ?, ?, ?)
             """, (role, feature, can_view, can_edit))
 
+        _bump_permissions_version(cur)
         conn.commit()
+        invalidate_permission_cache()
         flash("Permissions updated successfully.", "success")
 
     cur.execute("SELECT * FROM permissions ORDER BY role, feature")
@@ -9045,9 +8688,10 @@ def ops_mi_cases():
 
     db  = get_db()
     cur = db.cursor()
+    snap = dashboard_snapshot.get_snapshot(db)
 
     base_sql = """
-      SELECT r.*
+      SELECT r.id
         FROM reviews r
    LEFT JOIN users u ON u.id = r.assigned_to
        WHERE 1=1
@@ -9066,8 +8710,7 @@ def ops_mi_cases():
         base_sql += " AND r.updated_at >= datetime('now','-30 days')"
 
     try:
-        cur.execute(base_sql, params)
-        rows = [dict(r) for r in cur.fetchall()]
+        rows = snap.select(db, base_sql, params)
     except Exception as e:
         rows = []
 
@@ -9344,21 +8987,14 @@ def ops_mi_cases():
             if ro.lower() != _outcome.lower():
                 continue
 
-        # Derived status (used for display)
-        # Fix mismatch: if assigned_to is set but status says "Unassigned", derive correct status
+        # Derived status (used for display) - materialized on the row (utils.dashboard_status)
         raw_status = r.get('status', '')
-        assigned_to = r.get('assigned_to')
         
         # Preserve "Referred to AI SME" status
         if raw_status and 'referred to ai sme' in raw_status.lower():
             s = raw_status  # Keep the manually set AI SME status
-        elif assigned_to and raw_status and raw_status.lower() == 'unassigned':
-            # Task is assigned but status is wrong - derive correct status
-            s = str(derive_case_status(r)) or "(Unclassified)"
         else:
-            # Use best_status_with_raw_override to respect manually set statuses
-            from utils import best_status_with_raw_override
-            s = str(best_status_with_raw_override(r)) or "(Unclassified)"
+            s = r.get('derived_status') or "(Unclassified)"
         
         # Debug logging for AI SME referrals when filtering by "Referred to SME"
         if status and status.strip().lower() == 'referred to sme' and raw_status and 'referred to ai sme' in raw_status.lower():
@@ -11068,143 +10704,11 @@ def api_reviewer_dashboard():
             'bucket_5p': sum(r.get('bucket_5p', 0) for r in age_rows),
         }
         
-        # Build chaser_week_rows for reviewer (similar to ops dashboard but filtered to this reviewer)
-        week_days = [monday_this + timedelta(days=i) for i in range(5)]  # Mon-Fri
-        chaser_week_headers = ["7", "14", "21", "NTC"]  # Removed "Overdue" - now separate
-        chaser_week_rows = [
-            {"date": d.strftime("%d/%m/%Y"), "iso": d.isoformat(), **{h: 0 for h in chaser_week_headers}}
-            for d in week_days
-        ]
-        # Separate structure for overdue chasers
-        chaser_overdue = {"7": 0, "14": 0, "21": 0, "NTC": 0}
-        
-        # Process chaser cycle for this reviewer's assigned tasks
-        DUE_MAP = {
-            "7": ["Chaser1DueDate", "Chaser_1_DueDate", "chaser1_due", "chaser_1_due", "Outreach1DueDate", "Outreach_Cycle_1_Due"],
-            "14": ["Chaser2DueDate", "Chaser_2_DueDate", "chaser2_due", "chaser_2_due", "Outreach2DueDate", "Outreach_Cycle_2_Due"],
-            "21": ["Chaser3DueDate", "Chaser_3_DueDate", "chaser3_due", "chaser_3_due", "Outreach3DueDate", "Outreach_Cycle_3_Due"],
-            "NTC": ["NTCDueDate", "NTC_DueDate", "ntc_due", "NTC Due Date", "NTC_Due"]
-        }
-        ISSUED_MAP = {
-            "7": ["Chaser1IssuedDate", "Chaser1DateIssued", "chaser1_issued", "Outreach1Date", "Outreach_Cycle_1_Issued", "Outreach Cycle 1 Issued"],
-            "14": ["Chaser2IssuedDate", "Chaser2DateIssued", "chaser2_issued", "Outreach2Date", "Outreach_Cycle_2_Issued", "Outreach Cycle 2 Issued"],
-            "21": ["Chaser3IssuedDate", "Chaser3DateIssued", "chaser3_issued", "Outreach3Date", "Outreach_Cycle_3_Issued", "Outreach Cycle 3 Issued"],
-            "NTC": ["NTCIssuedDate", "NTC_IssuedDate", "ntc_issued"]
-        }
-        STATUS_TO_COL = {
-            "chaser1_due": "7", "7 day chaser due": "7", "chaser1 due": "7",
-            "chaser2_due": "14", "14 day chaser due": "14", "chaser2 due": "14",
-            "chaser3_due": "21", "21 day chaser due": "21", "chaser3 due": "21",
-            "ntc_due": "NTC", "ntc due": "NTC", "ntc - due": "NTC"
-        }
-        
-        def _coalesce_key(rec, keys):
-            for k in keys:
-                if k in rec and str(rec.get(k) or "").strip():
-                    return k
-            return None
-        
-        def _parse_date_any(s):
-            if not s:
-                return None
-            s = str(s).strip()
-            # Try ISO datetime format first (e.g., "2025-10-07T00:01:00")
-            for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"):
-                try:
-                    return datetime.strptime(s, fmt).date()
-                except:
-                    continue
-            # If all formats fail, try dateutil parser as last resort
-            try:
-                from dateutil import parser
-                return parser.parse(s).date()
-            except:
-                pass
-            return None
-        
-        def _is_blank_issued(v):
-            if v is None:
-                return True
-            s = str(v).strip().lower()
-            return s in ("", "none", "null", "n/a", "na", "-", "0", "false")
-        
-        # Helper function to check if a chaser has been issued
-        def _is_chaser_issued(rec, chaser_type):
-            """Check if a chaser type has been issued"""
-            ik = _coalesce_key(rec, ISSUED_MAP.get(chaser_type, []))
-            if ik:
-                return not _is_blank_issued(rec.get(ik))
-            return False
-        
-        # Process assigned tasks for chaser cycle with sequential logic
-        for rec in my_assigned_rows:
-            # Skip if outreach is completed
-            outreach_complete = rec.get('outreach_complete') or rec.get('OutreachComplete')
-            if outreach_complete in (1, '1', True, 'true', 'True'):
-                continue
-            
-            # Check chasers sequentially: 7 → 14 → 21 → NTC
-            # Only show the NEXT chaser that needs to be issued
-            chaser_sequence = ["7", "14", "21", "NTC"]
-            found_next_chaser = False
-            
-            for typ in chaser_sequence:
-                # Check if all previous chasers have been issued
-                if typ == "7":
-                    # 7-day chaser: no prerequisites
-                    prev_issued = True
-                elif typ == "14":
-                    # 14-day chaser: 7-day must be issued
-                    prev_issued = _is_chaser_issued(rec, "7")
-                elif typ == "21":
-                    # 21-day chaser: 7-day and 14-day must be issued
-                    prev_issued = _is_chaser_issued(rec, "7") and _is_chaser_issued(rec, "14")
-                elif typ == "NTC":
-                    # NTC: 7-day, 14-day, and 21-day must be issued
-                    prev_issued = _is_chaser_issued(rec, "7") and _is_chaser_issued(rec, "14") and _is_chaser_issued(rec, "21")
-                else:
-                    prev_issued = False
-                
-                # Skip if previous chasers haven't been issued
-                if not prev_issued:
-                    continue
-                
-                # Check if this chaser has been issued (if so, move to next)
-                if _is_chaser_issued(rec, typ):
-                    continue  # Already issued, check next chaser
-                
-                # Get due date for this chaser
-                k = _coalesce_key(rec, DUE_MAP.get(typ, []))
-                if not k:
-                    continue
-                d = _parse_date_any(rec.get(k))
-                if not d:
-                    continue
-                
-                # Find which row this due date falls into (Mon-Fri of current week)
-                row_idx = None
-                for idx, week_day in enumerate(week_days):
-                    if d == week_day:
-                        row_idx = idx
-                        break
-                
-                # Only count if due date is in current week (Mon-Fri) or overdue
-                is_overdue = d < monday_this
-                is_in_current_week = row_idx is not None
-                
-                if is_overdue:
-                    # Add to separate overdue structure
-                    chaser_overdue[typ] += 1
-                    found_next_chaser = True
-                    break  # Found the next chaser to show, stop checking
-                elif is_in_current_week:
-                    # Show in specific chaser column on the due date row
-                    if chaser_week_rows:
-                        chaser_week_rows[row_idx][typ] += 1
-                    found_next_chaser = True
-                    break  # Found the next chaser to show, stop checking
-                # If due date is not in current week and not overdue, skip it
-                # (don't show future chasers until their due dates are in the current week)
+        # Chaser cycle for this reviewer's assigned tasks (one grouped query, see chaser_cycle.py)
+        chaser = week_rows(chaser_grid(conn, reviewer_ids=[user_id], today=today))
+        chaser_week_rows = chaser['chaser_week_rows']
+        chaser_week_headers = chaser['chaser_headers']
+        chaser_overdue = chaser['chaser_overdue']
         
         conn.close()
 
@@ -11789,6 +11293,9 @@ def api_team_leader_dashboard():
         qc_pass_cnt = sum(1 for o in qc_outcomes if o in ("pass", "pass with feedback"))
         qc_pass_pct = round((qc_pass_cnt / qc_sample) * 100, 1) if qc_sample > 0 else 0.0
         
+        # Chaser cycle across the team's reviewers (same grid as the reviewer / Ops MI dashboards)
+        chaser = week_rows(chaser_grid(conn, reviewer_ids=r_ids))
+        
         conn.close()
         
         return jsonify({
@@ -11799,7 +11306,8 @@ def api_team_leader_dashboard():
             'completed_count': completed_count,
             'qc_sample': qc_sample,
             'qc_pass_pct': qc_pass_pct,
-            'reviewers': reviewers
+            'reviewers': reviewers,
+            **chaser
         })
     except Exception as e:
         import traceback
@@ -12539,6 +12047,8 @@ def api_operations_dashboard():
         
         db = get_db()
         cur = db.cursor()
+        # Shared reviews working set (brings materialized statuses up to date first)
+        snap = dashboard_snapshot.get_snapshot(db)
         
         # Build Teams dropdown
         cur.execute("""
@@ -12574,7 +12084,7 @@ def api_operations_dashboard():
         
         # Get reviews with team and date filter (updated for single-level fields)
         pop_sql = """
-            SELECT r.*
+            SELECT r.id
             FROM reviews r
             LEFT JOIN users u ON u.id = r.assigned_to
             WHERE 1=1
@@ -12600,163 +12110,89 @@ def api_operations_dashboard():
                 date_start.isoformat(), date_end.isoformat()   # For date_assigned (active tasks)
             ])
         
-        cur.execute(pop_sql, pop_params)
-        reviews_base = [dict(r) for r in cur.fetchall()]
-        
-        # Total Population
-        total_screened = len(reviews_base)
-        
-        # Total Completed
-        total_completed = sum(1 for r in reviews_base 
-                             if str(r.get('status', '')).strip().lower() in ('complete', 'completed'))
-        
-        # QC Sample and Pass Rate (updated for single-level fields)
-        qc_sample = 0
-        pass_qc = 0
-        for r in reviews_base:
-            qc_outcome = r.get("qc_outcome")
-            if qc_outcome:
-                qc_sample += 1
-                if str(qc_outcome).lower().startswith("pass"):
-                    pass_qc += 1
-        
-        qc_pass_pct = round((pass_qc / qc_sample) * 100, 1) if qc_sample else 0
-        
-        # Case Status Distribution with Age Buckets
-        from collections import defaultdict
-        from datetime import datetime, timedelta
-        
-        status_counts = defaultdict(int)
-        age_by_status = defaultdict(lambda: defaultdict(int))
-        
-        def calc_age_days(r):
-            """Calculate age in days since updated_at or date_assigned"""
-            dt_str = r.get('updated_at') or r.get("date_assigned")
-            if not dt_str:
-                return 999  # Unknown age
-            try:
-                dt = datetime.strptime(str(dt_str), '%Y-%m-%d %H:%M:%S')
-                return (datetime.now() - dt).days
-            except:
-                return 999
-        
-        for r in reviews_base:
-            # Use derive_case_status to get the correct status instead of raw status field
-            # This properly checks assigned_to field to determine if task is unassigned
-            # Fix mismatch: if assigned_to is set but status says "Unassigned", derive correct status
-            raw_status = r.get('status', '')
-            assigned_to = r.get('assigned_to')
+        def _population_aggregates():
+            reviews_base = snap.select(db, pop_sql, pop_params)
             
-            # Use best_status_with_raw_override to respect manually set statuses
-            # This will preserve "Referred to AI SME" as-is, but we'll group it under "Referred to SME" for counts
-            from utils import best_status_with_raw_override
-            derived_status = best_status_with_raw_override(r)
+            # Total Population
+            total_screened = len(reviews_base)
             
-            # Group "Referred to AI SME" under "Referred to SME" for dashboard counts
-            if str(derived_status) == "Referred to AI SME":
-                from utils import ReviewStatus
-                derived_status = ReviewStatus.SME_REFERRED  # Map to "Referred to SME" for dashboard grouping
+            # Total Completed
+            total_completed = sum(1 for r in reviews_base 
+                                 if str(r.get('status', '')).strip().lower() in ('complete', 'completed'))
             
-            # Fix mismatch: if assigned_to is set but status says "Unassigned", derive correct status
-            if assigned_to and raw_status and raw_status.lower() == 'unassigned':
-                # Task is assigned but status is wrong - derive correct status
-                derived_status = derive_case_status(r)
-                # Group "Referred to AI SME" under "Referred to SME" for dashboard counts
-                if str(derived_status) == "Referred to AI SME":
-                    from utils import ReviewStatus
-                    derived_status = ReviewStatus.SME_REFERRED
+            # QC Sample and Pass Rate (updated for single-level fields)
+            qc_sample = 0
+            pass_qc = 0
+            for r in reviews_base:
+                qc_outcome = r.get("qc_outcome")
+                if qc_outcome:
+                    qc_sample += 1
+                    if str(qc_outcome).lower().startswith("pass"):
+                        pass_qc += 1
             
-            status = str(derived_status)  # ReviewStatus is a string enum, so str() works directly
-            status_counts[status] += 1
+            qc_pass_pct = round((pass_qc / qc_sample) * 100, 1) if qc_sample else 0
             
-            age = calc_age_days(r)
-            if age <= 12:
-                age_by_status[status]['1–2 days'] += 1
-            elif age <= 35:
-                age_by_status[status]['3–5 days'] += 1
-            else:
-                age_by_status[status]['5 days+'] += 1
-        
-        total_reviews = len(reviews_base) or 1
-        distribution = [
-            {
-                "status": status,
-                "count": count,
-                "pct": round((count / total_reviews) * 100, 1),
-                "age_buckets": dict(age_by_status[status])
-            }
-            for status, count in sorted(status_counts.items(), key=lambda x: x[1], reverse=True)
-        ]
-        
-        # Outcome Breakdown (updated for single-level fields)
-        outcome_counts = defaultdict(int)
-        for r in reviews_base:
-            if str(r.get('status', '')).strip().lower() in ('complete', 'completed'):
-                outcome = r.get('outcome', 'Unknown')
-                if outcome:
-                    outcome_counts[outcome] += 1
-        
-        total_outcomes = sum(outcome_counts.values()) or 1
-        outcome_breakdown = [
-            {
-                "label": outcome,
-                "count": count,
-                "pct": round((count / total_outcomes) * 100, 1)
+            # Case Status Distribution with Age Buckets - grouped on the
+            # materialized status_bucket / age_bucket columns (see status_materializer.py)
+            from collections import defaultdict
+            
+            status_counts = defaultdict(int)
+            age_by_status = defaultdict(lambda: defaultdict(int))
+            
+            for r in reviews_base:
+                status = r.get("status_bucket") or "(Unclassified)"
+                status_counts[status] += 1
+                age_by_status[status][r.get("age_bucket") or "5 days+"] += 1
+            
+            total_reviews = len(reviews_base) or 1
+            distribution = [
+                {
+                    "status": status,
+                    "count": count,
+                    "pct": round((count / total_reviews) * 100, 1),
+                    "age_buckets": dict(age_by_status[status])
+                }
+                # ties keep the old GROUP BY order (status_bucket ascending)
+                for status, count in sorted(sorted(status_counts.items()), key=lambda x: x[1], reverse=True)
+            ]
+            
+            # Outcome Breakdown (updated for single-level fields)
+            outcome_counts = defaultdict(int)
+            for r in reviews_base:
+                if str(r.get('status', '')).strip().lower() in ('complete', 'completed'):
+                    outcome = r.get('outcome', 'Unknown')
+                    if outcome:
+                        outcome_counts[outcome] += 1
+            
+            total_outcomes = sum(outcome_counts.values()) or 1
+            outcome_breakdown = [
+                {
+                    "label": outcome,
+                    "count": count,
+                    "pct": round((count / total_outcomes) * 100, 1)
+                }
+                for outcome, count in sorted(outcome_counts.items(), key=lambda x: x[1], reverse=True)
+            ]
+            return {
+                'total_screened': total_screened,
+                'total_completed': total_completed,
+                'qc_sample': qc_sample,
+                'qc_pass_pct': qc_pass_pct,
+                'pass_qc': pass_qc,
+                'distribution': distribution,
+                'outcome_breakdown': outcome_breakdown,
             }
-            for outcome, count in sorted(outcome_counts.items(), key=lambda x: x[1], reverse=True)
-        ]
-        
-        # Chaser Cycle (Current Week) - use separate query to get ALL tasks with chasers, not filtered by date_assigned/date_completed
-        from collections import defaultdict
-        week_days = [monday_this + timedelta(days=i) for i in range(5)]  # Mon-Fri
-        chaser_week_headers = ["7", "14", "21", "NTC"]  # Removed "Overdue" - now separate
-        chaser_week_rows = [
-            {"date": d.strftime("%d/%m/%Y"), "iso": d.isoformat(), **{h: 0 for h in chaser_week_headers}}
-            for d in week_days
-        ]
-        # Separate structure for overdue chasers
-        chaser_overdue = {"7": 0, "14": 0, "21": 0, "NTC": 0}
-        
-        # Get ALL tasks for chaser cycle (not filtered by date_assigned/date_completed)
-        # Only filter by team if specified
-        chaser_sql = """
-            SELECT r.*
-            FROM reviews r
-            LEFT JOIN users u ON u.id = r.assigned_to
-            WHERE 1=1
-        """
-        chaser_params = []
-        if selected_team != "all":
-            chaser_sql += " AND u.team_lead = ?"
-            chaser_params.append(selected_team)
         
-        cur.execute(chaser_sql, chaser_params)
-        chaser_reviews = [dict(r) for r in cur.fetchall()]
-        
-        DUE_MAP = {
-            "7": ["Chaser1DueDate", "Chaser_1_DueDate", "chaser1_due", "chaser_1_due", "Outreach1DueDate", "Outreach_Cycle_1_Due"],
-            "14": ["Chaser2DueDate", "Chaser_2_DueDate", "chaser2_due", "chaser_2_due", "Outreach2DueDate", "Outreach_Cycle_2_Due"],
-            "21": ["Chaser3DueDate", "Chaser_3_DueDate", "chaser3_due", "chaser_3_due", "Outreach3DueDate", "Outreach_Cycle_3_Due"],
-            "NTC": ["NTCDueDate", "NTC_DueDate", "ntc_due", "NTC Due Date", "NTC_Due"]
-        }
-        ISSUED_MAP = {
-            "7": ["Chaser1IssuedDate", "Chaser1DateIssued", "chaser1_issued", "Outreach1Date", "Outreach_Cycle_1_Issued", "Outreach Cycle 1 Issued"],
-            "14": ["Chaser2IssuedDate", "Chaser2DateIssued", "chaser2_issued", "Outreach2Date", "Outreach_Cycle_2_Issued", "Outreach Cycle 2 Issued"],
-            "21": ["Chaser3IssuedDate", "Chaser3DateIssued", "chaser3_issued", "Outreach3Date", "Outreach_Cycle_3_Issued", "Outreach Cycle 3 Issued"],
-            "NTC": ["NTCIssuedDate", "NTC_IssuedDate", "ntc_issued"]
-        }
-        STATUS_TO_COL = {
-            "chaser1_due": "7", "7 day chaser due": "7", "chaser1 due": "7",
-            "chaser2_due": "14", "14 day chaser due": "14", "chaser2 due": "14",
-            "chaser3_due": "21", "21 day chaser due": "21", "chaser3 due": "21",
-            "ntc_due": "NTC", "ntc due": "NTC", "ntc - due": "NTC"
-        }
+        # Aggregates are computed once per data version and filter set, then shared
+        pop = snap.memo(("ops_population", pop_sql, tuple(pop_params)), _population_aggregates)
         
-        def _coalesce_key(rec, keys):
-            for k in keys:
-                if k in rec and str(rec.get(k) or "").strip():
-                    return k
-            return None
+        # Chaser Cycle (Current Week) - ALL tasks with chasers, not filtered by date_assigned/date_completed;
+        # only by team if specified. One grouped query over the materialized chaser columns (chaser_cycle.py).
+        chaser = snap.memo(("chaser_grid", selected_team, today), lambda: week_rows(
+            chaser_grid(db, team_lead=selected_team if selected_team != 'all' else None, today=today)))
+        chaser_week_rows = chaser['chaser_week_rows']
+        chaser_headers = chaser['chaser_headers']
+        chaser_overdue = chaser['chaser_overdue']
         
         def _parse_date_any(s):
             if not s:
@@ -12776,91 +12212,6 @@ def api_operations_dashboard():
                 pass
             return None
         
-        def _is_blank_issued(v):
-            if v is None:
-                return True
-            s = str(v).strip().lower()
-            return s in ("", "none", "null", "n/a", "na", "-", "0", "false")
-        
-        # Helper function to check if a chaser has been issued
-        def _is_chaser_issued(rec, chaser_type):
-            """Check if a chaser type has been issued"""
-            ik = _coalesce_key(rec, ISSUED_MAP.get(chaser_type, []))
-            if ik:
-                return not _is_blank_issued(rec.get(ik))
-            return False
-        
-        # Process all reviews for chaser cycle with sequential logic (using separate query that includes all tasks)
-        for rec in chaser_reviews:
-            # Skip if outreach is completed
-            outreach_complete = rec.get('outreach_complete') or rec.get('OutreachComplete')
-            if outreach_complete in (1, '1', True, 'true', 'True'):
-                continue
-            
-            # Check chasers sequentially: 7 → 14 → 21 → NTC
-            # Only show the NEXT chaser that needs to be issued
-            chaser_sequence = ["7", "14", "21", "NTC"]
-            found_next_chaser = False
-            
-            for typ in chaser_sequence:
-                # Check if all previous chasers have been issued
-                if typ == "7":
-                    # 7-day chaser: no prerequisites
-                    prev_issued = True
-                elif typ == "14":
-                    # 14-day chaser: 7-day must be issued
-                    prev_issued = _is_chaser_issued(rec, "7")
-                elif typ == "21":
-                    # 21-day chaser: 7-day and 14-day must be issued
-                    prev_issued = _is_chaser_issued(rec, "7") and _is_chaser_issued(rec, "14")
-                elif typ == "NTC":
-                    # NTC: 7-day, 14-day, and 21-day must be issued
-                    prev_issued = _is_chaser_issued(rec, "7") and _is_chaser_issued(rec, "14") and _is_chaser_issued(rec, "21")
-                else:
-                    prev_issued = False
-                
-                # Skip if previous chasers haven't been issued
-                if not prev_issued:
-                    continue
-                
-                # Check if this chaser has been issued (if so, move to next)
-                if _is_chaser_issued(rec, typ):
-                    continue  # Already issued, check next chaser
-                
-                # Get due date for this chaser
-                k = _coalesce_key(rec, DUE_MAP.get(typ, []))
-                if not k:
-                    continue
-                d = _parse_date_any(rec.get(k))
-                if not d:
-                    continue
-                
-                # Find which row this due date falls into (Mon-Fri of current week)
-                row_idx = None
-                for idx, week_day in enumerate(week_days):
-                    if d == week_day:
-                        row_idx = idx
-                        break
-                
-                # Only count if due date is in current week (Mon-Fri) or overdue
-                is_overdue = d < monday_this
-                is_in_current_week = row_idx is not None
-                
-                if is_overdue:
-                    # Add to separate overdue structure
-                    chaser_overdue[typ] += 1
-                    found_next_chaser = True
-                    break  # Found the next chaser to show, stop checking
-                elif is_in_current_week:
-                    # Show in specific chaser column on the due date row
-                    if chaser_week_rows:
-                        chaser_week_rows[row_idx][typ] += 1
-                    found_next_chaser = True
-                    break  # Found the next chaser to show, stop checking
-                # If due date is not in current week and not overdue, skip it
-                # (don't show future chasers until their due dates are in the current week)
-        
-        chaser_headers = chaser_week_headers
         
         # Planning/Forecast data - load from forecast_planning table (like mi_dashboard does)
         try:
@@ -12967,88 +12318,91 @@ def api_operations_dashboard():
         
         # Planning actuals should use ALL reviews (global scope), not filtered reviews
         # This matches the old mi_dashboard behavior where planning is global
-        cur.execute("SELECT * FROM reviews")
-        reviews_all = [dict(r) for r in cur.fetchall()]
-        
-        print(f"[PLANNING DEBUG] Total reviews: {len(reviews_all)}")
-        print(f"[PLANNING DEBUG] Planning weeks: {len(planning)}")
-        print(f"[PLANNING DEBUG] Week labels: {plan_labels[:5]}")
-        print(f"[PLANNING DEBUG] Week starts (first 5): {week_starts[:5]}")
-        print(f"[PLANNING DEBUG] Monday to idx mapping (first 5): {dict(list(monday_to_idx.items())[:5])}")
-        
-        plan_actual = [0 for _ in planning] if planning else []
-        completed_count = 0
-        matched_count = 0
-        
-        if planning:
-            for r in reviews_all:
-                d = terminal_completion_date(r)
-                if not d:
-                    continue
-                completed_count += 1
-                m = _monday_of(d)
-                print(f"[PLANNING DEBUG] Task {r.get('task_id', 'unknown')}: completion_date={d}, monday_of_week={m}")
+        def _plan_actual():
+            reviews_all = snap.rows
+        
+            print(f"[PLANNING DEBUG] Total reviews: {len(reviews_all)}")
+            print(f"[PLANNING DEBUG] Planning weeks: {len(planning)}")
+            print(f"[PLANNING DEBUG] Week labels: {plan_labels[:5]}")
+            print(f"[PLANNING DEBUG] Week starts (first 5): {week_starts[:5]}")
+            print(f"[PLANNING DEBUG] Monday to idx mapping (first 5): {dict(list(monday_to_idx.items())[:5])}")
+        
+            plan_actual = [0 for _ in planning] if planning else []
+            completed_count = 0
+            matched_count = 0
+        
+            if planning:
+                for r in reviews_all:
+                    d = terminal_completion_date(r)
+                    if not d:
+                        continue
+                    completed_count += 1
+                    m = _monday_of(d)
+                    print(f"[PLANNING DEBUG] Task {r.get('task_id', 'unknown')}: completion_date={d}, monday_of_week={m}")
                 
-                idx = monday_to_idx.get(m)
-                if idx is None:
-                    # Fallback: try matching by parsing labels dynamically
-                    print(f"[PLANNING DEBUG] No direct match for Monday {m}, trying fallback...")
-                    matched = False
-                    try:
-                        for i, row in enumerate(planning):
-                            lbl = row["week_label"]
-                            lbl_d = _parse_week_label(lbl)
-                            if lbl_d:
-                                lbl_monday = _monday_of(lbl_d)
-                                if lbl_monday == m:
-                                    idx = i
-                                    matched = True
-                                    print(f"[PLANNING DEBUG] Matched via fallback to week {i} (label: {lbl}, parsed: {lbl_d}, monday: {lbl_monday})")
-                                    break
-                    except Exception as e:
-                        print(f"[PLANNING DEBUG] Fallback error: {e}")
+                    idx = monday_to_idx.get(m)
+                    if idx is None:
+                        # Fallback: try matching by parsing labels dynamically
+                        print(f"[PLANNING DEBUG] No direct match for Monday {m}, trying fallback...")
+                        matched = False
+                        try:
+                            for i, row in enumerate(planning):
+                                lbl = row["week_label"]
+                                lbl_d = _parse_week_label(lbl)
+                                if lbl_d:
+                                    lbl_monday = _monday_of(lbl_d)
+                                    if lbl_monday == m:
+                                        idx = i
+                                        matched = True
+                                        print(f"[PLANNING DEBUG] Matched via fallback to week {i} (label: {lbl}, parsed: {lbl_d}, monday: {lbl_monday})")
+                                        break
+                        except Exception as e:
+                            print(f"[PLANNING DEBUG] Fallback error: {e}")
                     
-                    # If still no match, find the closest week (week that contains this Monday)
-                    if not matched and idx is None:
-                        print(f"[PLANNING DEBUG] Still no match, trying to find closest week for Monday {m}...")
-                        min_diff = None
-                        closest_idx = None
-                        for i, row in enumerate(planning):
-                            lbl = row["week_label"]
-                            lbl_d = _parse_week_label(lbl)
-                            if lbl_d:
-                                lbl_monday = _monday_of(lbl_d)
-                                # Check if this Monday falls within this week (Monday to Sunday)
-                                week_end = lbl_monday + timedelta(days=6)
-                                if lbl_monday <= m <= week_end:
-                                    idx = i
-                                    print(f"[PLANNING DEBUG] Matched to week {i} (label: {lbl}) - Monday {m} falls within week {lbl_monday} to {week_end}")
-                                    break
-                                # Also track the closest week
-                                diff = abs((m - lbl_monday).days)
-                                if min_diff is None or diff < min_diff:
-                                    min_diff = diff
-                                    closest_idx = i
+                        # If still no match, find the closest week (week that contains this Monday)
+                        if not matched and idx is None:
+                            print(f"[PLANNING DEBUG] Still no match, trying to find closest week for Monday {m}...")
+                            min_diff = None
+                            closest_idx = None
+                            for i, row in enumerate(planning):
+                                lbl = row["week_label"]
+                                lbl_d = _parse_week_label(lbl)
+                                if lbl_d:
+                                    lbl_monday = _monday_of(lbl_d)
+                                    # Check if this Monday falls within this week (Monday to Sunday)
+                                    week_end = lbl_monday + timedelta(days=6)
+                                    if lbl_monday <= m <= week_end:
+                                        idx = i
+                                        print(f"[PLANNING DEBUG] Matched to week {i} (label: {lbl}) - Monday {m} falls within week {lbl_monday} to {week_end}")
+                                        break
+                                    # Also track the closest week
+                                    diff = abs((m - lbl_monday).days)
+                                    if min_diff is None or diff < min_diff:
+                                        min_diff = diff
+                                        closest_idx = i
                         
-                        # If no week contains it, use the closest one
-                        if idx is None and closest_idx is not None:
-                            idx = closest_idx
-                            lbl = planning[closest_idx]["week_label"]
-                            lbl_d = _parse_week_label(lbl)
-                            if lbl_d:
-                                lbl_monday = _monday_of(lbl_d)
-                                print(f"[PLANNING DEBUG] Using closest week {idx} (label: {lbl}, monday: {lbl_monday}, diff: {min_diff} days)")
-                else:
-                    print(f"[PLANNING DEBUG] Direct match to week {idx}")
+                            # If no week contains it, use the closest one
+                            if idx is None and closest_idx is not None:
+                                idx = closest_idx
+                                lbl = planning[closest_idx]["week_label"]
+                                lbl_d = _parse_week_label(lbl)
+                                if lbl_d:
+                                    lbl_monday = _monday_of(lbl_d)
+                                    print(f"[PLANNING DEBUG] Using closest week {idx} (label: {lbl}, monday: {lbl_monday}, diff: {min_diff} days)")
+                    else:
+                        print(f"[PLANNING DEBUG] Direct match to week {idx}")
                 
-                if idx is not None:
-                    plan_actual[idx] += 1
-                    matched_count += 1
-                    print(f"[PLANNING DEBUG] Added to week {idx}, new count: {plan_actual[idx]}")
+                    if idx is not None:
+                        plan_actual[idx] += 1
+                        matched_count += 1
+                        print(f"[PLANNING DEBUG] Added to week {idx}, new count: {plan_actual[idx]}")
+        
+            print(f"[PLANNING DEBUG] Total completed tasks found: {completed_count}")
+            print(f"[PLANNING DEBUG] Total matched to weeks: {matched_count}")
+            print(f"[PLANNING DEBUG] Final plan_actual (first 10): {plan_actual[:10]}")
+            return plan_actual
         
-        print(f"[PLANNING DEBUG] Total completed tasks found: {completed_count}")
-        print(f"[PLANNING DEBUG] Total matched to weeks: {matched_count}")
-        print(f"[PLANNING DEBUG] Final plan_actual (first 10): {plan_actual[:10]}")
+        plan_actual = snap.memo(("ops_plan_actual", tuple(plan_labels)), _plan_actual)
         
         db.close()
         
@@ -13063,13 +12417,13 @@ def api_operations_dashboard():
             ],
             'selected_date': date_range,
             'selected_team': selected_team,
-            'total_screened': total_screened,
-            'total_completed': total_completed,
-            'qc_sample': qc_sample,
-            'qc_pass_pct': qc_pass_pct,
-            'pass_qc': pass_qc,
-            'distribution': distribution or [],
-            'outcome_breakdown': outcome_breakdown or [],
+            'total_screened': pop['total_screened'],
+            'total_completed': pop['total_completed'],
+            'qc_sample': pop['qc_sample'],
+            'qc_pass_pct': pop['qc_pass_pct'],
+            'pass_qc': pop['pass_qc'],
+            'distribution': pop['distribution'] or [],
+            'outcome_breakdown': pop['outcome_breakdown'] or [],
             'chaser_headers': chaser_headers,
             'chaser_week_rows': chaser_week_rows,
             'chaser_overdue': chaser_overdue,
@@ -15032,9 +14386,12 @@ def api_transaction_dashboard():
         tx_pred = "WHERE " + " AND ".join(tx_where)
         a_pred = "WHERE " + " AND ".join(a_where)
         
+        # Monthly in/out/cash flows from the rolling aggregates (month granularity)
+        from tx_aggregates import monthly_flows, summarize_flows
+        flows = summarize_flows(monthly_flows(conn, customer_id, start, end))
+
         # KPIs
-        cur.execute(f"SELECT COUNT(*) c FROM transactions t {tx_pred}", tx_params)
-        total_tx = cur.fetchone()["c"]
+        total_tx = flows["total_tx"]
         
         cur.execute(f"SELECT COUNT(*) c FROM alerts a {a_pred}", a_params)
         total_alerts = cur.fetchone()["c"]
@@ -15050,27 +14407,10 @@ def api_transaction_dashboard():
         }
         
         # Tiles
-        cur.execute(f"""
-            SELECT
-                SUM(CASE WHEN t.direction='in' THEN t.base_amount ELSE 0 END) AS total_in,
-                SUM(CASE WHEN t.direction='out' THEN t.base_amount ELSE 0 END) AS total_out
-            FROM transactions t {tx_pred}
-        """, tx_params)
-        sums = cur.fetchone()
-        total_in = float(sums["total_in"] or 0)
-        total_out = float(sums["total_out"] or 0)
-        
-        cur.execute(f"""
-            SELECT
-                SUM(CASE WHEN t.direction='in' AND lower(IFNULL(t.channel,''))='cash'
-                    THEN t.base_amount ELSE 0 END) AS cash_in,
-                SUM(CASE WHEN t.direction='out' AND lower(IFNULL(t.channel,''))='cash'
-                    THEN t.base_amount ELSE 0 END) AS cash_out
-            FROM transactions t {tx_pred}
-        """, tx_params)
-        cash = cur.fetchone()
-        cash_in = float(cash["cash_in"] or 0)
-        cash_out = float(cash["cash_out"] or 0)
+        total_in = flows["total_in"]
+        total_out = flows["total_out"]
+        cash_in = flows["cash_in"]
+        cash_out = flows["cash_out"]
         
         cur.execute(f"""
             SELECT COUNT(*) AS cnt, SUM(t.base_amount) AS total
@@ -15130,42 +14470,25 @@ def api_transaction_dashboard():
         ]
         
         # Monthly trends
-        cur.execute(f"""
-            SELECT strftime('%Y-%m', t.txn_date) ym,
-                   SUM(CASE WHEN t.direction='in' THEN t.base_amount ELSE 0 END) AS in_sum,
-                   SUM(CASE WHEN t.direction='out' THEN t.base_amount ELSE 0 END) AS out_sum
-            FROM transactions t {tx_pred}
-            GROUP BY ym
-            ORDER BY ym
-        """, tx_params)
-        trend_rows = cur.fetchall()
-        trend_labels = [r["ym"] for r in trend_rows]
-        trend_in = [float(r["in_sum"] or 0) for r in trend_rows]
-        trend_out = [float(r["out_sum"] or 0) for r in trend_rows]
+        trend_labels = flows["trend_labels"]
+        trend_in = flows["trend_in"]
+        trend_out = flows["trend_out"]
         
         # Reviewer metrics
         cur.execute(f"""
             SELECT
-                AVG(CASE WHEN t.direction='in' AND lower(IFNULL(t.channel,''))='cash' THEN t.base_amount END) AS avg_cash_in,
-                AVG(CASE WHEN t.direction='out' AND lower(IFNULL(t.channel,''))='cash' THEN t.base_amount END) AS avg_cash_out,
-                AVG(CASE WHEN t.direction='in' THEN t.base_amount END) AS avg_in,
-                AVG(CASE WHEN t.direction='out' THEN t.base_amount END) AS avg_out,
-                MAX(CASE WHEN t.direction='in' THEN t.base_amount END) AS max_in,
-                MAX(CASE WHEN t.direction='out' THEN t.base_amount END) AS max_out,
-                SUM(CASE WHEN IFNULL(t.country_iso2,'')<>'' AND UPPER(t.country_iso2)<>'GB' THEN t.base_amount ELSE 0 END) AS overseas_value,
-                SUM(t.base_amount) AS total_value
+                SUM(CASE WHEN IFNULL(t.country_iso2,'')<>'' AND UPPER(t.country_iso2)<>'GB' THEN t.base_amount ELSE 0 END) AS overseas_value
             FROM transactions t {tx_pred}
         """, tx_params)
         m = cur.fetchone()
-        avg_cash_deposits = float(m["avg_cash_in"] or 0.0)
-        avg_cash_withdrawals = float(m["avg_cash_out"] or 0.0)
-        avg_in = float(m["avg_in"] or 0.0)
-        avg_out = float(m["avg_out"] or 0.0)
-        max_in = float(m["max_in"] or 0.0)
-        max_out = float(m["max_out"] or 0.0)
+        avg_cash_deposits = flows["avg_cash_in"]
+        avg_cash_withdrawals = flows["avg_cash_out"]
+        avg_in = flows["avg_in"]
+        avg_out = flows["avg_out"]
+        max_in = flows["max_in"]
+        max_out = flows["max_out"]
         overseas_value = float(m["overseas_value"] or 0.0)
-        total_val_from_query = float(m["total_value"] or 0.0)
-        denom_total = total_in + total_out if (total_in + total_out) > 0 else total_val_from_query
+        denom_total = total_in + total_out
         overseas_pct = (overseas_value / denom_total * 100.0) if denom_total > 0 else 0.0
         
         cur.execute(f"""
@@ -16143,7 +15466,9 @@ def api_transaction_ai_rationale():
 # AI SME API Endpoints (Proxy to FastAPI)
 # ============================================================================
 # AI SME FastAPI typically runs on port 8000
-AI_SME_BASE_URL = os.environ.get("AI_SME_BASE_URL", "http://localhost:8000")
+# Calls go through the shared pooled session in sme_client (keep-alive, per-endpoint
+# timeouts, circuit breaker, latency histograms)
+AI_SME_BASE_URL = sme_client.AI_SME_BASE_URL
 
 @csrf.exempt
 @app.route('/api/sme/health', methods=['GET'])
@@ -16164,11 +15489,10 @@ def api_sme_health():
         if 'session' in request.cookies:
             cookies['session'] = request.cookies.get('session')
         
-        response = requests.get(
-            f"{AI_SME_BASE_URL}/health",
+        response = sme_client.sme.get(
+            "/health",
             headers=headers,
-            cookies=cookies,
-            timeout=5
+            cookies=cookies
         )
         if response.status_code == 200:
             data = response.json()
@@ -16221,18 +15545,50 @@ def api_sme_query():
         if 'session' in request.cookies:
             cookies['session'] = request.cookies.get('session')
         
-        response = requests.post(
-            f"{AI_SME_BASE_URL}/query",
+        # Streaming mode: relay the FastAPI server-sent events as they arrive
+        wants_stream = form_data.get('stream') in ('1', 'true', 'True') or \
+            'text/event-stream' in (request.headers.get('Accept') or '')
+        if wants_stream:
+            form_data['stream'] = 'true'
+            upstream = sme_client.sme.post(
+                "/query",
+                data=form_data,
+                headers={**headers, 'Accept': 'text/event-stream'},
+                cookies=cookies,
+                stream=True
+            )
+            if upstream.status_code != 200:
+                upstream.close()
+                return jsonify({'error': 'Failed to get response from AI SME'}), upstream.status_code
+
+            def relay():
+                try:
+                    for chunk in upstream.iter_content(chunk_size=None):
+                        if chunk:
+                            yield chunk
+                finally:
+                    upstream.close()
+
+            return Response(
+                stream_with_context(relay()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        response = sme_client.sme.post(
+            "/query",
             data=form_data,
             headers=headers,
-            cookies=cookies,
-            timeout=30
+            cookies=cookies
         )
         
         if response.status_code == 200:
             return jsonify(response.json())
         else:
             return jsonify({'error': 'Failed to get response from AI SME'}), response.status_code
+    except requests.exceptions.ConnectionError as e:
+        # SME down, or circuit breaker open (sme_client.SMEUnavailable)
+        return jsonify({'error': 'AI SME service unavailable', 'detail': str(e)}), 503
     except Exception as e:
         import traceback
         print(f"Error in api_sme_query: {str(e)}\n{traceback.format_exc()}")
@@ -16265,12 +15621,11 @@ def api_sme_referral():
         if 'session' in request.cookies:
             cookies['session'] = request.cookies.get('session')
         
-        response = requests.post(
-            f"{AI_SME_BASE_URL}/referral",
+        response = sme_client.sme.post(
+            "/referral",
             data=form_data,
             headers=headers,
-            cookies=cookies,
-            timeout=10
+            cookies=cookies
         )
         
         if response.status_code == 200:
@@ -16339,12 +15694,11 @@ def api_sme_feedback():
         if 'session' in request.cookies:
             cookies['session'] = request.cookies.get('session')
         
-        response = requests.post(
-            f"{AI_SME_BASE_URL}/feedback",
+        response = sme_client.sme.post(
+            "/feedback",
             data=form_data,
             headers=headers,
-            cookies=cookies,
-            timeout=10
+            cookies=cookies
         )
         
         if response.status_code == 200:
@@ -16389,11 +15743,10 @@ def api_my_referrals():
             if 'session' in request.cookies:
                 cookies['session'] = request.cookies.get('session')
             
-            response = requests.get(
-                f"{AI_SME_BASE_URL}/my_referrals/data",
+            response = sme_client.sme.get(
+                "/my_referrals/data",
                 headers=headers,
-                cookies=cookies,
-                timeout=10
+                cookies=cookies
             )
             if response.status_code == 200:
                 ai_data = response.json()
@@ -16646,18 +15999,16 @@ def _proxy_to_sme_admin(method, endpoint, require_json=False):
         if 'session' in request.cookies:
             cookies['session'] = request.cookies.get('session')
         
-        url = f"{AI_SME_BASE_URL}{endpoint}"
-        
         if method == 'GET':
             params = request.args.to_dict()
-            response = requests.get(url, params=params, headers=headers, cookies=cookies, timeout=30)
+            response = sme_client.sme.get(endpoint, params=params, headers=headers, cookies=cookies)
         elif method == 'POST':
             if require_json:
                 data = request.get_json() or {}
-                response = requests.post(url, json=data, headers=headers, cookies=cookies, timeout=30)
+                response = sme_client.sme.post(endpoint, json=data, headers=headers, cookies=cookies)
             else:
                 form_data = request.form.to_dict()
-                response = requests.post(url, data=form_data, headers=headers, cookies=cookies, timeout=30)
+                response = sme_client.sme.post(endpoint, data=form_data, headers=headers, cookies=cookies)
         else:
             return jsonify({'error': 'Method not supported'}), 405
         
@@ -16668,6 +16019,9 @@ def _proxy_to_sme_admin(method, endpoint, require_json=False):
                 return response.text, 200, {'Content-Type': response.headers.get('Content-Type', 'application/json')}
         else:
             return jsonify({'error': 'Failed to get response from AI SME'}), response.status_code
+    except requests.exceptions.ConnectionError as e:
+        # SME down, or circuit breaker open (sme_client.SMEUnavailable)
+        return jsonify({'error': 'AI SME service unavailable', 'detail': str(e)}), 503
     except Exception as e:
         import traceback
         print(f"Error in AI SME admin proxy: {str(e)}\n{traceback.format_exc()}")
@@ -16710,11 +16064,10 @@ def api_sme_admin_referrals_update():
         # First, get the referral to check if it has a task_id
         referral_task_id = None
         try:
-            ref_response = requests.get(
-                f"{AI_SME_BASE_URL}/admin/referrals/data",
+            ref_response = sme_client.sme.get(
+                "/admin/referrals/data",
                 headers=headers,
-                cookies=cookies,
-                timeout=10
+                cookies=cookies
             )
             if ref_response.status_code == 200:
                 ref_data = ref_response.json()
@@ -16727,12 +16080,11 @@ def api_sme_admin_referrals_update():
             print(f"Warning: Could not fetch referral data: {e}")
         
         # Proxy the update to FastAPI
-        response = requests.post(
-            f"{AI_SME_BASE_URL}/admin/referrals/update",
+        response = sme_client.sme.post(
+            "/admin/referrals/update",
             data=form_data,
             headers=headers,
-            cookies=cookies,
-            timeout=10
+            cookies=cookies
         )
         
         if response.status_code == 200:
@@ -16877,13 +16229,12 @@ def api_sme_admin_upload():
         if title:
             data['title'] = title
         
-        response = requests.post(
-            f"{AI_SME_BASE_URL}/upload",
+        response = sme_client.sme.post(
+            "/upload",
             files=files,
             data=data,
             headers=headers,
-            cookies=cookies,
-            timeout=60
+            cookies=cookies
         )
         
         if response.status_code == 200:
@@ -17109,6 +16460,26 @@ def api_tx_review_admin_config_toggles():
         print(f"Error in api_tx_review_admin_config_toggles: {str(e)}\n{traceback.format_exc()}")
         return jsonify({'error': str(e)}), 500
 
+@csrf.exempt
+@app.route('/api/tx_review/admin/aggregates/rebuild', methods=['POST'])
+@role_required('admin')
+def api_tx_review_admin_rebuild_aggregates():
+    """Rebuild the Transaction Review rolling aggregate tables from the ledger"""
+    try:
+        from tx_aggregates import ensure_aggregate_tables, rebuild_aggregates
+        conn = get_db_connection()
+        try:
+            ensure_aggregate_tables(conn)
+            rebuild_aggregates(conn)
+            n_months = conn.execute("SELECT COUNT(*) c FROM tx_agg_month").fetchone()["c"]
+        finally:
+            conn.close()
+        return jsonify({"status": "ok", "message": f"Rebuilt aggregates ({n_months} customer-month rows)"})
+    except Exception as e:
+        import traceback
+        print(f"Error in api_tx_review_admin_rebuild_aggregates: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({'error': str(e)}), 500
+
 @csrf.exempt
 @app.route('/api/tx_review/admin/countries', methods=['GET', 'POST'])
 @role_required('admin')
@@ -17266,7 +16637,6 @@ def api_tx_review_upload():
         
         country_count = 0
         sort_count = 0
-        tx_count = 0
         
         # Process country file
         if 'country_file' in request.files and request.files['country_file'].filename:
@@ -17300,34 +16670,24 @@ def api_tx_review_upload():
                 sort_count += 1
             conn.commit()
         
-        # Process transactions file
+        # Process transactions file - ingest and scoring run as a background job
+        job_id = None
         if 'tx_file' in request.files and request.files['tx_file'].filename:
-            import sys
-            import os
-            # Add current directory to path for import
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            if current_dir not in sys.path:
-                sys.path.insert(0, current_dir)
-            from tx_review_ingest import ingest_transactions_csv
-            try:
-                tx_count, bad_dates = ingest_transactions_csv(conn, request.files['tx_file'])
-                if bad_dates > 0:
-                    print(f"[ingest_transactions_csv] Skipped {bad_dates} row(s) with invalid txn_date.")
-            except Exception as e:
-                import traceback
-                print(f"Error ingesting transactions: {str(e)}\n{traceback.format_exc()}")
-                conn.close()
-                return jsonify({
-                    "status": "error",
-                    "message": f"Failed to ingest transactions: {str(e)}"
-                }), 500
+            path = jobs.spool_upload(request.files['tx_file'], prefix="tx")
+            job_id = jobs.enqueue("tx_upload", {
+                "path": path,
+                "db_path": os.path.abspath(DB_PATH),
+            }, created_by=session.get("user_id"))
         
         conn.close()
         
+        message = f"Loaded {country_count} countries, {sort_count} sort codes"
+        if job_id:
+            message += f"; transactions queued for processing (job {job_id})"
         return jsonify({
             "status": "ok",
-            "message": f"Loaded {tx_count} transactions, {country_count} countries, {sort_count} sort codes",
-            "transactions": tx_count,
+            "message": message,
+            "job_id": job_id,
             "countries": country_count,
             "sort_codes": sort_count
         })
@@ -17336,6 +16696,85 @@ def api_tx_review_upload():
         print(f"Error in api_tx_review_upload: {str(e)}\n{traceback.format_exc()}")
         return jsonify({'error': str(e)}), 500
 
+@csrf.exempt
+@app.route('/api/admin/db_pool_stats', methods=['GET'])
+@role_required('admin')
+def api_admin_db_pool_stats():
+    """Connection pool counters (opened / reused / pooled) for this worker process"""
+    return jsonify({"status": "ok", "pid": os.getpid(), "stats": db_pool.pool_stats()})
+
+@csrf.exempt
+@app.route('/api/admin/dashboard_snapshot_stats', methods=['GET'])
+@role_required('admin')
+def api_admin_dashboard_snapshot_stats():
+    """Ops MI snapshot cache hits / builds / invalidations for this worker process"""
+    return jsonify({"status": "ok", "pid": os.getpid(), "stats": dashboard_snapshot.stats()})
+
+@csrf.exempt
+@app.route('/api/admin/sme_proxy_stats', methods=['GET'])
+@role_required('admin')
+def api_admin_sme_proxy_stats():
+    """AI SME proxy latency histograms and circuit-breaker state for this worker process"""
+    return jsonify({"status": "ok", "pid": os.getpid(), "stats": sme_client.sme.stats()})
+
+@csrf.exempt
+@app.route('/api/admin/status/sweep', methods=['POST'])
+@role_required('admin')
+def api_admin_status_sweep():
+    """Queue a recompute of all materialized case statuses"""
+    job_id = jobs.enqueue("status_sweep", created_by=session.get("user_id"))
+    return jsonify({"status": "ok", "message": f"Status sweep queued (job {job_id})", "job_id": job_id})
+
+def _job_visible(job):
+    """Admins see every job; other users only the jobs they started."""
+    return job is not None and (session.get("role") == "admin" or job.get("created_by") == session.get("user_id"))
+
+@csrf.exempt
+@app.route('/api/jobs', methods=['GET'])
+def api_jobs_list():
+    """List recent background jobs (optionally ?kind=tx_upload)"""
+    if not session.get("user_id"):
+        return jsonify({'error': 'Not authenticated'}), 401
+    try:
+        rows = jobs.list_jobs(kind=request.args.get("kind"), limit=request.args.get("limit", 50, type=int))
+        return jsonify({"status": "ok", "jobs": [j for j in rows if _job_visible(j)]})
+    except Exception as e:
+        import traceback
+        print(f"Error in api_jobs_list: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({'error': str(e)}), 500
+
+@csrf.exempt
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """Status, progress and result of a background job"""
+    if not session.get("user_id"):
+        return jsonify({'error': 'Not authenticated'}), 401
+    try:
+        job = jobs.get_job(job_id)
+        if not _job_visible(job):
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({"status": "ok", "job": job})
+    except Exception as e:
+        import traceback
+        print(f"Error in api_job_status: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({'error': str(e)}), 500
+
+@csrf.exempt
+@app.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+def api_job_cancel(job_id):
+    """Cancel a queued job, or ask a running job to stop at its next checkpoint"""
+    if not session.get("user_id"):
+        return jsonify({'error': 'Not authenticated'}), 401
+    try:
+        if not _job_visible(jobs.get_job(job_id)):
+            return jsonify({'error': 'Job not found'}), 404
+        job = jobs.request_cancel(job_id)
+        return jsonify({"status": "ok", "job": job})
+    except Exception as e:
+        import traceback
+        print(f"Error in api_job_cancel: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({'error': str(e)}), 500
+
 @csrf.exempt
 @app.route('/api/tx_review/sample/<path:filename>', methods=['GET'])
 @role_required('admin')
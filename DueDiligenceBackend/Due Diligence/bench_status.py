@@ -0,0 +1,163 @@
+"""
+Status derivation benchmark: per-row derive_case_status() vs derive_case_status_batch().
+
+    python bench_status.py                        # 1k / 10k / 100k generated reviews
+    python bench_status.py --rows 50000 --mix edge --repeat 5
+    python bench_status.py --db scrutinise_workflow.db
+
+The per-row side is what the dashboards did for every review: derive_case_status(),
+status_bucket() and age_bucket_from_dt(last_touched_date_for_record()). Both
+sides start from the same DataFrame and every run checks that they agree.
+--mix realistic generates rows shaped like the reviews table (ISO strings and
+NULLs); --mix edge adds the odd values tests/test_status_batch.py covers.
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from status_batch import derive_case_status_batch
+from utils import age_bucket_from_dt, derive_case_status, last_touched_date_for_record, status_bucket
+
+DATE_FIELDS = (
+    "InitialReviewCompleteDate", "Chaser1IssuedDate", "Chaser1DueDate", "Chaser2DueDate",
+    "Chaser3DueDate", "NTCDueDate", "NTCIssuedDate", "RestrictionsAppliedDate",
+    "outreach_response_received_date", "Outreach1Date", "OutreachDate1", "date_completed",
+    "qc_check_date", "qc_end_time", "sme_returned_date", "SMEReturnedDate",
+    "updated_at", "date_assigned", "sme_selected_date",
+)
+STATUSES = ("Unassigned", "Pending Review", "Referred to SME", "Referred to AI SME",
+            "QC - Rework Complete", "Outreach", "Completed", "complete", "Awaiting QC")
+
+
+def _date_value(rng, today, mix):
+    d = today + timedelta(days=rng.randint(-30, 30))
+    layouts = [d.isoformat(), d.isoformat(),
+               f"{d.isoformat()} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+               f"{d.isoformat()}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.{rng.randint(0, 999999):06d}",
+               d.strftime("%d/%m/%Y")]
+    if mix == "edge":
+        layouts += [
+            d.strftime("%m/%d/%Y"), d.strftime("%d-%m-%Y"), d.strftime("%Y/%m/%d"),
+            d.strftime("%d %b %Y"), d.strftime("%d %B %Y"), d.strftime("%d/%m/%Y %H:%M:%S"),
+            f" {d.isoformat()} ", f"{d.isoformat()}T10:00:00Z", f"{d.isoformat()} 10:00",
+            f"{d.day}/{d.month}/{d.year}", "2024-02-30", "2024-01-05 25:00:00", "1500-06-01",
+            d, datetime(d.year, d.month, d.day, 9, 30), pd.Timestamp(d),
+            "n/a", "yesterday", "0", 0, 1, " ", "", float("nan"), pd.NaT,
+        ]
+    return rng.choice(layouts)
+
+
+def _pick(rng, mix, common, edge=()):
+    return rng.choice(common + (edge if mix == "edge" else ()))
+
+
+def generate_reviews(n, seed=0, mix="realistic", today=None):
+    """n review dicts with random workflow fields; mix="edge" adds blank/odd values of every kind."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    nan = float("nan")
+    rows = []
+    for i in range(n):
+        rec = {"id": i + 1}
+        for f in DATE_FIELDS:
+            # Most workflow dates are still empty on a typical case
+            if rng.random() < 0.45:
+                rec[f] = _date_value(rng, today, mix)
+            else:
+                rec[f] = _pick(rng, mix, (None,), ("", "0", 0, nan, " "))
+        rec["status"] = _pick(rng, mix, STATUSES + (None,),
+                              ("", nan, "referred to ai sme - awaiting", " Completed ", "COMPLETE", 5))
+        rec["assigned_to"] = _pick(rng, mix, (None, 7, 12, 30), (0, "0", " 0 ", "", "12", nan, " ", False))
+        rec["referred_to_sme"] = _pick(rng, mix, (None, None, None, 3), ("", "0", 0, "yes", nan))
+        rec["qc_assigned_to"] = _pick(rng, mix, (None, 9), ("", 0, "0", nan, "9"))
+        rec["qc_outcome"] = _pick(rng, mix, (None, "Pass", "Pass with Feedback", "Fail"),
+                                  ("", " fail ", "FAIL", nan, 0))
+        rec["qc_rework_required"] = _pick(rng, mix, (None, 0, 1), ("0", "1", "", nan, True, False))
+        rec["qc_rework_completed"] = _pick(rng, mix, (None, 0, 1), ("0", "1", "", " ", nan, True, False))
+        rec["_in_qc_sampling"] = _pick(rng, mix, (None, 0, 1), (True, False, "0", "", nan))
+        rec["outreach_complete"] = _pick(rng, mix, (None, 0, 1), ("0", "1", "", nan, True))
+        if mix == "edge" and rng.random() < 0.1:
+            # rec.get() on absent keys
+            for f in rng.sample(sorted(rec), 3):
+                if f != "id":
+                    rec.pop(f)
+        rows.append(rec)
+    return rows
+
+
+def scalar_columns(records, today=None):
+    """
+    The per-row path: [(status, status_bucket, age_bucket), ...]. age_bucket is
+    None where last_touched_date_for_record() raises (max() over a timestamp
+    it could not parse); the batch treats such a value as no date.
+    """
+    out = []
+    for r in records:
+        status = str(derive_case_status(r))
+        try:
+            age = age_bucket_from_dt(last_touched_date_for_record(r), today)
+        except TypeError:
+            age = None
+        out.append((status, status_bucket(status), age))
+    return out
+
+
+def same(scalar_row, batch_row):
+    return scalar_row[:2] == tuple(batch_row[:2]) and scalar_row[2] in (None, batch_row[2])
+
+
+def _time(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), result
+
+
+def run(df, repeat):
+    records = df.to_dict(orient="records")
+    t_scalar, scalar = _time(lambda: scalar_columns(records), repeat)
+    t_batch, batch = _time(lambda: derive_case_status_batch(df), repeat)
+    mismatches = sum(1 for a, b in zip(scalar, batch.itertuples(index=False, name=None)) if not same(a, b))
+    return {
+        "rows": len(df),
+        "scalar_s": round(t_scalar, 4),
+        "batch_s": round(t_batch, 4),
+        "speedup": round(t_scalar / t_batch, 1) if t_batch else None,
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, nargs="*", default=[1000, 10000, 100000])
+    ap.add_argument("--mix", choices=("realistic", "edge"), default="realistic")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--db", help="benchmark the reviews table of this SQLite database instead (opened read-only)")
+    args = ap.parse_args()
+
+    if args.db:
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+        try:
+            frames = [pd.read_sql_query("SELECT * FROM reviews", conn)]
+        finally:
+            conn.close()
+    else:
+        frames = [pd.DataFrame(generate_reviews(n, seed=args.seed, mix=args.mix)) for n in args.rows]
+
+    print(f"{'rows':>8} {'per-row s':>10} {'batch s':>9} {'speedup':>8} {'mismatches':>10}")
+    for df in frames:
+        res = run(df, max(1, args.repeat))
+        print(f"{res['rows']:>8} {res['scalar_s']:>10} {res['batch_s']:>9} {res['speedup']:>7}x {res['mismatches']:>10}")
+
+
+if __name__ == "__main__":
+    main()
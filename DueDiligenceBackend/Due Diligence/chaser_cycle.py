@@ -0,0 +1,254 @@
+"""
+Chaser Cycle Engine
+One grouped query for the "overdue / weekday x chaser type" grid shown on the
+reviewer, team leader and Ops MI dashboards.
+
+A review's next chaser is the first of 7 -> 14 -> 21 -> NTC that has not been
+issued while all earlier ones have (nothing once outreach is complete).
+next_chaser() computes it, and status_materializer stores it on the review as
+
+  chaser_next_type  - "7", "14", "21" or "NTC" (NULL when nothing is pending)
+  chaser_next_due   - its due date as ISO YYYY-MM-DD (NULL when unparseable)
+
+so chaser_grid() is a single indexed range scan over chaser_next_due grouped
+by (type, due day), scoped to one reviewer, a set of reviewers, a team lead or
+the whole operation.
+
+The reviewer and Ops MI templates keep their own status-driven grid: only
+reviews whose status names a chaser or says overdue. status_chaser() places a
+review on it, status_materializer stores that as chaser_status_type /
+chaser_status_due / chaser_status_overdue, and status_week_rows() groups it.
+"""
+from datetime import datetime, timedelta
+
+CHASER_TYPES = ["7", "14", "21", "NTC"]
+
+# Column aliases for robustness across DB variants
+DUE_MAP = {
+    "7": ["Chaser1DueDate", "Chaser_1_DueDate", "chaser1_due", "chaser_1_due", "Outreach1DueDate", "Outreach_Cycle_1_Due"],
+    "14": ["Chaser2DueDate", "Chaser_2_DueDate", "chaser2_due", "chaser_2_due", "Outreach2DueDate", "Outreach_Cycle_2_Due"],
+    "21": ["Chaser3DueDate", "Chaser_3_DueDate", "chaser3_due", "chaser_3_due", "Outreach3DueDate", "Outreach_Cycle_3_Due"],
+    "NTC": ["NTCDueDate", "NTC_DueDate", "ntc_due", "NTC Due Date", "NTC_Due"]
+}
+ISSUED_MAP = {
+    "7": ["Chaser1IssuedDate", "Chaser1DateIssued", "chaser1_issued", "Outreach1Date", "Outreach_Cycle_1_Issued", "Outreach Cycle 1 Issued"],
+    "14": ["Chaser2IssuedDate", "Chaser2DateIssued", "chaser2_issued", "Outreach2Date", "Outreach_Cycle_2_Issued", "Outreach Cycle 2 Issued"],
+    "21": ["Chaser3IssuedDate", "Chaser3DateIssued", "chaser3_issued", "Outreach3Date", "Outreach_Cycle_3_Issued", "Outreach Cycle 3 Issued"],
+    "NTC": ["NTCIssuedDate", "NTC_IssuedDate", "ntc_issued"]
+}
+
+# Raw status text -> chaser column on the dashboard templates
+STATUS_TO_COL = {
+    "chaser1_due": "7", "7 day chaser due": "7", "chaser1 due": "7",
+    "chaser2_due": "14", "14 day chaser due": "14", "chaser2 due": "14",
+    "chaser3_due": "21", "21 day chaser due": "21", "chaser3 due": "21",
+    "ntc_due": "NTC", "ntc due": "NTC", "ntc - due": "NTC",
+}
+
+_DATE_FORMATS = ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+def _coalesce_key(rec, keys):
+    for k in keys:
+        if k in rec and str(rec.get(k) or "").strip():
+            return k
+    return None
+
+
+def _parse_date_any(s):
+    if not s:
+        return None
+    s = str(s).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).date()
+        except Exception:
+            continue
+    try:
+        from dateutil import parser
+        return parser.parse(s).date()
+    except Exception:
+        return None
+
+
+def _parse_day(s):
+    """Date-only formats, as the status-driven template grid has always parsed due dates."""
+    s = str(s or "").strip()
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _is_blank_issued(v):
+    if v is None:
+        return True
+    s = str(v).strip().lower()
+    return s in ("", "none", "null", "n/a", "na", "-", "0", "false")
+
+
+def _is_chaser_issued(rec, chaser_type):
+    ik = _coalesce_key(rec, ISSUED_MAP.get(chaser_type, []))
+    return bool(ik) and not _is_blank_issued(rec.get(ik))
+
+
+def next_chaser(rec):
+    """(chaser_type, due ISO date) of the review's next chaser to issue, or (None, None)."""
+    outreach_complete = rec.get("outreach_complete") or rec.get("OutreachComplete")
+    if outreach_complete in (1, "1", True, "true", "True"):
+        return None, None
+    for typ in CHASER_TYPES:
+        if _is_chaser_issued(rec, typ):
+            continue
+        k = _coalesce_key(rec, DUE_MAP[typ])
+        d = _parse_date_any(rec.get(k)) if k else None
+        # Later chasers wait on this one, so an undated pending chaser ends the cycle
+        return (typ, d.isoformat()) if d else (None, None)
+    return None, None
+
+
+def status_chaser(rec):
+    """
+    (chaser_type, due ISO date, overdue flag) for the status-driven template grid,
+    or (None, None, None). A review is on that grid when its raw status names a
+    chaser (e.g. "7 Day Chaser Due") or says overdue: it takes the due date of
+    the named chaser (overdue: the first of 7/14/21/NTC with a date), and drops
+    out once that chaser has been issued.
+    """
+    low_status = str(rec.get("status") or "").strip().lower()
+    is_overdue = "overdue" in low_status
+    col = next((c for key, c in STATUS_TO_COL.items() if key in low_status), None)
+    if not col and not is_overdue:
+        return None, None, None
+    for typ in (CHASER_TYPES if is_overdue else [col]):
+        k = _coalesce_key(rec, DUE_MAP[typ])
+        d = _parse_day(rec.get(k)) if k else None
+        if d:
+            if _coalesce_key(rec, ISSUED_MAP[typ]):
+                return None, None, None
+            return typ, d.isoformat(), int(is_overdue)
+    return None, None, None
+
+
+def week_of(today=None):
+    """Monday..Sunday of the current week."""
+    today = today or datetime.utcnow().date()
+    monday = today - timedelta(days=today.weekday())
+    return [monday + timedelta(days=i) for i in range(7)]
+
+
+def _scope(reviewer_ids=None, team_lead=None):
+    """(join, where, params) restricting reviews r to the scope, or None for an empty reviewer list."""
+    if reviewer_ids is not None:
+        ids = [int(i) for i in reviewer_ids]
+        if not ids:
+            return None
+        return "", [f"r.assigned_to IN ({','.join('?' * len(ids))})"], ids
+    if team_lead:
+        return " JOIN users u ON u.id = r.assigned_to", ["u.team_lead = ?"], [team_lead]
+    return "", [], []
+
+
+def chaser_grid(conn, reviewer_ids=None, team_lead=None, today=None):
+    """
+    Counts of pending chasers for the current week in one grouped query:
+      {"week": [Mon..Sun dates], "overdue": {type: n}, "days": {iso: {type: n}}}
+    "overdue" is due before this Monday. Scope: reviewer_ids (assigned_to IN ...),
+    else team_lead (users.team_lead of the assignee), else every review.
+    """
+    import status_materializer
+    status_materializer.ensure_fresh(conn)
+
+    week = week_of(today)
+    sql = """
+        SELECT r.chaser_next_type,
+               CASE WHEN r.chaser_next_due < ? THEN 'overdue' ELSE r.chaser_next_due END AS bucket,
+               COUNT(*)
+          FROM reviews r
+    """
+    params = [week[0].isoformat(), week[-1].isoformat()]
+    scope = _scope(reviewer_ids, team_lead)
+    if scope is None:
+        return {"week": week, "overdue": {t: 0 for t in CHASER_TYPES}, "days": {}}
+    join, where, scope_params = scope
+    sql += join + " WHERE " + " AND ".join(["r.chaser_next_due <= ?"] + where) + " GROUP BY 1, 2"
+    params += scope_params
+
+    overdue = {t: 0 for t in CHASER_TYPES}
+    days = {}
+    for typ, bucket, n in conn.execute(sql, params).fetchall():
+        if typ not in overdue:
+            continue
+        if bucket == "overdue":
+            overdue[typ] += n
+        else:
+            days.setdefault(bucket, {t: 0 for t in CHASER_TYPES})[typ] += n
+    return {"week": week, "overdue": overdue, "days": days}
+
+
+def week_rows(grid, workdays=5):
+    """API shape: chaser_week_rows (Mon..Fri), chaser_headers and chaser_overdue."""
+    rows = []
+    for d in grid["week"][:workdays]:
+        counts = grid["days"].get(d.isoformat(), {})
+        rows.append({"date": d.strftime("%d/%m/%Y"), "iso": d.isoformat(),
+                     **{t: counts.get(t, 0) for t in CHASER_TYPES}})
+    return {
+        "chaser_week_rows": rows,
+        "chaser_headers": list(CHASER_TYPES),
+        "chaser_overdue": dict(grid["overdue"]),
+    }
+
+
+def status_week_rows(conn, reviewer_ids=None, team_lead=None, today=None, workdays=5):
+    """
+    Template shape: Mon..Fri rows x ("Overdue", 7, 14, 21, NTC), driven by the raw
+    review status as the dashboard templates always have been (see status_chaser()),
+    from one grouped query over the materialized chaser_status_* columns.
+    "Overdue" takes 7/14/21 chasers of overdue-status reviews due before today.
+    Same scope arguments as chaser_grid().
+    """
+    import status_materializer
+    status_materializer.ensure_fresh(conn)
+
+    today = today or datetime.utcnow().date()
+    week_days = week_of(today)[:workdays]
+    headers = ["Overdue"] + CHASER_TYPES
+    rows = [{"date": d.strftime("%d/%m/%Y"), "iso": d.isoformat(), **{h: 0 for h in headers}}
+            for d in week_days]
+    scope = _scope(reviewer_ids, team_lead)
+    if scope is None:
+        return rows, headers
+    join, where, params = scope
+    sql = f"""
+        SELECT r.chaser_status_type, r.chaser_status_due, r.chaser_status_overdue, COUNT(*)
+          FROM reviews r{join}
+         WHERE {" AND ".join(["r.chaser_status_due BETWEEN ? AND ?"] + where)}
+         GROUP BY 1, 2, 3
+    """
+    by_iso = {row["iso"]: row for row in rows}
+    for typ, due, overdue, n in conn.execute(sql, [week_days[0].isoformat(), week_days[-1].isoformat()] + params):
+        row = by_iso.get(due)
+        if row is None or typ not in CHASER_TYPES:
+            continue
+        row["Overdue" if (overdue and due < today.isoformat() and typ != "NTC") else typ] += n
+    return rows, headers
+
+
+def chaser_cycle_by_label(grid, today=None):
+    """
+    Legacy reviewer template shape: {"1"|"2"|"3"|"NTC": {"overdue", Mon..Sun ISO: n}},
+    with the column headers and keys, and today's key.
+    """
+    today = today or datetime.utcnow().date()
+    labels = {"7": "1", "14": "2", "21": "3", "NTC": "NTC"}
+    keys = ["overdue"] + [d.isoformat() for d in grid["week"]]
+    headers = ["Overdue"] + [d.strftime("%d/%m/%Y") for d in grid["week"]]
+    cycle = {}
+    for typ, label in labels.items():
+        cycle[label] = {"overdue": grid["overdue"].get(typ, 0)}
+        for d in grid["week"]:
+            cycle[label][d.isoformat()] = grid["days"].get(d.isoformat(), {}).get(typ, 0)
+    return cycle, headers, keys, today.isoformat()
@@ -0,0 +1,184 @@
+"""
+Dashboard Snapshot Cache
+One in-process working set of the reviews table shared by the Ops MI views
+(mi_dashboard, api_operations_dashboard, ops_mi_cases) and the MI exports
+(download_mi_report, export_excel), instead of each request running
+SELECT * FROM reviews and re-deriving every case.
+
+- Data version: triggers on reviews bump settings.reviews_version on every
+  insert/update/delete, so a write from any worker process invalidates every
+  worker's snapshot on its next read.
+- A snapshot is the full row set (dicts, with the materialized status columns
+  from status_materializer) plus per-case derived fields computed lazily and
+  kept for the snapshot's lifetime (live_status: utils.derive_case_status;
+  for STATUS_BATCH_ROWS rows or more, status_batch.derive_case_status_batch
+  derives every case in one columnar pass on first use).
+- Filter slicing: select() runs the endpoint's own filter SQL returning only
+  r.id, and hands back copies of the cached rows in that order; memo() keeps
+  grouped aggregates per filter key.
+- Snapshots also expire after DASHBOARD_SNAPSHOT_TTL seconds, which bounds
+  staleness for inputs outside reviews (users/team leads, forecast_planning).
+"""
+import os
+import threading
+import time
+
+import status_materializer
+from status_batch import derive_case_status_batch
+from utils import derive_case_status
+
+SNAPSHOT_TTL = float(os.environ.get("DASHBOARD_SNAPSHOT_TTL", "30"))
+STATUS_BATCH_ROWS = int(os.environ.get("STATUS_BATCH_ROWS", "500"))   # below this, per-row derivation is cheaper
+
+_lock = threading.Lock()
+_snapshots = {}          # db file -> Snapshot
+_build_locks = {}        # db file -> Lock (one build at a time per database)
+_ready = set()           # db files whose version triggers exist in this process
+_stats = {"hits": 0, "builds": 0, "expired": 0, "invalidated": 0, "memo_hits": 0, "memo_misses": 0}
+
+
+def _count(key, n=1):
+    with _lock:
+        _stats[key] += n
+
+
+def ensure_version_triggers(conn):
+    """Create the reviews_version counter and the triggers that bump it (idempotent)."""
+    db_file = conn.execute("PRAGMA database_list").fetchone()[2]
+    if db_file in _ready:
+        return
+    conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('reviews_version', '0')")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_reviews_version_{event.lower()}
+            AFTER {event} ON reviews
+            BEGIN
+                UPDATE settings SET value = CAST(value AS INTEGER) + 1 WHERE key = 'reviews_version';
+            END
+        """)
+    conn.commit()
+    _ready.add(db_file)
+
+
+def reviews_version(conn):
+    ensure_version_triggers(conn)
+    row = conn.execute("SELECT value FROM settings WHERE key = 'reviews_version'").fetchone()
+    return int(row[0]) if row and row[0] is not None else 0
+
+
+class Snapshot:
+    def __init__(self, version, rows):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.rows = rows
+        self.by_id = {r["id"]: r for r in rows}
+        self._live_status = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def age(self):
+        return time.monotonic() - self.built_at
+
+    # ---------------- rows ----------------
+    def all_rows(self):
+        """Copies of every cached review row (callers may mutate them)."""
+        return [dict(r) for r in self.rows]
+
+    def rows_for(self, ids):
+        return [dict(self.by_id[i]) for i in ids if i in self.by_id]
+
+    def select(self, conn, id_sql, params=()):
+        """
+        Rows matching a filter query that selects review ids (first column),
+        e.g. "SELECT r.id FROM reviews r LEFT JOIN users u ... WHERE ...".
+        The id list is memoized per (sql, params) for this snapshot.
+        """
+        ids = self.memo(("ids", id_sql, tuple(params)),
+                        lambda: [row[0] for row in conn.execute(id_sql, tuple(params)).fetchall()])
+        return self.rows_for(ids)
+
+    # ---------------- derived per-case fields ----------------
+    def live_status(self, review_id):
+        """str(derive_case_status()) of the cached row, computed once per snapshot."""
+        if len(self.rows) >= STATUS_BATCH_ROWS:
+            statuses = self.memo("live_status", lambda: dict(zip(
+                (r["id"] for r in self.rows), derive_case_status_batch(self.rows)["status"])))
+            return statuses.get(review_id)
+        status = self._live_status.get(review_id)
+        if status is None and review_id in self.by_id:
+            status = str(derive_case_status(dict(self.by_id[review_id])) or "")
+            self._live_status[review_id] = status
+        return status
+
+    # ---------------- aggregates ----------------
+    def memo(self, key, fn):
+        """fn() computed once per snapshot and key; treat the result as read-only."""
+        with self._lock:
+            if key in self._memo:
+                _count("memo_hits")
+                return self._memo[key]
+        value = fn()
+        with self._lock:
+            self._memo.setdefault(key, value)
+            _count("memo_misses")
+            return self._memo[key]
+
+
+def _build(conn, version):
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM reviews")
+    cols = [c[0] for c in cur.description]
+    return Snapshot(version, [dict(zip(cols, row)) for row in cur.fetchall()])
+
+
+def get_snapshot(conn):
+    """The current snapshot for this database, rebuilt when reviews changed or the TTL passed."""
+    status_materializer.ensure_fresh(conn)
+    version = reviews_version(conn)
+    db_file = conn.execute("PRAGMA database_list").fetchone()[2]
+
+    def _current():
+        snap = _snapshots.get(db_file)
+        if snap is None:
+            return None
+        if snap.version != version:
+            _count("invalidated")
+            return None
+        if snap.age() > SNAPSHOT_TTL:
+            _count("expired")
+            return None
+        return snap
+
+    with _lock:
+        build_lock = _build_locks.setdefault(db_file, threading.Lock())
+    snap = _current()
+    if snap is not None:
+        _count("hits")
+        return snap
+    # Concurrent requests wait for one build instead of each reading the table
+    with build_lock:
+        snap = _snapshots.get(db_file)
+        if snap is not None and snap.version == version and snap.age() <= SNAPSHOT_TTL:
+            _count("hits")
+            return snap
+        snap = _build(conn, version)
+        _snapshots[db_file] = snap
+        _count("builds")
+        return snap
+
+
+def invalidate():
+    with _lock:
+        _snapshots.clear()
+
+
+def stats():
+    with _lock:
+        out = dict(_stats)
+        out["snapshots"] = {
+            db: {"version": s.version, "rows": len(s.rows), "age_seconds": round(s.age(), 1), "memo_keys": len(s._memo)}
+            for db, s in _snapshots.items()
+        }
+    out["ttl_seconds"] = SNAPSHOT_TTL
+    return out
@@ -0,0 +1,141 @@
+"""
+SQLite Connection Pool
+Per-request connection reuse for the Due Diligence app.
+
+Within a request, get_connection() hands out one connection stored on
+flask.g; the many get_db()/get_db_connection() calls made by
+before_request hooks, permission checks, helpers and route bodies all share
+it, and their conn.close() calls are no-ops. release() (registered as an
+app-context teardown) rolls back anything left uncommitted and returns the
+connection to a small per-process idle pool for the next request.
+
+PRAGMAs are applied once when a connection is created:
+  journal_mode=WAL, synchronous=NORMAL, cache_size, mmap_size, busy_timeout
+
+Outside a request (job workers, scripts) a standalone connection is returned
+and close() really closes it.
+"""
+import os
+import sqlite3
+import threading
+
+from flask import g, has_app_context
+
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "20000"))
+CACHE_SIZE_KB = int(os.environ.get("DB_CACHE_SIZE_KB", "20000"))     # ~20 MB page cache
+MMAP_SIZE = int(os.environ.get("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+_G_KEY = "_db_pool_conn"
+
+_lock = threading.Lock()
+_idle = []
+_pool_pid = os.getpid()
+_stats = {
+    "opened": 0,        # new sqlite3 connections created
+    "reused": 0,        # get_connection() calls served by the request's connection
+    "pool_hits": 0,     # requests that took an idle pooled connection
+    "released": 0,      # request teardowns returning a connection
+    "discarded": 0,     # connections closed because the pool was full or broken
+    "standalone": 0,    # connections handed out outside a request
+}
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection whose close() is a no-op while it is request-scoped."""
+
+    _request_scoped = False
+
+    def close(self):
+        if self._request_scoped:
+            return
+        sqlite3.Connection.close(self)
+
+    def really_close(self):
+        self._request_scoped = False
+        sqlite3.Connection.close(self)
+
+
+def _count(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def _open(db_path):
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000.0,
+                           factory=PooledConnection, check_same_thread=False)
+    for pragma in (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={MMAP_SIZE}",
+        f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    ):
+        try:
+            conn.execute(pragma)
+        except sqlite3.DatabaseError:
+            pass  # e.g. WAL unavailable on this filesystem
+    _count("opened")
+    return conn
+
+
+def _take_idle(db_path):
+    global _idle, _pool_pid
+    with _lock:
+        if _pool_pid != os.getpid():
+            # Forked child (gunicorn/job workers): never share the parent's handles
+            _idle = []
+            _pool_pid = os.getpid()
+        for i, (path, conn) in enumerate(_idle):
+            if path == db_path:
+                del _idle[i]
+                _stats["pool_hits"] += 1
+                return conn
+    return None
+
+
+def get_connection(db_path):
+    """Return the request's connection to db_path, creating or pooling as needed."""
+    if not has_app_context():
+        _count("standalone")
+        return _open(db_path)
+
+    conns = g.setdefault(_G_KEY, {})
+    conn = conns.get(db_path)
+    if conn is not None:
+        _count("reused")
+    else:
+        conn = _take_idle(db_path) or _open(db_path)
+        conn._request_scoped = True
+        conns[db_path] = conn
+    # Callers occasionally swap the row factory; give everyone the default back
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def release(exc=None):
+    """App-context teardown: return this request's connections to the pool."""
+    conns = g.pop(_G_KEY, None) if has_app_context() else None
+    for db_path, conn in (conns or {}).items():
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.really_close()
+            _count("discarded")
+            continue
+        with _lock:
+            _stats["released"] += 1
+            if _pool_pid == os.getpid() and len(_idle) < POOL_SIZE:
+                _idle.append((db_path, conn))
+                continue
+            _stats["discarded"] += 1
+        conn.really_close()
+
+
+def pool_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["idle"] = len(_idle)
+    stats["pool_size"] = POOL_SIZE
+    return stats
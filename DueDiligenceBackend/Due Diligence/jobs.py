@@ -0,0 +1,471 @@
+"""
+Background Jobs
+SQLite-backed job queue plus a small worker process pool, so uploads, scoring
+and QC sampling run off the Flask request path.
+
+  enqueue(kind, payload)   -> job id (returned to the client immediately)
+  get_job(job_id)          -> status / progress / result for polling endpoints
+  request_cancel(job_id)   -> queued jobs are cancelled at once, running jobs
+                              stop at their next progress() call
+  start_workers()          -> opt-in (JOB_WORKERS > 0): forks worker processes
+                              from the web server on first enqueue
+
+Handlers are registered per kind with register_handler() and are called as
+handler(payload, progress); progress(dict) stores progress for the status
+endpoint and raises JobCancelled when a cancel has been requested. Failed jobs
+are retried with exponential backoff up to max_attempts. A spooled upload
+(payload "path") is kept while a retry is pending and deleted once the job is
+cancelled or has failed for the last time.
+
+Both Flask apps import this module and share jobs.db, so a worker only claims
+kinds it has a handler for. While a handler runs, a heartbeat thread keeps the
+job's heartbeat_at fresh; a job whose heartbeat stops (dead worker) is
+requeued, and that counts as an attempt.
+
+Jobs are processed by a standalone worker (the default, JOB_WORKERS=0); run
+one or more alongside the web apps with:  python jobs.py
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+import traceback
+import multiprocessing
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOBS_DB = os.environ.get("JOBS_DB", os.path.join(BASE_DIR, "jobs.db"))
+JOB_UPLOAD_DIR = os.environ.get("JOB_UPLOAD_DIR", os.path.join(BASE_DIR, "job_uploads"))
+# In-process forked workers are opt-in: forking a server that already has threads
+# and open connections is unsafe, so by default `python jobs.py` does the work
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "0"))
+POLL_SECONDS = 1.0
+RETRY_BASE_SECONDS = 5
+# A running job whose heartbeat is older than this is assumed to belong to a dead worker
+STALE_SECONDS = 600
+HEARTBEAT_SECONDS = 30
+
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+_HANDLERS = {}
+_WORKERS = []
+_WORKERS_PID = None
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when the job has been cancelled."""
+
+
+def register_handler(kind, func):
+    _HANDLERS[kind] = func
+    return func
+
+
+def _now():
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _connect(db_path=None):
+    conn = sqlite3.connect(db_path or JOBS_DB, timeout=20)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def ensure_jobs_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued'
+                CHECK(status IN ('queued','running','succeeded','failed','cancelled')),
+            payload TEXT,
+            progress TEXT,
+            result TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            run_after TEXT,
+            created_by INTEGER,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            heartbeat_at TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs(status, run_after)")
+    conn.commit()
+
+
+def _row_to_job(row):
+    job = dict(row)
+    for key in ("payload", "progress", "result"):
+        try:
+            job[key] = json.loads(job[key]) if job[key] else None
+        except Exception:
+            pass
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+def _discard_upload(job):
+    """Delete a job's spooled upload (payload "path" under JOB_UPLOAD_DIR) once no run will need it."""
+    payload = job.get("payload")
+    path = payload.get("path") if isinstance(payload, dict) else None
+    if not path or os.path.dirname(os.path.abspath(path)) != os.path.abspath(JOB_UPLOAD_DIR):
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def enqueue(kind, payload=None, created_by=None, max_attempts=3, db_path=None):
+    """Queue a job and return its id. Starts the worker pool on first use."""
+    if kind not in _HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    conn = _connect(db_path)
+    try:
+        ensure_jobs_table(conn)
+        cur = conn.execute("""
+            INSERT INTO jobs(kind, status, payload, max_attempts, created_by, created_at, run_after)
+            VALUES(?, 'queued', ?, ?, ?, ?, ?)
+        """, (kind, json.dumps(payload or {}), int(max_attempts), created_by, _now(), _now()))
+        conn.commit()
+        job_id = cur.lastrowid
+    finally:
+        conn.close()
+    if db_path is None:
+        start_workers()
+    return job_id
+
+
+def get_job(job_id, db_path=None):
+    conn = _connect(db_path)
+    try:
+        ensure_jobs_table(conn)
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+    finally:
+        conn.close()
+
+
+def list_jobs(kind=None, limit=50, db_path=None):
+    conn = _connect(db_path)
+    try:
+        ensure_jobs_table(conn)
+        if kind:
+            rows = conn.execute("SELECT * FROM jobs WHERE kind = ? ORDER BY id DESC LIMIT ?", (kind, int(limit))).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (int(limit),)).fetchall()
+        return [_row_to_job(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def request_cancel(job_id, db_path=None):
+    """
+    Cancel a job. Queued jobs are cancelled immediately; running jobs are flagged
+    and stop at their next progress update. Returns the updated job (or None).
+    """
+    conn = _connect(db_path)
+    try:
+        ensure_jobs_table(conn)
+        cancelled = conn.execute("""
+            UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ?
+            WHERE id = ? AND status = 'queued'
+        """, (_now(), job_id)).rowcount
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    job = get_job(job_id, db_path)
+    if cancelled and job is not None:
+        # No worker will pick it up now
+        _discard_upload(job)
+    return job
+
+
+def _claim_next(conn, kinds=None):
+    """
+    Atomically move the oldest runnable job of a kind this process handles
+    (default: the registered kinds) to 'running' and return it.
+    """
+    kinds = list(_HANDLERS if kinds is None else kinds)
+    if not kinds:
+        return None
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Jobs left running by a worker that died: requeue (the lost run counted
+        # as an attempt at claim time), or fail once max_attempts is used up
+        stale = f"-{STALE_SECONDS} seconds"
+        dead = conn.execute("""
+            SELECT * FROM jobs
+            WHERE status = 'running' AND heartbeat_at < datetime('now', ?) AND attempts >= max_attempts
+        """, (stale,)).fetchall()
+        conn.executemany("""
+            UPDATE jobs SET status = 'failed', error = 'Worker stopped responding', finished_at = ?
+            WHERE id = ?
+        """, [(_now(), r["id"]) for r in dead])
+        conn.execute("""
+            UPDATE jobs SET status = 'queued', run_after = ?, error = 'Worker stopped responding'
+            WHERE status = 'running' AND heartbeat_at < datetime('now', ?)
+        """, (_now(), stale))
+        row = conn.execute(f"""
+            SELECT * FROM jobs
+            WHERE status = 'queued' AND (run_after IS NULL OR run_after <= ?)
+              AND kind IN ({','.join('?' * len(kinds))})
+            ORDER BY id LIMIT 1
+        """, (_now(), *kinds)).fetchone()
+        if row is not None:
+            conn.execute("""
+                UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                       started_at = ?, heartbeat_at = ?, error = NULL
+                WHERE id = ?
+            """, (_now(), _now(), row["id"]))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    for r in dead:
+        _discard_upload(_row_to_job(r))
+    return _row_to_job(row) if row is not None else None
+
+
+def _start_heartbeat(job_id, db_path):
+    """Refresh heartbeat_at every HEARTBEAT_SECONDS until the returned event is set."""
+    stop = threading.Event()
+
+    def beat():
+        conn = _connect(db_path)
+        try:
+            while not stop.wait(HEARTBEAT_SECONDS):
+                try:
+                    conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                                 (_now(), job_id))
+                    conn.commit()
+                except sqlite3.Error as e:
+                    print(f"[Jobs] Heartbeat for #{job_id} failed: {e}")
+        finally:
+            conn.close()
+
+    threading.Thread(target=beat, name=f"job-{job_id}-heartbeat", daemon=True).start()
+    return stop
+
+
+def _make_progress(conn, job_id):
+    def progress(info):
+        conn.execute("UPDATE jobs SET progress = ?, heartbeat_at = ? WHERE id = ?",
+                     (json.dumps(info, default=str), _now(), job_id))
+        conn.commit()
+        row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row and row["cancel_requested"]:
+            raise JobCancelled(f"Job {job_id} cancelled")
+    return progress
+
+
+def run_job(conn, job, db_path=None):
+    """Run one claimed job to completion, recording its outcome."""
+    job_id = job["id"]
+    handler = _HANDLERS.get(job["kind"])
+    heartbeat = _start_heartbeat(job_id, db_path)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind: {job['kind']}")
+        # Long stages (scoring, sampling) report progress rarely; the heartbeat
+        # thread keeps the job from being requeued as stale meanwhile
+        result = handler(job["payload"] or {}, _make_progress(conn, job_id))
+        conn.execute("UPDATE jobs SET status = 'succeeded', result = ?, finished_at = ? WHERE id = ?",
+                     (json.dumps(result, default=str), _now(), job_id))
+        print(f"[Jobs] {job['kind']} #{job_id} succeeded")
+    except JobCancelled:
+        conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?", (_now(), job_id))
+        print(f"[Jobs] {job['kind']} #{job_id} cancelled")
+        _discard_upload(job)
+    except Exception as e:
+        print(f"[Jobs] {job['kind']} #{job_id} failed: {e}\n{traceback.format_exc()}")
+        attempts = job["attempts"] + 1
+        if attempts < job["max_attempts"] and handler is not None:
+            delay = RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+            conn.execute("""
+                UPDATE jobs SET status = 'queued', error = ?, run_after = datetime('now', ?)
+                WHERE id = ?
+            """, (str(e), f"+{delay} seconds", job_id))
+        else:
+            conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                         (str(e), _now(), job_id))
+            # Out of attempts: the spooled upload is only kept while a retry is pending
+            _discard_upload(job)
+    finally:
+        heartbeat.set()
+    conn.commit()
+
+
+def run_pending(db_path=None, max_jobs=None):
+    """Drain runnable jobs in the current process. Returns the number run."""
+    conn = _connect(db_path)
+    ensure_jobs_table(conn)
+    ran = 0
+    try:
+        while max_jobs is None or ran < max_jobs:
+            job = _claim_next(conn)
+            if job is None:
+                break
+            run_job(conn, job, db_path)
+            ran += 1
+    finally:
+        conn.close()
+    return ran
+
+
+def worker_loop(db_path=None):
+    """Poll the queue forever; one job at a time per worker process."""
+    print(f"[Jobs] Worker {os.getpid()} started")
+    while True:
+        try:
+            if run_pending(db_path) == 0:
+                time.sleep(POLL_SECONDS)
+        except KeyboardInterrupt:
+            break
+        except Exception as e:
+            print(f"[Jobs] Worker {os.getpid()} error: {e}")
+            time.sleep(POLL_SECONDS)
+
+
+def start_workers(n=None):
+    """
+    Fork JOB_WORKERS workers once per server process (development only; off by
+    default). The fork happens on first enqueue, after the app has started its
+    threads and opened connections, so production should keep JOB_WORKERS=0
+    and run `python jobs.py`.
+    """
+    global _WORKERS, _WORKERS_PID
+    n = JOB_WORKERS if n is None else n
+    if n <= 0:
+        return
+    if _WORKERS_PID == os.getpid() and any(p.is_alive() for p in _WORKERS):
+        return
+    try:
+        ctx = multiprocessing.get_context("fork")
+    except ValueError:
+        # No fork (Windows): handlers would not be registered in spawned children
+        print("[Jobs] fork unavailable; run `python jobs.py` to process jobs")
+        return
+    _WORKERS = []
+    for _ in range(n):
+        p = ctx.Process(target=worker_loop, daemon=True)
+        p.start()
+        _WORKERS.append(p)
+    _WORKERS_PID = os.getpid()
+
+
+def spool_upload(file_storage, prefix="upload"):
+    """Save an uploaded file to JOB_UPLOAD_DIR for a job to pick up; returns the path."""
+    os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+    name = f"{prefix}_{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}_{os.getpid()}.csv"
+    path = os.path.join(JOB_UPLOAD_DIR, name)
+    file_storage.save(path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Transaction Review handlers (shared by both Flask apps)
+# ---------------------------------------------------------------------------
+
+def tx_upload_job(payload, progress):
+    """Ingest a spooled transactions CSV, then score it as a second stage."""
+    from tx_review_ingest import ingest_transactions_csv, score_new_transactions
+
+    path = payload["path"]
+    total_bytes = os.path.getsize(path) if os.path.exists(path) else None
+    conn = sqlite3.connect(payload["db_path"], timeout=20)
+    try:
+        def ingest_progress(info):
+            info = dict(info, stage="ingest", total_bytes=total_bytes)
+            if total_bytes and info.get("bytes"):
+                info["percent"] = round(100.0 * info["bytes"] / total_bytes, 1)
+            progress(info)
+
+        progress({"stage": "ingest", "rows": 0, "total_bytes": total_bytes})
+        with open(path, "rb") as f:
+            tx_count, bad_dates = ingest_transactions_csv(conn, f, progress=ingest_progress, score=False)
+        # Ingest is committed; a retry of this job re-loads the same file idempotently
+        progress({"stage": "scoring", "rows": tx_count, "bad_dates": bad_dates})
+        scored = score_new_transactions(conn) or {}
+    finally:
+        conn.close()
+
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    message = f"Loaded {tx_count} transactions"
+    if bad_dates:
+        message += f" (skipped {bad_dates} row(s) with invalid txn_date)"
+    return {
+        "message": message,
+        "transactions": tx_count,
+        "skipped_bad_dates": bad_dates,
+        "scored": scored.get("scored"),
+        "alerts": scored.get("alerts"),
+    }
+
+
+def tx_score_job(payload, progress):
+    from tx_review_ingest import score_new_transactions
+
+    conn = sqlite3.connect(payload["db_path"], timeout=20)
+    try:
+        progress({"stage": "scoring"})
+        return score_new_transactions(conn) or {}
+    finally:
+        conn.close()
+
+
+def tx_aggregates_job(payload, progress):
+    """Build the Transaction Review aggregates from the ledger if they never were."""
+    from tx_aggregates import ensure_aggregate_tables
+
+    conn = sqlite3.connect(payload["db_path"], timeout=20)
+    try:
+        progress({"stage": "aggregates"})
+        ensure_aggregate_tables(conn)
+        return {"customer_months": conn.execute("SELECT COUNT(*) FROM tx_agg_month").fetchone()[0]}
+    finally:
+        conn.close()
+
+
+def queue_tx_aggregates_build(db_path):
+    """
+    App startup step: queue the first aggregate build for the worker, so no
+    dashboard request ever builds them. Does nothing once they are built or
+    while a build is already queued/running; returns the job id, if any.
+    """
+    from tx_aggregates import aggregates_built
+
+    conn = sqlite3.connect(db_path, timeout=20)
+    try:
+        if aggregates_built(conn):
+            return None
+    finally:
+        conn.close()
+    latest = list_jobs(kind="tx_aggregates", limit=1)
+    if latest and latest[0]["status"] in ("queued", "running"):
+        return latest[0]["id"]
+    return enqueue("tx_aggregates", {"db_path": os.path.abspath(db_path)})
+
+
+register_handler("tx_upload", tx_upload_job)
+register_handler("tx_score", tx_score_job)
+register_handler("tx_aggregates", tx_aggregates_job)
+
+
+if __name__ == "__main__":
+    # Standalone worker: importing the app registers its handlers (e.g. qc_sampling)
+    sys.path.insert(0, BASE_DIR)
+    import app  # noqa: F401
+    import jobs
+    jobs.worker_loop()
@@ -166,6 +166,14 @@ for role in roles:
         if can_view or can_edit:
             print(f"  ✓ {role} -> {feature}: view={bool(can_view)}, edit={bool(can_edit)}")
 
+# Bump settings.permissions_version in the same transaction (as app._bump_permissions_version
+# does) so running app workers reload their cached permission matrix on the next request
+cur.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+cur.execute("""
+    INSERT INTO settings (key, value) VALUES ('permissions_version', '1')
+    ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+""")
+
 conn.commit()
 conn.close()
 
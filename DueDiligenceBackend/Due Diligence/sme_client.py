@@ -0,0 +1,176 @@
+"""
+AI SME HTTP Client
+Shared, pooled HTTP session for the Flask routes that proxy to the AI SME
+FastAPI service.
+
+- One requests.Session per process with a keep-alive connection pool
+  (SME_POOL_SIZE), instead of a new TCP connection per proxied call.
+- Per-endpoint (connect, read) timeouts, so health checks fail in seconds
+  rather than tying up a worker for 30s.
+- Circuit breaker: after SME_BREAKER_THRESHOLD consecutive connection
+  failures/timeouts/5xx gateway errors, calls fail fast with SMEUnavailable
+  for SME_BREAKER_COOLDOWN seconds; then a single trial call is let through.
+- Latency histogram per proxied endpoint, exposed via stats().
+"""
+import http.cookiejar
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+AI_SME_BASE_URL = os.environ.get("AI_SME_BASE_URL", "http://localhost:8000")
+POOL_SIZE = int(os.environ.get("SME_POOL_SIZE", "16"))
+BREAKER_THRESHOLD = int(os.environ.get("SME_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("SME_BREAKER_COOLDOWN", "30"))
+
+# (connect, read) seconds per FastAPI endpoint; read is the max gap between bytes
+TIMEOUTS = {
+    "/health": (2, 5),
+    "/query": (3, 30),
+    "/query:stream": (3, 120),
+    "/referral": (3, 15),
+    "/feedback": (3, 10),
+    "/my_referrals/data": (3, 15),
+    "/admin/referrals/data": (3, 15),
+    "/admin/referrals/update": (3, 10),
+    "/upload": (3, 120),
+}
+DEFAULT_TIMEOUT = (3, 30)
+
+LATENCY_BUCKETS_MS = [25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+_BREAKER_STATUSES = {502, 503, 504}
+
+
+class SMEUnavailable(requests.exceptions.ConnectionError):
+    """Raised without calling out while the circuit breaker is open."""
+
+
+class SMEClient:
+    def __init__(self, base_url=AI_SME_BASE_URL, pool_size=POOL_SIZE,
+                 breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._hist = {}   # endpoint -> {"count", "errors", "total_ms", "buckets"}
+
+    # ---------------- session ----------------
+    def _get_session(self):
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                # New process (gunicorn/job worker fork): never share the parent's sockets
+                s = requests.Session()
+                # Shared by every user's proxied calls: never keep a Set-Cookie from the
+                # SME, so each call carries only the cookies= it was given
+                s.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                self._session = s
+                self._pid = os.getpid()
+            return self._session
+
+    # ---------------- circuit breaker ----------------
+    def _before_call(self, endpoint):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.breaker_cooldown or self._trial_in_flight:
+                self._record(endpoint, 0.0, error=True, locked=True)
+                raise SMEUnavailable(f"AI SME circuit open; skipping {endpoint}")
+            self._trial_in_flight = True   # half-open: let this one call through
+
+    def _after_call(self, ok):
+        with self._lock:
+            self._trial_in_flight = False
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._failures >= self.breaker_threshold or self._opened_at is not None:
+                if self._opened_at is None:
+                    print(f"[SME] Circuit opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+
+    # ---------------- metrics ----------------
+    def _record(self, endpoint, ms, error=False, locked=False):
+        def _do():
+            h = self._hist.setdefault(endpoint, {
+                "count": 0, "errors": 0, "total_ms": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            })
+            h["count"] += 1
+            h["errors"] += int(error)
+            h["total_ms"] += ms
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if ms <= bound:
+                    h["buckets"][i] += 1
+                    break
+            else:
+                h["buckets"][-1] += 1
+        if locked:
+            _do()
+        else:
+            with self._lock:
+                _do()
+
+    def stats(self):
+        with self._lock:
+            endpoints = {}
+            for ep, h in self._hist.items():
+                labels = [f"le_{b}ms" for b in LATENCY_BUCKETS_MS] + ["gt_%dms" % LATENCY_BUCKETS_MS[-1]]
+                endpoints[ep] = {
+                    "count": h["count"],
+                    "errors": h["errors"],
+                    "avg_ms": round(h["total_ms"] / h["count"], 1) if h["count"] else 0.0,
+                    "histogram": dict(zip(labels, h["buckets"])),
+                }
+            state = "closed"
+            if self._opened_at is not None:
+                state = "half_open" if time.monotonic() - self._opened_at >= self.breaker_cooldown else "open"
+            return {
+                "base_url": self.base_url,
+                "pool_size": self.pool_size,
+                "breaker": {"state": state, "consecutive_failures": self._failures,
+                            "threshold": self.breaker_threshold, "cooldown_seconds": self.breaker_cooldown},
+                "endpoints": endpoints,
+            }
+
+    # ---------------- requests ----------------
+    def request(self, method, endpoint, stream=False, timeout=None, **kwargs):
+        """Call the AI SME service; raises SMEUnavailable while the breaker is open."""
+        key = endpoint + (":stream" if stream else "")
+        self._before_call(key)
+        started = time.perf_counter()
+        try:
+            response = self._get_session().request(
+                method, f"{self.base_url}{endpoint}", stream=stream,
+                timeout=timeout or TIMEOUTS.get(key) or TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT), **kwargs
+            )
+        except Exception:
+            # Connection refused, timeouts, ... (also releases a half-open trial slot)
+            self._record(key, (time.perf_counter() - started) * 1000, error=True)
+            self._after_call(ok=False)
+            raise
+        ok = response.status_code not in _BREAKER_STATUSES
+        # For streams this is time to response headers, i.e. time to first byte
+        self._record(key, (time.perf_counter() - started) * 1000, error=response.status_code >= 400)
+        self._after_call(ok=ok)
+        return response
+
+    def get(self, endpoint, **kwargs):
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self.request("POST", endpoint, **kwargs)
+
+
+sme = SMEClient()
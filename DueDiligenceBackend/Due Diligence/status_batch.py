@@ -0,0 +1,284 @@
+"""
+Columnar Case Status
+derive_case_status_batch() computes, for a whole table of reviews at once, what
+the dashboards otherwise get by looping over rows:
+
+  status         - str(utils.derive_case_status(rec))
+  status_bucket  - utils.status_bucket(status)
+  age_bucket     - utils.age_bucket_from_dt(utils.last_touched_date_for_record(rec))
+
+Input is a DataFrame, a mapping of column -> values, or a list of row dicts
+(missing columns/keys read as None, like rec.get()).
+
+- Dates: strings in the common fixed layouts (ISO date / datetime, dd/mm/yyyy)
+  are parsed with pd.to_datetime(format=...) over each column's distinct
+  values; anything else (other layouts, date objects, odd values) goes through
+  the scalar parser once per distinct value. Dates are held as day ordinals
+  (0 = no date).
+- Flags and IDs keep derive_case_status()'s exact blank/truthiness rules
+  (None vs NaN vs 0 vs "0"): each rule is evaluated once per distinct value.
+- The priority order of derive_case_status() is one np.select() over masks.
+
+tests/test_status_batch.py checks it row for row against the scalar functions;
+bench_status.py times both.
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from utils import ReviewStatus, is_blank, not_blank, parse_d, status_bucket, _parse_iso_dt_any
+
+# Columns derive_case_status() / last_touched_date_for_record() read
+STATUS_FIELDS = (
+    "status", "assigned_to", "referred_to_sme", "qc_assigned_to", "qc_outcome",
+    "qc_rework_required", "qc_rework_completed", "_in_qc_sampling", "outreach_complete",
+    "InitialReviewCompleteDate", "Chaser1IssuedDate", "Chaser1DueDate", "Chaser2DueDate",
+    "Chaser3DueDate", "NTCDueDate", "NTCIssuedDate", "RestrictionsAppliedDate",
+    "outreach_response_received_date", "Outreach1Date", "OutreachDate1", "date_completed",
+    "qc_check_date", "qc_end_time", "sme_returned_date", "SMEReturnedDate",
+)
+TOUCHED_FIELDS = ("updated_at", "date_assigned", "date_completed", "qc_check_date",
+                  "sme_selected_date", "sme_returned_date")
+
+# (full-match regex, strptime format) that parse_d() would reach first for such strings
+_PARSE_D_LAYOUTS = (
+    (r"\d{4}-\d{2}-\d{2}", "%Y-%m-%d"),
+    (r"\d{1,2}/\d{1,2}/\d{4}", "%d/%m/%Y"),
+    (r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}", "%Y-%m-%d %H:%M:%S"),
+    (r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}", "%Y-%m-%dT%H:%M:%S"),
+    (r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{1,6}", "%Y-%m-%dT%H:%M:%S.%f"),
+)
+# Same for _parse_iso_dt_any(), applied after its Z / fractional-seconds stripping
+_ISO_DT_LAYOUTS = (
+    (r"\d{4}-\d{2}-\d{2}", "%Y-%m-%d"),
+    (r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}", "%Y-%m-%d %H:%M:%S"),
+    (r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}", "%Y-%m-%dT%H:%M:%S"),
+)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+# ---------------- column access ----------------
+def _object_array(values, n):
+    out = np.empty(n, dtype=object)
+    out[:] = list(values) if not isinstance(values, np.ndarray) else values
+    return out
+
+
+def _columns(reviews, fields):
+    """(n, {field: object ndarray}) from a DataFrame, column mapping or row dicts."""
+    if isinstance(reviews, pd.DataFrame):
+        n = len(reviews)
+        return n, {f: (reviews[f].to_numpy(dtype=object) if f in reviews.columns else np.full(n, None, dtype=object))
+                   for f in fields}
+    if isinstance(reviews, dict):
+        n = len(next(iter(reviews.values()))) if reviews else 0
+        return n, {f: (_object_array(reviews[f], n) if f in reviews else np.full(n, None, dtype=object))
+                   for f in fields}
+    rows = list(reviews)
+    n = len(rows)
+    return n, {f: _object_array([r.get(f) for r in rows], n) for f in fields}
+
+
+def _per_value(arr, fn, dtype=object, many=None):
+    """
+    fn(v) for every element, evaluated once per distinct value. many(values)
+    may compute fn over the array of distinct non-null values in one go.
+    """
+    out = np.empty(len(arr), dtype=dtype)
+    if not len(arr):
+        return out
+    codes, uniques = pd.factorize(arr)
+    na = codes < 0
+    if len(uniques):
+        mapped = np.empty(len(uniques), dtype=dtype)
+        mapped[:] = many(uniques) if many is not None else [fn(u) for u in uniques]
+        out[~na] = mapped[codes[~na]]
+    if na.any():
+        # factorize() folds None, NaN and NaT together, but the scalar rules
+        # tell None apart from NaN/NaT (e.g. NaN is truthy), so split them again.
+        is_none = np.equal(arr[na], None).astype(bool)
+        na_out = np.empty(int(na.sum()), dtype=dtype)
+        na_out[is_none] = fn(None)
+        na_out[~is_none] = fn(float("nan"))
+        out[na] = na_out
+    return out
+
+
+def _to_ordinal(d):
+    return d.toordinal() if d else 0
+
+
+def _date_ordinals(arr, layouts, scalar_fn, prepare=None):
+    """Day ordinals (0 = None) of scalar_fn(v) for each element; common string layouts parsed columnar."""
+    def fn(v):
+        return _to_ordinal(scalar_fn(v))
+
+    def many(values):
+        out = np.zeros(len(values), dtype=np.int64)
+        todo = np.ones(len(values), dtype=bool)
+        # Only str values take the columnar path (.str would call methods of other types)
+        is_str = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+        if is_str.any():
+            pos = np.flatnonzero(is_str)
+            strs = pd.Series(values[pos], dtype=object)
+            strs = strs.str.strip() if prepare is None else prepare(strs)
+            left = np.ones(len(pos), dtype=bool)
+            for pattern, fmt in layouts:
+                pending = np.flatnonzero(left)
+                if not len(pending):
+                    break
+                hit = strs.iloc[pending].str.fullmatch(pattern).to_numpy(dtype=bool, na_value=False)
+                if not hit.any():
+                    continue
+                parsed = pd.to_datetime(strs.iloc[pending[hit]], format=fmt, errors="coerce")
+                ok = parsed.notna().to_numpy()
+                done = pending[hit][ok]
+                out[pos[done]] = parsed[ok].to_numpy(dtype="datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+                left[done] = False
+                todo[pos[done]] = False
+        # Other layouts and non-string values: the scalar parser, once per distinct value
+        out[todo] = [fn(v) for v in values[todo]]
+        return out
+
+    return _per_value(arr, fn, dtype=np.int64, many=many)
+
+
+def _parse_d_ordinals(arr):
+    return _date_ordinals(arr, _PARSE_D_LAYOUTS, parse_d)
+
+
+def _touched_ordinals(arr):
+    def _scalar(v):
+        dt = _parse_iso_dt_any(v) if v else None
+        return dt.date() if dt else None
+
+    def _prepare(s):
+        # Mirrors _parse_iso_dt_any(): str(s).replace("Z", "").split(".")[0] ("" is skipped: falsy)
+        return s.str.replace("Z", "", regex=False).str.split(".", n=1).str[0]
+
+    return _date_ordinals(arr, _ISO_DT_LAYOUTS, _scalar, prepare=_prepare)
+
+
+# ---------------- scalar rules, per distinct value ----------------
+def _unassigned(v):
+    return is_blank(v) or (isinstance(v, str) and v.strip() == "0")
+
+
+def _rework_completed(v):
+    return v is not None and v != 0 and v != "0" and str(v).strip() != ""
+
+
+def _outreach_complete(v):
+    return bool(v and v != 0)
+
+
+# ---------------- batch API ----------------
+def derive_case_status_batch(reviews, today: date = None) -> pd.DataFrame:
+    """
+    status / status_bucket / age_bucket for every review, identical to calling
+    derive_case_status(), status_bucket() and age_bucket_from_dt(last_touched_date_for_record())
+    per row. `today` defaults to date.today() for due states and to UTC today
+    for age buckets, as the scalar functions do. The result shares the
+    DataFrame's index (a RangeIndex otherwise).
+    """
+    n, col = _columns(reviews, STATUS_FIELDS + TOUCHED_FIELDS)
+    status_today = (today or date.today()).toordinal()
+    age_today = (today or datetime.utcnow().date()).toordinal()
+
+    def has(field):
+        return _parse_d_ordinals(col[field]) > 0
+
+    def due(field):
+        d = _parse_d_ordinals(col[field])
+        return (d > 0) & (d <= status_today)
+
+    def flag(field, fn):
+        return _per_value(col[field], fn, dtype=bool)
+
+    # Dates
+    irc = has("InitialReviewCompleteDate")
+    c1_issued = has("Chaser1IssuedDate")
+    dc = has("date_completed")
+    qcd = has("qc_check_date")
+    qc_end = has("qc_end_time")
+    resp = has("outreach_response_received_date")
+    sme_ret = has("sme_returned_date") | has("SMEReturnedDate")
+    o1 = has("Outreach1Date") | has("OutreachDate1")
+    ntc_due = due("NTCDueDate")
+    c3_due = due("Chaser3DueDate")
+    c2_due = due("Chaser2DueDate")
+    c1_due = due("Chaser1DueDate")
+    restrictions_due = due("NTCIssuedDate") & ~has("RestrictionsAppliedDate")
+
+    # Flags / IDs
+    unassigned = flag("assigned_to", _unassigned)
+    referred = flag("referred_to_sme", not_blank)
+    qc_unassigned = flag("qc_assigned_to", is_blank)
+    rework_req = flag("qc_rework_required", not_blank)
+    rework_done = flag("qc_rework_completed", _rework_completed)
+    in_sampling = flag("_in_qc_sampling", bool)
+    outreach_done = flag("outreach_complete", _outreach_complete)
+
+    # Status text
+    status_col = col["status"]
+    low_status = _per_value(status_col, lambda v: (str(v) or "").strip().lower())
+    ai_sme = _per_value(low_status, lambda s: "referred to ai sme" in s, dtype=bool)
+    sme_text = _per_value(low_status, lambda s: "referred to sme" in s, dtype=bool)
+    not_done_text = _per_value(low_status, lambda s: s not in ("complete", "completed"), dtype=bool)
+    rework_complete_text = flag("status", lambda v: str(v or "").strip() == "QC - Rework Complete")
+    outcome = _per_value(col["qc_outcome"], lambda v: str(v or "").strip().lower())
+    passed = _per_value(outcome, lambda s: s in ("pass", "pass with feedback"), dtype=bool)
+    failed = outcome == "fail"
+
+    qc_queue = [in_sampling & qc_unassigned, in_sampling]   # -> QC_WAITING_ASSIGNMENT, QC_PENDING_REVIEW
+    S = ReviewStatus
+    rules = [
+        (sme_ret & ai_sme, S.SME_RETURNED),
+        (sme_ret & irc & c1_issued, S.SME_RETURNED),
+        (ai_sme & ~sme_ret, S.REFERRED_TO_AI_SME),
+        ((referred | sme_text) & ~sme_ret, S.SME_REFERRED),
+        # Completed: QC workflow
+        (dc & rework_complete_text & qc_queue[0], S.QC_WAITING_ASSIGNMENT),
+        (dc & rework_complete_text & qc_queue[1], S.QC_PENDING_REVIEW),
+        (dc & rework_complete_text, S.AWAITING_QC),
+        (dc & rework_req & ~rework_done, S.QC_REWORK),
+        (dc & rework_done & ~qcd & qc_queue[0], S.QC_WAITING_ASSIGNMENT),
+        (dc & rework_done & ~qcd, S.AWAITING_QC_REWORK),
+        (dc & qcd & rework_req, S.COMPLETED),   # rework required and done (not done matched above)
+        (dc & qcd & passed, S.COMPLETED),
+        (dc & qcd & failed & qc_end & rework_done, S.COMPLETED),
+        (dc & qcd & failed & qc_queue[0], S.QC_WAITING_ASSIGNMENT),
+        (dc & qcd & failed & qc_queue[1], S.QC_PENDING_REVIEW),
+        (dc & ~qcd & qc_queue[0], S.QC_WAITING_ASSIGNMENT),
+        (dc & ~qcd & qc_queue[1], S.QC_PENDING_REVIEW),
+        (dc, S.COMPLETED),
+        # Open cases (date_completed blank from here on)
+        (unassigned, S.UNASSIGNED),
+        (irc & ~c1_issued & ~o1 & not_done_text, S.IR_COMP),
+        (outreach_done, S.OUTREACH_COMPLETE),
+        (resp, S.OUTREACH_RET),
+        (o1, S.OUTREACH),
+        (ntc_due, S.NTC_DUE),
+        (c3_due, S.CHASER3_DUE),
+        (c2_due, S.CHASER2_DUE),
+        (c1_due, S.CHASER1_DUE),
+        (restrictions_due, S.RESTRICTIONS_DUE),
+    ]
+    labels = np.array([s.value for _, s in rules] + [S.PENDING_REVIEW.value], dtype=object)
+    choice = np.select([m for m, _ in rules], np.arange(len(rules)), default=len(rules)) if n else np.zeros(0, dtype=int)
+    status = labels[choice]
+
+    bucket_labels = np.array([status_bucket(s) for s in labels], dtype=object)
+    status_group = bucket_labels[choice]
+
+    touched = np.zeros(n, dtype=np.int64)
+    for field in TOUCHED_FIELDS:
+        touched = np.maximum(touched, _touched_ordinals(col[field]))
+    age_days = age_today - touched
+    age = np.where(touched == 0, "5 days+",
+                   np.where(age_days <= 2, "1–2 days", np.where(age_days <= 5, "3–5 days", "5 days+")))
+
+    index = reviews.index if isinstance(reviews, pd.DataFrame) else None
+    return pd.DataFrame({"status": status, "status_bucket": status_group, "age_bucket": age.astype(object)},
+                        index=index)
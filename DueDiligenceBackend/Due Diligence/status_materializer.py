@@ -0,0 +1,179 @@
+"""
+Case Status Materialization
+Stores the dashboard status of every review on the reviews row itself so
+dashboards can GROUP BY in SQL instead of calling derive_case_status() per row.
+
+Columns added to reviews:
+  derived_status        - utils.dashboard_status() (derived status, raw-status override)
+  status_bucket         - utils.status_bucket() (AI SME referrals grouped under SME)
+  age_bucket            - utils.ops_age_bucket() (operations dashboard: 12/35 days since updated_at)
+  chaser_next_type      - chaser_cycle.next_chaser(): next chaser to issue (7/14/21/NTC)
+  chaser_next_due       - its due date, ISO YYYY-MM-DD (indexed for chaser_cycle.chaser_grid)
+  chaser_status_type    - chaser_cycle.status_chaser(): the chaser the raw status names
+  chaser_status_due     - its due date, ISO (indexed for chaser_cycle.status_week_rows)
+  chaser_status_overdue - 1 when the raw status says overdue
+  status_dirty          - 1 when the row changed since it was last materialized
+  status_refreshed_at   - when the columns above were computed
+
+Any write to a review marks it dirty (trigger; new rows default to dirty), and
+refresh_dirty() recomputes just those rows. Chaser/NTC due states and age
+buckets also move with the calendar, so sweep_statuses() recomputes every row
+once a day: run `python status_materializer.py` nightly, or let ensure_fresh()
+do it on the first dashboard read of the day.
+"""
+import os
+import sqlite3
+from datetime import datetime
+
+from chaser_cycle import next_chaser, status_chaser
+from utils import dashboard_status, status_bucket, ops_age_bucket
+
+STATUS_COLUMNS = {
+    "derived_status": "TEXT",
+    "status_bucket": "TEXT",
+    "age_bucket": "TEXT",
+    "chaser_next_type": "TEXT",
+    "chaser_next_due": "TEXT",
+    "chaser_status_type": "TEXT",
+    "chaser_status_due": "TEXT",
+    "chaser_status_overdue": "INTEGER",
+    "status_dirty": "INTEGER DEFAULT 1",
+    "status_refreshed_at": "TEXT",
+}
+# Columns compute_status_fields() returns, in order
+MATERIALIZED = ("derived_status", "status_bucket", "age_bucket", "chaser_next_type", "chaser_next_due",
+                "chaser_status_type", "chaser_status_due", "chaser_status_overdue")
+BATCH_ROWS = 500   # ids per SELECT ... IN (...) (stays under SQLite's variable limit)
+
+_ready = set()   # db files already migrated in this process
+
+
+def ensure_status_columns(conn):
+    """Add the materialized columns, indexes and dirty-marking trigger (idempotent)."""
+    db_file = conn.execute("PRAGMA database_list").fetchone()[2]
+    if db_file in _ready:
+        return
+    conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+    existing = {r[1] for r in conn.execute("PRAGMA table_info(reviews)").fetchall()}
+    for col, decl in STATUS_COLUMNS.items():
+        if col not in existing:
+            conn.execute(f"ALTER TABLE reviews ADD COLUMN {col} {decl}")
+    if not set(MATERIALIZED) <= existing:
+        # Older databases were swept without some of these columns: force a fresh sweep
+        conn.execute("DELETE FROM settings WHERE key = 'status_swept_on'")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_status_bucket ON reviews(status_bucket, age_bucket)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_derived_status ON reviews(derived_status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_status_dirty ON reviews(status_dirty) WHERE status_dirty = 1")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_chaser_due ON reviews(chaser_next_due, chaser_next_type)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_assignee_chaser ON reviews(assigned_to, chaser_next_due)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_status_chaser_due ON reviews(chaser_status_due)")
+    # Application writes never touch the materialized columns, so an update that
+    # leaves all of them unchanged is a source change: mark the row dirty.
+    conn.execute("DROP TRIGGER IF EXISTS trg_reviews_status_dirty")
+    conn.execute("DROP TRIGGER IF EXISTS trg_reviews_status_dirty_v2")
+    unchanged = "".join(f"\n         AND NEW.{c} IS OLD.{c}" for c in MATERIALIZED)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_reviews_status_dirty_v3
+        AFTER UPDATE ON reviews
+        WHEN OLD.status_dirty = 0
+         AND NEW.status_dirty IS OLD.status_dirty{unchanged}
+        BEGIN
+            UPDATE reviews SET status_dirty = 1 WHERE id = NEW.id;
+        END
+    """)
+    conn.commit()
+    _ready.add(db_file)
+
+
+def compute_status_fields(rec, now=None):
+    """Values of the MATERIALIZED columns for one review dict."""
+    status = str(dashboard_status(rec) or "")
+    return (status, status_bucket(status), ops_age_bucket(rec, now)) + next_chaser(rec) + status_chaser(rec)
+
+
+def _refresh(conn, where, params=(), today=None):
+    """Recompute rows matching `where`; writes only rows whose values changed. Returns rows written."""
+    # Age buckets count days against local time, as the operations dashboard always has
+    clock = datetime.now()
+    if today is not None:
+        clock = datetime.combine(today, clock.time())
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    # Collect ids first: the updates below change columns the WHERE may be scanning
+    ids = [r[0] for r in conn.execute(f"SELECT id FROM reviews WHERE {where}", params).fetchall()]
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    written = 0
+    for i in range(0, len(ids), BATCH_ROWS):
+        chunk = ids[i:i + BATCH_ROWS]
+        rows = cur.execute(f"SELECT * FROM reviews WHERE id IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+        updates = []
+        for row in rows:
+            rec = dict(row)
+            fields = compute_status_fields(rec, clock)
+            old = tuple(rec.get(c) for c in MATERIALIZED)
+            if fields != old or rec.get("status_dirty"):
+                updates.append(fields + (now, rec["id"]))
+        if updates:
+            conn.executemany(f"""
+                UPDATE reviews
+                   SET {", ".join(f"{c} = ?" for c in MATERIALIZED)},
+                       status_dirty = 0, status_refreshed_at = ?
+                 WHERE id = ?
+            """, updates)
+            written += len(updates)
+    conn.commit()
+    return written
+
+
+def refresh_dirty(conn):
+    """Recompute reviews written since they were last materialized."""
+    ensure_status_columns(conn)
+    if conn.execute("SELECT 1 FROM reviews WHERE status_dirty = 1 LIMIT 1").fetchone() is None:
+        return 0
+    return _refresh(conn, "status_dirty = 1")
+
+
+def refresh_reviews(conn, review_ids):
+    """Recompute specific reviews immediately (e.g. right after a bulk write)."""
+    ensure_status_columns(conn)
+    ids = [int(i) for i in review_ids]
+    written = 0
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        written += _refresh(conn, f"id IN ({','.join('?' * len(chunk))})", chunk)
+    return written
+
+
+def sweep_statuses(conn, today=None):
+    """Recompute every review for date-driven transitions; records the sweep date."""
+    ensure_status_columns(conn)
+    today = today or datetime.utcnow().date()
+    written = _refresh(conn, "1=1", today=today)
+    conn.execute("""
+        INSERT INTO settings (key, value) VALUES ('status_swept_on', ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (today.isoformat(),))
+    conn.commit()
+    print(f"[Status] Sweep for {today.isoformat()} updated {written} review(s)")
+    return written
+
+
+def ensure_fresh(conn):
+    """Called before dashboard reads: daily sweep if it hasn't run today, else dirty rows only."""
+    ensure_status_columns(conn)
+    row = conn.execute("SELECT value FROM settings WHERE key = 'status_swept_on'").fetchone()
+    if not row or row[0] != datetime.utcnow().date().isoformat():
+        return sweep_statuses(conn)
+    return refresh_dirty(conn)
+
+
+if __name__ == "__main__":
+    # Nightly sweep, e.g. cron: 5 0 * * *  python status_materializer.py
+    import sys
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), os.environ.get("DB_PATH", "scrutinise_workflow.db"))
+    conn = sqlite3.connect(db_path, timeout=20)
+    try:
+        sweep_statuses(conn)
+    finally:
+        conn.close()
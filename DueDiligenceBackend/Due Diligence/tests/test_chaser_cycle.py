@@ -0,0 +1,172 @@
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import status_materializer
+from chaser_cycle import DUE_MAP, ISSUED_MAP, status_week_rows
+
+TODAY = date(2026, 10, 14)   # a Wednesday: Mon/Tue are already past
+MONDAY = TODAY - timedelta(days=TODAY.weekday())
+
+DUE_COLUMNS = ["Chaser1DueDate", "Chaser2DueDate", "Chaser3DueDate", "NTCDueDate", "Outreach2DueDate"]
+ISSUED_COLUMNS = ["Chaser1IssuedDate", "Chaser2IssuedDate", "Chaser3IssuedDate", "NTCIssuedDate", "Outreach1Date"]
+STATUSES = ["7 Day Chaser Due", "14 Day Chaser Due", "21 Day Chaser Due", "NTC Due", "NTC - Due",
+            "chaser2_due", "Chaser Overdue", "Overdue", "Pending Review", "Outreach", "Completed", ""]
+
+
+def _old_template_grid(records, today):
+    """The status-driven loop the Ops MI / reviewer templates ran per review before chaser_cycle."""
+    STATUS_TO_COL = {
+        "chaser1_due": "7", "7 day chaser due": "7", "chaser1 due": "7",
+        "chaser2_due": "14", "14 day chaser due": "14", "chaser2 due": "14",
+        "chaser3_due": "21", "21 day chaser due": "21", "chaser3 due": "21",
+        "ntc_due": "NTC", "ntc due": "NTC", "ntc - due": "NTC",
+    }
+
+    def _coalesce_key(rec, keys):
+        for k in keys:
+            if k in rec and str(rec.get(k) or "").strip():
+                return k
+        return None
+
+    def _parse_date_any(s):
+        if not s:
+            return None
+        s = str(s).strip()
+        for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"):
+            try:
+                return datetime.strptime(s, fmt).date()
+            except Exception:
+                continue
+        return None
+
+    monday = today - timedelta(days=today.weekday())
+    week_days = [monday + timedelta(days=i) for i in range(5)]
+    headers = ["Overdue", "7", "14", "21", "NTC"]
+    rows = [{"date": d.strftime("%d/%m/%Y"), "iso": d.isoformat(), **{h: 0 for h in headers}} for d in week_days]
+    for rec in records:
+        low_status = (str(rec.get("status") or "")).strip().lower()
+        is_overdue = "overdue" in low_status
+        col = None
+        for key, mapped in STATUS_TO_COL.items():
+            if key in low_status:
+                col = mapped
+                break
+        if not col and not is_overdue:
+            continue
+        chosen_typ = None
+        due_date = None
+        for typ in (["7", "14", "21", "NTC"] if is_overdue else [col]):
+            k = _coalesce_key(rec, DUE_MAP.get(typ, []))
+            if not k:
+                continue
+            d = _parse_date_any(rec.get(k))
+            if d:
+                due_date = d
+                chosen_typ = typ
+                break
+        if not due_date:
+            continue
+        ik = _coalesce_key(rec, ISSUED_MAP.get(chosen_typ, []))
+        if ik and str(rec.get(ik) or "").strip():
+            continue
+        if not (week_days[0] <= due_date <= week_days[-1]):
+            continue
+        target = "Overdue" if (is_overdue and due_date < today and chosen_typ in ("7", "14", "21")) else chosen_typ
+        for row in rows:
+            if row["iso"] == due_date.isoformat():
+                row[target] += 1
+                break
+    return rows, headers
+
+
+def _make_db(path, records):
+    conn = sqlite3.connect(path)
+    cols = ["status", "assigned_to"] + DUE_COLUMNS + ISSUED_COLUMNS
+    conn.execute(f"CREATE TABLE reviews (id INTEGER PRIMARY KEY, {', '.join(f'{c} TEXT' for c in cols)})")
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, team_lead TEXT)")
+    conn.executemany("INSERT INTO users (id, team_lead) VALUES (?, ?)", [(7, "lead_a"), (8, "lead_a"), (9, "lead_b")])
+    conn.executemany(
+        f"INSERT INTO reviews ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+        [tuple(r.get(c) for c in cols) for r in records])
+    conn.commit()
+    return conn
+
+
+def _random_records(n, seed):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        rec = {"status": rng.choice(STATUSES), "assigned_to": rng.choice([7, 8, 9, None])}
+        for c in DUE_COLUMNS:
+            if rng.random() < 0.6:
+                d = MONDAY + timedelta(days=rng.randint(-4, 9))
+                rec[c] = rng.choice([d.isoformat(), d.strftime("%d/%m/%Y"), f"{d.isoformat()} 09:00:00", "n/a"])
+        for c in ISSUED_COLUMNS:
+            if rng.random() < 0.2:
+                rec[c] = rng.choice(["2026-10-01", "0", " "])
+        records.append(rec)
+    return records
+
+
+@pytest.fixture
+def records():
+    return _random_records(600, seed=4)
+
+
+@pytest.fixture
+def conn(tmp_path, records):
+    conn = _make_db(str(tmp_path / "reviews.db"), records)
+    yield conn
+    conn.close()
+
+
+def test_matches_old_template_grid(conn, records):
+    assert status_week_rows(conn, today=TODAY) == _old_template_grid(records, TODAY)
+
+
+def test_scoped_to_reviewers_and_team_lead(conn, records):
+    assert status_week_rows(conn, reviewer_ids=[7], today=TODAY) == \
+        _old_template_grid([r for r in records if r["assigned_to"] == 7], TODAY)
+    assert status_week_rows(conn, team_lead="lead_a", today=TODAY) == \
+        _old_template_grid([r for r in records if r["assigned_to"] in (7, 8)], TODAY)
+    rows, _ = status_week_rows(conn, reviewer_ids=[], today=TODAY)
+    assert all(row[h] == 0 for row in rows for h in ("Overdue", "7", "14", "21", "NTC"))
+
+
+def test_pinned_cells(tmp_path):
+    monday, tuesday, thursday = MONDAY, MONDAY + timedelta(days=1), MONDAY + timedelta(days=3)
+    conn = _make_db(str(tmp_path / "pinned.db"), [
+        {"status": "7 Day Chaser Due", "Chaser1DueDate": thursday.isoformat()},
+        {"status": "Chaser Overdue", "Chaser1DueDate": monday.strftime("%d/%m/%Y")},
+        # overdue status, but NTC stays in its own column
+        {"status": "Overdue", "NTCDueDate": tuesday.isoformat()},
+        # already issued, or a status the grid ignores
+        {"status": "14 Day Chaser Due", "Chaser2DueDate": thursday.isoformat(), "Chaser2IssuedDate": "n/a"},
+        {"status": "Pending Review", "Chaser1DueDate": thursday.isoformat()},
+        # status names the 14-day chaser: its due date comes from an alias column
+        {"status": "chaser2_due", "Outreach2DueDate": monday.isoformat()},
+    ])
+    rows, headers = status_week_rows(conn, today=TODAY)
+    assert headers == ["Overdue", "7", "14", "21", "NTC"]
+    grid = {row["iso"]: {h: row[h] for h in headers if row[h]} for row in rows}
+    assert grid == {
+        monday.isoformat(): {"Overdue": 1, "14": 1},
+        tuesday.isoformat(): {"NTC": 1},
+        (monday + timedelta(days=2)).isoformat(): {},
+        thursday.isoformat(): {"7": 1},
+        (monday + timedelta(days=4)).isoformat(): {},
+    }
+
+
+def test_grid_follows_review_writes(conn, records):
+    status_week_rows(conn, today=TODAY)   # materializes every row
+    conn.execute("UPDATE reviews SET status = '7 Day Chaser Due', Chaser1DueDate = ?, Chaser1IssuedDate = NULL,"
+                 " Outreach1Date = NULL", (MONDAY.isoformat(),))
+    conn.commit()
+    status_materializer.refresh_dirty(conn)
+    rows, _ = status_week_rows(conn, today=TODAY)
+    assert rows[0]["7"] == len(records)
+    assert sum(row[h] for row in rows for h in ("Overdue", "14", "21", "NTC")) == 0
@@ -0,0 +1,156 @@
+import sqlite3
+import time
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def _status(db_path, job_id):
+    return jobs.get_job(job_id, db_path)["status"]
+
+
+def test_workers_only_claim_their_own_kinds(db_path, monkeypatch):
+    # Two apps share one jobs.db, each with its own handlers
+    ran = []
+    dd_handlers = {"qc_sampling": lambda payload, progress: ran.append("qc_sampling")}
+    tx_handlers = {"tx_upload": lambda payload, progress: ran.append("tx_upload")}
+
+    monkeypatch.setattr(jobs, "_HANDLERS", dd_handlers)
+    dd_job = jobs.enqueue("qc_sampling", db_path=db_path)
+    monkeypatch.setattr(jobs, "_HANDLERS", tx_handlers)
+    tx_job = jobs.enqueue("tx_upload", db_path=db_path)
+
+    # The Transaction Review worker runs its job and leaves the other one queued
+    assert jobs.run_pending(db_path) == 1
+    assert ran == ["tx_upload"]
+    assert _status(db_path, tx_job) == "succeeded"
+    assert _status(db_path, dd_job) == "queued"
+    assert jobs.get_job(dd_job, db_path)["attempts"] == 0
+
+    monkeypatch.setattr(jobs, "_HANDLERS", dd_handlers)
+    assert jobs.run_pending(db_path) == 1
+    assert ran == ["tx_upload", "qc_sampling"]
+    assert _status(db_path, dd_job) == "succeeded"
+
+
+def _make_stale(db_path, job_id, attempts):
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        UPDATE jobs SET status = 'running', attempts = ?, heartbeat_at = datetime('now', '-1 hour')
+        WHERE id = ?
+    """, (attempts, job_id))
+    conn.commit()
+    conn.close()
+
+
+def test_stale_job_is_requeued_as_an_attempt(db_path, monkeypatch):
+    monkeypatch.setattr(jobs, "_HANDLERS", {"slow": lambda payload, progress: "done"})
+    job_id = jobs.enqueue("slow", max_attempts=2, db_path=db_path)
+    _make_stale(db_path, job_id, attempts=1)
+
+    assert jobs.run_pending(db_path) == 1
+    job = jobs.get_job(job_id, db_path)
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+
+
+def test_stale_job_fails_after_max_attempts(db_path, monkeypatch):
+    ran = []
+    monkeypatch.setattr(jobs, "_HANDLERS", {"slow": lambda payload, progress: ran.append(1)})
+    job_id = jobs.enqueue("slow", max_attempts=2, db_path=db_path)
+    _make_stale(db_path, job_id, attempts=2)
+
+    assert jobs.run_pending(db_path) == 0
+    assert ran == []
+    job = jobs.get_job(job_id, db_path)
+    assert job["status"] == "failed"
+    assert job["error"] == "Worker stopped responding"
+
+
+def test_heartbeat_runs_while_handler_is_busy(db_path, monkeypatch):
+    monkeypatch.setattr(jobs, "HEARTBEAT_SECONDS", 0.05)
+    seen = {}
+
+    def long_stage(payload, progress):
+        # No progress() calls: only the heartbeat thread can refresh heartbeat_at
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE jobs SET heartbeat_at = '2000-01-01 00:00:00' WHERE id = ?", (job_id,))
+        conn.commit()
+        time.sleep(0.5)
+        seen["heartbeat_at"] = conn.execute("SELECT heartbeat_at FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        conn.close()
+
+    monkeypatch.setattr(jobs, "_HANDLERS", {"long": long_stage})
+    job_id = jobs.enqueue("long", db_path=db_path)
+    assert jobs.run_pending(db_path) == 1
+    assert seen["heartbeat_at"] > "2000-01-01 00:00:00"
+    assert _status(db_path, job_id) == "succeeded"
+
+
+def _spooled(tmp_path, monkeypatch):
+    upload_dir = tmp_path / "job_uploads"
+    upload_dir.mkdir()
+    monkeypatch.setattr(jobs, "JOB_UPLOAD_DIR", str(upload_dir))
+    path = upload_dir / "tx_test.csv"
+    path.write_text("txn_id\n1\n")
+    return path
+
+
+def test_upload_kept_for_retry_and_removed_on_final_failure(db_path, tmp_path, monkeypatch):
+    path = _spooled(tmp_path, monkeypatch)
+
+    def broken(payload, progress):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(jobs, "_HANDLERS", {"upload": broken})
+    monkeypatch.setattr(jobs, "RETRY_BASE_SECONDS", 0)
+    job_id = jobs.enqueue("upload", {"path": str(path)}, max_attempts=2, db_path=db_path)
+
+    assert jobs.run_pending(db_path, max_jobs=1) == 1
+    assert _status(db_path, job_id) == "queued"
+    assert path.exists()
+
+    assert jobs.run_pending(db_path, max_jobs=1) == 1
+    assert _status(db_path, job_id) == "failed"
+    assert not path.exists()
+
+
+def test_upload_removed_when_queued_job_is_cancelled(db_path, tmp_path, monkeypatch):
+    path = _spooled(tmp_path, monkeypatch)
+    monkeypatch.setattr(jobs, "_HANDLERS", {"upload": lambda payload, progress: None})
+    job_id = jobs.enqueue("upload", {"path": str(path)}, db_path=db_path)
+
+    assert jobs.request_cancel(job_id, db_path)["status"] == "cancelled"
+    assert not path.exists()
+
+
+def test_upload_removed_when_running_job_is_cancelled(db_path, tmp_path, monkeypatch):
+    path = _spooled(tmp_path, monkeypatch)
+
+    def cancelled_midway(payload, progress):
+        jobs.request_cancel(job_id, db_path)
+        progress({"stage": "ingest"})
+
+    monkeypatch.setattr(jobs, "_HANDLERS", {"upload": cancelled_midway})
+    job_id = jobs.enqueue("upload", {"path": str(path)}, db_path=db_path)
+
+    assert jobs.run_pending(db_path) == 1
+    assert _status(db_path, job_id) == "cancelled"
+    assert not path.exists()
+
+
+def test_upload_removed_when_stale_job_runs_out_of_attempts(db_path, tmp_path, monkeypatch):
+    path = _spooled(tmp_path, monkeypatch)
+    monkeypatch.setattr(jobs, "_HANDLERS", {"upload": lambda payload, progress: None})
+    job_id = jobs.enqueue("upload", {"path": str(path)}, max_attempts=1, db_path=db_path)
+    _make_stale(db_path, job_id, attempts=1)
+
+    assert jobs.run_pending(db_path) == 0
+    assert _status(db_path, job_id) == "failed"
+    assert not path.exists()
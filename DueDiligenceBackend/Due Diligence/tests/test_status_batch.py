@@ -0,0 +1,105 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench_status import generate_reviews, same, scalar_columns
+from status_batch import derive_case_status_batch
+from utils import ReviewStatus, derive_case_status
+
+TODAY = dt.date.today()
+YESTERDAY = TODAY - dt.timedelta(days=1)
+TOMORROW = TODAY + dt.timedelta(days=1)
+
+
+def _batch_rows(result):
+    return list(result.itertuples(index=False, name=None))
+
+
+def _assert_equivalent(scalar, batch):
+    assert len(scalar) == len(batch)
+    bad = [(i, s, b) for i, (s, b) in enumerate(zip(scalar, _batch_rows(batch))) if not same(s, b)]
+    assert not bad, bad[:5]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("mix", ["realistic", "edge"])
+def test_row_dicts_match_scalar(seed, mix):
+    records = generate_reviews(2000, seed=seed, mix=mix)
+    _assert_equivalent(scalar_columns(records), derive_case_status_batch(records))
+
+
+@pytest.mark.parametrize("mix", ["realistic", "edge"])
+def test_dataframe_matches_scalar(mix):
+    # A DataFrame fills absent keys with NaN, which the scalar rules treat differently from None
+    df = pd.DataFrame(generate_reviews(3000, seed=7, mix=mix))
+    _assert_equivalent(scalar_columns(df.to_dict(orient="records")), derive_case_status_batch(df))
+
+
+def test_column_mapping_matches_scalar():
+    records = generate_reviews(500, seed=3, mix="edge")
+    keys = sorted({k for r in records for k in r})
+    columns = {k: [r.get(k) for r in records] for k in keys}
+    _assert_equivalent(scalar_columns(records), derive_case_status_batch(columns))
+
+
+def test_explicit_today_for_age_bucket():
+    records = generate_reviews(1000, seed=5)
+    today = TODAY + dt.timedelta(days=4)
+    expected = [age for _, _, age in scalar_columns(records, today=today)]
+    assert list(derive_case_status_batch(records, today=today)["age_bucket"]) == expected
+
+
+@pytest.mark.parametrize("rec,expected", [
+    ({}, ReviewStatus.UNASSIGNED),
+    ({"assigned_to": " 0 "}, ReviewStatus.UNASSIGNED),
+    ({"assigned_to": 5}, ReviewStatus.PENDING_REVIEW),
+    ({"assigned_to": 5, "status": "Referred to AI SME"}, ReviewStatus.REFERRED_TO_AI_SME),
+    ({"assigned_to": 5, "referred_to_sme": 3}, ReviewStatus.SME_REFERRED),
+    ({"sme_returned_date": str(TODAY), "InitialReviewCompleteDate": str(TODAY),
+      "Chaser1IssuedDate": str(TODAY)}, ReviewStatus.SME_RETURNED),
+    ({"date_completed": str(TODAY), "status": "QC - Rework Complete", "_in_qc_sampling": 1},
+     ReviewStatus.QC_WAITING_ASSIGNMENT),
+    ({"date_completed": str(TODAY), "qc_rework_required": 1}, ReviewStatus.QC_REWORK),
+    ({"date_completed": str(TODAY), "qc_rework_completed": float("nan")}, ReviewStatus.AWAITING_QC_REWORK),
+    ({"date_completed": str(TODAY), "qc_check_date": str(TODAY), "qc_outcome": "Fail",
+      "_in_qc_sampling": 1, "qc_assigned_to": 9}, ReviewStatus.QC_PENDING_REVIEW),
+    ({"date_completed": str(TODAY), "qc_check_date": str(TODAY), "qc_outcome": "Pass"}, ReviewStatus.COMPLETED),
+    ({"assigned_to": 5, "InitialReviewCompleteDate": YESTERDAY.strftime("%d/%m/%Y")}, ReviewStatus.IR_COMP),
+    ({"assigned_to": 5, "outreach_complete": "0"}, ReviewStatus.OUTREACH_COMPLETE),
+    ({"assigned_to": 5, "OutreachDate1": str(YESTERDAY)}, ReviewStatus.OUTREACH),
+    ({"assigned_to": 5, "Chaser2DueDate": f"{YESTERDAY}T09:00:00"}, ReviewStatus.CHASER2_DUE),
+    ({"assigned_to": 5, "Chaser2DueDate": str(TOMORROW)}, ReviewStatus.PENDING_REVIEW),
+    ({"assigned_to": 5, "NTCIssuedDate": str(YESTERDAY)}, ReviewStatus.RESTRICTIONS_DUE),
+])
+def test_status_branches(rec, expected):
+    assert derive_case_status(rec) == expected
+    assert derive_case_status_batch([rec])["status"][0] == expected.value
+
+
+def test_status_bucket_groups_ai_sme():
+    out = derive_case_status_batch([{"status": "Referred to AI SME"}, {}])
+    assert list(out["status_bucket"]) == [ReviewStatus.SME_REFERRED.value, ReviewStatus.UNASSIGNED.value]
+
+
+def test_result_keeps_dataframe_index():
+    df = pd.DataFrame({"assigned_to": [5, None]}, index=[10, 20])
+    out = derive_case_status_batch(df)
+    assert list(out.index) == [10, 20]
+    assert list(out["status"]) == [ReviewStatus.PENDING_REVIEW.value, ReviewStatus.UNASSIGNED.value]
+
+
+def test_numeric_and_datetime_columns():
+    df = pd.DataFrame({
+        "assigned_to": [5.0, np.nan, 0.0],
+        "date_completed": pd.to_datetime([None, str(TODAY), None]),
+        "updated_at": pd.to_datetime([str(YESTERDAY), None, None]),
+    })
+    _assert_equivalent(scalar_columns(df.to_dict(orient="records")), derive_case_status_batch(df))
+
+
+def test_empty_input():
+    out = derive_case_status_batch([])
+    assert list(out.columns) == ["status", "status_bucket", "age_bucket"]
+    assert out.empty
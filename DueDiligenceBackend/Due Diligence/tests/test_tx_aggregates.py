@@ -0,0 +1,49 @@
+import io
+import sqlite3
+
+import pytest
+
+import jobs
+from tx_aggregates import aggregates_built, monthly_flows
+from tx_review_ingest import ingest_transactions_csv
+
+LEDGER = """id,txn_date,customer_id,direction,amount,currency,base_amount,country_iso2,payer_sort_code,payee_sort_code,channel,narrative
+T1,2025-01-03,C1,in,500,GBP,500,GB,,,bank,salary
+T2,2025-01-20,C1,out,120,GBP,120,GB,,,cash,atm
+T3,2025-02-11,C1,out,80,GBP,80,GB,,,card,cash back
+T4,2025-02-14,C1,in,900,GBP,900,RU,,,bank,invoice
+T5,2025-03-01,C1,out,40,GBP,40,GB,,,cash,
+T6,2025-02-02,C2,in,75,GBP,75,GB,,,bank,gift
+"""
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "tx.db")
+    conn = sqlite3.connect(path)
+    ingest_transactions_csv(conn, io.StringIO(LEDGER), score=False)
+    # As on a database that has a ledger but has never built its aggregates
+    conn.execute("DELETE FROM tx_agg_state")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_monthly_flows_read_the_ledger_until_the_first_build(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DB", str(tmp_path / "jobs.db"))
+    conn = sqlite3.connect(db_path)
+    periods = [(None, None), ("2025-02-01", "2025-03-31")]
+    before = [monthly_flows(conn, c, *p) for c in ("C1", "C2", "C3") for p in periods]
+    assert [len(rows) for rows in before] == [5, 3, 1, 1, 0, 0]
+    assert conn.total_changes == 0 and not aggregates_built(conn)
+
+    # Startup queues one build, whatever the number of app processes
+    job_id = jobs.queue_tx_aggregates_build(db_path)
+    assert jobs.queue_tx_aggregates_build(db_path) == job_id
+    assert jobs.run_pending() == 1
+    assert jobs.get_job(job_id)["status"] == "succeeded"
+    assert aggregates_built(conn)
+    assert jobs.queue_tx_aggregates_build(db_path) is None
+
+    assert [monthly_flows(conn, c, *p) for c in ("C1", "C2", "C3") for p in periods] == before
+    conn.close()
@@ -0,0 +1,192 @@
+import io
+import json
+import random
+import sqlite3
+import statistics
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from tx_review_ingest import TX_COLUMNS, ingest_transactions_csv
+from tx_scoring import score_worklist
+
+COUNTRIES = {
+    "GB": {"iso2": "GB", "risk_level": "LOW", "score": 0, "prohibited": 0},
+    "IR": {"iso2": "IR", "risk_level": "PROHIBITED", "score": 100, "prohibited": 1},
+    "RU": {"iso2": "RU", "risk_level": "HIGH", "score": 70, "prohibited": 0},
+    "AE": {"iso2": "AE", "risk_level": "HIGH_3RD", "score": 50, "prohibited": 0},
+}
+EXPECTED = {f"C{i}": {"expected_monthly_in": 3000.0, "expected_monthly_out": 3000.0} for i in range(1, 6)}
+PARAMS = {
+    "on": {k: True for k in ("prohibited_country", "high_risk_corridor", "median_outlier", "nlp_risky_terms",
+                             "expected_out", "expected_in", "cash_daily_breach", "severity_mapping")},
+    "country_map": COUNTRIES,
+    "expected_map": EXPECTED,
+    "high_risk_min_amount": 100.0,
+    "median_mult": 3.0,
+    "exp_out_factor": 1.2,
+    "exp_in_factor": 1.2,
+    "enabled_terms": ["crypto", "gift"],
+    "cash_daily_limit": 1500.0,
+    "sev_crit": 90, "sev_high": 70, "sev_med": 50, "sev_low": 30,
+}
+# Well-spaced amounts: no median x3 lands within the median sketch's 0.5% of one
+AMOUNTS = [50, 100, 200, 400, 800, 5000]
+MONTHS = ["2025-01", "2025-02", "2025-03"]
+
+
+def _per_row_alerts(conn, params, alerted):
+    """The per-row engine score_new_transactions ran before tx_scoring, minus the inserts."""
+    on = params["on"]
+    country_map, expected_map = params["country_map"], params["expected_map"]
+    txns = [dict(r) for r in conn.execute("SELECT * FROM transactions ORDER BY txn_date")]
+    per_key = defaultdict(list)
+    for t in txns:
+        per_key[(t["customer_id"], t["direction"])].append(t["base_amount"])
+    cust_medians = {k: statistics.median(v) for k, v in per_key.items()}
+
+    def month_total(cid, direction, start, end):
+        return sum(t["base_amount"] for t in txns
+                   if t["customer_id"] == cid and t["direction"] == direction and start <= t["txn_date"] <= end)
+
+    def cash_total(cid, day):
+        return sum(t["base_amount"] for t in txns
+                   if t["customer_id"] == cid and t["txn_date"] == day
+                   and ((t["channel"] or "").lower() == "cash" or "cash" in (t["narrative"] or "").lower()))
+
+    out = {}
+    for t in txns:
+        if t["id"] in alerted:
+            continue
+        tags, score, severity = [], 0, "INFO"
+        chan, narrative = (t["channel"] or "").lower(), (t["narrative"] or "")
+        d = date.fromisoformat(t["txn_date"])
+        month_start = d.replace(day=1).isoformat()
+        month_end = ((d.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)).isoformat()
+        exp = expected_map.get(t["customer_id"], {"expected_monthly_in": 0, "expected_monthly_out": 0})
+        med = float(cust_medians.get((t["customer_id"], t["direction"]), 0.0))
+
+        c = country_map.get(t["country_iso2"] or "")
+        if on["prohibited_country"] and c and c["prohibited"]:
+            tags.append("PROHIBITED_COUNTRY")
+            score += 100
+        elif (on["high_risk_corridor"] and c and c["risk_level"] in ("HIGH_3RD", "HIGH")
+              and float(t["base_amount"]) >= params["high_risk_min_amount"]):
+            tags.append("HIGH_RISK_COUNTRY")
+            score += int(c["score"])
+        limit = float(params["cash_daily_limit"])
+        if on["cash_daily_breach"] and limit > 0 and (chan == "cash" or "cash" in narrative.lower()):
+            if cash_total(t["customer_id"], t["txn_date"]) > limit:
+                tags.append("CASH_DAILY_BREACH")
+                score += 20
+        if on["median_outlier"] and med > 0 and float(t["base_amount"]) > med * params["median_mult"]:
+            tags.append("HISTORICAL_DEVIATION")
+            score += 25
+        if on["nlp_risky_terms"] and any(term in narrative.lower() for term in params["enabled_terms"]):
+            tags.append("NLP_RISK")
+            score += 10
+        if on["expected_out"] and t["direction"] == "out" and exp["expected_monthly_out"] > 0:
+            if month_total(t["customer_id"], "out", month_start, month_end) > \
+                    exp["expected_monthly_out"] * params["exp_out_factor"]:
+                tags.append("EXPECTED_BREACH_OUT")
+                score += 20
+        if on["expected_in"] and t["direction"] == "in" and exp["expected_monthly_in"] > 0:
+            if month_total(t["customer_id"], "in", month_start, month_end) > \
+                    exp["expected_monthly_in"] * params["exp_in_factor"]:
+                tags.append("EXPECTED_BREACH_IN")
+                score += 15
+        if on["severity_mapping"]:
+            if "PROHIBITED_COUNTRY" in tags or score >= params["sev_crit"]:
+                severity = "CRITICAL"
+            elif score >= params["sev_high"]:
+                severity = "HIGH"
+            elif score >= params["sev_med"]:
+                severity = "MEDIUM"
+            elif score >= params["sev_low"]:
+                severity = "LOW"
+        if tags:
+            out[t["id"]] = (tags, min(score, 100), severity)
+    return out
+
+
+def _alerts(conn):
+    return {r[0]: (json.loads(r[1]), r[2], r[3])
+            for r in conn.execute("SELECT txn_id, rule_tags, score, severity FROM alerts")}
+
+
+def _upload(conn, rows):
+    df = pd.DataFrame(rows)
+    for col in TX_COLUMNS:
+        if col not in df:
+            df[col] = ""
+    df["amount"] = df["base_amount"]
+    df["currency"] = "GBP"
+    ingest_transactions_csv(conn, io.StringIO(df[TX_COLUMNS].to_csv(index=False)), score=False)
+
+
+def _txn(txn_id, customer_id, day, direction, amount, country="GB", channel="bank", narrative="invoice"):
+    return {"id": txn_id, "txn_date": day, "customer_id": customer_id, "direction": direction,
+            "base_amount": amount, "country_iso2": country, "channel": channel, "narrative": narrative}
+
+
+def _random_rows(rng, customers, months, start, per_month):
+    rows = []
+    for cid in customers:
+        for ym in months:
+            for _ in range(rng.randint(1, per_month)):
+                rows.append(_txn(
+                    f"T{start + len(rows)}", cid, f"{ym}-{rng.randint(1, 28):02d}",
+                    rng.choice(["in", "out"]), rng.choice(AMOUNTS),
+                    country=rng.choice(["GB", "GB", "GB", "IR", "RU", "AE", "FR", ""]),
+                    channel=rng.choice(["bank", "card", "cash"]),
+                    narrative=rng.choice(["invoice", "rent", "cash deposit", "gift", "crypto otc", ""])))
+    return rows
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "tx.db"))
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE config_versions(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("slice_rows", [None, 7])
+def test_matches_per_row_engine(conn, slice_rows):
+    rng = random.Random(3)
+    customers = [f"C{i}" for i in range(1, 9)]   # C6-C8 have no KYC profile
+    _upload(conn, _random_rows(rng, customers, MONTHS, 0, 6))
+    expected = _per_row_alerts(conn, PARAMS, alerted=set())
+    score_worklist(conn, PARAMS, slice_rows=slice_rows)
+    assert _alerts(conn) == expected
+
+    # Second upload lands in every month of the customers it touches, so the
+    # per-row engine's re-evaluation of the whole ledger only moves those rows.
+    first_ids = {r[0] for r in conn.execute("SELECT id FROM transactions")}
+    _upload(conn, _random_rows(rng, customers[::2], MONTHS, 10_000, 4))
+    late = _per_row_alerts(conn, PARAMS, alerted=set(expected))
+    expected.update(late)
+    score_worklist(conn, PARAMS, slice_rows=slice_rows)
+    assert _alerts(conn) == expected
+    assert first_ids & set(late), "no earlier row was re-evaluated into an alert"
+
+
+def test_later_rows_re_evaluate_earlier_non_alerting_rows(conn):
+    _upload(conn, [
+        _txn("a", "C1", "2025-03-02", "out", 1000),
+        _txn("b", "C1", "2025-03-09", "out", 1000),
+        _txn("c", "C1", "2025-04-01", "out", 1000),
+    ])
+    assert score_worklist(conn, PARAMS) == {"scored": 3, "alerts": 0}
+
+    # March outflows now total 4,000 against 3,000 x 1.2 expected
+    _upload(conn, [_txn("d", "C1", "2025-03-20", "out", 2000)])
+    assert score_worklist(conn, PARAMS) == {"scored": 3, "alerts": 3}
+    assert _alerts(conn) == {t: (["EXPECTED_BREACH_OUT"], 20, "INFO") for t in ("a", "b", "d")}
+
+    # Nothing left to score, and April was never revisited
+    assert score_worklist(conn, PARAMS) == {"scored": 0, "alerts": 0}
@@ -0,0 +1,333 @@
+"""
+Transaction Review Rolling Aggregates
+Maintained per-customer flow tables so the scorer and dashboards read
+O(customers x months) rows instead of scanning the transactions ledger.
+
+Tables:
+  tx_agg_month  - customer x month x direction: count, total, cash (channel) total, max
+  tx_agg_day    - customer x day x cash flag: count, total (cash flag = channel or
+                  narrative mentions cash, as used by the cash daily breach rule)
+  tx_agg_median - customer x direction log-bucket histogram (median sketch)
+
+Updated incrementally by ingest_transactions_csv(); rebuild_aggregates()
+recreates everything from the ledger on demand. The first build runs in the
+job worker (jobs.tx_aggregates_job, queued at app startup) or on the first
+upload/scoring run, never in a dashboard request: readers only check
+aggregates_built().
+"""
+import math
+import sqlite3
+import numpy as np
+import pandas as pd
+
+
+# Median sketch: log buckets with 0.5% relative accuracy (DDSketch-style)
+SKETCH_ALPHA = 0.005
+SKETCH_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+SKETCH_LOG_GAMMA = math.log(SKETCH_GAMMA)
+SKETCH_ZERO_BUCKET = -(2 ** 31)  # amounts <= 0
+
+_MONTH_COLS = """
+    t.customer_id, substr(t.txn_date, 1, 7), t.direction,
+    COUNT(*), SUM(t.base_amount),
+    SUM(CASE WHEN lower(IFNULL(t.channel,''))='cash' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN lower(IFNULL(t.channel,''))='cash' THEN t.base_amount ELSE 0 END),
+    MAX(t.base_amount)
+"""
+
+_DAY_COLS = """
+    t.customer_id, t.txn_date,
+    CASE WHEN lower(IFNULL(t.channel,''))='cash' OR instr(lower(IFNULL(t.narrative,'')),'cash')>0
+         THEN 1 ELSE 0 END AS is_cash,
+    COUNT(*), SUM(t.base_amount)
+"""
+
+
+def ensure_aggregate_tables(conn):
+    """Create the aggregate tables; build them from the ledger on first use"""
+    _create_aggregate_tables(conn)
+    if not aggregates_built(conn):
+        rebuild_aggregates(conn)
+
+
+def aggregates_built(conn):
+    """Whether the aggregates have been built from the ledger (read-only check)"""
+    try:
+        return conn.execute("SELECT 1 FROM tx_agg_state WHERE key='built_at'").fetchone() is not None
+    except sqlite3.OperationalError:
+        return False
+
+
+def _create_aggregate_tables(conn):
+    """Create the (empty) aggregate tables"""
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tx_agg_month(
+            customer_id TEXT NOT NULL,
+            ym TEXT NOT NULL,
+            direction TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            cash_n INTEGER NOT NULL DEFAULT 0,
+            cash_total REAL NOT NULL DEFAULT 0,
+            max_amount REAL,
+            PRIMARY KEY(customer_id, ym, direction)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tx_agg_day(
+            customer_id TEXT NOT NULL,
+            txn_date TEXT NOT NULL,
+            is_cash INTEGER NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY(customer_id, txn_date, is_cash)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tx_agg_median(
+            customer_id TEXT NOT NULL,
+            direction TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY(customer_id, direction, bucket)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tx_agg_state(
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+# ---------- Median sketch ----------
+def sketch_bucket(amounts):
+    """Map amounts to sketch bucket indices (vectorized)"""
+    a = np.asarray(amounts, dtype=float)
+    out = np.full(a.shape, SKETCH_ZERO_BUCKET, dtype=np.int64)
+    pos = a > 0
+    out[pos] = np.ceil(np.log(a[pos]) / SKETCH_LOG_GAMMA).astype(np.int64)
+    return out
+
+
+def sketch_value(buckets):
+    """Representative amount for sketch bucket indices (vectorized)"""
+    b = np.asarray(buckets, dtype=np.int64)
+    out = np.zeros(b.shape, dtype=float)
+    pos = b != SKETCH_ZERO_BUCKET
+    out[pos] = 2 * np.power(SKETCH_GAMMA, b[pos].astype(float)) / (SKETCH_GAMMA + 1)
+    return out
+
+
+def _apply_sketch_delta(conn, rows, sign):
+    """Add (sign=1) or retract (sign=-1) rows[customer_id, direction, base_amount] from the sketch"""
+    if rows is None or rows.empty:
+        return
+    df = pd.DataFrame({
+        "customer_id": rows["customer_id"].astype(str).to_numpy(),
+        "direction": rows["direction"].astype(str).to_numpy(),
+        "bucket": sketch_bucket(rows["base_amount"].fillna(0.0)),
+    })
+    counts = df.groupby(["customer_id", "direction", "bucket"]).size().reset_index(name="n")
+    conn.executemany(
+        """INSERT INTO tx_agg_median(customer_id, direction, bucket, n) VALUES(?,?,?,?)
+           ON CONFLICT(customer_id, direction, bucket) DO UPDATE SET n = n + excluded.n""",
+        [(c, d, int(b), int(n) * sign) for c, d, b, n in counts.itertuples(index=False)]
+    )
+    if sign < 0:
+        conn.execute("DELETE FROM tx_agg_median WHERE n <= 0")
+
+
+def sketch_medians(sketch):
+    """
+    Median per customer/direction from sketch rows [customer_id, direction, bucket, n].
+    Matches statistics.median (mean of the two middle ranks) up to bucket accuracy.
+    """
+    if sketch.empty:
+        return pd.DataFrame(columns=["customer_id", "direction", "median"])
+    keys = ["customer_id", "direction"]
+    s = sketch.sort_values(keys + ["bucket"]).reset_index(drop=True)
+    s["cum"] = s.groupby(keys)["n"].cumsum()
+    s["tot"] = s.groupby(keys)["n"].transform("sum")
+    s["value"] = sketch_value(s["bucket"])
+    prev = s["cum"] - s["n"]
+
+    def _at(rank):
+        hit = s[(prev <= rank) & (s["cum"] > rank)]
+        return hit.set_index(keys)["value"]
+
+    lo = _at((s["tot"] - 1) // 2)
+    hi = _at(s["tot"] // 2)
+    return ((lo + hi) / 2).rename("median").reset_index()
+
+
+# ---------- Maintenance ----------
+def capture_replaced(conn, txn_ids):
+    """Existing ledger rows about to be overwritten by an upsert of txn_ids"""
+    ids = [str(i) for i in txn_ids]
+    frames = []
+    for i in range(0, len(ids), 500):
+        part = ids[i:i + 500]
+        frames.append(pd.read_sql_query(
+            f"SELECT id, customer_id, direction, base_amount, txn_date FROM transactions "
+            f"WHERE id IN ({','.join('?' * len(part))})",
+            conn, params=part))
+    if not frames:
+        return pd.DataFrame(columns=["id", "customer_id", "direction", "base_amount", "txn_date"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _refresh_months(conn, keys):
+    """Recompute month and day aggregates for (customer_id, ym) keys from the ledger"""
+    if keys.empty:
+        return
+    conn.execute("DROP TABLE IF EXISTS temp._tx_agg_keys")
+    conn.execute("CREATE TEMP TABLE _tx_agg_keys(customer_id TEXT NOT NULL, ym TEXT NOT NULL)")
+    conn.executemany(
+        "INSERT INTO temp._tx_agg_keys(customer_id, ym) VALUES(?,?)",
+        [(str(c), str(ym)) for c, ym in keys.itertuples(index=False)]
+    )
+    conn.executemany(
+        "DELETE FROM tx_agg_month WHERE customer_id = ? AND ym = ?",
+        [(str(c), str(ym)) for c, ym in keys.itertuples(index=False)]
+    )
+    conn.executemany(
+        "DELETE FROM tx_agg_day WHERE customer_id = ? AND txn_date BETWEEN ? AND ?",
+        [(str(c), f"{ym}-01", f"{ym}-31") for c, ym in keys.itertuples(index=False)]
+    )
+    conn.execute(f"""
+        INSERT INTO tx_agg_month(customer_id, ym, direction, n, total, cash_n, cash_total, max_amount)
+        SELECT {_MONTH_COLS}
+        FROM temp._tx_agg_keys k
+        JOIN transactions t ON t.customer_id = k.customer_id
+                           AND t.txn_date BETWEEN k.ym || '-01' AND k.ym || '-31'
+        GROUP BY t.customer_id, substr(t.txn_date, 1, 7), t.direction
+    """)
+    conn.execute(f"""
+        INSERT INTO tx_agg_day(customer_id, txn_date, is_cash, n, total)
+        SELECT {_DAY_COLS}
+        FROM temp._tx_agg_keys k
+        JOIN transactions t ON t.customer_id = k.customer_id
+                           AND t.txn_date BETWEEN k.ym || '-01' AND k.ym || '-31'
+        GROUP BY t.customer_id, t.txn_date, is_cash
+    """)
+    conn.execute("DROP TABLE IF EXISTS temp._tx_agg_keys")
+
+
+def apply_ingested(conn, new_rows, replaced=None):
+    """
+    Fold a freshly upserted batch into the aggregates (call after the INSERT,
+    before commit). new_rows/replaced need customer_id, direction, base_amount,
+    txn_date; replaced is the output of capture_replaced() taken before the insert.
+    """
+    frames = [new_rows[["customer_id", "txn_date"]]]
+    if replaced is not None and not replaced.empty:
+        frames.append(replaced[["customer_id", "txn_date"]])
+    touched = pd.concat(frames, ignore_index=True)
+    keys = pd.DataFrame({
+        "customer_id": touched["customer_id"].astype(str),
+        "ym": touched["txn_date"].astype(str).str[:7],
+    }).drop_duplicates()
+    _refresh_months(conn, keys)
+    _apply_sketch_delta(conn, replaced, -1)
+    _apply_sketch_delta(conn, new_rows, 1)
+
+
+def rebuild_aggregates(conn, chunksize=100_000):
+    """Recreate all aggregate tables from the transactions ledger"""
+    cur = conn.cursor()
+    has_ledger = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='transactions'").fetchone()
+    cur.execute("DELETE FROM tx_agg_month")
+    cur.execute("DELETE FROM tx_agg_day")
+    cur.execute("DELETE FROM tx_agg_median")
+    if has_ledger:
+        cur.execute(f"""
+            INSERT INTO tx_agg_month(customer_id, ym, direction, n, total, cash_n, cash_total, max_amount)
+            SELECT {_MONTH_COLS}
+            FROM transactions t
+            GROUP BY t.customer_id, substr(t.txn_date, 1, 7), t.direction
+        """)
+        cur.execute(f"""
+            INSERT INTO tx_agg_day(customer_id, txn_date, is_cash, n, total)
+            SELECT {_DAY_COLS}
+            FROM transactions t
+            GROUP BY t.customer_id, t.txn_date, is_cash
+        """)
+        for chunk in pd.read_sql_query(
+            "SELECT customer_id, direction, base_amount FROM transactions", conn, chunksize=chunksize
+        ):
+            _apply_sketch_delta(conn, chunk, 1)
+    cur.execute("""
+        INSERT INTO tx_agg_state(key, value) VALUES('built_at', CURRENT_TIMESTAMP)
+        ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=CURRENT_TIMESTAMP
+    """)
+    conn.commit()
+
+
+def clear_aggregates(conn):
+    """Empty the aggregates (e.g. after the ledger is wiped)"""
+    for table in ("tx_agg_month", "tx_agg_day", "tx_agg_median"):
+        try:
+            conn.execute(f"DELETE FROM {table}")
+        except Exception:
+            pass
+
+
+# ---------- Readers ----------
+def monthly_flows(conn, customer_id, start=None, end=None):
+    """
+    Monthly in/out rows for one customer from tx_agg_month, optionally limited to
+    the months overlapping [start, end] (ISO dates). Ordered by month. Until the
+    first build has run, the same rows are grouped from this customer's ledger rows.
+    """
+    cols = "ym, direction, n, total, cash_n, cash_total, max_amount"
+    built = aggregates_built(conn)
+    if built:
+        sql, ym = f"SELECT {cols} FROM tx_agg_month WHERE customer_id = ?", "ym"
+    else:
+        sql, ym = f"SELECT {_MONTH_COLS} FROM transactions t WHERE t.customer_id = ?", "substr(t.txn_date, 1, 7)"
+    params = [customer_id]
+    if start and end:
+        sql += f" AND {ym} BETWEEN ? AND ?"
+        params += [start[:7], end[:7]]
+    if not built:
+        sql = (f"WITH g(customer_id, {cols}) AS ("
+               f"{sql} GROUP BY t.customer_id, substr(t.txn_date, 1, 7), t.direction"
+               f") SELECT {cols} FROM g")
+    cur = conn.execute(sql + " ORDER BY ym", params)
+    cols = [c[0] for c in cur.description]
+    return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+
+def summarize_flows(rows):
+    """Collapse monthly_flows() rows into dashboard tile/metric values and a monthly trend"""
+    s = {"total_in": 0.0, "total_out": 0.0, "cash_in": 0.0, "cash_out": 0.0,
+         "n_in": 0, "n_out": 0, "cash_n_in": 0, "cash_n_out": 0,
+         "max_in": None, "max_out": None}
+    trend = {}
+    for r in rows:
+        d = "in" if r["direction"] == "in" else "out"
+        total = float(r["total"] or 0)
+        s[f"total_{d}"] += total
+        s[f"cash_{d}"] += float(r["cash_total"] or 0)
+        s[f"n_{d}"] += int(r["n"] or 0)
+        s[f"cash_n_{d}"] += int(r["cash_n"] or 0)
+        if r["max_amount"] is not None:
+            cur_max = s[f"max_{d}"]
+            s[f"max_{d}"] = max(float(r["max_amount"]), cur_max) if cur_max is not None else float(r["max_amount"])
+        t = trend.setdefault(r["ym"], {"in": 0.0, "out": 0.0})
+        t[d] += total
+    s["total_tx"] = s["n_in"] + s["n_out"]
+    s["avg_in"] = (s["total_in"] / s["n_in"]) if s["n_in"] else 0.0
+    s["avg_out"] = (s["total_out"] / s["n_out"]) if s["n_out"] else 0.0
+    s["avg_cash_in"] = (s["cash_in"] / s["cash_n_in"]) if s["cash_n_in"] else 0.0
+    s["avg_cash_out"] = (s["cash_out"] / s["cash_n_out"]) if s["cash_n_out"] else 0.0
+    s["max_in"] = s["max_in"] or 0.0
+    s["max_out"] = s["max_out"] or 0.0
+    s["trend_labels"] = sorted(trend)
+    s["trend_in"] = [trend[k]["in"] for k in s["trend_labels"]]
+    s["trend_out"] = [trend[k]["out"] for k in s["trend_labels"]]
+    return s
@@ -6,8 +6,9 @@ import sqlite3
 import json
 import pandas as pd
 from datetime import datetime, timedelta, date
-from collections import defaultdict
-import statistics
+
+from tx_scoring import score_worklist, forget_scored
+from tx_aggregates import ensure_aggregate_tables, capture_replaced, apply_ingested
 
 
 def _excel_serial_to_date(n):
@@ -186,28 +187,101 @@ def _risky_terms_enabled(conn):
     return [t.get("term") for t in terms if isinstance(t, dict) and t.get("enabled")]
 
 
-def ingest_transactions_csv(conn, fobj):
+TX_COLUMNS = [
+    "id", "txn_date", "customer_id", "direction", "amount", "currency", "base_amount",
+    "country_iso2", "payer_sort_code", "payee_sort_code", "channel", "narrative"
+]
+
+# Rows per chunk for streaming ingest; bounds worker memory regardless of file size
+INGEST_CHUNK_ROWS = 50_000
+
+# Candidate formats for column-level inference; earlier entries win ties
+# (so ambiguous 01/02/2025 stays day-first, as in _coerce_date)
+DATE_FORMATS = [
+    "%d/%m/%Y", "%Y-%m-%d", "%m/%d/%Y",
+    "%d-%m-%Y", "%Y/%m/%d",
+    "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M",
+]
+EXCEL_SERIAL = "excel-serial"
+_EXCEL_ORIGIN = pd.Timestamp(1899, 12, 30)
+_EXCEL_MAX = 2958466  # 9999-12-31
+
+
+def _excel_serial_column(series):
+    """Vectorized Excel serial -> Timestamp (NaT where not a positive serial)"""
+    n = pd.to_numeric(series, errors="coerce")
+    n = n.where((n >= 1) & (n < _EXCEL_MAX))
+    return _EXCEL_ORIGIN + pd.to_timedelta(n.floordiv(1), unit="D")
+
+
+def _parse_with(series, fmt):
+    if fmt == EXCEL_SERIAL:
+        return _excel_serial_column(series)
+    return pd.to_datetime(series.astype(str).str.strip(), format=fmt, errors="coerce")
+
+
+def infer_date_format(series, sample_size=500):
     """
-    Ingest transactions from CSV file
-    Returns: (count_inserted, count_skipped_bad_dates)
+    Infer the dominant date format of a column from a sample of its non-blank
+    values: one of DATE_FORMATS, EXCEL_SERIAL, or None if nothing matches.
     """
-    # --- load & validate columns --------------------------------------------
-    df = pd.read_csv(fobj)
+    sample = series.dropna().astype(str).str.strip()
+    sample = sample[~sample.str.lower().isin(["", "nan", "none", "null"])].head(sample_size)
+    if sample.empty:
+        return None
+    best, best_hits = None, 0
+    for fmt in [EXCEL_SERIAL] + DATE_FORMATS:
+        hits = int(_parse_with(sample, fmt).notna().sum())
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+    return best
 
-    needed = {
-        "id", "txn_date", "customer_id", "direction", "amount", "currency", "base_amount",
-        "country_iso2", "payer_sort_code", "payee_sort_code", "channel", "narrative"
-    }
-    missing = needed - set(map(str, df.columns))
-    if missing:
-        raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
 
-    # --- txn_date robust parsing (no warnings, no mass failure) -------------
-    df["txn_date"] = df["txn_date"].apply(_coerce_date)
-    bad_dates = df["txn_date"].isna().sum()
+def parse_date_column(series, fmt=None):
+    """
+    Parse a whole column of dates in one vectorized call.
+
+    fmt is the format inferred for an earlier chunk of the same upload (the
+    inference cache); it is inferred here when missing or when it no longer
+    matches most of the column. Cells the format can't parse fall back to
+    per-cell _coerce_date.
+
+    Returns: (Series of datetime.date or None, rejected_count, fmt_used)
+    """
+    blank = series.isna() | series.astype(str).str.strip().str.lower().isin(["", "nan", "none", "null"])
+    if fmt is None:
+        fmt = infer_date_format(series)
+    parsed = _parse_with(series, fmt) if fmt else pd.Series(pd.NaT, index=series.index)
+    ok = parsed.notna()
+
+    # Format drift (e.g. a different export appended): re-infer once for this column
+    n_values = int((~blank).sum())
+    if n_values and int(ok.sum()) * 2 < n_values:
+        refit = infer_date_format(series)
+        if refit and refit != fmt:
+            fmt = refit
+            parsed = _parse_with(series, fmt)
+            ok = parsed.notna()
+
+    out = pd.Series([None] * len(series), index=series.index, dtype=object)
+    out[ok] = parsed[ok].dt.date
+    residual = ~ok & ~blank
+    if residual.any():
+        out[residual] = series[residual].apply(_coerce_date)
+    rejected = int(out.isna().sum())
+    return out, rejected, fmt
+
+
+def _normalize_chunk(df, date_fmt):
+    """
+    Validate and normalize one chunk.
+    Returns (clean_df, bad_date_count, date_fmt) - date_fmt is carried to the next chunk.
+    """
+    # --- txn_date: vectorized parse with the cached format ------------------
+    df["txn_date"], bad_dates, date_fmt = parse_date_column(df["txn_date"], date_fmt)
     if bad_dates:
         # Drop rows with unparseable txn_date
-        df = df[df["txn_date"].notna()]
+        df = df[df["txn_date"].notna()].copy()
 
     # --- normalize text-ish fields ------------------------------------------
     df["direction"] = df["direction"].astype(str).str.lower().str.strip()
@@ -240,9 +314,16 @@ def ingest_transactions_csv(conn, fobj):
     df["amount"] = df["amount"].fillna(0.0)
     df["base_amount"] = df["base_amount"].fillna(0.0)
 
-    # --- ensure transactions table exists ----------------------------------
-    cur = conn.cursor()
-    cur.execute("""
+    # --- stringify keys; last occurrence of a repeated id wins --------------
+    df["id"] = df["id"].astype(str)
+    df["customer_id"] = df["customer_id"].astype(str)
+    df["txn_date"] = df["txn_date"].astype(str)
+    df = df.drop_duplicates(subset="id", keep="last")
+    return df, bad_dates, date_fmt
+
+
+def _ensure_transactions_table(conn):
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS transactions(
             id TEXT PRIMARY KEY,
             txn_date DATE NOT NULL,
@@ -261,44 +342,90 @@ def ingest_transactions_csv(conn, fobj):
     """)
     conn.commit()
 
-    # --- insert --------------------------------------------------------------
-    recs = df.to_dict(orient="records")
-    n_inserted = 0
-    for r in recs:
-        cur.execute(
-            """INSERT OR REPLACE INTO transactions
-               (id, txn_date, customer_id, direction, amount, currency, base_amount, country_iso2,
-                payer_sort_code, payee_sort_code, channel, narrative)
-               VALUES(?,?,?,?,?,?,?,?,?,?,?,?)""",
-            (
-                str(r["id"]),
-                str(r["txn_date"]),  # now a real date
-                str(r["customer_id"]),
-                str(r["direction"]),
-                float(r["amount"]),  # not null
-                str(r.get("currency", "GBP")),
-                float(r["base_amount"]),  # not null
-                (str(r["country_iso2"]) if r.get("country_iso2") else None),
-                (str(r["payer_sort_code"]) if r.get("payer_sort_code") else None),
-                (str(r["payee_sort_code"]) if r.get("payee_sort_code") else None),
-                (str(r["channel"]) if r.get("channel") else None),
-                (str(r["narrative"]) if r.get("narrative") else None),
-            )
+
+def _load_chunk(conn, df):
+    """Bulk-upsert one normalized chunk and fold it into the aggregates (no commit)"""
+    replaced = capture_replaced(conn, df["id"])
+    rows = [
+        (
+            r.id, r.txn_date, r.customer_id, r.direction,
+            float(r.amount), str(r.currency), float(r.base_amount),
+            (str(r.country_iso2) if r.country_iso2 else None),
+            (str(r.payer_sort_code) if r.payer_sort_code else None),
+            (str(r.payee_sort_code) if r.payee_sort_code else None),
+            (str(r.channel) if r.channel else None),
+            (str(r.narrative) if r.narrative else None),
         )
-        n_inserted += 1
+        for r in df[TX_COLUMNS].itertuples(index=False)
+    ]
+    conn.executemany(
+        """INSERT OR REPLACE INTO transactions
+           (id, txn_date, customer_id, direction, amount, currency, base_amount, country_iso2,
+            payer_sort_code, payee_sort_code, channel, narrative)
+           VALUES(?,?,?,?,?,?,?,?,?,?,?,?)""",
+        rows
+    )
+    # Fold the chunk into the rolling aggregates; re-loaded ids must be scored again
+    apply_ingested(conn, df[["customer_id", "direction", "base_amount", "txn_date"]], replaced)
+    forget_scored(conn, df["id"])
+    return len(rows)
+
+
+def ingest_transactions_csv(conn, fobj, chunksize=INGEST_CHUNK_ROWS, progress=None, score=True):
+    """
+    Ingest transactions from CSV file, streaming it in bounded chunks.
+
+    Each chunk is parsed (dates vectorized via parse_date_column, reusing the
+    format inferred for earlier chunks), bulk-loaded with executemany and folded into the aggregates;
+    the whole file is committed as one transaction, then scored.
+
+    progress: optional callable receiving {"rows", "chunks", "bad_dates", "bytes"}
+              after each chunk.
+    Returns: (count_inserted, count_skipped_bad_dates)
+    """
+    _ensure_transactions_table(conn)
+    # Aggregates must exist before the insert so a first-time build doesn't
+    # count this batch twice.
+    ensure_aggregate_tables(conn)
+
+    n_inserted, bad_dates, n_chunks = 0, 0, 0
+    date_fmt = None
+    try:
+        for chunk in pd.read_csv(fobj, chunksize=chunksize):
+            if n_chunks == 0:
+                # --- validate columns once ----------------------------------
+                missing = set(TX_COLUMNS) - set(map(str, chunk.columns))
+                if missing:
+                    raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+
+            df, bad, date_fmt = _normalize_chunk(chunk, date_fmt)
+            bad_dates += bad
+            n_inserted += _load_chunk(conn, df)
+            n_chunks += 1
+
+            if progress:
+                try:
+                    pos = fobj.tell()
+                except Exception:
+                    pos = None
+                progress({"rows": n_inserted, "chunks": n_chunks, "bad_dates": bad_dates, "bytes": pos})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
 
-    conn.commit()
-    
     # Score new transactions
-    score_new_transactions(conn)
+    if score:
+        score_new_transactions(conn)
 
     return n_inserted, bad_dates
 
 
 def score_new_transactions(conn):
     """
-    Score transactions that don't have alerts yet
+    Score transactions that haven't been scored yet
     Creates alerts based on configured rules
+    Returns: {"scored": n, "alerts": n}
     """
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
@@ -354,121 +481,23 @@ def score_new_transactions(conn):
         "severity_mapping": _tx_cfg_get_bool(conn, "cfg_rule_enabled_severity_mapping", True),
     }
 
-    # Medians
-    cur.execute("SELECT customer_id, direction, base_amount FROM transactions")
-    per_key = defaultdict(list)
-    for r in cur.fetchall():
-        per_key[(r["customer_id"], r["direction"])].append(r["base_amount"])
-    cust_medians = {k: statistics.median(v) for k, v in per_key.items() if v}
-
-    # Worklist - transactions without alerts
-    txns = cur.execute("""
-        SELECT t.* FROM transactions t
-        LEFT JOIN alerts a ON a.txn_id = t.id
-        WHERE a.id IS NULL
-        ORDER BY t.txn_date ASC
-    """).fetchall()
-
-    for t in txns:
-        reasons, tags, score = [], [], 0
-        severity = "INFO"
-        chan = (t["channel"] or "").lower()
-        narrative = (t["narrative"] or "")
-
-        d = date.fromisoformat(t["txn_date"])
-        month_start = d.replace(day=1).isoformat()
-        month_end = ((d.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)).isoformat()
-
-        month_in_total = float(cur.execute(
-            "SELECT SUM(base_amount) s FROM transactions WHERE customer_id=? AND direction='in' AND txn_date BETWEEN ? AND ?",
-            (t["customer_id"], month_start, month_end)
-        ).fetchone()["s"] or 0)
-
-        month_out_total = float(cur.execute(
-            "SELECT SUM(base_amount) s FROM transactions WHERE customer_id=? AND direction='out' AND txn_date BETWEEN ? AND ?",
-            (t["customer_id"], month_start, month_end)
-        ).fetchone()["s"] or 0)
-
-        exp = expected_map.get(t["customer_id"], {"expected_monthly_in": 0, "expected_monthly_out": 0})
-        expected_monthly_in = float(exp.get("expected_monthly_in") or 0)
-        expected_monthly_out = float(exp.get("expected_monthly_out") or 0)
-        med = float(cust_medians.get((t["customer_id"], t["direction"]), 0.0))
-
-        # Prohibited
-        c = country_map.get(t["country_iso2"] or "")
-        if on["prohibited_country"] and c and c["prohibited"]:
-            reasons.append(f"Prohibited country {t['country_iso2']}")
-            tags.append("PROHIBITED_COUNTRY")
-            score += 100
-
-        # High-risk
-        elif on["high_risk_corridor"] and c and (c["risk_level"] in ("HIGH_3RD", "HIGH")) and float(t["base_amount"]) >= high_risk_min_amount:
-            reasons.append(f"High-risk corridor {t['country_iso2']} ({c['risk_level']})")
-            tags.append("HIGH_RISK_COUNTRY")
-            score += int(c["score"])
-
-        # Cash daily breach (GLOBAL)
-        cash_daily_limit = float(_tx_cfg_get(conn, "cfg_cash_daily_limit", 0.0, float))
-        if on["cash_daily_breach"] and cash_daily_limit > 0 and (chan == "cash" or "cash" in narrative.lower()):
-            d_total = float(cur.execute(
-                "SELECT SUM(base_amount) AS s FROM transactions "
-                "WHERE customer_id=? AND txn_date=? "
-                "AND (lower(IFNULL(channel,''))='cash' OR instr(lower(IFNULL(narrative,'')),'cash')>0)",
-                (t["customer_id"], t["txn_date"])
-            ).fetchone()["s"] or 0)
-            if d_total > cash_daily_limit:
-                reasons.append(f"Cash daily limit breached (global £{cash_daily_limit:,.2f}; activity £{d_total:,.2f})")
-                tags.append("CASH_DAILY_BREACH")
-                score += 20
-
-        # Median outlier
-        if on["median_outlier"] and med > 0 and float(t["base_amount"]) > med * float(median_mult):
-            reasons.append(f"Significant deviation (×{t['base_amount']/med:.1f})")
-            tags.append("HISTORICAL_DEVIATION")
-            score += 25
-
-        # NLP risky terms (only enabled terms)
-        if on["nlp_risky_terms"] and enabled_terms:
-            low = narrative.lower()
-            if any(term.lower() in low for term in enabled_terms):
-                reasons.append("Narrative contains risky term(s)")
-                tags.append("NLP_RISK")
-                score += 10
-
-        # Expected breaches
-        if on["expected_out"] and t["direction"] == "out" and expected_monthly_out > 0:
-            if month_out_total > expected_monthly_out * float(exp_out_factor):
-                reasons.append(f"Outflows exceed expected (actual £{month_out_total:.2f})")
-                tags.append("EXPECTED_BREACH_OUT")
-                score += 20
-
-        if on["expected_in"] and t["direction"] == "in" and expected_monthly_in > 0:
-            if month_in_total > expected_monthly_in * float(exp_in_factor):
-                reasons.append(f"Inflows exceed expected (actual £{month_in_total:.2f})")
-                tags.append("EXPECTED_BREACH_IN")
-                score += 15
-
-        # Severity mapping
-        if on["severity_mapping"]:
-            if "PROHIBITED_COUNTRY" in tags or score >= sev_crit:
-                severity = "CRITICAL"
-            elif score >= sev_high:
-                severity = "HIGH"
-            elif score >= sev_med:
-                severity = "MEDIUM"
-            elif score >= sev_low:
-                severity = "LOW"
-
-        if reasons:
-            # Get max config version ID
-            config_version_row = cur.execute("SELECT MAX(id) as max_id FROM config_versions").fetchone()
-            config_version = config_version_row["max_id"] if config_version_row and config_version_row["max_id"] else None
-            
-            cur.execute(
-                """INSERT INTO alerts(txn_id, customer_id, score, severity, reasons, rule_tags, config_version)
-                   VALUES(?,?,?,?,?,?,?)""",
-                (t["id"], t["customer_id"], int(min(score, 100)), severity,
-                 json.dumps(reasons), json.dumps(list(dict.fromkeys(tags))), config_version)
-            )
-    conn.commit()
+    cash_daily_limit = _tx_cfg_get(conn, "cfg_cash_daily_limit", 0.0, float)
+
+    # Batch-score the unscored worklist (grouped aggregates, column-wise rules)
+    return score_worklist(conn, {
+        "on": on,
+        "country_map": country_map,
+        "expected_map": expected_map,
+        "high_risk_min_amount": high_risk_min_amount,
+        "median_mult": median_mult,
+        "exp_out_factor": exp_out_factor,
+        "exp_in_factor": exp_in_factor,
+        "enabled_terms": enabled_terms,
+        "cash_daily_limit": cash_daily_limit,
+        "sev_crit": sev_crit,
+        "sev_high": sev_high,
+        "sev_med": sev_med,
+        "sev_low": sev_low,
+    })
+
 
@@ -0,0 +1,356 @@
+"""
+Transaction Review Batch Scoring Engine
+Scores the unscored transaction worklist using grouped pandas/NumPy
+operations instead of per-row SQL lookups. Monthly totals, cash daily
+totals and medians come from the maintained aggregate tables in
+tx_aggregates.py.
+
+Every rule only looks at a transaction's own customer-month (plus the
+customer's median), so the worklist is scored in slices of whole
+customer-months of about SCORE_SLICE_ROWS unscored rows each: memory stays
+bounded however large the upload was.
+
+Shared by the Due Diligence upload path (tx_review_ingest.py) and the
+standalone Transaction Review app.
+"""
+import re
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from tx_aggregates import ensure_aggregate_tables, sketch_medians
+
+SCORE_SLICE_ROWS = 50_000
+
+TAG_ORDER = [
+    "PROHIBITED_COUNTRY", "HIGH_RISK_COUNTRY", "CASH_DAILY_BREACH",
+    "HISTORICAL_DEVIATION", "NLP_RISK", "EXPECTED_BREACH_OUT", "EXPECTED_BREACH_IN",
+]
+
+
+def ensure_scoring_tables(conn):
+    """Create the alerts table and the scored-transaction marker table"""
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS alerts(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            txn_id TEXT NOT NULL,
+            customer_id TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            severity TEXT CHECK(severity IN ('INFO','LOW','MEDIUM','HIGH','CRITICAL')) NOT NULL,
+            reasons TEXT NOT NULL,
+            rule_tags TEXT NOT NULL,
+            config_version INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_txn ON alerts(txn_id)")
+    # Transactions evaluated by the engine (with or without an alert), so the
+    # next run only picks up newly loaded rows.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tx_scored(
+            txn_id TEXT PRIMARY KEY,
+            scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def forget_scored(conn, txn_ids):
+    """Clear scored markers for re-loaded transaction ids so they are scored again"""
+    ids = [(str(i),) for i in txn_ids]
+    if not ids:
+        return
+    ensure_scoring_tables(conn)
+    conn.executemany("DELETE FROM tx_scored WHERE txn_id = ?", ids)
+
+
+def _worklist_slices(conn, max_rows=None):
+    """
+    The unscored customer-months, packed in order into lists of (customer_id, ym)
+    covering about max_rows unscored transactions each (a single larger
+    customer-month is a slice of its own).
+    """
+    max_rows = max_rows or SCORE_SLICE_ROWS
+    groups = conn.execute("""
+        SELECT t.customer_id, substr(t.txn_date, 1, 7) AS ym, COUNT(*) AS n
+        FROM transactions t
+        LEFT JOIN alerts a ON a.txn_id = t.id
+        LEFT JOIN tx_scored s ON s.txn_id = t.id
+        WHERE a.id IS NULL AND s.txn_id IS NULL
+        GROUP BY 1, 2 ORDER BY 1, 2
+    """).fetchall()
+    batch, rows = [], 0
+    for customer_id, ym, n in groups:
+        if batch and rows + n > max_rows:
+            yield batch
+            batch, rows = [], 0
+        batch.append((str(customer_id), ym))
+        rows += n
+    if batch:
+        yield batch
+
+
+def _load_worklist(conn, months):
+    """
+    Unscored transactions of the given (customer_id, ym) months, plus previously
+    scored, non-alerting transactions in the same customer/month (their monthly
+    and daily totals may have moved).
+    """
+    cols = "t.id, t.txn_date, t.customer_id, t.direction, t.base_amount, t.country_iso2, t.channel, t.narrative"
+    conn.execute("DROP TABLE IF EXISTS temp._tx_batch_months")
+    conn.execute("""
+        CREATE TEMP TABLE _tx_batch_months(
+            customer_id TEXT NOT NULL,
+            m_start TEXT NOT NULL,
+            m_end TEXT NOT NULL
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO temp._tx_batch_months(customer_id, m_start, m_end) VALUES(?,?,?)",
+        [(c, f"{ym}-01", f"{ym}-31") for c, ym in months]
+    )
+
+    new = pd.read_sql_query(f"""
+        SELECT {cols} FROM temp._tx_batch_months m
+        JOIN transactions t ON t.customer_id = m.customer_id
+                           AND t.txn_date BETWEEN m.m_start AND m.m_end
+        LEFT JOIN alerts a ON a.txn_id = t.id
+        LEFT JOIN tx_scored s ON s.txn_id = t.id
+        WHERE a.id IS NULL AND s.txn_id IS NULL
+    """, conn)
+    if new.empty:
+        return new, new
+    new["txn_date"] = new["txn_date"].astype(str)
+
+    prior = pd.read_sql_query(f"""
+        SELECT {cols} FROM temp._tx_batch_months m
+        JOIN transactions t ON t.customer_id = m.customer_id
+                           AND t.txn_date BETWEEN m.m_start AND m.m_end
+        JOIN tx_scored s ON s.txn_id = t.id
+        LEFT JOIN alerts a ON a.txn_id = t.id
+        WHERE a.id IS NULL
+    """, conn)
+    if prior.empty:
+        return new.copy(), new
+    prior["txn_date"] = prior["txn_date"].astype(str)
+    work = pd.concat([new, prior], ignore_index=True).drop_duplicates(subset="id")
+    return work, new
+
+
+def _monthly_totals(conn):
+    """Per customer/month/direction totals for the batch's customer-months"""
+    return pd.read_sql_query("""
+        SELECT g.customer_id, g.ym, g.direction, g.total
+        FROM temp._tx_batch_months m
+        JOIN tx_agg_month g ON g.customer_id = m.customer_id
+                           AND g.ym = substr(m.m_start, 1, 7)
+    """, conn)
+
+
+def _cash_daily_totals(conn):
+    """Per customer/day cash totals for the batch's customer-months"""
+    return pd.read_sql_query("""
+        SELECT g.customer_id, g.txn_date, g.total AS cash_total
+        FROM temp._tx_batch_months m
+        JOIN tx_agg_day g ON g.customer_id = m.customer_id
+                         AND g.txn_date BETWEEN m.m_start AND m.m_end
+        WHERE g.is_cash = 1
+    """, conn)
+
+
+def _medians(conn):
+    """Per customer/direction median base_amount for batch customers, from the median sketch"""
+    sketch = pd.read_sql_query("""
+        SELECT g.customer_id, g.direction, g.bucket, g.n
+        FROM (SELECT DISTINCT customer_id FROM temp._tx_batch_months) c
+        JOIN tx_agg_median g ON g.customer_id = c.customer_id
+    """, conn)
+    return sketch_medians(sketch)
+
+
+def evaluate_rules(work, params):
+    """
+    Evaluate all built-in rules column-wise over a worklist DataFrame that already
+    carries month_in_total, month_out_total, cash_total and median columns.
+    Returns the DataFrame with score, severity and per-rule reason columns added.
+    """
+    on = params["on"]
+    country_map = params["country_map"]
+    expected_map = params["expected_map"]
+    n = len(work)
+    base = work["base_amount"].astype(float)
+    narrative = work["narrative"].fillna("").astype(str)
+    narrative_low = narrative.str.lower()
+    chan = work["channel"].fillna("").astype(str).str.lower()
+    iso = work["country_iso2"].fillna("").astype(str)
+    direction = work["direction"].astype(str)
+
+    # Country lookups
+    known = iso.map(lambda x: x in country_map).astype(bool)
+    prohibited_flag = iso.map(lambda x: bool((country_map.get(x) or {}).get("prohibited"))).astype(bool)
+    risk_level = iso.map(lambda x: (country_map.get(x) or {}).get("risk_level"))
+    risk_score = iso.map(lambda x: int((country_map.get(x) or {}).get("score") or 0)).astype(int)
+
+    # Expected monthly flows
+    cust = work["customer_id"]
+    exp_in = cust.map(lambda c: float((expected_map.get(c) or {}).get("expected_monthly_in") or 0)).astype(float)
+    exp_out = cust.map(lambda c: float((expected_map.get(c) or {}).get("expected_monthly_out") or 0)).astype(float)
+
+    score = np.zeros(n, dtype=np.int64)
+    reasons = {}
+
+    # Prohibited / high-risk corridor (mutually exclusive, prohibited wins)
+    m_prohib = on["prohibited_country"] & known & prohibited_flag
+    m_hr = (~m_prohib & on["high_risk_corridor"] & known
+            & risk_level.isin(["HIGH_3RD", "HIGH"]) & (base >= params["high_risk_min_amount"]))
+    score += np.where(m_prohib, 100, 0) + np.where(m_hr, risk_score, 0)
+    reasons["PROHIBITED_COUNTRY"] = np.where(m_prohib, "Prohibited country " + iso, None)
+    reasons["HIGH_RISK_COUNTRY"] = np.where(
+        m_hr, "High-risk corridor " + iso + " (" + risk_level.fillna("").astype(str) + ")", None)
+
+    # Cash daily breach (GLOBAL)
+    limit = float(params["cash_daily_limit"] or 0)
+    is_cash = (chan == "cash") | narrative_low.str.contains("cash", regex=False)
+    cash_total = work["cash_total"].astype(float).fillna(0.0)
+    m_cash = on["cash_daily_breach"] & (limit > 0) & is_cash & (cash_total > limit)
+    score += np.where(m_cash, 20, 0)
+    reasons["CASH_DAILY_BREACH"] = np.where(
+        m_cash,
+        cash_total.map(lambda v: f"Cash daily limit breached (global £{limit:,.2f}; activity £{v:,.2f})"),
+        None)
+
+    # Median outlier
+    med = work["median"].astype(float).fillna(0.0)
+    m_med = on["median_outlier"] & (med > 0) & (base > med * float(params["median_mult"]))
+    score += np.where(m_med, 25, 0)
+    ratio = (base / med.where(med > 0, 1.0))
+    reasons["HISTORICAL_DEVIATION"] = np.where(
+        m_med, ratio.map(lambda v: f"Significant deviation (×{v:.1f})"), None)
+
+    # NLP risky terms (only enabled terms)
+    terms = [str(t).lower() for t in params["enabled_terms"] if t is not None]
+    if on["nlp_risky_terms"] and terms:
+        pattern = "|".join(re.escape(t) for t in terms)
+        m_nlp = narrative_low.str.contains(pattern, regex=True)
+    else:
+        m_nlp = pd.Series(False, index=work.index)
+    score += np.where(m_nlp, 10, 0)
+    reasons["NLP_RISK"] = np.where(m_nlp, "Narrative contains risky term(s)", None)
+
+    # Expected breaches
+    out_total = work["month_out_total"].astype(float).fillna(0.0)
+    in_total = work["month_in_total"].astype(float).fillna(0.0)
+    m_out = (on["expected_out"] & (direction == "out") & (exp_out > 0)
+             & (out_total > exp_out * float(params["exp_out_factor"])))
+    m_in = (on["expected_in"] & (direction == "in") & (exp_in > 0)
+            & (in_total > exp_in * float(params["exp_in_factor"])))
+    score += np.where(m_out, 20, 0) + np.where(m_in, 15, 0)
+    reasons["EXPECTED_BREACH_OUT"] = np.where(
+        m_out, out_total.map(lambda v: f"Outflows exceed expected (actual £{v:.2f})"), None)
+    reasons["EXPECTED_BREACH_IN"] = np.where(
+        m_in, in_total.map(lambda v: f"Inflows exceed expected (actual £{v:.2f})"), None)
+
+    # Severity mapping (score is compared before capping, as before)
+    if on["severity_mapping"]:
+        severity = np.select(
+            [m_prohib.to_numpy() | (score >= params["sev_crit"]),
+             score >= params["sev_high"], score >= params["sev_med"], score >= params["sev_low"]],
+            ["CRITICAL", "HIGH", "MEDIUM", "LOW"], default="INFO")
+    else:
+        severity = np.full(n, "INFO", dtype=object)
+
+    out = work.copy()
+    out["score"] = score
+    out["severity"] = severity
+    for tag in TAG_ORDER:
+        out[f"reason_{tag}"] = reasons[tag]
+    return out
+
+
+def score_worklist(conn, params, slice_rows=None):
+    """
+    Score every unscored transaction and bulk-insert alerts, one slice of
+    customer-months (about slice_rows / SCORE_SLICE_ROWS unscored rows) at a
+    time; each slice is committed before the next is loaded.
+
+    params: dict with keys on (rule toggles), country_map, expected_map,
+    high_risk_min_amount, median_mult, exp_out_factor, exp_in_factor,
+    enabled_terms, cash_daily_limit, sev_crit, sev_high, sev_med, sev_low.
+
+    Returns: {"scored": <rows evaluated>, "alerts": <alerts inserted>}
+    """
+    conn.row_factory = sqlite3.Row
+    ensure_scoring_tables(conn)
+    ensure_aggregate_tables(conn)
+
+    row = conn.execute("SELECT MAX(id) AS max_id FROM config_versions").fetchone()
+    config_version = row["max_id"] if row and row["max_id"] else None
+
+    totals = {"scored": 0, "alerts": 0}
+    for months in _worklist_slices(conn, slice_rows):
+        res = _score_slice(conn, months, params, config_version)
+        totals["scored"] += res["scored"]
+        totals["alerts"] += res["alerts"]
+    return totals
+
+
+def _score_slice(conn, months, params, config_version):
+    """Score the unscored transactions of one slice of customer-months and commit."""
+    work, new = _load_worklist(conn, months)
+    if work.empty:
+        conn.execute("DROP TABLE IF EXISTS temp._tx_batch_months")
+        return {"scored": 0, "alerts": 0}
+
+    on = params["on"]
+    work["ym"] = work["txn_date"].str[:7]
+
+    # Monthly in/out totals
+    if on["expected_in"] or on["expected_out"]:
+        monthly = _monthly_totals(conn).pivot_table(
+            index=["customer_id", "ym"], columns="direction", values="total", aggfunc="sum")
+        monthly = monthly.reindex(columns=["in", "out"]).rename(
+            columns={"in": "month_in_total", "out": "month_out_total"}).reset_index()
+        work = work.merge(monthly, on=["customer_id", "ym"], how="left")
+    else:
+        work["month_in_total"] = 0.0
+        work["month_out_total"] = 0.0
+
+    # Cash daily totals
+    if on["cash_daily_breach"] and float(params["cash_daily_limit"] or 0) > 0:
+        work = work.merge(_cash_daily_totals(conn), on=["customer_id", "txn_date"], how="left")
+    else:
+        work["cash_total"] = 0.0
+
+    # Medians per customer/direction
+    if on["median_outlier"]:
+        work = work.merge(_medians(conn), on=["customer_id", "direction"], how="left")
+    else:
+        work["median"] = 0.0
+
+    scored = evaluate_rules(work, params)
+    reason_cols = [f"reason_{tag}" for tag in TAG_ORDER]
+    fired = scored[scored[reason_cols].notna().any(axis=1)]
+
+    alert_rows = []
+    for rec in fired[["id", "customer_id", "score", "severity"] + reason_cols].itertuples(index=False):
+        reasons = [r for r in rec[4:] if r is not None]
+        tags = [tag for tag, r in zip(TAG_ORDER, rec[4:]) if r is not None]
+        alert_rows.append((
+            str(rec[0]), str(rec[1]), int(min(int(rec[2]), 100)), str(rec[3]),
+            json.dumps(reasons), json.dumps(tags), config_version,
+        ))
+
+    conn.executemany(
+        """INSERT INTO alerts(txn_id, customer_id, score, severity, reasons, rule_tags, config_version)
+           VALUES(?,?,?,?,?,?,?)""",
+        alert_rows
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO tx_scored(txn_id) VALUES(?)",
+        [(str(i),) for i in new["id"]]
+    )
+    conn.execute("DROP TABLE IF EXISTS temp._tx_batch_months")
+    conn.commit()
+    return {"scored": int(len(work)), "alerts": len(alert_rows)}
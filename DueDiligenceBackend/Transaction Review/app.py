@@ -17,6 +17,12 @@ DUE_DILIGENCE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."
 DB_PATH = os.getenv("TX_DB") or os.path.join(DUE_DILIGENCE_DIR, "scrutinise_workflow.db")
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
+# Shared Transaction Review modules (tx_scoring etc.) live beside the Due Diligence app
+import sys
+if DUE_DILIGENCE_DIR not in sys.path:
+    sys.path.insert(0, DUE_DILIGENCE_DIR)
+import jobs
+
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY","devkey")
 
@@ -787,7 +793,7 @@ def gt(x, y):  # handy for expressions
         return False
 
 def get_builtin_rules():
-    """Return the hard-coded rules that are active in score_new_transactions(), as read-only metadata."""
+    """Return the hard-coded rules that are active in tx_scoring.score_worklist(), as read-only metadata."""
     return [
         {
             "category": "Jurisdiction Risk",
@@ -976,153 +982,14 @@ def load_csv_to_table(path, table):
     return count
 
 def ingest_transactions_csv(fobj):
-    import pandas as pd
-    from datetime import datetime, timedelta, date
-
-    # --- helpers -------------------------------------------------------------
-    def _excel_serial_to_date(n):
-        # Excel's day 1 = 1899-12-31; but with the 1900-leap bug, pandas/Excel often use 1899-12-30
-        # We’ll use 1899-12-30 which matches most CSV exports.
-        origin = date(1899, 12, 30)
-        try:
-            n = int(float(n))
-            if n <= 0:
-                return None
-            return origin + timedelta(days=n)
-        except Exception:
-            return None
-
-    COMMON_FORMATS = [
-        "%d/%m/%Y", "%Y-%m-%d", "%m/%d/%Y",
-        "%d-%m-%Y", "%Y/%m/%d",
-    ]
-
-    def _coerce_date(val):
-        if val is None:
-            return None
-        s = str(val).strip()
-        if s == "" or s.lower() in ("nan", "none", "null"):
-            return None
-
-        # 1) numeric → Excel serial
-        try:
-            # accept integers/floats or numeric-looking strings
-            if isinstance(val, (int, float)) or s.replace(".", "", 1).isdigit():
-                d = _excel_serial_to_date(val)
-                if d:
-                    return d
-        except Exception:
-            pass
-
-        # 2) try explicit formats
-        for fmt in COMMON_FORMATS:
-            try:
-                return datetime.strptime(s, fmt).date()
-            except Exception:
-                pass
-
-        # 3) last resort: pandas to_datetime with dayfirst True then False
-        try:
-            d = pd.to_datetime(s, dayfirst=True, errors="coerce")
-            if pd.notna(d):
-                return d.date()
-        except Exception:
-            pass
-        try:
-            d = pd.to_datetime(s, dayfirst=False, errors="coerce")
-            if pd.notna(d):
-                return d.date()
-        except Exception:
-            pass
-
-        return None
-
-    # --- load & validate columns --------------------------------------------
-    df = pd.read_csv(fobj)
-
-    needed = {
-        "id","txn_date","customer_id","direction","amount","currency","base_amount",
-        "country_iso2","payer_sort_code","payee_sort_code","channel","narrative"
-    }
-    missing = needed - set(map(str, df.columns))
-    if missing:
-        raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
-
-    # --- txn_date robust parsing (no warnings, no mass failure) -------------
-    df["txn_date"] = df["txn_date"].apply(_coerce_date)
-    bad_dates = df["txn_date"].isna().sum()
-    if bad_dates:
-        # Drop rows with unparseable txn_date; we’ll report how many were skipped
-        df = df[df["txn_date"].notna()]
-
-    # --- normalize text-ish fields ------------------------------------------
-    df["direction"] = df["direction"].astype(str).str.lower().str.strip()
-    df["currency"]  = df.get("currency", "GBP").fillna("GBP").astype(str).str.strip()
-
-    # Normalize optional text fields (empty → None)
-    for col in ["country_iso2","payer_sort_code","payee_sort_code","channel","narrative"]:
-        if col in df.columns:
-            df[col] = df[col].astype(str)
-            df[col] = df[col].str.strip()
-            df[col] = df[col].replace({"": None, "nan": None, "None": None, "NULL": None})
-        else:
-            df[col] = None
-
-    # ISO2 upper-case
-    df["country_iso2"] = df["country_iso2"].apply(lambda x: (x or "").upper() or None)
-
-    # channel lower-case
-    df["channel"] = df["channel"].apply(lambda x: (x or "").lower() or None)
-
-    # --- amounts: coerce, backfill, then fill (0.0) to satisfy NOT NULL -----
-    df["amount"]      = pd.to_numeric(df["amount"], errors="coerce")
-    df["base_amount"] = pd.to_numeric(df["base_amount"], errors="coerce")
-
-    mask_amt_na  = df["amount"].isna() & df["base_amount"].notna()
-    mask_base_na = df["base_amount"].isna() & df["amount"].notna()
-    df.loc[mask_amt_na,  "amount"]      = df.loc[mask_amt_na,  "base_amount"]
-    df.loc[mask_base_na, "base_amount"] = df.loc[mask_base_na, "amount"]
-
-    df["amount"]      = df["amount"].fillna(0.0)
-    df["base_amount"] = df["base_amount"].fillna(0.0)
-
-    # --- insert --------------------------------------------------------------
-    recs = df.to_dict(orient="records")
-    db = get_db()
-    n_inserted = 0
-    for r in recs:
-        db.execute(
-            """INSERT OR REPLACE INTO transactions
-               (id, txn_date, customer_id, direction, amount, currency, base_amount, country_iso2,
-                payer_sort_code, payee_sort_code, channel, narrative)
-               VALUES(?,?,?,?,?,?,?,?,?,?,?,?)""",
-            (
-                str(r["id"]),
-                str(r["txn_date"]),                 # now a real date
-                str(r["customer_id"]),
-                str(r["direction"]),
-                float(r["amount"]),                 # not null
-                str(r.get("currency","GBP")),
-                float(r["base_amount"]),            # not null
-                (str(r["country_iso2"]) if r.get("country_iso2") else None),
-                (str(r["payer_sort_code"]) if r.get("payer_sort_code") else None),
-                (str(r["payee_sort_code"]) if r.get("payee_sort_code") else None),
-                (str(r["channel"]) if r.get("channel") else None),
-                (str(r["narrative"]) if r.get("narrative") else None),
-            )
-        )
-        n_inserted += 1
-
-    db.commit()
-    score_new_transactions()
-
-    # Return count; the UI already flashes “Loaded N transactions”
-    # If you want to surface skipped rows, you can also flash here, but
-    # we’ll just print to console to avoid changing routes:
-    if bad_dates:
-        print(f"[ingest_transactions_csv] Skipped {bad_dates} row(s) with invalid txn_date.")
+    """
+    Stream the upload into the shared ledger in bounded chunks (see
+    tx_review_ingest.ingest_transactions_csv) and score the new rows.
+    Returns: (count_inserted, count_skipped_bad_dates)
+    """
+    from tx_review_ingest import ingest_transactions_csv as _ingest_stream
 
-    return n_inserted
+    return _ingest_stream(get_db(), fobj)
 
 # ---------- Built-in rules (hard-coded) with configurable parameters ----------
 def builtin_rules_catalog():
@@ -1365,149 +1232,6 @@ def risky_terms_enabled():
     items = cfg_get("cfg_risky_terms2", [], list)
     return [i["term"] for i in items if isinstance(i, dict) and i.get("enabled")]
 
-def score_new_transactions():
-    import statistics
-    db = get_db()
-    country_map = get_country_map()
-    expected_map = get_expected_map()
-
-    # Params
-    high_risk_min_amount = cfg_get("cfg_high_risk_min_amount", 0.0, float)
-    median_mult = cfg_get("cfg_median_multiplier", 3.0, float)
-    exp_out_factor = cfg_get("cfg_expected_out_factor", 1.2, float)
-    exp_in_factor  = cfg_get("cfg_expected_in_factor", 1.2, float)
-    enabled_terms  = risky_terms_enabled()  # NEW: only enabled
-    sev_crit = cfg_get("cfg_sev_critical", 90, int)
-    sev_high = cfg_get("cfg_sev_high", 70, int)
-    sev_med  = cfg_get("cfg_sev_medium", 50, int)
-    sev_low  = cfg_get("cfg_sev_low", 30, int)
-
-    # Toggles
-    on = {
-        "prohibited_country": cfg_get_bool("cfg_rule_enabled_prohibited_country", True),
-        "high_risk_corridor": cfg_get_bool("cfg_rule_enabled_high_risk_corridor", True),
-        "median_outlier": cfg_get_bool("cfg_rule_enabled_median_outlier", True),
-        "nlp_risky_terms": cfg_get_bool("cfg_rule_enabled_nlp_risky_terms", True),
-        "expected_out": cfg_get_bool("cfg_rule_enabled_expected_out", True),
-        "expected_in": cfg_get_bool("cfg_rule_enabled_expected_in", True),
-        "cash_daily_breach": cfg_get_bool("cfg_rule_enabled_cash_daily_breach", True),
-        "severity_mapping": cfg_get_bool("cfg_rule_enabled_severity_mapping", True),
-    }
-
-    # Medians
-    cur = db.execute("SELECT customer_id, direction, base_amount FROM transactions")
-    per_key = defaultdict(list)
-    for r in cur.fetchall():
-        per_key[(r["customer_id"], r["direction"])].append(r["base_amount"])
-    cust_medians = {k: statistics.median(v) for k,v in per_key.items() if v}
-
-    # Worklist
-    txns = db.execute("""
-        SELECT t.* FROM transactions t
-        LEFT JOIN alerts a ON a.txn_id = t.id
-        WHERE a.id IS NULL
-        ORDER BY t.txn_date ASC
-    """).fetchall()
-
-    for t in txns:
-        reasons, tags, score = [], [], 0
-        severity = "INFO"
-        chan = (t["channel"] or "").lower()
-        narrative = (t["narrative"] or "")
-
-        d = date.fromisoformat(t["txn_date"])
-        month_start = d.replace(day=1).isoformat()
-        month_end = ((d.replace(day=28)+timedelta(days=4)).replace(day=1) - timedelta(days=1)).isoformat()
-
-        month_in_total = float(db.execute(
-            "SELECT SUM(base_amount) s FROM transactions WHERE customer_id=? AND direction='in' AND txn_date BETWEEN ? AND ?",
-            (t["customer_id"], month_start, month_end)
-        ).fetchone()["s"] or 0)
-
-        month_out_total = float(db.execute(
-            "SELECT SUM(base_amount) s FROM transactions WHERE customer_id=? AND direction='out' AND txn_date BETWEEN ? AND ?",
-            (t["customer_id"], month_start, month_end)
-        ).fetchone()["s"] or 0)
-
-        exp = expected_map.get(t["customer_id"], {"expected_monthly_in":0, "expected_monthly_out":0})
-        expected_monthly_in  = float(exp.get("expected_monthly_in") or 0)
-        expected_monthly_out = float(exp.get("expected_monthly_out") or 0)
-        med = float(cust_medians.get((t["customer_id"], t["direction"]), 0.0))
-
-        # Prohibited
-        c = country_map.get(t["country_iso2"] or "")
-        if on["prohibited_country"] and c and c["prohibited"]:
-            reasons.append(f"Prohibited country {t['country_iso2']}")
-            tags.append("PROHIBITED_COUNTRY")
-            score += 100
-
-        # High-risk
-        elif on["high_risk_corridor"] and c and (c["risk_level"] in ("HIGH_3RD","HIGH")) and float(t["base_amount"]) >= high_risk_min_amount:
-            reasons.append(f"High-risk corridor {t['country_iso2']} ({c['risk_level']})")
-            tags.append("HIGH_RISK_COUNTRY")
-            score += int(c["score"])
-
-        # Cash daily breach (GLOBAL)
-        cash_daily_limit = float(cfg_get("cfg_cash_daily_limit", 0.0, float))
-        if on["cash_daily_breach"] and cash_daily_limit > 0 and (chan == "cash" or "cash" in narrative.lower()):
-            d_total = float(db.execute(
-                 "SELECT SUM(base_amount) AS s FROM transactions "
-                 "WHERE customer_id=? AND txn_date=? "
-                 "AND (lower(IFNULL(channel,''))='cash' OR instr(lower(IFNULL(narrative,'')),'cash')>0)",
-                 (t["customer_id"], t["txn_date"])
-            ).fetchone()["s"] or 0)
-            if d_total > cash_daily_limit:
-                reasons.append(f"Cash daily limit breached (global £{cash_daily_limit:,.2f}; activity £{d_total:,.2f})")
-                tags.append("CASH_DAILY_BREACH")
-                score += 20        
-
-        # Median outlier
-        if on["median_outlier"] and med > 0 and float(t["base_amount"]) > med * float(median_mult):
-            reasons.append(f"Significant deviation (×{t['base_amount']/med:.1f})")
-            tags.append("HISTORICAL_DEVIATION")
-            score += 25
-
-        # NLP risky terms (only enabled terms)
-        if on["nlp_risky_terms"] and enabled_terms:
-            low = narrative.lower()
-            if any(term.lower() in low for term in enabled_terms):
-                reasons.append("Narrative contains risky term(s)")
-                tags.append("NLP_RISK")
-                score += 10
-
-        # Expected breaches
-        if on["expected_out"] and t["direction"]=="out" and expected_monthly_out>0:
-            if month_out_total > expected_monthly_out * float(exp_out_factor):
-                reasons.append(f"Outflows exceed expected (actual £{month_out_total:.2f})")
-                tags.append("EXPECTED_BREACH_OUT")
-                score += 20
-
-        if on["expected_in"] and t["direction"]=="in" and expected_monthly_in>0:
-            if month_in_total > expected_monthly_in * float(exp_in_factor):
-                reasons.append(f"Inflows exceed expected (actual £{month_in_total:.2f})")
-                tags.append("EXPECTED_BREACH_IN")
-                score += 15
-
-        # Severity mapping (kept even if toggle is off; but we respect it for transparency)
-        if on["severity_mapping"]:
-            if "PROHIBITED_COUNTRY" in tags or score >= sev_crit:
-                severity = "CRITICAL"
-            elif score >= sev_high:
-                severity = "HIGH"
-            elif score >= sev_med:
-                severity = "MEDIUM"
-            elif score >= sev_low:
-                severity = "LOW"
-
-        if reasons:
-            db.execute(
-                """INSERT INTO alerts(txn_id, customer_id, score, severity, reasons, rule_tags, config_version)
-                   VALUES(?,?,?,?,?,?, (SELECT MAX(id) FROM config_versions))""",
-                (t["id"], t["customer_id"], int(min(score,100)), severity,
-                 json.dumps(reasons), json.dumps(list(dict.fromkeys(tags))))
-            )
-    db.commit()
-
 # ---------- Routes ----------
 @app.route("/")
 def dashboard():
@@ -1568,8 +1292,12 @@ def dashboard():
     tx_pred = "WHERE " + " AND ".join(tx_where)
     a_pred  = "WHERE " + " AND ".join(a_where)
 
+    # Monthly in/out/cash flows from the rolling aggregates (month granularity)
+    from tx_aggregates import monthly_flows, summarize_flows
+    flows = summarize_flows(monthly_flows(db, customer_id, start, end))
+
     # KPIs
-    total_tx = db.execute(f"SELECT COUNT(*) c FROM transactions t {tx_pred}", tx_params).fetchone()["c"]
+    total_tx = flows["total_tx"]
     total_alerts = db.execute(f"SELECT COUNT(*) c FROM alerts a {a_pred}", a_params).fetchone()["c"]
     critical = db.execute(f"SELECT COUNT(*) c FROM alerts a {a_pred} AND a.severity='CRITICAL'", a_params).fetchone()["c"]
 
@@ -1581,28 +1309,12 @@ def dashboard():
     }
 
     # Tiles: totals, cash in/out
-    sums = db.execute(f"""
-      SELECT
-        SUM(CASE WHEN t.direction='in'  THEN t.base_amount ELSE 0 END)  AS total_in,
-        SUM(CASE WHEN t.direction='out' THEN t.base_amount ELSE 0 END)  AS total_out
-      FROM transactions t {tx_pred}
-    """, tx_params).fetchone()
-    total_in  = float(sums["total_in"]  or 0)
-    total_out = float(sums["total_out"] or 0)
+    total_in  = flows["total_in"]
+    total_out = flows["total_out"]
     total_value = total_in + total_out
 
-    cash = db.execute(f"""
-      SELECT
-        SUM(CASE WHEN t.direction='in'
-                   AND lower(IFNULL(t.channel,''))='cash'
-                 THEN t.base_amount ELSE 0 END) AS cash_in,
-        SUM(CASE WHEN t.direction='out'
-                   AND lower(IFNULL(t.channel,''))='cash'
-                 THEN t.base_amount ELSE 0 END) AS cash_out
-      FROM transactions t {tx_pred}
-    """, tx_params).fetchone()
-    cash_in  = float(cash["cash_in"]  or 0)
-    cash_out = float(cash["cash_out"] or 0)
+    cash_in  = flows["cash_in"]
+    cash_out = flows["cash_out"]
 
     # High/High-3rd/Prohibited corridors — count AND total £
     hr = db.execute(f"""
@@ -1662,42 +1374,25 @@ def dashboard():
     ]
 
     # Monthly trend of money in/out
-    trend_rows = db.execute(f"""
-      SELECT strftime('%Y-%m', t.txn_date) ym,
-             SUM(CASE WHEN t.direction='in'  THEN t.base_amount ELSE 0 END) AS in_sum,
-             SUM(CASE WHEN t.direction='out' THEN t.base_amount ELSE 0 END) AS out_sum
-      FROM transactions t {tx_pred}
-      GROUP BY ym
-      ORDER BY ym
-    """, tx_params).fetchall()
-    trend_labels = [r["ym"] for r in trend_rows]
-    trend_in  = [float(r["in_sum"]  or 0) for r in trend_rows]
-    trend_out = [float(r["out_sum"] or 0) for r in trend_rows]
+    trend_labels = flows["trend_labels"]
+    trend_in  = flows["trend_in"]
+    trend_out = flows["trend_out"]
 
     # Reviewer metrics (averages, highs, overseas, high-risk % etc.)
     m = db.execute(f"""
       SELECT
-        AVG(CASE WHEN t.direction='in'  AND lower(IFNULL(t.channel,''))='cash' THEN t.base_amount END) AS avg_cash_in,
-        AVG(CASE WHEN t.direction='out' AND lower(IFNULL(t.channel,''))='cash' THEN t.base_amount END) AS avg_cash_out,
-        AVG(CASE WHEN t.direction='in'  THEN t.base_amount END) AS avg_in,
-        AVG(CASE WHEN t.direction='out' THEN t.base_amount END) AS avg_out,
-        MAX(CASE WHEN t.direction='in'  THEN t.base_amount END) AS max_in,
-        MAX(CASE WHEN t.direction='out' THEN t.base_amount END) AS max_out,
-        SUM(CASE WHEN IFNULL(t.country_iso2,'')<>'' AND UPPER(t.country_iso2)<>'GB' THEN t.base_amount ELSE 0 END) AS overseas_value,
-        SUM(t.base_amount) AS total_value
+        SUM(CASE WHEN IFNULL(t.country_iso2,'')<>'' AND UPPER(t.country_iso2)<>'GB' THEN t.base_amount ELSE 0 END) AS overseas_value
       FROM transactions t {tx_pred}
     """, tx_params).fetchone()
 
-    avg_cash_deposits     = float(m["avg_cash_in"]  or 0.0)
-    avg_cash_withdrawals  = float(m["avg_cash_out"] or 0.0)
-    avg_in                = float(m["avg_in"]       or 0.0)
-    avg_out               = float(m["avg_out"]      or 0.0)
-    max_in                = float(m["max_in"]       or 0.0)
-    max_out               = float(m["max_out"]      or 0.0)
+    avg_cash_deposits     = flows["avg_cash_in"]
+    avg_cash_withdrawals  = flows["avg_cash_out"]
+    avg_in                = flows["avg_in"]
+    avg_out               = flows["avg_out"]
+    max_in                = flows["max_in"]
+    max_out               = flows["max_out"]
     overseas_value        = float(m["overseas_value"] or 0.0)
-    total_val_from_query  = float(m["total_value"]  or 0.0)
-    # Use the earlier computed total_value if present; else fall back
-    denom_total = total_value if total_value > 0 else total_val_from_query
+    denom_total = total_value
     overseas_pct = (overseas_value / denom_total * 100.0) if denom_total > 0 else 0.0
 
     hr_val_row = db.execute(f"""
@@ -1752,29 +1447,53 @@ def upload():
         cf, sf, tf = request.files.get("country_file"), request.files.get("sort_file"), request.files.get("tx_file")
         country_count = 0
         sort_count = 0
-        tx_count = 0
         
         if cf and cf.filename: 
             country_count = load_csv_to_table(cf, "ref_country_risk")
         if sf and sf.filename: 
             sort_count = load_csv_to_table(sf, "ref_sort_codes")
+        job_id = None
         if tf and tf.filename: 
-            tx_count = ingest_transactions_csv(tf)
+            # Ingest + scoring run in the background job workers
+            path = jobs.spool_upload(tf, prefix="tx")
+            job_id = jobs.enqueue("tx_upload", {"path": path, "db_path": os.path.abspath(DB_PATH)})
+        queued = f"; transactions queued for processing (job {job_id})" if job_id else ""
         
         # Check if JSON response requested
         if request.headers.get('Accept') == 'application/json' or request.args.get('format') == 'json':
             return jsonify({
                 "status": "ok",
-                "message": f"Loaded {tx_count} transactions, {country_count} countries, {sort_count} sort codes",
-                "transactions": tx_count,
+                "message": f"Loaded {country_count} countries, {sort_count} sort codes{queued}",
+                "job_id": job_id,
                 "countries": country_count,
                 "sort_codes": sort_count
             })
         
-        flash(f"Loaded {tx_count} transactions")
+        flash(f"Loaded {country_count} countries, {sort_count} sort codes{queued}")
         return redirect(url_for("upload"))
     return render_template("upload.html")
 
+# jobs.db is shared with the Due Diligence app: only expose jobs this app queued
+TX_JOB_KINDS = ("tx_upload", "tx_score")
+
+def _job_visible(job):
+    """Transaction jobs started from this app (no DD user id recorded)."""
+    return job is not None and job["kind"] in TX_JOB_KINDS and job.get("created_by") is None
+
+@app.route("/jobs/<int:job_id>")
+def job_status(job_id):
+    job = jobs.get_job(job_id)
+    if not _job_visible(job):
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"status": "ok", "job": job})
+
+@app.route("/jobs/<int:job_id>/cancel", methods=["POST"])
+def job_cancel(job_id):
+    if not _job_visible(jobs.get_job(job_id)):
+        return jsonify({"error": "Job not found"}), 404
+    job = jobs.request_cancel(job_id)
+    return jsonify({"status": "ok", "job": job})
+
 @app.route("/alerts")
 def alerts():
     db = get_db()
@@ -3304,6 +3023,12 @@ def admin_wipe():
     # Delete dependents first
     db.execute("DELETE FROM alerts;")
     db.execute("DELETE FROM transactions;")
+    try:
+        db.execute("DELETE FROM tx_scored;")
+    except sqlite3.OperationalError:
+        pass
+    from tx_aggregates import clear_aggregates
+    clear_aggregates(db)
 
     # Optional: clear AI working tables if you like
     try:
@@ -3396,4 +3121,6 @@ if __name__ == "__main__":
             with open(os.path.join(DATA_DIR, "transactions_sample.csv"), "rb") as f:
                 ingest_transactions_csv(f)
 
+    # First aggregate build runs in the job worker, not in a dashboard request
+    jobs.queue_tx_aggregates_build(DB_PATH)
     app.run(debug=True, port=8085)
\ No newline at end of file
@@ -162,6 +162,19 @@ def main():
         cleanup_processes()
         sys.exit(1)
     
+    # Start the background job worker (uploads, scoring, QC sampling, status sweep)
+    print_header("Starting Background Job Worker")
+    worker_cmd = [python_cmd, "jobs.py"]
+    if not start_service(
+        "Job worker",
+        worker_cmd,
+        str(due_diligence_dir),
+        f"Running: {' '.join(worker_cmd)}",
+        wait_time=3
+    ):
+        cleanup_processes()
+        sys.exit(1)
+    
     # Start AI SME (FastAPI)
     print_header("Starting AI SME Service")
     uvicorn_cmd = ["uvicorn", "app:app", "--reload", "--host", "0.0.0.0", "--port", "8000"]
@@ -193,11 +206,13 @@ def main():
     
     print("Services running:")
     print_info("  • Due Diligence (Flask): http://localhost:5050")
+    print_info("  • Job worker: python jobs.py")
     print_info("  • AI SME (FastAPI): http://localhost:8000")
     print_info("  • Frontend (React/Vite): http://localhost:5173")
     print()
     print("Note: Service output is hidden. For detailed logs, run services individually:")
     print_info("  • Due Diligence: cd 'Due Diligence' && python app.py")
+    print_info("  • Job worker: cd 'Due Diligence' && python jobs.py")
     print_info("  • AI SME: cd 'AI SME' && uvicorn app:app --reload")
     print_info("  • Frontend: cd frontend && npm run dev")
     print()
@@ -65,6 +65,61 @@ function AISME({ taskId, customerId }) {
     };
     setMessages(prev => [...prev, newMessage]);
     setShowWelcome(false);
+    return newMessage.id;
+  };
+
+  const updateMessage = (id, html) => {
+    setMessages(prev => prev.map(msg => (msg.id === id ? { ...msg, html } : msg)));
+  };
+
+  // Reads the server-sent events of a streamed answer, rendering deltas as they
+  // arrive. Resolves with the final payload (same shape as the JSON response).
+  const readAnswerStream = async (res) => {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    let final = null;
+    let msgId = null;
+
+    const handleEvent = (block) => {
+      let event = 'message';
+      const dataLines = [];
+      block.split('\n').forEach(line => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) dataLines.push(line.slice(5).trimStart());
+      });
+      if (!dataLines.length) return;
+      const payload = JSON.parse(dataLines.join('\n'));
+      if (event === 'delta') {
+        text += payload.text || '';
+        if (msgId === null) {
+          setThinking(false);
+          msgId = appendMessage('assistant', escapeHtml(text));
+        } else {
+          updateMessage(msgId, escapeHtml(text));
+        }
+      } else if (event === 'done' || event === 'error') {
+        final = payload;
+      }
+    };
+
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let idx;
+      while ((idx = buffer.indexOf('\n\n')) !== -1) {
+        handleEvent(buffer.slice(0, idx));
+        buffer = buffer.slice(idx + 2);
+      }
+    }
+    if (buffer.trim()) handleEvent(buffer);
+
+    const answer = final?.answer || text || '(no answer)';
+    if (msgId === null) appendMessage('assistant', escapeHtml(answer));
+    else updateMessage(msgId, escapeHtml(answer));
+    return { ...(final || {}), answer };
   };
 
   const isFallbackAnswer = (text) => {
@@ -98,10 +153,12 @@ function AISME({ taskId, customerId }) {
     try {
       const formData = new FormData();
       formData.append('q', q);
+      formData.append('stream', '1');
 
       const res = await fetch(`${BASE_URL}/api/sme/query`, {
         method: 'POST',
         credentials: 'include',
+        headers: { Accept: 'text/event-stream' },
         body: formData
       });
 
@@ -109,12 +166,16 @@ function AISME({ taskId, customerId }) {
         throw new Error('Failed to get response');
       }
 
-      const data = await res.json();
+      let data;
+      if ((res.headers.get('Content-Type') || '').includes('text/event-stream') && res.body) {
+        // Assistant message is rendered incrementally while streaming
+        data = await readAnswerStream(res);
+      } else {
+        data = await res.json();
+        appendMessage('assistant', escapeHtml(data?.answer || '(no answer)'));
+      }
       const answer = data?.answer || '(no answer)';
       setLastAnswer(answer);
-      
-      // Add assistant message
-      appendMessage('assistant', escapeHtml(answer));
 
       // Check if fallback answer - auto-referral
       if (isFallbackAnswer(answer) || data?.is_fallback) {
@@ -218,6 +218,49 @@ function TeamLeaderDashboard() {
           </div>
         </div>
 
+        {/* Chaser Cycle (Current Week) */}
+        <div className="card shadow-sm mb-4">
+          <div className="card-body">
+            <h5 className="card-title">Chaser Cycle (Current Week)</h5>
+            <div className="table-responsive">
+              <table className="table table-sm mb-0">
+                <thead>
+                  <tr>
+                    <th>Date</th>
+                    {data.chaser_headers?.map((h) => (
+                      <th key={h} className="text-center">{h}</th>
+                    ))}
+                  </tr>
+                </thead>
+                <tbody>
+                  {data.chaser_week_rows && data.chaser_week_rows.length > 0 ? (
+                    <>
+                      {data.chaser_week_rows.map((row) => (
+                        <tr key={row.iso}>
+                          <td className="fw-semibold">{row.date}</td>
+                          {data.chaser_headers.map((h) => (
+                            <td key={h} className="text-center">{row[h] || 0}</td>
+                          ))}
+                        </tr>
+                      ))}
+                      <tr className="table-warning">
+                        <td className="fw-bold">Overdue</td>
+                        {data.chaser_headers.map((h) => (
+                          <td key={h} className="text-center">{data.chaser_overdue?.[h] || 0}</td>
+                        ))}
+                      </tr>
+                    </>
+                  ) : (
+                    <tr>
+                      <td colSpan={(data.chaser_headers?.length || 0) + 1} className="text-muted text-center">No chaser data.</td>
+                    </tr>
+                  )}
+                </tbody>
+              </table>
+            </div>
+          </div>
+        </div>
+
         {/* Team Members */}
         {data.reviewers && data.reviewers.length > 0 && (
           <div className="card shadow-sm">
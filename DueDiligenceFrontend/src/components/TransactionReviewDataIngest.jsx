@@ -15,6 +15,31 @@ function TransactionReviewDataIngest() {
     setFiles(prev => ({ ...prev, [name]: file }));
   };
 
+  // Transactions are ingested and scored by a background job; poll until it finishes
+  const pollJob = async (jobId) => {
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      const response = await fetch(`${BASE_URL}/api/jobs/${jobId}`, { credentials: 'include' });
+      const data = await response.json();
+      if (!response.ok) {
+        setResult({ type: 'error', message: data.error || 'Failed to fetch job status' });
+        return;
+      }
+      const job = data.job;
+      if (job.status === 'succeeded') {
+        setResult({ type: 'success', message: (job.result && job.result.message) || 'Transactions processed successfully!' });
+        return;
+      }
+      if (job.status === 'failed' || job.status === 'cancelled') {
+        setResult({ type: 'error', message: job.error || `Job ${job.status}` });
+        return;
+      }
+      const progress = job.progress || {};
+      const detail = progress.percent != null ? ` (${progress.percent}%)` : progress.rows ? ` (${progress.rows} rows)` : '';
+      setResult({ type: 'success', message: `Processing transactions: ${progress.stage || job.status}${detail}` });
+    }
+  };
+
   const handleUpload = async (e) => {
     e.preventDefault();
     
@@ -44,6 +69,9 @@ function TransactionReviewDataIngest() {
         setResult({ type: 'success', message: data.message || 'Files uploaded and processed successfully!' });
         setFiles({ tx_file: null, country_file: null, sort_file: null });
         e.target.reset();
+        if (data.job_id) {
+          await pollJob(data.job_id);
+        }
       } else {
         setResult({ type: 'error', message: data.error || 'Upload failed' });
       }